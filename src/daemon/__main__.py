@@ -0,0 +1,164 @@
+# daemon/__main__.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Command-line tools for daemons, run as ``python3 -m daemon``.
+
+    The ``status`` command reports the status of the daemons named by
+    many PID files, in one pass (see `daemon.pidfile.scan_pidfiles`)::
+
+        $ python3 -m daemon status /run/lorem/
+        $ python3 -m daemon status --json '/run/*/ipsum.pid'
+
+    The exit status follows the LSB convention for ``status``: 0 if
+    every daemon is running, 3 if any is not, and 4 if no PID file
+    matched.
+    """
+
+import argparse
+import json
+import sys
+
+from . import pidfile
+
+
+exit_status_running = 0
+exit_status_not_running = 3
+exit_status_unknown = 4
+
+status_columns = [
+        ('pid', "PID"),
+        ('alive', "ALIVE"),
+        ('uptime', "UPTIME"),
+        ('lock_holder', "LOCK"),
+        ('lease_age', "LEASE"),
+        ('path', "PATH"),
+        ]
+
+
+def format_status_value(value):
+    """ Format a value of a PID file status, for a table.
+
+        :param value: The value to format.
+        :return: The text of the value.
+        """
+    if value is None:
+        text = "-"
+    elif isinstance(value, bool):
+        text = "yes" if value else "no"
+    elif isinstance(value, float):
+        text = "{value:.1f}".format(value=value)
+    else:
+        text = str(value)
+    return text
+
+
+def format_status_table(statuses):
+    """ Format the status of PID files, as a table.
+
+        :param statuses: A sequence of PID file status mappings (see
+            `daemon.pidfile.scan_pidfiles`).
+        :return: The text of the table, one line per PID file, with a
+            heading line.
+        """
+    rows = [[title for (name, title) in status_columns]]
+    for status in statuses:
+        rows.append([
+                format_status_value(status[name])
+                for (name, title) in status_columns])
+    widths = [
+            max(len(row[index]) for row in rows)
+            for index in range(len(status_columns) - 1)]
+    lines = []
+    for row in rows:
+        cells = [cell.ljust(width) for (cell, width) in zip(row, widths)]
+        cells.append(row[-1])
+        lines.append("  ".join(cells))
+    return "".join(line + "\n" for line in lines)
+
+
+def get_exit_status(statuses):
+    """ Get the exit status for the status of PID files.
+
+        :param statuses: A sequence of PID file status mappings.
+        :return: The exit status (see the module documentation).
+        """
+    if not statuses:
+        exit_status = exit_status_unknown
+    elif all(status['alive'] for status in statuses):
+        exit_status = exit_status_running
+    else:
+        exit_status = exit_status_not_running
+    return exit_status
+
+
+def run_status(args):
+    """ Report the status of the PID files named by `args.pattern`.
+
+        :param args: The parsed command-line arguments.
+        :return: The exit status.
+        """
+    statuses = pidfile.scan_pidfiles(args.pattern)
+    if args.json:
+        json.dump(statuses, args.output, indent=4)
+        args.output.write("\n")
+    else:
+        args.output.write(format_status_table(statuses))
+    return get_exit_status(statuses)
+
+
+def make_argument_parser():
+    """ Make the command-line argument parser for this program. """
+    parser = argparse.ArgumentParser(
+            prog="python3 -m daemon",
+            description="Command-line tools for daemons.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    status_parser = subparsers.add_parser(
+            'status',
+            help="Report the status of daemons from their PID files.")
+    status_parser.add_argument(
+            'pattern',
+            help="Directory of ‘*.pid’ files, or glob pattern of PID files.")
+    status_parser.add_argument(
+            '--json', action='store_true',
+            help="Write the status as JSON, instead of a table.")
+    status_parser.set_defaults(func=run_status)
+    return parser
+
+
+def main(argv=None, output=None):
+    """ Mainline code for this program.
+
+        :param argv: The command-line arguments, or ``None`` to use
+            `sys.argv`.
+        :param output: The file to write to, or ``None`` to use
+            `sys.stdout`.
+        :return: The exit status.
+        """
+    parser = make_argument_parser()
+    args = parser.parse_args(argv)
+    args.output = sys.stdout if output is None else output
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,171 @@
+# daemon/activation.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Adoption of sockets passed by the service manager.
+
+    A service manager (such as ‘systemd’) can bind listening sockets on
+    behalf of the daemon, and pass them as open file descriptors when it
+    starts the daemon (“socket activation”). The passed file descriptors
+    are numbered consecutively from 3. The service manager describes
+    them in environment variables:
+
+    * ``LISTEN_PID``: the process ID for which the file descriptors are
+      intended;
+
+    * ``LISTEN_FDS``: the number of file descriptors passed;
+
+    * ``LISTEN_FDNAMES``: optionally, a colon-separated name for each
+      file descriptor.
+
+    Reference: ‘sd_listen_fds(3)’ in the ‘systemd’ documentation.
+    """
+
+import os
+import socket
+import stat
+
+
+listen_pid_environment_variable = "LISTEN_PID"
+listen_fds_environment_variable = "LISTEN_FDS"
+listen_fdnames_environment_variable = "LISTEN_FDNAMES"
+
+listen_fds_start = 3
+
+default_listen_fd_name = "unknown"
+
+
+def get_listen_file_descriptors(environ=None, pid=None):
+    """ Get the file descriptors passed by the service manager.
+
+        :param environ: The mapping of environment variables to query,
+            or ``None`` to query `os.environ`.
+        :param pid: The process ID to match, or ``None`` for the current
+            process.
+        :return: A `list` of (`name`, `fd`) pairs, in order of file
+            descriptor; empty if no file descriptors are passed to this
+            process.
+
+        The file descriptors are passed only if ``LISTEN_PID`` matches
+        the process ID. Each name is from ``LISTEN_FDNAMES``; if those
+        names do not match the file descriptors, each name is
+        “unknown”.
+        """
+    if environ is None:
+        environ = os.environ
+    if pid is None:
+        pid = os.getpid()
+    try:
+        listen_pid = int(environ.get(listen_pid_environment_variable))
+        listen_fds_count = int(environ.get(listen_fds_environment_variable))
+    except (TypeError, ValueError):
+        return []
+    if (listen_pid != pid) or (listen_fds_count <= 0):
+        return []
+
+    fds = range(listen_fds_start, listen_fds_start + listen_fds_count)
+    names = []
+    if listen_fdnames_environment_variable in environ:
+        names = environ[listen_fdnames_environment_variable].split(":")
+    if len(names) != listen_fds_count:
+        names = [default_listen_fd_name] * listen_fds_count
+
+    return list(zip(names, fds))
+
+
+def clear_listen_environment(environ=None):
+    """ Remove the socket activation variables from the environment.
+
+        :param environ: The mapping of environment variables to modify,
+            or ``None`` to modify `os.environ`.
+        :return: ``None``.
+
+        This prevents child processes from inheriting the variables,
+        which describe file descriptors intended for this process only.
+        """
+    if environ is None:
+        environ = os.environ
+    for name in [
+            listen_pid_environment_variable,
+            listen_fds_environment_variable,
+            listen_fdnames_environment_variable,
+            ]:
+        environ.pop(name, None)
+
+
+def is_socket_file_descriptor(fd):
+    """ Determine whether the file descriptor `fd` is a socket.
+
+        :param fd: The file descriptor to interrogate.
+        :return: ``True`` iff `fd` is an open socket.
+        """
+    try:
+        mode = os.fstat(fd).st_mode
+    except OSError:
+        return False
+    return stat.S_ISSOCK(mode)
+
+
+def make_listen_sockets(named_fds):
+    """ Make socket objects for the passed file descriptors.
+
+        :param named_fds: A sequence of (`name`, `fd`) pairs; see
+            `get_listen_file_descriptors`.
+        :return: A `dict` mapping each name to a `tuple` of
+            `socket.socket` instances, in order of file descriptor.
+
+        Several file descriptors can have the same name; for example,
+        when a service manager socket unit listens on several addresses.
+        File descriptors that are not sockets (e.g. FIFOs) are omitted.
+
+        Each socket object owns its file descriptor, and closes it when
+        the socket object is closed.
+        """
+    sockets_by_name = {}
+    for (name, fd) in named_fds:
+        if not is_socket_file_descriptor(fd):
+            continue
+        listen_socket = socket.socket(fileno=fd)
+        sockets_by_name.setdefault(name, []).append(listen_socket)
+
+    result = {
+            name: tuple(sockets)
+            for (name, sockets) in sockets_by_name.items()}
+    return result
+
+
+def adopt_listen_file_descriptors(environ=None):
+    """ Adopt the file descriptors passed by the service manager.
+
+        :param environ: The mapping of environment variables to use, or
+            ``None`` to use `os.environ`.
+        :return: A `list` of (`name`, `fd`) pairs; see
+            `get_listen_file_descriptors`.
+
+        Get the file descriptors passed to this process, mark each one
+        “close-on-exec”, then remove the socket activation variables
+        from the environment.
+        """
+    named_fds = get_listen_file_descriptors(environ)
+    for (name, fd) in named_fds:
+        os.set_inheritable(fd, False)
+    clear_listen_environment(environ)
+    return named_fds
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
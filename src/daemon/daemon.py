@@ -7,16 +7,51 @@
 
 """ Daemon process behaviour. """
 
+import array
 import atexit
+import bisect
+import contextlib
 import errno
+import itertools
+import json
 import os
 import pwd
 import resource
 import signal
-import socket
+import subprocess
 import sys
+import sysconfig
+import threading
+import time
+import traceback
+import types
 import warnings
 
+from .activation import (
+        adopt_listen_file_descriptors,
+        is_socket_file_descriptor,
+        make_listen_sockets,
+        )
+from .handover import (
+        get_handover_socket,
+        handover_environment_variable,
+        handover_status_complete,
+        handover_status_ready,
+        make_handover_socket_pair,
+        receive_file_descriptors,
+        receive_message,
+        send_file_descriptors,
+        send_message,
+        )
+from .notify import (
+        ServiceNotifier,
+        WatchdogHeartbeat,
+        get_watchdog_interval,
+        )
+from .reload import Reloader
+from .shutdown import GracefulShutdown
+from .signals import SignalDispatcher
+
 
 class DaemonError(Exception):
     """ Base exception class for errors from this module. """
@@ -29,6 +64,17 @@ class DaemonOSEnvironmentError(DaemonError, OSError):
 class DaemonProcessDetachError(DaemonError, OSError):
     """ Exception raised when process detach fails. """
 
+
+detach_strategy_double_fork = "double-fork"
+detach_strategy_single_fork = "single-fork"
+detach_strategy_foreground = "foreground"
+
+detach_strategies = [
+        detach_strategy_double_fork,
+        detach_strategy_single_fork,
+        detach_strategy_foreground,
+        ]
+
 
 class DaemonContext:
     """ Context for turning the current program into a daemon process.
@@ -149,6 +195,8 @@ class DaemonContext:
 
             * ``signal.SIGTERM``: ``'terminate'``
 
+            * ``signal.SIGHUP``: ``'reload'``
+
             Depending on how the program will interact with its child
             processes, it may need to specify a signal map that
             includes the ``signal.SIGCHLD`` signal (received when a
@@ -207,6 +255,160 @@ class DaemonContext:
 
             If ``None``, the corresponding system stream is re-bound to the
             file named by `os.devnull`.
+
+        `files_close_on_exec`
+            :Default: ``False``
+
+            If true, open file descriptors are *not* closed during daemon
+            start. Instead, each one (other than those preserved, as for
+            `files_preserve`) is marked “close-on-exec”, so that it is
+            closed when the daemon process executes another program.
+
+            This avoids closing file descriptors which are in use without
+            the knowledge of the program; for example, those held by a
+            library for random numbers or event polling. Such file
+            descriptors remain open in the daemon process, but do not leak
+            into programs it executes.
+
+        `record_open_timings`
+            :Default: ``False``
+
+            If true, record the time taken by each phase of `open`; the
+            timings are then available as the `open_timings` property.
+
+        `open_timings_hook`
+            :Default: ``None``
+
+            If not ``None``, a callable to receive the `open_timings`
+            mapping when `open` completes; for example, to report a slow
+            daemon start. Setting this also records the timings, as for
+            `record_open_timings`.
+
+            The hook is called in the daemon process, after all other
+            steps of `open`.
+
+        `wait_for_ready`
+            :Default: ``False``
+
+            When detaching the process context, the original process does
+            not exit immediately. Instead it waits until the daemon
+            process reports that it is ready (`notify_ready`) or that it
+            failed to start (`notify_failure`, `notify_exception`), or
+            until the daemon process ends.
+
+            If true, the daemon reports that it is ready only when the
+            program calls `notify_ready`. This allows the program that
+            started the daemon to know when the daemon is ready to serve
+            requests. If false, `open` reports that the daemon is ready
+            when it completes.
+
+            The report of readiness is also sent to the service manager,
+            if any (see `notify_ready`).
+
+            The original process then exits with status 0 if the daemon
+            is ready. If the daemon failed to start, the original process
+            writes the daemon's error message (for an exception, the
+            traceback) to `sys.stderr`, and exits with a non-zero status;
+            see `wait_for_daemon_ready`.
+
+            This has no effect if the process context is not detached (see
+            `detach_process`).
+
+        `watchdog_heartbeat`
+            :Default: ``False``
+
+            If true, and the service manager enables its watchdog for the
+            daemon (see `daemon.notify.get_watchdog_interval`), send the
+            watchdog keep-alive notifications automatically from a
+            dedicated thread while the daemon context is open (see
+            `daemon.notify.WatchdogHeartbeat`).
+
+        `watchdog_liveness_check`
+            :Default: ``None``
+
+            A callable, taking no arguments, that returns true if the
+            daemon is working. If not ``None``, it is called before each
+            automatic watchdog keep-alive; the keep-alive is skipped if
+            it returns false, so that the service manager can detect the
+            daemon is not working.
+
+        `socket_activation`
+            :Default: ``True``
+
+            If true, when the daemon context opens, adopt the sockets
+            passed by the service manager (“socket activation”; see
+            `daemon.activation`), or by a predecessor daemon (see
+            `restart`). The passed file descriptors are not closed; the
+            sockets are available as the `listen_sockets` property. The
+            environment variables ``LISTEN_PID``, ``LISTEN_FDS``,
+            ``LISTEN_FDNAMES``, and ``DAEMON_HANDOVER_FD`` are removed, so
+            that child processes do not inherit them.
+
+        `signal_dispatch_thread`
+            :Default: ``False``
+
+            If true, when the daemon context opens, block the signals in
+            `signal_map` that have a handler, and call each handler from
+            a dedicated thread as soon as its signal arrives (see
+            `daemon.signals.SignalDispatcher`). The handler is called with
+            arguments (`signal_number`, ``None``); an exception it raises
+            (e.g. from `terminate`) is raised in the main thread instead.
+
+            Normally, Python calls a signal handler only in the main
+            thread, between bytecode instructions; a long call to compiled
+            code in the main thread delays the handler until that call
+            returns. The dispatcher thread avoids that delay only while the
+            main thread's call releases the global interpreter lock.
+
+        `graceful_shutdown`
+            :Default: ``False``
+
+            If true, the first signal handled by `terminate` does not end
+            the daemon at once; instead it begins a graceful shutdown (see
+            `begin_shutdown`). The daemon program is expected to finish its
+            work in progress, then exit. A second such signal, or the
+            passing of the `shutdown_timeout` deadline, raises
+            ``SystemExit`` as usual.
+
+        `shutdown_timeout`
+            :Default: ``30``
+
+            Time (seconds) allowed for a graceful shutdown, from when it
+            begins; or ``None`` for no deadline.
+
+        `reload_hook`
+            :Default: ``None``
+
+            If not ``None``, a callable to receive the duration (seconds)
+            of each reload (see `reload`) when it completes; for example,
+            to report a slow reload. The duration is also available as
+            the `last_reload_duration` property.
+
+        `detach_strategy`
+            :Default: ``"double-fork"``
+
+            How to detach the process context, if `detach_process` is
+            true (see `detach_process_context`):
+
+            * ``"double-fork"``: fork, start a new session, then fork
+              again. The daemon is not a session leader, so can never
+              acquire a controlling terminal.
+
+            * ``"single-fork"``: fork, then start a new session. The
+              daemon is a session leader; it must open any terminal
+              device with ``O_NOCTTY``, to avoid acquiring it as the
+              controlling terminal.
+
+            * ``"foreground"``: do not fork; start a new session unless
+              the process already leads its process group. The original
+              process is the daemon, so `wait_for_ready` has no effect;
+              this suits a program started by a supervisor that does not
+              expect it to fork.
+
+            Each fork copies the page tables of the process, which takes
+            longer the larger the process; so a program that loads much
+            before opening the daemon context starts faster with fewer
+            forks.
         """
 
     def __init__(
@@ -225,6 +427,18 @@ class DaemonContext:
             stdout=None,
             stderr=None,
             signal_map=None,
+            files_close_on_exec=False,
+            record_open_timings=False,
+            open_timings_hook=None,
+            wait_for_ready=False,
+            watchdog_heartbeat=False,
+            watchdog_liveness_check=None,
+            socket_activation=True,
+            signal_dispatch_thread=False,
+            graceful_shutdown=False,
+            shutdown_timeout=30,
+            reload_hook=None,
+            detach_strategy=detach_strategy_double_fork,
             ):
         """ Set up a new instance. """
         self.chroot_directory = chroot_directory
@@ -236,6 +450,18 @@ class DaemonContext:
         self.stdin = stdin
         self.stdout = stdout
         self.stderr = stderr
+        self.files_close_on_exec = files_close_on_exec
+        self.record_open_timings = record_open_timings
+        self.open_timings_hook = open_timings_hook
+        self.wait_for_ready = wait_for_ready
+        self.watchdog_heartbeat = watchdog_heartbeat
+        self.watchdog_liveness_check = watchdog_liveness_check
+        self.socket_activation = socket_activation
+        self.signal_dispatch_thread = signal_dispatch_thread
+        self.graceful_shutdown = graceful_shutdown
+        self.shutdown_timeout = shutdown_timeout
+        self.reload_hook = reload_hook
+        self.detach_strategy = detach_strategy
 
         if uid is None:
             uid = os.getuid()
@@ -254,12 +480,89 @@ class DaemonContext:
         self.signal_map = signal_map
 
         self._is_open = False
+        self._open_timings = None
+        self._ready_fd = None
+        self._service_notifier = None
+        self._watchdog_heartbeat = None
+        self._listen_fds = []
+        self._listen_sockets = {}
+        self._passed_fds = []
+        self._handover_socket = None
+        self._pidfile_held_elsewhere = False
+        self._successor_process = None
+        self._signal_dispatcher = None
+        self._shutdown = GracefulShutdown()
+        self._reloader = Reloader(
+                begin=self.notify_reloading, end=self._end_reload)
 
     @property
     def is_open(self):
         """ ``True`` if the instance is currently open. """
         return self._is_open
 
+    @property
+    def shutdown_event(self):
+        """ Event set when a graceful shutdown begins.
+
+            A `threading.Event`. Code doing work can check
+            ``shutdown_event.is_set()``, which takes no lock, to decide
+            whether to take more work; or wait on the event. See
+            `begin_shutdown`.
+            """
+        return self._shutdown.event
+
+    @property
+    def is_shutting_down(self):
+        """ ``True`` iff a graceful shutdown has begun. """
+        return self._shutdown.event.is_set()
+
+    @property
+    def last_reload_duration(self):
+        """ Duration (seconds) of the most recent reload.
+
+            ``None`` if the daemon has not reloaded. See `reload`.
+            """
+        return self._reloader.last_duration
+
+    @property
+    def listen_sockets(self):
+        """ Sockets passed by the service manager.
+
+            A read-only mapping from each name (from ``LISTEN_FDNAMES``,
+            or “unknown”) to a `tuple` of `socket.socket` instances with
+            that name. Empty if no sockets were adopted (see
+            `socket_activation`).
+            """
+        return types.MappingProxyType(self._listen_sockets)
+
+    @property
+    def passed_file_descriptors(self):
+        """ File descriptors passed to the daemon.
+
+            A `tuple` of (`name`, `fd`) pairs, for each file descriptor
+            passed by the service manager or by a predecessor (see
+            `socket_activation`); including those that are not sockets.
+            """
+        return tuple(self._passed_fds)
+
+    @property
+    def open_timings(self):
+        """ Timings of each phase of the most recent `open`.
+
+            A read-only mapping from phase name to the duration of that
+            phase, in nanoseconds of the monotonic clock; or ``None`` if
+            the timings were not recorded.
+
+            The phases, in order, are: ``socket_activation``,
+            ``chroot_directory``, ``prevent_core``, ``umask``,
+            ``working_directory``, ``process_owner``, ``detach_process``,
+            ``signal_map``, ``close_files``, ``redirect_streams``,
+            ``pidfile``. A phase
+            that is skipped (e.g. because its option is not set) is
+            recorded with its short duration regardless.
+            """
+        return self._open_timings
+
     def open(self):
         """ Become a daemon process.
 
@@ -272,6 +575,9 @@ class DaemonContext:
               immediately. This makes it safe to call `open` multiple times on
               an instance.
 
+            * If the `socket_activation` attribute is true, adopt the
+              sockets passed by the service manager, if any.
+
             * If the `prevent_core` attribute is true, set the resource limits
               for the process to prevent any core dump from the process.
 
@@ -292,9 +598,18 @@ class DaemonContext:
               groups whose membership includes the username corresponding
               to `uid`).
 
+            * If the environment names a notification socket for a service
+              manager, open a socket to it; see `notify_ready`.
+
             * Close all open file descriptors. This excludes those listed in
               the `files_preserve` attribute, and those that correspond to the
-              `stdin`, `stdout`, or `stderr` attributes.
+              `stdin`, `stdout`, or `stderr` attributes, the sockets passed
+              by the service manager, and the socket to the service
+              manager.
+
+              If the `files_close_on_exec` attribute is true, instead of
+              closing those file descriptors, mark each of them
+              close-on-exec.
 
             * Change current working directory to the path specified by the
               `working_directory` attribute.
@@ -304,10 +619,17 @@ class DaemonContext:
 
             * If the `detach_process` option is true, detach the current
               process into its own process group, and disassociate from any
-              controlling terminal.
+              controlling terminal, as specified by the `detach_strategy`
+              attribute.
+
+              The original process waits until the daemon reports that it
+              is ready, or that it failed to start.
 
             * Set signal handlers as specified by the `signal_map` attribute.
 
+              If the `signal_dispatch_thread` attribute is true, instead
+              start a thread to dispatch those signals.
+
             * If any of the attributes `stdin`, `stdout`, `stderr` are not
               ``None``, bind the system streams `sys.stdin`, `sys.stdout`,
               and/or `sys.stderr` to the files represented by the
@@ -324,41 +646,108 @@ class DaemonContext:
             * Register the `close` method to be called during Python's exit
               processing.
 
+            * If the `open_timings_hook` attribute is not ``None``, call it
+              with the `open_timings` mapping.
+
+            * If the `watchdog_heartbeat` attribute is true, start sending
+              the watchdog keep-alive notifications, if the service manager
+              enables its watchdog.
+
+            * Unless the `wait_for_ready` attribute is true, report to the
+              original process that the daemon is ready (see
+              `notify_ready`).
+
             When the function returns, the running program is a daemon
             process.
+
+            If any step after detaching the process context raises an
+            exception, report the exception to the original process (see
+            `notify_exception`) before propagating it.
+
+            If the `record_open_timings` attribute is true, or the
+            `open_timings_hook` attribute is not ``None``, the time taken
+            by each phase is recorded in the `open_timings` property.
             """
         if self.is_open:
             return
 
+        phase_timer = None
+        end_phase = _ignore_phase_end
+        if self.record_open_timings or (self.open_timings_hook is not None):
+            phase_timer = PhaseTimer()
+            end_phase = phase_timer.end_phase
+
+        if self.socket_activation:
+            self._adopt_listen_sockets()
+        end_phase('socket_activation')
+
         if self.chroot_directory is not None:
             change_root_directory(self.chroot_directory)
+        end_phase('chroot_directory')
 
         if self.prevent_core:
             prevent_core_dump()
+        end_phase('prevent_core')
 
         change_file_creation_mask(self.umask)
+        end_phase('umask')
         change_working_directory(self.working_directory)
+        end_phase('working_directory')
         change_process_owner(self.uid, self.gid, self.initgroups)
+        end_phase('process_owner')
 
         if self.detach_process:
-            detach_process_context()
+            self._ready_fd = detach_process_context(
+                    wait_for_ready=True, strategy=self.detach_strategy)
+        end_phase('detach_process')
+
+        try:
+            signal_handler_map = self._make_signal_handler_map()
+            if self.signal_dispatch_thread:
+                self._start_signal_dispatcher(signal_handler_map)
+            else:
+                set_signal_handlers(signal_handler_map)
+            end_phase('signal_map')
+
+            self._open_service_notifier()
+            exclude_fds = self._get_exclude_file_descriptors()
+            if self.files_close_on_exec:
+                mark_all_open_files_close_on_exec(exclude=exclude_fds)
+            else:
+                close_all_open_files(exclude=exclude_fds)
+            end_phase('close_files')
 
-        signal_handler_map = self._make_signal_handler_map()
-        set_signal_handlers(signal_handler_map)
+            redirect_stream(sys.stdin, self.stdin)
+            redirect_stream(sys.stdout, self.stdout)
+            redirect_stream(sys.stderr, self.stderr)
+            end_phase('redirect_streams')
 
-        exclude_fds = self._get_exclude_file_descriptors()
-        close_all_open_files(exclude=exclude_fds)
+            if self.pidfile is not None:
+                if self._handover_socket is None:
+                    self.pidfile.__enter__()
+                else:
+                    # The predecessor hands over the PID file when this
+                    # daemon is ready.
+                    self._pidfile_held_elsewhere = True
+            end_phase('pidfile')
 
-        redirect_stream(sys.stdin, self.stdin)
-        redirect_stream(sys.stdout, self.stdout)
-        redirect_stream(sys.stderr, self.stderr)
+            self._is_open = True
 
-        if self.pidfile is not None:
-            self.pidfile.__enter__()
+            register_atexit_function(self.close)
 
-        self._is_open = True
+            if phase_timer is not None:
+                self._open_timings = phase_timer.timings
+                if self.open_timings_hook is not None:
+                    self.open_timings_hook(self._open_timings)
 
-        register_atexit_function(self.close)
+            if self.watchdog_heartbeat:
+                self._start_watchdog_heartbeat()
+        except BaseException as exc:
+            self.notify_exception(exc)
+            raise
+
+        if not self.wait_for_ready:
+            self.notify_ready()
 
     def __enter__(self):
         """ Context manager entry point. """
@@ -379,23 +768,156 @@ class DaemonContext:
             * If the `pidfile` attribute is not ``None``, exit its context
               manager.
 
+            * Cancel the deadline of the graceful shutdown, if any.
+
+            * Stop the signal dispatcher thread, if any.
+
+            * Stop the watchdog keep-alive notifications, if any, and
+              close the socket to the service manager, if any.
+
             * Mark this instance as closed (for the purpose of future `open`
               and `close` calls).
             """
         if not self.is_open:
             return
 
-        if self.pidfile is not None:
+        if self.pidfile is not None and not self._pidfile_held_elsewhere:
             # Follow the interface for telling a context manager to exit,
             # <URL:https://docs.python.org/3/library/stdtypes.html#typecontextmanager>.
             self.pidfile.__exit__(None, None, None)
 
+        self._shutdown.cancel()
+
+        if self._signal_dispatcher is not None:
+            self._signal_dispatcher.stop()
+            self._signal_dispatcher = None
+
+        if self._watchdog_heartbeat is not None:
+            self._watchdog_heartbeat.stop()
+            self._watchdog_heartbeat = None
+
+        if self._service_notifier is not None:
+            self._service_notifier.close()
+            self._service_notifier = None
+
         self._is_open = False
 
     def __exit__(self, exc_type, exc_value, traceback):
-        """ Context manager exit point. """
+        """ Context manager exit point.
+
+            If an exception is propagating before the daemon reported it
+            is ready, report the exception to the original process (see
+            `notify_exception`).
+            """
+        if exc_value is not None:
+            self.notify_exception(exc_value)
         self.close()
 
+    def notify_ready(self):
+        """ Report that the daemon is ready.
+
+            :return: ``None``.
+
+            If the original process is waiting (see `wait_for_ready`),
+            tell it the daemon is ready; it then exits with status 0.
+
+            If there is a service manager (see `notify_status`), also
+            notify it that the daemon is ready.
+
+            If this daemon was started by a predecessor (see `restart`),
+            first tell the predecessor, and wait for it to hand over the
+            PID file.
+            """
+        if self._handover_socket is not None:
+            self._complete_handover()
+        if self._ready_fd is not None:
+            ready_fd = self._ready_fd
+            self._ready_fd = None
+            notify_daemon_ready(ready_fd)
+        if self._service_notifier is not None:
+            self._service_notifier.notify_ready()
+
+    def notify_status(self, status):
+        """ Notify the service manager of the daemon's status text.
+
+            :param status: The status text, for display to the user.
+            :return: ``None``.
+
+            When the daemon context opens, if the ``NOTIFY_SOCKET``
+            environment variable names the notification socket of a
+            service manager (e.g. ‘systemd’), a socket to it is opened
+            and kept open (see `daemon.notify.ServiceNotifier`). The
+            `notify_*` methods send notifications on that socket. If
+            there is no service manager, they do nothing.
+            """
+        if self._service_notifier is not None:
+            self._service_notifier.notify_status(status)
+
+    def notify_watchdog(self):
+        """ Notify the service manager that the daemon is alive.
+
+            :return: ``None``.
+
+            See `notify_status` for the service manager.
+            """
+        if self._service_notifier is not None:
+            self._service_notifier.notify_watchdog()
+
+    def notify_reloading(self):
+        """ Notify the service manager that the daemon is reloading.
+
+            :return: ``None``.
+
+            Call `notify_ready` when the reload is complete. See
+            `notify_status` for the service manager.
+            """
+        if self._service_notifier is not None:
+            self._service_notifier.notify_reloading()
+
+    def notify_stopping(self):
+        """ Notify the service manager that the daemon is stopping.
+
+            :return: ``None``.
+
+            See `notify_status` for the service manager.
+            """
+        if self._service_notifier is not None:
+            self._service_notifier.notify_stopping()
+
+    def notify_failure(self, message):
+        """ Report to the original process that the daemon failed to start.
+
+            :param message: Text describing the failure.
+            :return: ``None``.
+
+            If the original process is waiting (see `wait_for_ready`),
+            tell it the daemon failed to start; it then writes the
+            `message` to its standard error stream and exits with a
+            non-zero status. Otherwise, do nothing.
+            """
+        if self._ready_fd is None:
+            return
+        ready_fd = self._ready_fd
+        self._ready_fd = None
+        notify_daemon_failure(ready_fd, message)
+
+    def notify_exception(self, exception):
+        """ Report to the original process an exception during start.
+
+            :param exception: The exception instance to report.
+            :return: ``None``.
+
+            If the original process is waiting (see `wait_for_ready`),
+            send it the exception type, message, and traceback; it then
+            writes the traceback to its standard error stream and exits
+            with a non-zero status. Otherwise, do nothing.
+            """
+        if self._ready_fd is None:
+            return
+        ready_fd = self._ready_fd
+        self._ready_fd = None
+        notify_daemon_exception(ready_fd, exception)
+
     def terminate(self, signal_number, stack_frame):
         """ Signal handler for end-process signals.
 
@@ -405,15 +927,389 @@ class DaemonContext:
             :return: ``None``.
 
             Signal handler for the ``signal.SIGTERM`` signal. Performs the
-            following step:
+            following steps:
+
+            * If the `graceful_shutdown` attribute is true, and no
+              graceful shutdown has begun, begin it (see `begin_shutdown`)
+              and return.
 
             * Raise a ``SystemExit`` exception explaining the signal.
             """
+        if self.graceful_shutdown and not self._shutdown.is_requested:
+            self.begin_shutdown(signal_number)
+            return
         exception = SystemExit(
                 "Terminating on signal {signal_number!r}".format(
                     signal_number=signal_number))
         raise exception
 
+    def restart(self, args, timeout=30):
+        """ Replace this daemon with a successor, without downtime.
+
+            :param args: The program arguments to start the successor, as
+                for `subprocess.Popen`.
+            :param timeout: Maximum time (seconds) to wait for the
+                successor to be ready.
+            :return: The process ID of the successor daemon.
+            :raise DaemonError: If the successor does not become ready;
+                this daemon continues as before.
+
+            Perform the following steps:
+
+            * Start the successor program, with a Unix socket to this
+              daemon named by the ``DAEMON_HANDOVER_FD`` environment
+              variable (see `daemon.handover`). The successor does not
+              inherit the signals blocked by the signal dispatcher (see
+              `signal_dispatch_thread`).
+
+            * Send the successor the sockets in `listen_sockets`, and the
+              files in `files_preserve`. The successor's `DaemonContext`
+              adopts them as its `listen_sockets` (see
+              `socket_activation`); the files in `files_preserve` are
+              named “files_preserve”.
+
+            * Wait for the successor to report it is ready (see
+              `notify_ready`).
+
+            * If the `pidfile` attribute is not ``None``, atomically hand
+              the PID file over to the successor (see
+              `daemon.pidfile.TimeoutPIDLockFile.hand_over`). The PID file
+              then is not released when this daemon closes. If the PID
+              file is held open (see `daemon.pidfile.FlockPIDLockFile`),
+              its file descriptor is also sent to the successor, which
+              adopts the lock.
+
+            * Notify the service manager, if any, of the successor's
+              process ID.
+
+            * Begin a graceful shutdown of this daemon (see
+              `begin_shutdown`).
+            """
+        if self.pidfile is not None and not hasattr(
+                self.pidfile, 'hand_over'):
+            raise DaemonError(
+                    "PID file {pidfile!r} cannot be handed over".format(
+                        pidfile=self.pidfile))
+
+        named_fds = self._get_handover_file_descriptors()
+        (handover_socket, successor_socket) = make_handover_socket_pair()
+        try:
+            successor_fd = successor_socket.fileno()
+            environ = dict(os.environ)
+            environ[handover_environment_variable] = str(successor_fd)
+            with self._signals_unblocked():
+                self._successor_process = subprocess.Popen(
+                        args, env=environ, pass_fds=[successor_fd])
+            successor_socket.close()
+
+            handover_socket.settimeout(timeout)
+            send_file_descriptors(handover_socket, named_fds)
+            (message, fds) = receive_message(handover_socket)
+            for fd in fds:
+                os.close(fd)
+            if (message or {}).get('status') != handover_status_ready:
+                raise DaemonError("Successor daemon did not become ready")
+            successor_pid = int(message['pid'])
+
+            pidfile_fds = []
+            if self.pidfile is not None:
+                self.pidfile.hand_over(successor_pid)
+                self._pidfile_held_elsewhere = True
+                pidfile_fd = _get_file_descriptor(self.pidfile)
+                if pidfile_fd is not None:
+                    pidfile_fds.append(pidfile_fd)
+            send_message(
+                    handover_socket, fds=pidfile_fds,
+                    status=handover_status_complete)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            error = DaemonError(
+                    "Unable to hand over to successor daemon"
+                    " ({exc})".format(exc=exc))
+            raise error from exc
+        finally:
+            successor_socket.close()
+            handover_socket.close()
+
+        try:
+            self._successor_process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            # The successor program did not detach; leave it running.
+            pass
+
+        if self._service_notifier is not None:
+            self._service_notifier.notify(MAINPID=str(successor_pid))
+        self.begin_shutdown()
+        return successor_pid
+
+    def _get_handover_file_descriptors(self):
+        """ Get the file descriptors to hand over to a successor.
+
+            :return: A `list` of (`name`, `fd`) pairs: the sockets in
+                `listen_sockets`, then the files in `files_preserve`
+                (named “files_preserve”).
+            """
+        named_fds = []
+        for (name, sockets) in self._listen_sockets.items():
+            named_fds.extend(
+                    (name, item.fileno()) for item in sockets
+                    if item.fileno() >= 0)
+        handover_fds = {fd for (name, fd) in named_fds}
+        for item in (self.files_preserve or []):
+            if isinstance(item, int):
+                fd = item
+            else:
+                fd = _get_file_descriptor(item)
+            if fd is None or fd in handover_fds:
+                continue
+            named_fds.append(("files_preserve", fd))
+            handover_fds.add(fd)
+        return named_fds
+
+    def _complete_handover(self):
+        """ Complete the handover from the predecessor daemon.
+
+            :return: ``None``.
+            :raise DaemonError: If the predecessor did not hand over.
+
+            Tell the predecessor that this daemon is ready, then wait for
+            it to hand over the PID file. If the `pidfile` attribute can
+            adopt the lock (see `daemon.pidfile.TimeoutPIDLockFile.adopt`),
+            adopt it, with the open PID file if the predecessor sent one.
+            """
+        handover_socket = self._handover_socket
+        self._handover_socket = None
+        try:
+            send_message(
+                    handover_socket,
+                    status=handover_status_ready, pid=os.getpid())
+            (message, fds) = receive_message(handover_socket)
+            if (
+                    hasattr(self.pidfile, 'adopt')
+                    and (message or {}).get('status')
+                    == handover_status_complete):
+                self.pidfile.adopt(fds.pop(0) if fds else None)
+            for fd in fds:
+                os.close(fd)
+        except (OSError, ValueError) as exc:
+            error = DaemonError(
+                    "Unable to complete handover from predecessor daemon"
+                    " ({exc})".format(exc=exc))
+            raise error from exc
+        finally:
+            handover_socket.close()
+        if (message or {}).get('status') != handover_status_complete:
+            raise DaemonError("Predecessor daemon did not hand over")
+        self._pidfile_held_elsewhere = False
+
+    def add_drain_callback(self, callback):
+        """ Register a callback to drain work during graceful shutdown.
+
+            :param callback: A callable object, expecting no arguments.
+            :return: ``None``.
+
+            When a graceful shutdown begins, each drain callback is
+            called, in order of registration, in a dedicated thread. A
+            drain callback typically stops taking new work, and waits
+            for the work in progress to finish.
+            """
+        self._shutdown.add_drain_callback(callback)
+
+    def begin_shutdown(self, signal_number=signal.SIGTERM):
+        """ Begin a graceful shutdown of the daemon.
+
+            :param signal_number: The OS signal number for which to raise
+                ``SystemExit`` if the deadline passes.
+            :return: ``None``.
+
+            If a graceful shutdown has already begun, do nothing.
+            Otherwise:
+
+            * Set the `shutdown_event`.
+
+            * Notify the service manager, if any, that the daemon is
+              stopping.
+
+            * Call the drain callbacks (see `add_drain_callback`).
+
+            * If the `shutdown_timeout` attribute is not ``None``, when
+              that time has passed, send the signal `signal_number` to
+              the daemon again; `terminate` then raises ``SystemExit``.
+            """
+        begun = self._shutdown.begin(
+                timeout=self.shutdown_timeout,
+                expire=(lambda: self._expire_shutdown(signal_number)))
+        if begun:
+            self.notify_stopping()
+
+    def _expire_shutdown(self, signal_number):
+        """ End the graceful shutdown, as its deadline has passed.
+
+            :param signal_number: The OS signal number to send.
+            :return: ``None``.
+
+            Send the signal to the main thread (or, if the signals are
+            dispatched from a dedicated thread, to the process), so it is
+            handled as a second signal.
+            """
+        if self._signal_dispatcher is not None:
+            os.kill(os.getpid(), signal_number)
+        else:
+            signal.pthread_kill(threading.main_thread().ident, signal_number)
+
+    def add_reload_callback(self, callback):
+        """ Register a callback to reload the daemon in place.
+
+            :param callback: A callable object, expecting no arguments.
+            :return: ``None``.
+
+            On each reload (see `reload`), each reload callback is
+            called, in order of registration. A reload callback
+            typically re-reads configuration, or reopens log files.
+            """
+        self._reloader.add_reload_callback(callback)
+
+    def reload(self, signal_number=signal.SIGHUP, stack_frame=None):
+        """ Signal handler for reload signals.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+
+            Signal handler for the ``signal.SIGHUP`` signal. Performs the
+            following steps:
+
+            * Notify the service manager, if any, that the daemon is
+              reloading.
+
+            * Call the reload callbacks (see `add_reload_callback`). An
+              exception raised by a callback is reported to `sys.stderr`,
+              and the remaining callbacks are called.
+
+            * Notify the service manager, if any, that the daemon is
+              ready again.
+
+            * If the `reload_hook` attribute is not ``None``, call it
+              with the duration of the reload.
+
+            If a reload is already in progress (for example, when the
+            signal arrives during a reload callback), it is not
+            interrupted; one more reload is done when it completes. A
+            burst of signals thus causes at most one further reload.
+            """
+        self._reloader.request()
+
+    def _end_reload(self, duration):
+        """ Complete a reload of the daemon.
+
+            :param duration: The duration (seconds) of the reload.
+            :return: ``None``.
+            """
+        if self._service_notifier is not None:
+            self._service_notifier.notify_ready()
+        if self.reload_hook is not None:
+            self.reload_hook(duration)
+
+    def _open_service_notifier(self):
+        """ Open the socket to the service manager, if any.
+
+            :return: ``None``.
+            :raise DaemonOSEnvironmentError: If the socket cannot be
+                opened.
+
+            The service manager is named by the environment; see
+            `daemon.notify.ServiceNotifier.from_environment`.
+            """
+        if self._service_notifier is None:
+            self._service_notifier = ServiceNotifier.from_environment()
+        if self._service_notifier is None:
+            return
+        try:
+            self._service_notifier.open()
+        except OSError as exc:
+            error = DaemonOSEnvironmentError(
+                    "Unable to open service manager socket {address!r}"
+                    " ({exc})".format(
+                        address=self._service_notifier.address, exc=exc))
+            raise error from exc
+
+    def _adopt_listen_sockets(self):
+        """ Adopt the sockets passed to the daemon, if any.
+
+            :return: ``None``.
+            :raise DaemonOSEnvironmentError: If the file descriptors
+                cannot be adopted.
+
+            Adopt the sockets passed by the service manager, and those
+            passed by a predecessor daemon (see `restart`).
+
+            This must be done before detaching the process context,
+            since the service manager passes the file descriptors to the
+            original process ID.
+            """
+        try:
+            named_fds = adopt_listen_file_descriptors()
+        except OSError as exc:
+            error = DaemonOSEnvironmentError(
+                    "Unable to adopt sockets from service manager"
+                    " ({exc})".format(exc=exc))
+            raise error from exc
+
+        try:
+            self._handover_socket = get_handover_socket()
+            if self._handover_socket is not None:
+                named_fds.extend(
+                        receive_file_descriptors(self._handover_socket))
+        except (OSError, ValueError) as exc:
+            error = DaemonOSEnvironmentError(
+                    "Unable to adopt files from predecessor daemon"
+                    " ({exc})".format(exc=exc))
+            raise error from exc
+
+        self._passed_fds = list(named_fds)
+        self._listen_fds = [fd for (name, fd) in named_fds]
+        self._listen_sockets = make_listen_sockets(named_fds)
+
+    def _start_signal_dispatcher(self, signal_handler_map):
+        """ Start dispatching signals from a dedicated thread.
+
+            :param signal_handler_map: A mapping from signal number to
+                handler, as for `set_signal_handlers`.
+            :return: ``None``.
+            """
+        self._signal_dispatcher = SignalDispatcher(signal_handler_map)
+        self._signal_dispatcher.start()
+
+    def _signals_unblocked(self):
+        """ Get a context in which the dispatched signals are unblocked.
+
+            :return: The context manager from
+                `daemon.signals.SignalDispatcher.signals_unblocked`, or a
+                null context if no signal dispatcher is running.
+            """
+        if self._signal_dispatcher is None:
+            return contextlib.nullcontext()
+        return self._signal_dispatcher.signals_unblocked()
+
+    def _start_watchdog_heartbeat(self):
+        """ Start the watchdog keep-alive notifications, if enabled.
+
+            :return: ``None``.
+
+            If there is a service manager, and it enables its watchdog for
+            this process, start a `WatchdogHeartbeat` at the interval the
+            service manager specifies.
+            """
+        if self._service_notifier is None:
+            return
+        interval = get_watchdog_interval()
+        if interval is None:
+            return
+        self._watchdog_heartbeat = WatchdogHeartbeat(
+                self._service_notifier, interval,
+                liveness_check=self.watchdog_liveness_check)
+        self._watchdog_heartbeat.start()
+
     def _get_exclude_file_descriptors(self):
         """ Get the set of file descriptors to exclude closing.
 
@@ -422,7 +1318,10 @@ class DaemonContext:
 
             The file descriptors to be preserved are those from the
             items in `files_preserve`, and also each of `stdin`,
-            `stdout`, and `stderr`. For each item:
+            `stdout`, and `stderr`, and the readiness pipe (see
+            `wait_for_ready`), service manager socket (see
+            `notify_status`), passed sockets (see `socket_activation`),
+            and the open PID file (see `pidfile`) if any. For each item:
 
             * If the item is ``None``, omit it from the return set.
 
@@ -430,18 +1329,34 @@ class DaemonContext:
               that value in the return set.
 
             * Otherwise, include the item verbatim in the return set.
+
+            The `files_preserve` collection is not modified.
             """
         files_preserve = self.files_preserve
         if files_preserve is None:
             files_preserve = []
-        files_preserve.extend(
+        stream_files = [
                 item for item in {self.stdin, self.stdout, self.stderr}
-                if hasattr(item, 'fileno'))
+                if hasattr(item, 'fileno')]
+        context_files = [
+                item for item in [
+                    self._ready_fd, self._service_notifier,
+                    self._handover_socket]
+                if item is not None]
+        context_files.extend(self._listen_fds)
+        pidfile_fd = _get_file_descriptor(self.pidfile)
+        if pidfile_fd is not None:
+            context_files.append(pidfile_fd)
 
         exclude_descriptors = set()
-        for item in files_preserve:
+        for item in itertools.chain(
+                files_preserve, stream_files, context_files):
             if item is None:
                 continue
+            if isinstance(item, int):
+                # The item is already a file descriptor.
+                exclude_descriptors.add(item)
+                continue
             file_descriptor = _get_file_descriptor(item)
             if file_descriptor is not None:
                 exclude_descriptors.add(file_descriptor)
@@ -486,6 +1401,41 @@ class DaemonContext:
         return signal_handler_map
 
 
+class PhaseTimer:
+    """ Timer for a sequence of consecutive phases.
+
+        Each phase starts when the previous phase ends; the first phase
+        starts when the timer is created. Durations are measured in
+        nanoseconds of the monotonic clock (`time.monotonic_ns`).
+        """
+
+    def __init__(self):
+        """ Set up a new instance. """
+        self._durations = {}
+        self._phase_start = time.monotonic_ns()
+
+    @property
+    def timings(self):
+        """ Read-only mapping from phase name to duration (nanoseconds). """
+        return types.MappingProxyType(self._durations)
+
+    def end_phase(self, name):
+        """ End the current phase, recording its duration as `name`.
+
+            :param name: The name of the phase that ends.
+            :return: ``None``.
+
+            The next phase starts immediately.
+            """
+        now = time.monotonic_ns()
+        self._durations[name] = now - self._phase_start
+        self._phase_start = now
+
+
+def _ignore_phase_end(name):
+    """ Ignore the end of a phase, when phases are not timed. """
+
+
 def get_stream_file_descriptors(
         stdin=sys.stdin,
         stdout=sys.stdout,
@@ -658,30 +1608,85 @@ def prevent_core_dump():
     resource.setrlimit(core_resource, core_limit)
 
 
-def detach_process_context():
+def detach_process_context(
+        wait_for_ready=False, strategy=detach_strategy_double_fork):
     """ Detach the process context from parent and session.
 
-        :return: ``None``.
+        :param wait_for_ready: If true, the original process waits for
+            the daemon to report its readiness before exiting.
+        :param strategy: How to detach; one of `detach_strategies`.
+        :return: If `wait_for_ready` is true and the process forks, the
+            file descriptor on which to report readiness; otherwise
+            ``None``.
+        :raise ValueError: If `strategy` is not a known strategy.
 
         Detach from the parent process and session group, allowing the
         parent to exit while this process continues running.
 
+        With the ``"double-fork"`` strategy, fork, start a new session,
+        then fork again, so that the daemon is not a session leader. With
+        ``"single-fork"``, fork then start a new session. With
+        ``"foreground"``, do not fork; start a new session, unless this
+        process leads its process group (which ‘setsid(2)’ does not
+        allow).
+
+        If `wait_for_ready` is true, a pipe connects the original process
+        to the detached process. The original process waits (see
+        `wait_for_daemon_ready`) until the detached process reports on
+        the pipe (see `notify_daemon_ready` and `notify_daemon_failure`),
+        or ends; then exits with the corresponding status. If the wait is
+        interrupted by an exception, the original process exits with
+        status `ready_exit_status_failed`.
+
         Reference: “Advanced Programming in the Unix Environment”,
         section 13.3, by W. Richard Stevens, published 1993 by
         Addison-Wesley.
         """
-
-    def fork_then_exit_parent(error_message):
+    if strategy not in detach_strategies:
+        raise ValueError(
+                "Unknown detach strategy: {strategy!r}".format(
+                    strategy=strategy))
+
+    if strategy == detach_strategy_foreground:
+        if os.getpgrp() != os.getpid():
+            os.setsid()
+        return None
+
+    ready_pipe = None
+    if wait_for_ready:
+        ready_pipe = os.pipe()
+
+    def exit_original_parent():
+        """ Exit the original process, once the daemon reports. """
+        exit_status = ready_exit_status_failed
+        try:
+            (read_fd, write_fd) = ready_pipe
+            os.close(write_fd)
+            (exit_status, message) = wait_for_daemon_ready(read_fd)
+            if message is not None:
+                sys.stderr.write(message + "\n")
+                sys.stderr.flush()
+        finally:
+            # Even if interrupted (e.g. by ``KeyboardInterrupt``), the
+            # original process must not return to the caller: the daemon
+            # process continues from there.
+            os._exit(exit_status)
+
+    def fork_then_exit_parent(error_message, exit_parent=None):
         """ Fork a child process, then exit the parent process.
 
             :param error_message: Message for the exception in case of a
                 detach failure.
+            :param exit_parent: Function to exit the parent process, or
+                ``None`` to exit immediately with status 0.
             :return: ``None``.
             :raise DaemonProcessDetachError: If the fork fails.
             """
         try:
             pid = os.fork()
             if pid > 0:
+                if exit_parent is not None:
+                    exit_parent()
                 os._exit(0)
         except OSError as exc:
             error = DaemonProcessDetachError(
@@ -689,9 +1694,153 @@ def detach_process_context():
                         message=error_message, exc=exc))
             raise error from exc
 
-    fork_then_exit_parent(error_message="Failed first fork")
+    fork_then_exit_parent(
+            error_message="Failed first fork",
+            exit_parent=(
+                exit_original_parent if ready_pipe is not None else None))
+    ready_fd = None
+    if ready_pipe is not None:
+        (read_fd, ready_fd) = ready_pipe
+        os.close(read_fd)
     os.setsid()
-    fork_then_exit_parent(error_message="Failed second fork")
+    if strategy == detach_strategy_double_fork:
+        fork_then_exit_parent(error_message="Failed second fork")
+
+    return ready_fd
+
+
+ready_status_ready = "ready"
+ready_status_failed = "failed"
+ready_status_exception = "exception"
+
+ready_exit_status_failed = 1
+ready_exit_status_exception = os.EX_SOFTWARE
+
+
+def _write_readiness_message(fd, message):
+    """ Write the readiness `message` to file descriptor `fd`, and close it.
+
+        :param fd: The file descriptor of the readiness pipe.
+        :param message: A mapping to send, serialised as a line of JSON.
+        :return: ``None``.
+        :raise DaemonOSEnvironmentError: If the message cannot be written.
+
+        If the original process has already ended, the message is
+        discarded.
+        """
+    data = (json.dumps(message) + "\n").encode('utf-8')
+    try:
+        while data:
+            written_size = os.write(fd, data)
+            data = data[written_size:]
+    except BrokenPipeError:
+        # The original process is no longer waiting for the message.
+        pass
+    except OSError as exc:
+        error = DaemonOSEnvironmentError(
+                "Unable to report readiness ({exc})".format(exc=exc))
+        raise error from exc
+    finally:
+        os.close(fd)
+
+
+def notify_daemon_ready(fd):
+    """ Report on readiness pipe `fd` that the daemon is ready.
+
+        :param fd: The file descriptor of the readiness pipe.
+        :return: ``None``.
+
+        The file descriptor is closed after the report.
+        """
+    _write_readiness_message(fd, {'status': ready_status_ready})
+
+
+def notify_daemon_failure(fd, message):
+    """ Report on readiness pipe `fd` that the daemon failed to start.
+
+        :param fd: The file descriptor of the readiness pipe.
+        :param message: Text describing the failure.
+        :return: ``None``.
+
+        The file descriptor is closed after the report.
+        """
+    _write_readiness_message(fd, {
+            'status': ready_status_failed,
+            'message': str(message),
+            })
+
+
+def notify_daemon_exception(fd, exception):
+    """ Report on readiness pipe `fd` an exception during daemon start.
+
+        :param fd: The file descriptor of the readiness pipe.
+        :param exception: The exception instance to report.
+        :return: ``None``.
+
+        The report contains the exception's type name, message, and
+        formatted traceback. The file descriptor is closed after the
+        report.
+        """
+    exc_type = type(exception)
+    traceback_lines = traceback.format_exception(
+            exc_type, exception, exception.__traceback__)
+    _write_readiness_message(fd, {
+            'status': ready_status_exception,
+            'type': "{module}.{name}".format(
+                module=exc_type.__module__, name=exc_type.__qualname__),
+            'message': str(exception),
+            'traceback': "".join(traceback_lines),
+            })
+
+
+def wait_for_daemon_ready(fd):
+    """ Wait for the daemon to report readiness on pipe `fd`.
+
+        :param fd: The file descriptor of the readiness pipe.
+        :return: A tuple (`exit_status`, `message`): the status with
+            which the original process should exit, and a message (or
+            ``None``) to report on its standard error stream.
+
+        Block until the daemon writes a complete report to the pipe, or
+        the pipe is closed without a report (the daemon process ended).
+        The file descriptor is closed on return.
+
+        The exit status is 0 if the daemon is ready;
+        `ready_exit_status_exception` if the daemon reported an
+        exception, with the traceback as the message; otherwise
+        `ready_exit_status_failed`.
+        """
+    data = b""
+    try:
+        while not data.endswith(b"\n"):
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        os.close(fd)
+
+    try:
+        report = json.loads(data.decode('utf-8'))
+        status = report['status']
+    except (ValueError, TypeError, KeyError):
+        report = None
+        status = None
+
+    if status == ready_status_ready:
+        result = (0, None)
+    elif status == ready_status_failed:
+        result = (ready_exit_status_failed, str(report.get('message', "")))
+    elif status == ready_status_exception:
+        message = report.get('traceback') or "{type}: {message}".format(
+                type=report.get('type'), message=report.get('message'))
+        result = (ready_exit_status_exception, str(message).rstrip("\n"))
+    else:
+        result = (
+                ready_exit_status_failed,
+                "Daemon process ended before it was ready")
+
+    return result
 
 
 def is_process_started_by_init():
@@ -718,28 +1867,12 @@ def is_socket(fd):
         :return: ``True`` iff the file descriptor is a socket; otherwise
             ``False``.
 
-        Query the socket type of `fd`. If there is no error, the file is a
-        socket.
+        Query the file type of `fd`, without creating a socket object.
         """
     warnings.warn(
             DeprecationWarning("migrate to `is_socket_file` instead"))
 
-    result = False
-
-    try:
-        file_socket = socket.fromfd(fd, socket.AF_INET, socket.SOCK_RAW)
-        file_socket.getsockopt(socket.SOL_SOCKET, socket.SO_TYPE)
-    except socket.error as exc:
-        exc_errno = exc.args[0]
-        if exc_errno == errno.ENOTSOCK:
-            # Socket operation on non-socket.
-            pass
-        else:
-            # Some other socket error.
-            result = True
-    else:
-        # No error getting socket type.
-        result = True
+    result = is_socket_file_descriptor(fd)
 
     return result
 
@@ -750,8 +1883,8 @@ def is_socket_file(file):
         :param file: The file (an `io.IOBase` instance) to interrogate.
         :return: ``True`` iff `file` is a socket; otherwise ``False``.
 
-        Query the socket type of the file descriptor of `file`. If there is no
-        error, the file is a socket.
+        Query the file type of the file descriptor of `file`, without
+        creating a socket object.
         """
     result = False
 
@@ -761,20 +1894,8 @@ def is_socket_file(file):
         # The file doesn't have a file descriptor.
         file_fd = None
 
-    try:
-        file_socket = socket.fromfd(file_fd, socket.AF_INET, socket.SOCK_RAW)
-        file_socket.getsockopt(socket.SOL_SOCKET, socket.SO_TYPE)
-    except socket.error as exc:
-        exc_errno = exc.args[0]
-        if exc_errno == errno.ENOTSOCK:
-            # Socket operation on non-socket.
-            pass
-        else:
-            # Some other socket error.
-            result = True
-    else:
-        # No error getting socket type.
-        result = True
+    if file_fd is not None:
+        result = is_socket_file_descriptor(file_fd)
 
     return result
 
@@ -798,6 +1919,10 @@ def is_process_started_by_superserver():
     return result
 
 
+_detach_process_context_required = None
+_detach_process_context_required_key = None
+
+
 def is_detach_process_context_required():
     """ Determine whether detaching the process context is required.
 
@@ -812,12 +1937,26 @@ def is_detach_process_context_required():
 
         If any of the above are true, the process is deemed to be already
         detached.
+
+        The environment is interrogated once in each process; the result
+        is cached for subsequent calls in the same process, while it has
+        the same parent process. If the process is reparented (for
+        example, when its parent exits), the environment is interrogated
+        again.
         """
-    result = True
-    if is_process_started_by_init() or is_process_started_by_superserver():
-        result = False
+    global _detach_process_context_required
+    global _detach_process_context_required_key
+    key = (os.getpid(), os.getppid())
+    if _detach_process_context_required_key != key:
+        result = True
+        if (
+                is_process_started_by_init()
+                or is_process_started_by_superserver()):
+            result = False
+        _detach_process_context_required = result
+        _detach_process_context_required_key = key
 
-    return result
+    return _detach_process_context_required
 
 
 def close_file_descriptor_if_open(fd):
@@ -842,6 +1981,29 @@ def close_file_descriptor_if_open(fd):
             raise error from exc
 
 
+def mark_file_descriptor_close_on_exec_if_open(fd):
+    """ Mark a file descriptor close-on-exec if already open.
+
+        :param fd: The file descriptor to mark.
+        :return: ``None``.
+
+        Set the “close-on-exec” flag of the file descriptor `fd`, so it is
+        not inherited by programs this process executes. Suppress an error
+        in the case the file was not open.
+        """
+    try:
+        os.set_inheritable(fd, False)
+    except EnvironmentError as exc:
+        if exc.errno == errno.EBADF:
+            # File descriptor was not open.
+            pass
+        else:
+            error = DaemonOSEnvironmentError(
+                    "Failed to mark file descriptor {fd:d} close-on-exec"
+                    " ({exc})".format(fd=fd, exc=exc))
+            raise error from exc
+
+
 MAXFD = 2048
 
 
@@ -876,12 +2038,172 @@ def _validate_fd_values(fds):
 
         A valid file descriptor is an `int` value.
         """
-    invalid_fds = set(filter((lambda fd: not isinstance(fd, int)), fds))
-    if invalid_fds:
-        value_to_complain_about = next(iter(invalid_fds))
-        message = "not an integer file descriptor: {!r}".format(
-                value_to_complain_about)
-        raise TypeError(message)
+    if isinstance(fds, FileDescriptorIntervalSet):
+        # The collection can only contain integers.
+        return
+
+    fd_types = set(map(type, fds))
+    if all(issubclass(fd_type, int) for fd_type in fd_types):
+        return
+
+    value_to_complain_about = next(
+            fd for fd in fds if not isinstance(fd, int))
+    message = "not an integer file descriptor: {!r}".format(
+            value_to_complain_about)
+    raise TypeError(message)
+
+
+class FileDescriptorIntervalSet:
+    """ A set of file descriptors, represented as intervals.
+
+        The set is stored compactly as an `array.array` of interval
+        bounds ``[low_0, high_0, low_1, high_1, …]``. Each interval
+        contains the integers from `low` up to, but not including,
+        `high`. The intervals are sorted, and are neither overlapping
+        nor adjacent.
+
+        A range of consecutive file descriptors, however many, takes
+        one interval; so the ranges *not* in the set take time and space
+        in proportion to the number of intervals, not of file
+        descriptors. A sparse set, with no two values adjacent, has an
+        interval for each value, and gains nothing: for 100,000 such
+        values, building the set and its complement each take some tens
+        of milliseconds, giving 100,001 ranges to close.
+        """
+
+    def __init__(self, intervals=()):
+        """ Set up a new instance.
+
+            :param intervals: An iterable of pairs (`low`, `high`),
+                each an interval of file descriptors to include.
+            :return: ``None``.
+            """
+        self._bounds = array.array('q')
+        for (low, high) in sorted(intervals):
+            if low >= high:
+                continue
+            if self._bounds and (low <= self._bounds[-1]):
+                # This interval overlaps or adjoins the previous one.
+                self._bounds[-1] = max(self._bounds[-1], high)
+            else:
+                self._bounds.extend((low, high))
+
+    @classmethod
+    def from_file_descriptors(cls, fds):
+        """ Make a new instance containing the file descriptors `fds`.
+
+            :param fds: A collection of file descriptors (each an `int`).
+            :return: A new `FileDescriptorIntervalSet` instance.
+
+            The values are sorted once, then each is either appended as
+            a new interval or extends the previous interval.
+            """
+        bounds = []
+        for fd in sorted(fds):
+            if bounds and (fd < bounds[-1]):
+                # This value is a duplicate of the previous value.
+                continue
+            if bounds and (bounds[-1] == fd):
+                bounds[-1] = fd + 1
+            else:
+                bounds.append(fd)
+                bounds.append(fd + 1)
+
+        instance = cls()
+        instance._bounds = array.array('q', bounds)
+        return instance
+
+    def __repr__(self):
+        """ Programmer representation of this instance. """
+        return "{class_name}({intervals!r})".format(
+                class_name=type(self).__name__,
+                intervals=self.intervals())
+
+    def __eq__(self, other):
+        """ Return ``True`` iff `other` contains the same intervals. """
+        if not isinstance(other, FileDescriptorIntervalSet):
+            return NotImplemented
+        return (self._bounds == other._bounds)
+
+    def __len__(self):
+        """ The number of file descriptors in this set. """
+        return (
+                sum(itertools.islice(self._bounds, 1, None, 2))
+                - sum(itertools.islice(self._bounds, 0, None, 2)))
+
+    def __bool__(self):
+        """ ``True`` iff this set contains any file descriptor. """
+        return bool(self._bounds)
+
+    def __contains__(self, fd):
+        """ Return ``True`` iff `fd` is in this set. """
+        # The value is within an interval iff an odd number of bounds
+        # are at or below it.
+        return (bisect.bisect_right(self._bounds, fd) % 2 == 1)
+
+    def __iter__(self):
+        """ Iterate over the file descriptors in this set, in order. """
+        for (low, high) in self.intervals():
+            yield from range(low, high)
+
+    def intervals(self):
+        """ Get the intervals of this set.
+
+            :return: A `list` of pairs (`low`, `high`), in order.
+            """
+        bounds = self._bounds
+        return list(zip(bounds[0::2], bounds[1::2]))
+
+    def union(self, other):
+        """ Make a new set with the file descriptors of both sets.
+
+            :param other: Another `FileDescriptorIntervalSet` instance.
+            :return: A new `FileDescriptorIntervalSet` instance.
+            """
+        return type(self)(itertools.chain(
+                self.intervals(), other.intervals()))
+
+    __or__ = union
+
+    def complement_ranges(self, within):
+        """ Get the ranges, within a range, not in this set.
+
+            :param within: The `range` of values to consider.
+            :return: A `list` of pairs (`low`, `high`), in order, of
+                those values in `within` that are not in this set.
+            """
+        (start, stop) = (within.start, within.stop)
+        if start >= stop:
+            return []
+
+        bounds = self._bounds
+        first = bisect.bisect_right(bounds, start)
+        last = bisect.bisect_left(bounds, stop)
+        if (first % 2 == 1):
+            # The start of the range is within an interval of this set,
+            # so the first gap begins at the end of that interval.
+            start = bounds[first]
+            first += 1
+        if (last % 2 == 1):
+            # The end of the range is within an interval of this set,
+            # so the last gap ends at the start of that interval.
+            last -= 1
+            stop = bounds[last]
+
+        # Between consecutive intervals of this set, there is a gap.
+        gap_bounds = [start]
+        gap_bounds.extend(bounds[first:last])
+        gap_bounds.append(stop)
+        ranges = list(zip(gap_bounds[0::2], gap_bounds[1::2]))
+
+        # Only the first and last gaps can be empty, when the range
+        # begins or ends at the boundary of an interval of this set.
+        if ranges and (ranges[-1][0] >= ranges[-1][1]):
+            del ranges[-1]
+        if ranges and (ranges[0][0] >= ranges[0][1]):
+            del ranges[0]
+
+        return ranges
 
 
 def _get_candidate_file_descriptor_ranges(exclude):
@@ -898,35 +2220,154 @@ def _get_candidate_file_descriptor_ranges(exclude):
 
         A value is a candidate if it could be an open file descriptor
         in this process, excluding those integers in the `exclude`
-        collection.
+        collection. The `exclude` collection may be a
+        `FileDescriptorIntervalSet`.
         """
     _validate_fd_values(exclude)
-    ranges = []
+    if not isinstance(exclude, FileDescriptorIntervalSet):
+        exclude = FileDescriptorIntervalSet.from_file_descriptors(exclude)
 
-    remaining_range = _total_file_descriptor_range
-    for exclude_fd in sorted(exclude):
-        if (exclude_fd > remaining_range.stop):
-            # This and all later exclusions are higher than the remaining
-            # range.
-            break
-        if (exclude_fd < remaining_range.start):
-            # The remaining range does not include the current exclusion.
-            continue
-        if (exclude_fd != remaining_range.start):
-            # There is a candidate range below the current exclusion.
-            ranges.append((remaining_range.start, exclude_fd))
-        # Narrow the remaining range to those above the current exclusion.
-        remaining_range = range(exclude_fd + 1, remaining_range.stop)
-
-    if (remaining_range.start < remaining_range.stop):
-        # After excluding all the specified file descriptors, there is a
-        # remaining range; append it as a candidate for closing file
-        # descriptors.
-        ranges.append((remaining_range.start, remaining_range.stop))
+    ranges = exclude.complement_ranges(within=_total_file_descriptor_range)
 
     return ranges
 
 
+SYS_CLOSE_RANGE = 436
+
+CLOSE_RANGE_CLOEXEC = 1 << 2
+
+close_range_probe_file_descriptor = (1 << 32) - 1
+""" File descriptor to close when checking that `close_range(2)` works.
+
+    This is the largest value the system call accepts; no process can
+    have a file descriptor that large open.
+    """
+
+os_closerange_uses_close_range = None
+""" ``True`` if `os.closerange` itself uses `close_range(2)`.
+
+    ``None`` until determined by `_get_os_closerange_uses_close_range`.
+    """
+
+
+def _make_close_range_function():
+    """ Make a function to invoke the `close_range(2)` system call.
+
+        :return: A function `close_range(first, last, flags)` that
+            invokes the system call, or ``None`` if the system call is
+            not available on this platform.
+
+        The function is found in the C library as `close_range` (GNU
+        libc 2.34 or later, FreeBSD 13 or later). Failing that, on
+        Linux the generic `syscall` entry point is used with the
+        system call number `SYS_CLOSE_RANGE`.
+
+        The returned function takes the inclusive range of file
+        descriptors `first` to `last`, and the `flags` for the system
+        call. It raises ``OSError`` if the system call fails; for
+        example, ``ENOSYS`` when the running kernel does not implement
+        the system call.
+        """
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+    except (ImportError, OSError):
+        # No foreign function interface to the C library.
+        return None
+
+    if hasattr(libc, 'close_range'):
+        libc_close_range = libc.close_range
+        libc_close_range.argtypes = [
+                ctypes.c_uint, ctypes.c_uint, ctypes.c_int]
+        libc_close_range.restype = ctypes.c_int
+    elif sys.platform.startswith('linux') and hasattr(libc, 'syscall'):
+        libc_syscall = libc.syscall
+        libc_syscall.restype = ctypes.c_long
+
+        def libc_close_range(first, last, flags):
+            return libc_syscall(
+                    ctypes.c_long(SYS_CLOSE_RANGE),
+                    ctypes.c_uint(first), ctypes.c_uint(last),
+                    ctypes.c_int(flags))
+    else:
+        return None
+
+    def close_range(first, last, flags):
+        """ Invoke `close_range(2)` on the inclusive range `first`–`last`. """
+        if libc_close_range(first, last, flags) != 0:
+            exc_errno = ctypes.get_errno()
+            raise OSError(exc_errno, os.strerror(exc_errno))
+
+    return close_range
+
+
+_close_range_function = None
+_close_range_function_is_known = False
+
+
+def _check_os_closerange_uses_close_range():
+    """ Check whether `os.closerange` uses the `close_range(2)` system call.
+
+        :return: ``True`` if `os.closerange` closes each range with a
+            single system call, otherwise ``False``.
+
+        From Python 3.10, `os.closerange` calls the system call if Python
+        was built with it (``HAVE_CLOSE_RANGE``); if the running kernel
+        does not implement it, or it is blocked, `os.closerange` instead
+        attempts to close each file descriptor in the range in turn. So
+        the system call is also invoked (see `_get_close_range_function`)
+        on `close_range_probe_file_descriptor`, which cannot be open.
+        """
+    if sys.version_info < (3, 10):
+        return False
+    if not sysconfig.get_config_var('HAVE_CLOSE_RANGE'):
+        return False
+    close_range = _get_close_range_function()
+    if close_range is None:
+        return False
+    try:
+        close_range(
+                close_range_probe_file_descriptor,
+                close_range_probe_file_descriptor, 0)
+    except OSError:
+        # The system call is not usable; e.g. the running kernel does
+        # not implement it.
+        return False
+    return True
+
+
+def _get_os_closerange_uses_close_range():
+    """ Get whether `os.closerange` uses the `close_range(2)` system call.
+
+        :return: The value of `os_closerange_uses_close_range`.
+
+        The value is determined (see
+        `_check_os_closerange_uses_close_range`) on the first call, and
+        remembered for subsequent calls.
+        """
+    global os_closerange_uses_close_range
+    if os_closerange_uses_close_range is None:
+        os_closerange_uses_close_range = (
+                _check_os_closerange_uses_close_range())
+    return os_closerange_uses_close_range
+
+
+def _get_close_range_function():
+    """ Get the function to invoke the `close_range(2)` system call.
+
+        :return: The function made by `_make_close_range_function`, or
+            ``None`` if the system call is not available.
+
+        The function is made on the first call, and remembered for
+        subsequent calls.
+        """
+    global _close_range_function, _close_range_function_is_known
+    if not _close_range_function_is_known:
+        _close_range_function = _make_close_range_function()
+        _close_range_function_is_known = True
+    return _close_range_function
+
+
 def _close_file_descriptor_ranges(ranges):
     """ Close file descriptors described by `ranges`.
 
@@ -936,9 +2377,99 @@ def _close_file_descriptor_ranges(ranges):
 
         Attempt to close each open file descriptor – starting from
         `low` and ending before `high` – from each range in `ranges`.
+
+        Where `os.closerange` uses the `close_range(2)` system call (see
+        `_get_os_closerange_uses_close_range`), each range is closed with
+        `os.closerange`. Otherwise, where the system call is available
+        through the C library, each range is closed with a single system
+        call. Failing that, or if the system call fails, fall back to
+        `os.closerange`; depending on the Python build that may attempt
+        to close each file descriptor in the range in turn.
+        """
+    if _get_os_closerange_uses_close_range():
+        for (low, high) in ranges:
+            os.closerange(low, high)
+        return
+
+    close_range = _get_close_range_function()
+    for (low, high) in ranges:
+        if close_range is not None:
+            try:
+                close_range(low, high - 1, 0)
+                continue
+            except OSError:
+                # The system call is not usable; e.g. the running kernel
+                # does not implement it. Use the fallback from now on.
+                close_range = None
+        os.closerange(low, high)
+
+
+open_file_descriptors_directory = "/proc/self/fd"
+
+
+def _get_open_file_descriptors():
+    """ Get the file descriptors currently open in this process.
+
+        :return: A `list` of the open file descriptors (each an `int`),
+            or ``None`` if the open file descriptors cannot be determined.
+
+        Read the entries of the directory named by
+        `open_file_descriptors_directory`, which the kernel populates
+        with an entry for each open file descriptor of the process.
+        That directory might not be available; for example, when the
+        ``/proc`` filesystem is not mounted, or inside a “chroot gaol”.
+
+        The result may include the file descriptor used to read the
+        directory, which is no longer open on return.
+        """
+    try:
+        names = os.listdir(open_file_descriptors_directory)
+    except OSError:
+        # The directory is not available.
+        return None
+
+    try:
+        file_descriptors = [int(name) for name in names]
+    except ValueError:
+        # The directory does not list file descriptors as expected.
+        return None
+
+    return file_descriptors
+
+
+def _get_open_file_descriptor_ranges(exclude):
+    """ Get the collection of open file descriptor ranges.
+
+        :param exclude: A collection of file descriptors that should
+            be excluded from the return ranges.
+        :return: The collection (a `list`) of ranges that contain the
+            file descriptors open in this process, or ``None`` if the
+            open file descriptors cannot be determined.
+
+        Determine the ranges of the open file descriptors, excluding
+        those integers in the `exclude` collection. Each range is a
+        pair of `int` values (`low`, `high`).
+
+        The cost depends on the number of open file descriptors, not on
+        the maximum number of file descriptors for the process.
         """
-    for range in ranges:
-        os.closerange(range[0], range[1])
+    _validate_fd_values(exclude)
+
+    open_fds = _get_open_file_descriptors()
+    if open_fds is None:
+        return None
+
+    ranges = []
+    for fd in sorted(open_fds):
+        if fd in exclude:
+            continue
+        if ranges and (ranges[-1][1] == fd):
+            # This file descriptor extends the previous range.
+            ranges[-1] = (ranges[-1][0], fd + 1)
+        else:
+            ranges.append((fd, fd + 1))
+
+    return ranges
 
 
 def close_all_open_files(exclude=None):
@@ -951,13 +2482,82 @@ def close_all_open_files(exclude=None):
         Closes every file descriptor (if open) of this process. If
         specified, `exclude` is a set of file descriptors to *not*
         close.
+
+        Where `os.closerange` is known to use the `close_range(2)` system
+        call (see `_get_os_closerange_uses_close_range`), close every
+        candidate file descriptor up to the maximum for this process;
+        each range takes a single system call. Otherwise, where the open
+        file descriptors can be determined (see
+        `_get_open_file_descriptors`), close only those, with
+        `os.closerange`; `os.closerange` might attempt to close each
+        file descriptor in a range in turn. Failing that, close every
+        candidate file descriptor (see `_close_file_descriptor_ranges`).
         """
     if exclude is None:
         exclude = set()
+    if not _get_os_closerange_uses_close_range():
+        fd_ranges = _get_open_file_descriptor_ranges(exclude=exclude)
+        if fd_ranges is not None:
+            for (low, high) in fd_ranges:
+                os.closerange(low, high)
+            return
     fd_ranges = _get_candidate_file_descriptor_ranges(exclude=exclude)
     _close_file_descriptor_ranges(ranges=fd_ranges)
 
 
+def _mark_file_descriptor_ranges_close_on_exec(ranges):
+    """ Mark file descriptors described by `ranges` close-on-exec.
+
+        :param ranges: A sequence of tuples `(low, high)`, each
+            describing a range of file descriptors to mark.
+        :return: ``None``.
+
+        Attempt to mark close-on-exec each open file descriptor –
+        starting from `low` and ending before `high` – from each range
+        in `ranges`.
+
+        Where the `close_range(2)` system call is available with the
+        ``CLOSE_RANGE_CLOEXEC`` flag, each range is marked with a single
+        system call. Otherwise, or if the system call fails, fall back to
+        marking each file descriptor in the range in turn.
+        """
+    close_range = _get_close_range_function()
+    for (low, high) in ranges:
+        if close_range is not None:
+            try:
+                close_range(low, high - 1, CLOSE_RANGE_CLOEXEC)
+                continue
+            except OSError:
+                # The system call is not usable; e.g. the running kernel
+                # does not implement the flag. Use the fallback from now on.
+                close_range = None
+        for fd in range(low, high):
+            mark_file_descriptor_close_on_exec_if_open(fd)
+
+
+def mark_all_open_files_close_on_exec(exclude=None):
+    """ Mark all open file descriptors close-on-exec.
+
+        :param exclude: Collection of file descriptors to skip when marking
+            files.
+        :return: ``None``.
+
+        Marks “close-on-exec” every file descriptor (if open) of this
+        process. If specified, `exclude` is a set of file descriptors to
+        *not* mark. The file descriptors remain open in this process, but
+        are closed in any program this process executes.
+
+        The file descriptors to mark are determined as for
+        `close_all_open_files`.
+        """
+    if exclude is None:
+        exclude = set()
+    fd_ranges = _get_open_file_descriptor_ranges(exclude=exclude)
+    if fd_ranges is None:
+        fd_ranges = _get_candidate_file_descriptor_ranges(exclude=exclude)
+    _mark_file_descriptor_ranges_close_on_exec(ranges=fd_ranges)
+
+
 def redirect_stream(system_stream, target_stream):
     """ Redirect a system stream to a specified file.
 
@@ -973,12 +2573,20 @@ def redirect_stream(system_stream, target_stream):
 
         If `target_stream` is ``None``, defaults to opening the
         operating system's null device and using its file descriptor.
+
+        The system stream's file descriptor is inheritable, so that
+        programs started by the daemon (see `DaemonContext.restart`)
+        inherit the redirected stream.
         """
     if target_stream is None:
         target_fd = os.open(os.devnull, os.O_RDWR)
     else:
         target_fd = target_stream.fileno()
-    os.dup2(target_fd, system_stream.fileno())
+    system_fd = system_stream.fileno()
+    os.dup2(target_fd, system_fd)
+    # If the system stream's file descriptor was closed, `os.open` may
+    # have reused it, non-inheritable; then `os.dup2` does nothing.
+    os.set_inheritable(system_fd, True)
 
 
 def make_default_signal_map():
@@ -994,6 +2602,7 @@ def make_default_signal_map():
             'SIGTTIN': None,
             'SIGTTOU': None,
             'SIGTERM': 'terminate',
+            'SIGHUP': 'reload',
             }
     signal_map = {
             getattr(signal, name): target
@@ -0,0 +1,251 @@
+# daemon/eventloop.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Daemon context integrated with an `asyncio` event loop.
+
+    A daemon program using `asyncio` must detach before its event loop
+    starts: detaching closes open files and forks new processes, which
+    the event loop does not survive. Once the loop runs, signals should
+    be handled by the loop, so that a signal handler runs as a loop
+    callback between other callbacks instead of interrupting a coroutine
+    at an arbitrary point.
+
+    Simple example of usage::
+
+        import daemon.eventloop
+
+        from spam import main
+
+        daemon_context = daemon.eventloop.AsyncDaemonContext()
+        daemon_context.run(main())
+    """
+
+import asyncio
+import inspect
+import signal
+
+from .daemon import (
+        DaemonContext,
+        DaemonError,
+        set_signal_handlers,
+        )
+
+
+class AsyncDaemonContext(DaemonContext):
+    """ Context for turning the current program into an `asyncio` daemon.
+
+        This is a `DaemonContext` (see that class for the options), which
+        is also an asynchronous context manager, for use in a coroutine
+        running in the event loop::
+
+            async def main(daemon_context):
+                async with daemon_context:
+                    await serve_forever()
+
+            daemon_context = AsyncDaemonContext()
+            daemon_context.open()
+            asyncio.run(main(daemon_context))
+
+        The context must be open (see `DaemonContext.open`) before the
+        event loop starts; the `run` method does this.
+
+        While the asynchronous context is entered, each signal in
+        `signal_map` with a callable handler is handled by the event loop
+        (see `asyncio.loop.add_signal_handler`). The handler is called
+        as a loop callback with arguments (`signal_number`, ``None``). If
+        the handler returns an awaitable (e.g. the handler is a coroutine
+        function), the awaitable is scheduled as a task. If a signal
+        dispatcher thread is running (see `signal_dispatch_thread`), it
+        is stopped; the event loop handles the signals instead.
+
+        The `terminate` handler cancels the task that entered the
+        asynchronous context, so that the task can finish at its next
+        ``await``. On exit of the asynchronous context, that cancellation
+        becomes a ``SystemExit`` exception explaining the signal.
+        """
+
+    def __init__(self, *args, **kwargs):
+        """ Set up a new instance. """
+        super().__init__(*args, **kwargs)
+
+        self._loop = None
+        self._main_task = None
+        self._loop_signal_numbers = []
+        self._signal_tasks = set()
+        self._terminate_signal_number = None
+
+    def run(self, main, *, debug=None):
+        """ Open the daemon context, then run `main` in an event loop.
+
+            :param main: The coroutine to run.
+            :param debug: If not ``None``, the debug mode of the event
+                loop (see `asyncio.run`).
+            :return: The return value of `main`.
+
+            Open this context before the event loop starts, then run the
+            event loop until `main` completes, with the asynchronous
+            context entered.
+            """
+        self.open()
+        run_kwargs = {}
+        if debug is not None:
+            run_kwargs['debug'] = debug
+        result = asyncio.run(self._run_main(main), **run_kwargs)
+        return result
+
+    async def _run_main(self, main):
+        """ Await `main` with the asynchronous context entered.
+
+            :param main: The coroutine to await.
+            :return: The return value of `main`.
+            """
+        async with self:
+            result = await main
+        return result
+
+    async def __aenter__(self):
+        """ Asynchronous context manager entry point.
+
+            :return: This instance.
+            :raise DaemonError: If the daemon context is not open.
+
+            Handle signals from `signal_map` in the running event loop.
+            """
+        if not self.is_open:
+            raise DaemonError(
+                    "Daemon context must be open before the event loop"
+                    " starts")
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
+        self._terminate_signal_number = None
+        if self._signal_dispatcher is not None:
+            self._signal_dispatcher.stop()
+            self._signal_dispatcher = None
+        self._add_loop_signal_handlers()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """ Asynchronous context manager exit point.
+
+            Restore the signal handlers from `signal_map`, then close the
+            daemon context (see `DaemonContext.__exit__`). If the task
+            was cancelled by `terminate`, raise ``SystemExit``.
+            """
+        self._remove_loop_signal_handlers()
+        self._loop = None
+        self._main_task = None
+
+        terminate_signal_number = self._terminate_signal_number
+        self._terminate_signal_number = None
+        if (
+                terminate_signal_number is not None
+                and isinstance(exc_value, asyncio.CancelledError)):
+            self.close()
+            raise self._make_terminate_exception(terminate_signal_number)
+
+        self.__exit__(exc_type, exc_value, traceback)
+
+    def terminate(self, signal_number, stack_frame):
+        """ Signal handler for end-process signals.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received, or ``None`` if handled by the event
+                loop.
+            :return: ``None``.
+
+            If the asynchronous context is entered, cancel the task that
+            entered it; on exit of that context, ``SystemExit`` is
+            raised. Otherwise, raise ``SystemExit`` immediately (see
+            `DaemonContext.terminate`).
+
+            If the `graceful_shutdown` attribute is true, the first such
+            signal instead begins a graceful shutdown (see
+            `DaemonContext.begin_shutdown`).
+            """
+        if self._main_task is None:
+            super().terminate(signal_number, stack_frame)
+            return
+        if self.graceful_shutdown and not self.is_shutting_down:
+            self.begin_shutdown(signal_number)
+            return
+        if self._terminate_signal_number is None:
+            self._terminate_signal_number = signal_number
+            self._main_task.cancel()
+
+    def _make_terminate_exception(self, signal_number):
+        """ Make the exception for terminating on `signal_number`. """
+        exception = SystemExit(
+                "Terminating on signal {signal_number!r}".format(
+                    signal_number=signal_number))
+        return exception
+
+    def _add_loop_signal_handlers(self):
+        """ Handle the signals from `signal_map` in the event loop.
+
+            :return: ``None``.
+
+            Signals with a handler of `signal.SIG_IGN` or `signal.SIG_DFL`
+            are left as set by `DaemonContext.open`.
+            """
+        signal_handler_map = self._make_signal_handler_map()
+        for (signal_number, handler) in signal_handler_map.items():
+            if handler in [signal.SIG_IGN, signal.SIG_DFL]:
+                continue
+            self._loop.add_signal_handler(
+                    signal_number, self._dispatch_signal,
+                    handler, signal_number)
+            self._loop_signal_numbers.append(signal_number)
+
+    def _remove_loop_signal_handlers(self):
+        """ Stop handling signals in the event loop.
+
+            :return: ``None``.
+
+            Restore the handlers for those signals as set by
+            `DaemonContext.open`.
+            """
+        if not self._loop_signal_numbers:
+            return
+        signal_handler_map = self._make_signal_handler_map()
+        for signal_number in self._loop_signal_numbers:
+            self._loop.remove_signal_handler(signal_number)
+        set_signal_handlers({
+                signal_number: signal_handler_map[signal_number]
+                for signal_number in self._loop_signal_numbers
+                if signal_number in signal_handler_map})
+        self._loop_signal_numbers = []
+
+    def _dispatch_signal(self, handler, signal_number):
+        """ Call the signal `handler`, as an event loop callback.
+
+            :param handler: The signal handler to call.
+            :param signal_number: The OS signal number received.
+            :return: ``None``.
+
+            If `handler` returns an awaitable, schedule it as a task.
+            """
+        result = handler(signal_number, None)
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._signal_tasks.add(task)
+            task.add_done_callback(self._signal_tasks.discard)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
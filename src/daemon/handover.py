@@ -0,0 +1,215 @@
+# daemon/handover.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Handover of open files from a daemon to its successor.
+
+    To restart without closing its listening sockets, a daemon starts its
+    successor with one end of a Unix socket pair, and names the file
+    descriptor of that socket in the environment variable
+    ``DAEMON_HANDOVER_FD``. On that socket:
+
+    * The predecessor sends its open files, as file descriptors passed
+      with ``SCM_RIGHTS`` (see ‘unix(7)’), with a name for each. The
+      files are sent in batches of at most `max_file_descriptors`; the
+      last batch is marked as done.
+
+    * The successor, when ready, sends its process ID.
+
+    * The predecessor hands over its PID file, then acknowledges.
+
+    Each message is a JSON object, sent as one packet on a
+    ``SOCK_SEQPACKET`` socket.
+    """
+
+import array
+import json
+import os
+import socket
+
+
+handover_environment_variable = "DAEMON_HANDOVER_FD"
+
+handover_status_ready = "ready"
+handover_status_complete = "handed-over"
+
+max_file_descriptors = 253
+""" Maximum number of file descriptors in one message (‘SCM_MAX_FD’). """
+
+max_message_size = 65536
+
+
+def make_handover_socket_pair():
+    """ Make a connected pair of sockets for a handover.
+
+        :return: A tuple (`predecessor_socket`, `successor_socket`).
+
+        The successor's socket is inheritable, for passing to the new
+        process.
+        """
+    (predecessor_socket, successor_socket) = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    successor_socket.set_inheritable(True)
+    return (predecessor_socket, successor_socket)
+
+
+def get_handover_socket(environ=None):
+    """ Get the handover socket from a predecessor, if any.
+
+        :param environ: The mapping of environment variables to query,
+            or ``None`` to query `os.environ`.
+        :return: The `socket.socket` named by ``DAEMON_HANDOVER_FD``, or
+            ``None`` if that variable is not set or not valid.
+
+        The variable is removed from the environment, so that child
+        processes do not inherit it. The socket is not inheritable.
+        """
+    if environ is None:
+        environ = os.environ
+    value = environ.pop(handover_environment_variable, None)
+    try:
+        fd = int(value)
+    except (TypeError, ValueError):
+        return None
+    if fd < 0:
+        return None
+    handover_socket = socket.socket(fileno=fd)
+    handover_socket.set_inheritable(False)
+    return handover_socket
+
+
+def send_message(handover_socket, fds=(), **fields):
+    """ Send a message on the handover socket.
+
+        :param handover_socket: The socket on which to send.
+        :param fds: A sequence of file descriptors to pass.
+        :param fields: The fields of the message.
+        :return: ``None``.
+        :raise ValueError: If there are too many file descriptors.
+        """
+    if len(fds) > max_file_descriptors:
+        raise ValueError(
+                "Too many file descriptors to pass: {count}".format(
+                    count=len(fds)))
+    data = json.dumps(fields).encode('utf-8')
+    ancillary = []
+    if fds:
+        ancillary.append((
+                socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                array.array('i', fds)))
+    handover_socket.sendmsg([data], ancillary)
+
+
+def receive_message(handover_socket):
+    """ Receive a message from the handover socket.
+
+        :param handover_socket: The socket from which to receive.
+        :return: A tuple (`fields`, `fds`), of the `dict` of message
+            fields and the `list` of file descriptors passed; or
+            (``None``, ``[]``) if the peer closed the socket.
+        :raise ValueError: If the message is not valid.
+
+        Each file descriptor received is not inheritable.
+        """
+    fd_size = array.array('i').itemsize
+    (data, ancillary, flags, address) = handover_socket.recvmsg(
+            max_message_size,
+            socket.CMSG_SPACE(max_file_descriptors * fd_size),
+            getattr(socket, 'MSG_CMSG_CLOEXEC', 0))
+
+    fds = array.array('i')
+    for (level, kind, item) in ancillary:
+        if (level, kind) == (socket.SOL_SOCKET, socket.SCM_RIGHTS):
+            fds.frombytes(item[:len(item) - (len(item) % fd_size)])
+    fds = list(fds)
+    if flags & (socket.MSG_TRUNC | socket.MSG_CTRUNC):
+        for fd in fds:
+            os.close(fd)
+        raise ValueError("Handover message truncated")
+
+    if not data:
+        return (None, fds)
+    try:
+        fields = json.loads(data.decode('utf-8'))
+        if not isinstance(fields, dict):
+            raise ValueError("Handover message is not an object")
+    except ValueError:
+        for fd in fds:
+            os.close(fd)
+        raise
+    for fd in fds:
+        os.set_inheritable(fd, False)
+    return (fields, fds)
+
+
+def send_file_descriptors(handover_socket, named_fds):
+    """ Send named file descriptors to the successor.
+
+        :param handover_socket: The socket on which to send.
+        :param named_fds: A sequence of (`name`, `fd`) pairs.
+        :return: ``None``.
+
+        Send one message for each batch of at most `max_file_descriptors`
+        files, each with the names of its files; the last message (which
+        is sent even if there are no files) has the field `done` true.
+        """
+    named_fds = list(named_fds)
+    batches = [
+            named_fds[index:(index + max_file_descriptors)]
+            for index in range(0, len(named_fds), max_file_descriptors)]
+    if not batches:
+        batches = [[]]
+    for (index, batch) in enumerate(batches):
+        send_message(
+                handover_socket,
+                fds=[fd for (name, fd) in batch],
+                names=[name for (name, fd) in batch],
+                done=(index == len(batches) - 1))
+
+
+def receive_file_descriptors(handover_socket):
+    """ Receive named file descriptors from the predecessor.
+
+        :param handover_socket: The socket from which to receive.
+        :return: A `list` of (`name`, `fd`) pairs.
+        :raise ValueError: If a message is not valid.
+
+        Receive each batch of files (see `send_file_descriptors`), until
+        the batch marked as done. If any batch fails, close the files
+        already received.
+        """
+    named_fds = []
+    try:
+        while True:
+            (fields, fds) = receive_message(handover_socket)
+            names = (fields or {}).get('names')
+            if not isinstance(names, list) or len(names) != len(fds):
+                for fd in fds:
+                    os.close(fd)
+                raise ValueError("Handover message does not name the files")
+            named_fds.extend(zip([str(name) for name in names], fds))
+            if fields.get('done'):
+                break
+    except BaseException:
+        for (name, fd) in named_fds:
+            os.close(fd)
+        raise
+    return named_fds
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,106 @@
+# daemon/memory.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Memory shared between a daemon and the processes it forks.
+
+    A forked process shares the memory pages of its parent until either
+    process writes to them (“copy-on-write”). In Python, merely using an
+    object writes its reference count, and the garbage collector writes
+    the header of each object it tracks; so the heap loaded before a fork
+    soon becomes private to each process.
+
+    Freezing the garbage collector's heap (`gc.freeze`) before the fork
+    moves the tracked objects to a permanent generation, which later
+    collections do not visit, so more of those pages stay shared.
+    """
+
+import gc
+import os
+
+
+smaps_rollup_path_template = "/proc/{pid}/smaps_rollup"
+
+smaps_rollup_fields = {
+        'Rss': 'rss',
+        'Pss': 'pss',
+        'Shared_Clean': 'shared',
+        'Shared_Dirty': 'shared',
+        'Private_Clean': 'private',
+        'Private_Dirty': 'private',
+        'Swap': 'swap',
+        }
+
+
+def freeze_gc_heap(collect=False):
+    """ Freeze the garbage collector's heap, in preparation for a fork.
+
+        :param collect: If true, do a full collection first.
+        :return: ``None``.
+
+        Move all objects tracked by the garbage collector to its permanent
+        generation (see `gc.freeze`), so that collections in the forked
+        process do not write to their pages.
+
+        A full collection first frees unreachable objects, so they are
+        not kept for the life of the process; but it also leaves gaps
+        among the frozen objects, which new objects in the forked process
+        then fill, writing to those pages.
+        """
+    if collect:
+        gc.collect()
+    gc.freeze()
+
+
+def get_memory_usage(pid=None):
+    """ Get the memory usage of a process, by sharing.
+
+        :param pid: The process ID, or ``None`` for the current process.
+        :return: A `dict` of memory sizes (bytes), by name: ``rss``,
+            ``pss``, ``shared``, ``private``, ``swap``; or ``None`` if
+            the system does not report them.
+
+        The sizes are read from ‘/proc/PID/smaps_rollup’ (see ‘proc(5)’).
+        The ``shared`` size counts the pages that this process shares
+        with any other; the ``private`` size counts pages used only by
+        this process. The ``pss`` (proportional set size) counts each
+        shared page divided by the number of processes sharing it.
+        """
+    if pid is None:
+        pid = "self"
+    path = smaps_rollup_path_template.format(pid=pid)
+    try:
+        with open(path, 'rb') as infile:
+            content = infile.read()
+    except (FileNotFoundError, PermissionError):
+        return None
+
+    usage = dict.fromkeys(sorted(set(smaps_rollup_fields.values())), 0)
+    for line in content.splitlines():
+        (field, __, value) = line.partition(b":")
+        name = smaps_rollup_fields.get(field.decode('ascii', 'replace'))
+        if name is None:
+            continue
+        words = value.split()
+        if len(words) != 2 or words[1] != b"kB":
+            continue
+        usage[name] += int(words[0]) * 1024
+    return usage
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,382 @@
+# daemon/notify.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Notification of service state to the service manager.
+
+    A service manager (such as ‘systemd’) that supervises the daemon
+    can receive notifications of the daemon's state: that it is ready,
+    reloading, or stopping; a status text; or a “watchdog” keep-alive.
+    The service manager sets the environment variable ``NOTIFY_SOCKET``
+    to the address of a Unix datagram socket, to which the daemon sends
+    each notification as a datagram of newline-separated ``KEY=VALUE``
+    assignments.
+
+    The service manager may also enable a watchdog for the service,
+    setting the environment variable ``WATCHDOG_USEC`` to the interval
+    within which the daemon must send a keep-alive notification. A
+    `WatchdogHeartbeat` sends those notifications from a dedicated
+    thread.
+
+    Reference: ‘sd_notify(3)’ and ‘sd_watchdog_enabled(3)’ in the
+    ‘systemd’ documentation.
+    """
+
+import os
+import socket
+import threading
+import time
+
+
+notify_socket_environment_variable = "NOTIFY_SOCKET"
+watchdog_usec_environment_variable = "WATCHDOG_USEC"
+watchdog_pid_environment_variable = "WATCHDOG_PID"
+
+
+def get_notify_socket_address(environ=None):
+    """ Get the address of the service manager's notification socket.
+
+        :param environ: The mapping of environment variables to query,
+            or ``None`` to query `os.environ`.
+        :return: The socket address (a `str` for a filesystem path, or
+            `bytes` for an abstract socket name), or ``None`` if there
+            is no notification socket.
+
+        The address is the value of the ``NOTIFY_SOCKET`` environment
+        variable. A value beginning with ``@`` names a socket in the
+        Linux abstract namespace, where the ``@`` stands for an initial
+        null byte. Any value that is neither an absolute path nor an
+        abstract name (for example, a ``vsock:`` address) is not
+        supported, and treated as no socket.
+        """
+    if environ is None:
+        environ = os.environ
+    address = environ.get(notify_socket_environment_variable)
+    if not address:
+        result = None
+    elif address.startswith("@"):
+        result = b"\0" + os.fsencode(address[1:])
+    elif address.startswith("/"):
+        result = address
+    else:
+        result = None
+    return result
+
+
+def get_watchdog_interval(environ=None, pid=None):
+    """ Get the interval of the service manager's watchdog.
+
+        :param environ: The mapping of environment variables to query,
+            or ``None`` to query `os.environ`.
+        :param pid: The process ID to match, or ``None`` for the current
+            process.
+        :return: The watchdog interval (a `float`, in seconds), or
+            ``None`` if the watchdog is not enabled for this process.
+
+        The interval is the value of the ``WATCHDOG_USEC`` environment
+        variable, in microseconds. If the ``WATCHDOG_PID`` environment
+        variable is set, the watchdog is enabled only for the process
+        with that ID.
+        """
+    if environ is None:
+        environ = os.environ
+    try:
+        interval_usec = int(environ.get(watchdog_usec_environment_variable))
+    except (TypeError, ValueError):
+        return None
+    if interval_usec <= 0:
+        return None
+
+    watchdog_pid = environ.get(watchdog_pid_environment_variable)
+    if watchdog_pid:
+        if pid is None:
+            pid = os.getpid()
+        try:
+            if int(watchdog_pid) != pid:
+                return None
+        except ValueError:
+            return None
+
+    return interval_usec / 1000000
+
+
+class ServiceNotifier:
+    """ Sender of notifications to the service manager.
+
+        The notifier holds a Unix datagram socket connected to the
+        service manager's notification socket, so that each notification
+        costs a single system call. The socket is opened by `open`, and
+        remains open until `close`.
+
+        The file descriptor of the socket (`fileno`) needs to remain open
+        for the life of the daemon; `daemon.DaemonContext` preserves it
+        when closing open files.
+        """
+
+    def __init__(self, address):
+        """ Set up a new instance.
+
+            :param address: The address of the service manager's
+                notification socket; see `get_notify_socket_address`.
+            :return: ``None``.
+            """
+        self.address = address
+        self.socket = None
+
+    def __repr__(self):
+        """ Programmer text representation of this instance. """
+        text = "<{class_name} address={address!r}>".format(
+                class_name=type(self).__name__, address=self.address)
+        return text
+
+    @classmethod
+    def from_environment(cls, environ=None):
+        """ Make a notifier for the socket named in the environment.
+
+            :param environ: The mapping of environment variables to
+                query, or ``None`` to query `os.environ`.
+            :return: A new `ServiceNotifier` instance, or ``None`` if
+                there is no notification socket.
+            """
+        address = get_notify_socket_address(environ)
+        if address is None:
+            return None
+        return cls(address)
+
+    def open(self):
+        """ Open the socket to the service manager.
+
+            :return: ``None``.
+
+            If the socket is already open, do nothing.
+            """
+        if self.socket is not None:
+            return
+        notify_socket = socket.socket(
+                socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+        try:
+            notify_socket.connect(self.address)
+        except OSError:
+            notify_socket.close()
+            raise
+        self.socket = notify_socket
+
+    def close(self):
+        """ Close the socket to the service manager.
+
+            :return: ``None``.
+            """
+        if self.socket is None:
+            return
+        self.socket.close()
+        self.socket = None
+
+    def fileno(self):
+        """ Get the file descriptor of the socket, or ``None`` if closed. """
+        if self.socket is None:
+            return None
+        return self.socket.fileno()
+
+    def notify(self, **assignments):
+        """ Send a notification of state to the service manager.
+
+            :param assignments: Each keyword argument is a state
+                variable name and its value.
+            :return: ``None``.
+            :raise ValueError: If a value contains a newline.
+            :raise OSError: If the notification cannot be sent.
+
+            Send the assignments as a single datagram, opening the
+            socket if needed. For example, ``notify(READY=1,
+            STATUS="Serving")`` tells the service manager the daemon is
+            ready, with the status text “Serving”.
+            """
+        lines = []
+        for (name, value) in assignments.items():
+            value = str(value)
+            if "\n" in value:
+                raise ValueError(
+                        "newline in value for {name}: {value!r}".format(
+                            name=name, value=value))
+            lines.append("{name}={value}\n".format(name=name, value=value))
+        self.open()
+        self.socket.send("".join(lines).encode('utf-8'))
+
+    def notify_ready(self, status=None):
+        """ Notify the service manager that the daemon is ready.
+
+            :param status: Status text to send with the notification,
+                or ``None`` for no status.
+            :return: ``None``.
+            """
+        assignments = {'READY': 1}
+        if status is not None:
+            assignments['STATUS'] = status
+        self.notify(**assignments)
+
+    def notify_status(self, status):
+        """ Notify the service manager of the daemon's status text.
+
+            :param status: The status text, for display to the user.
+            :return: ``None``.
+            """
+        self.notify(STATUS=status)
+
+    def notify_watchdog(self):
+        """ Notify the service manager that the daemon is alive.
+
+            :return: ``None``.
+
+            The service manager expects this keep-alive regularly when
+            its watchdog is enabled for the service.
+            """
+        self.notify(WATCHDOG=1)
+
+    def notify_reloading(self):
+        """ Notify the service manager that the daemon is reloading.
+
+            :return: ``None``.
+
+            The notification includes the time of the monotonic clock,
+            as the service manager requires to match the reload request.
+            The daemon should call `notify_ready` when the reload is
+            complete.
+            """
+        monotonic_usec = time.clock_gettime_ns(time.CLOCK_MONOTONIC) // 1000
+        self.notify(RELOADING=1, MONOTONIC_USEC=monotonic_usec)
+
+    def notify_stopping(self):
+        """ Notify the service manager that the daemon is stopping.
+
+            :return: ``None``.
+            """
+        self.notify(STOPPING=1)
+
+
+class WatchdogHeartbeat:
+    """ Sender of regular watchdog keep-alive notifications.
+
+        A dedicated thread sends a keep-alive (``WATCHDOG=1``) to the
+        service manager every half `interval`, as the service manager
+        recommends. The beats follow a fixed schedule on the monotonic
+        clock, so a late beat does not delay the following beats; if the
+        thread falls behind by more than a period, it beats immediately
+        and resumes the schedule from then.
+
+        If a `liveness_check` is specified, it is called before each
+        beat; the beat is skipped unless it returns true. Skipping beats
+        lets the service manager detect a daemon that is running but
+        not working.
+        """
+
+    thread_name = "daemon-watchdog"
+
+    def __init__(self, notifier, interval, liveness_check=None):
+        """ Set up a new instance.
+
+            :param notifier: The `ServiceNotifier` to send the
+                keep-alive notifications.
+            :param interval: The watchdog interval (seconds); see
+                `get_watchdog_interval`.
+            :param liveness_check: A callable, taking no arguments, that
+                returns true if the daemon is working; or ``None`` to
+                always send the keep-alive.
+            :return: ``None``.
+            """
+        self.notifier = notifier
+        self.interval = interval
+        self.liveness_check = liveness_check
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def period(self):
+        """ The time (seconds) between keep-alive notifications. """
+        return self.interval / 2
+
+    @property
+    def is_running(self):
+        """ ``True`` if the heartbeat thread is running. """
+        return (self._thread is not None) and self._thread.is_alive()
+
+    def start(self):
+        """ Start sending the keep-alive notifications.
+
+            :return: ``None``.
+
+            The first keep-alive is sent immediately. If the heartbeat
+            is already running, do nothing.
+            """
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+                target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """ Stop sending the keep-alive notifications.
+
+            :param timeout: The time (seconds) to wait for the heartbeat
+                thread to end, or ``None`` to wait indefinitely.
+            :return: ``None``.
+            """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def beat(self):
+        """ Send one keep-alive, unless the liveness check fails.
+
+            :return: ``True`` if the keep-alive was sent; otherwise
+                ``False``.
+
+            An exception from the liveness check counts as failure. An
+            error sending the notification (for example, while the
+            service manager restarts) is ignored.
+            """
+        if self.liveness_check is not None:
+            try:
+                is_alive = self.liveness_check()
+            except Exception:
+                is_alive = False
+            if not is_alive:
+                return False
+        try:
+            self.notifier.notify_watchdog()
+        except OSError:
+            return False
+        return True
+
+    def _run(self):
+        """ Send keep-alive notifications until stopped. """
+        next_beat_time = time.monotonic()
+        while True:
+            self.beat()
+            next_beat_time += self.period
+            delay = next_beat_time - time.monotonic()
+            if delay < 0:
+                # Behind schedule; beat now, and resume from this time.
+                next_beat_time -= delay
+                delay = 0
+            if self._stop_event.wait(delay):
+                break
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
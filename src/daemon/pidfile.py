@@ -7,7 +7,23 @@
 
 """ Lockfile behaviour implemented via Unix PID files. """
 
-from lockfile.pidlockfile import PIDLockFile
+import fcntl
+import fnmatch
+import glob
+import math
+import os
+import select
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+import lockfile
+from lockfile.pidlockfile import (
+        PIDLockFile,
+        read_pid_from_pidfile,
+        )
 
 
 class TimeoutPIDLockFile(PIDLockFile):
@@ -19,17 +35,42 @@ class TimeoutPIDLockFile(PIDLockFile):
         * The `acquire_timeout` parameter to the initialiser will be
           used as the default `timeout` parameter for the `acquire`
           method.
+
+        * If the `wait_for_release` parameter to the initialiser is true,
+          the `acquire` method waits for the PID file to be released (see
+          `wait_for_pidfile_release`), instead of polling for it.
+
+        * The PID file also records the identity of the process (see
+          `format_pidfile_content`), so that the `is_stale` method can
+          tell whether the process is still running.
+
+        * If the `lease_interval` parameter to the initialiser is not
+          ``None``, the lock is a lease: while the lock is held, the
+          modification time of the PID file is refreshed at that interval
+          (see `LeaseHeartbeat` and `get_lease_age`).
+
+        * The `hand_over` method passes the lock to another process, which
+          then calls the `adopt` method.
         """
 
-    def __init__(self, path, acquire_timeout=None, *args, **kwargs):
+    def __init__(
+            self, path, acquire_timeout=None, *args,
+            wait_for_release=False, lease_interval=None, **kwargs):
         """ Set up the parameters of a TimeoutPIDLockFile.
 
             :param path: Filesystem path to the PID file.
             :param acquire_timeout: Value to use by default for the
                 `acquire` call.
+            :param wait_for_release: If true, `acquire` waits for events
+                that release the PID file, instead of polling.
+            :param lease_interval: The time (seconds) between refreshes
+                of the lease, or ``None`` to not refresh it.
             :return: ``None``.
             """
         self.acquire_timeout = acquire_timeout
+        self.wait_for_release = wait_for_release
+        self.lease_interval = lease_interval
+        self._lease = None
         super().__init__(path, *args, **kwargs)
 
     def acquire(self, timeout=None, *args, **kwargs):
@@ -43,10 +84,1143 @@ class TimeoutPIDLockFile(PIDLockFile):
             initialisation with the `acquire_timeout` parameter. It is
             passed to `PIDLockFile.acquire`; see that method for
             details.
+
+            If the `wait_for_release` attribute is true, and the timeout
+            is positive, then while another process holds the lock, wait
+            for it to release the PID file (see
+            `wait_for_pidfile_release`), then try again; until the
+            timeout expires. The lock is then acquired as soon as it is
+            released, instead of at the next poll.
+
+            Once the lock is acquired, the identity of this process is
+            added to the PID file, and the lease (if any) is refreshed
+            until the lock is released.
+            """
+        if timeout is None:
+            timeout = self.acquire_timeout
+        if self.wait_for_release and timeout is not None and timeout > 0:
+            self._acquire_on_release(timeout, *args, **kwargs)
+        else:
+            super().acquire(timeout, *args, **kwargs)
+        self._write_process_identity()
+        self._lease = start_lease(self._lease, self.path, self.lease_interval)
+
+    def release(self, *args, **kwargs):
+        """ Release the lock.
+
+            :return: ``None``.
+
+            Stop refreshing the lease (if any), then release the lock
+            with `PIDLockFile.release`; see that method for details.
+            """
+        self._lease = stop_lease(self._lease)
+        super().release(*args, **kwargs)
+
+    def _acquire_on_release(self, timeout, *args, **kwargs):
+        """ Acquire the lock, waiting for its release between attempts. """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                super().acquire(0, *args, **kwargs)
+                return
+            except lockfile.AlreadyLocked:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise lockfile.LockTimeout(
+                            "Timeout waiting to acquire lock for"
+                            " {path}".format(path=self.path))
+            wait_for_pidfile_release(self.path, remaining)
+
+    def _write_process_identity(self):
+        """ Write the PID file again, with the identity of this process.
+
+            :return: ``None``.
+
+            The PID file as created by `PIDLockFile` contains only the
+            process ID; the content is rewritten in place, keeping that
+            first line. The identity is advisory: if it cannot be
+            written, `is_stale` checks only whether the process exists.
+            """
+        content = format_pidfile_content(os.getpid()).encode('ascii')
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CLOEXEC)
+        except OSError:
+            return
+        try:
+            os.pwrite(fd, content, 0)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def is_stale(self):
+        """ ``True`` if the PID file names a process no longer running.
+
+            See `is_pidfile_stale`.
+            """
+        return is_pidfile_stale(self.path)
+
+    def hand_over(self, pid):
+        """ Hand the lock over to another process.
+
+            :param pid: The process ID of the new holder of the lock.
+            :return: ``None``.
+            :raise lockfile.NotMyLock: If this process does not hold the
+                lock.
+
+            Atomically replace the PID file with one containing `pid`
+            (see `replace_pidfile`). The PID file exists throughout, so
+            the lock is never released; and it names only one process,
+            so the lock is never held by two processes.
+
+            This process stops refreshing the lease (if any); the new
+            holder refreshes it once it adopts the lock (see `adopt`).
+            """
+        if not self.i_am_locking():
+            raise lockfile.NotMyLock(
+                    "{path} is not locked by this process".format(
+                        path=self.path))
+        self._lease = stop_lease(self._lease)
+        replace_pidfile(self.path, pid)
+
+    def adopt(self, fd=None):
+        """ Take over the lock, handed over to this process.
+
+            :param fd: A file descriptor received from the previous
+                holder, if any; it is not needed, so is closed.
+            :return: ``None``.
+
+            The previous holder has already written the PID file for
+            this process (see `hand_over`); start refreshing the lease
+            (if any).
+            """
+        if fd is not None:
+            os.close(fd)
+        self._lease = start_lease(self._lease, self.path, self.lease_interval)
+
+
+class FlockPIDLockFile:
+    """ Lockfile with default timeout, implemented as a kernel lock.
+
+        This has the same interface as `TimeoutPIDLockFile`, with the
+        following changes:
+
+        * The lock is an exclusive ‘flock(2)’ lock on the open PID file,
+          not the existence of the file. The kernel releases the lock when
+          the process holding it ends, even if killed by ``SIGKILL``; so a
+          PID file left behind does not prevent acquiring the lock, and
+          need not be broken.
+
+        * The `acquire` method waits for the lock in one blocking call,
+          instead of polling.
+
+        * While the lock is held, the PID file stays open; the `fileno`
+          method returns its file descriptor, which `DaemonContext` does
+          not close.
+
+        * Acquiring the lock again in a child process (for example, after
+          the daemon detaches) keeps the lock, and writes the child's
+          process ID to the PID file.
+
+        * The `is_stale` method asks the kernel whether the lock is held,
+          instead of examining the process named in the PID file.
+
+        * If the `lease_interval` parameter to the initialiser is not
+          ``None``, the modification time of the PID file is refreshed at
+          that interval while the lock is held, as for
+          `TimeoutPIDLockFile`.
+
+        This uses ‘flock(2)’ instead of POSIX record locks (‘fcntl(2)’
+        ``F_SETLK``): a ‘flock(2)’ lock belongs to the open file, so it is
+        kept by a child process across ‘fork(2)’, and is not released when
+        the process closes some other file descriptor for the PID file.
+        """
+
+    def __init__(self, path, acquire_timeout=None, lease_interval=None):
+        """ Set up the parameters of a FlockPIDLockFile.
+
+            :param path: Filesystem path to the PID file.
+            :param acquire_timeout: Value to use by default for the
+                `acquire` call.
+            :param lease_interval: The time (seconds) between refreshes
+                of the lease, or ``None`` to not refresh it.
+            :return: ``None``.
+            """
+        self.path = path
+        self.acquire_timeout = acquire_timeout
+        self.lease_interval = lease_interval
+        self._fd = None
+        self._pid = None
+        self._lease = None
+
+    def __enter__(self):
+        """ Enter the context: acquire the lock. """
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Exit the context: release the lock. """
+        self.release()
+
+    def fileno(self):
+        """ Get the file descriptor of the open PID file.
+
+            :return: The file descriptor on which the lock is held.
+            :raise ValueError: If the lock is not held.
+            """
+        if self._fd is None:
+            raise ValueError(
+                    "{path} is not locked".format(path=self.path))
+        return self._fd
+
+    def read_pid(self):
+        """ Get the process ID from the PID file, or ``None``. """
+        return read_pid_from_pidfile(self.path)
+
+    def is_locked(self):
+        """ ``True`` if any process holds the lock. """
+        if self.i_am_locking():
+            return True
+        try:
+            fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+        return False
+
+    def i_am_locking(self):
+        """ ``True`` if this process holds the lock. """
+        return (self._fd is not None and self._pid == os.getpid())
+
+    def acquire(self, timeout=None):
+        """ Acquire the lock.
+
+            :param timeout: Maximum time (seconds) to wait for the lock;
+                ``None`` to wait indefinitely, or zero (or less) to not
+                wait.
+            :return: ``None``.
+            :raise lockfile.LockTimeout: If the timeout expires.
+            :raise lockfile.AlreadyLocked: If the timeout is not positive,
+                and another process holds the lock.
+            :raise lockfile.LockFailed: If the PID file cannot be opened.
+
+            The `timeout` defaults to the value set during
+            initialisation with the `acquire_timeout` parameter.
+
+            The lock is held on an open file of the PID file; when it is
+            acquired, the PID file is rewritten to contain the current
+            process ID. If this instance already holds the lock, in this
+            process or in the process from which this one was forked,
+            only the process ID is written.
             """
         if timeout is None:
             timeout = self.acquire_timeout
-        super().acquire(timeout, *args, **kwargs)
+        if self._fd is not None:
+            self._write_pid(os.getpid())
+            self._lease = start_lease(
+                    self._lease, self._fd, self.lease_interval)
+            return
+
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + max(timeout, 0)
+        while True:
+            try:
+                fd = os.open(
+                        self.path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC,
+                        0o644)
+            except OSError as exc:
+                error = lockfile.LockFailed(
+                        "failed to create {path}".format(path=self.path))
+                raise error from exc
+            try:
+                remaining = None
+                if deadline is not None:
+                    remaining = max(deadline - time.monotonic(), 0)
+                if not lock_file_descriptor(fd, remaining):
+                    if timeout is not None and timeout > 0:
+                        raise lockfile.LockTimeout(
+                                "Timeout waiting to acquire lock for"
+                                " {path}".format(path=self.path))
+                    raise lockfile.AlreadyLocked(
+                            "{path} is already locked".format(
+                                path=self.path))
+                if not is_same_file(fd, self.path):
+                    # The previous holder removed the PID file while
+                    # this process waited; lock the new one instead.
+                    os.close(fd)
+                    continue
+            except BaseException:
+                os.close(fd)
+                raise
+            break
+
+        self._fd = fd
+        self._write_pid(os.getpid())
+        self._lease = start_lease(self._lease, self._fd, self.lease_interval)
+
+    def release(self):
+        """ Release the lock.
+
+            :return: ``None``.
+            :raise lockfile.NotLocked: If no process holds the lock.
+            :raise lockfile.NotMyLock: If this process does not hold the
+                lock.
+
+            Stop refreshing the lease (if any), remove the PID file, then
+            close it, which releases the lock.
+            """
+        if not self.i_am_locking():
+            if not self.is_locked():
+                raise lockfile.NotLocked(
+                        "{path} is not locked".format(path=self.path))
+            raise lockfile.NotMyLock(
+                    "{path} is locked, but not by me".format(
+                        path=self.path))
+        self._lease = stop_lease(self._lease)
+        fd = self._fd
+        self._fd = None
+        self._pid = None
+        try:
+            if is_same_file(fd, self.path):
+                os.remove(self.path)
+        finally:
+            os.close(fd)
+
+    def is_stale(self):
+        """ ``True`` if the PID file exists, but no process holds the lock.
+            """
+        return (os.path.exists(self.path) and not self.is_locked())
+
+    def break_lock(self):
+        """ Remove the PID file, if no process holds the lock.
+
+            :return: ``None``.
+
+            A kernel lock cannot be broken: its holder releases it by
+            ending. If another process holds the lock, the PID file is
+            left in place.
+
+            The lock is taken while the PID file is removed, so that no
+            other process can acquire it in between.
+            """
+        try:
+            fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        except FileNotFoundError:
+            return
+        try:
+            if not _try_lock_file_descriptor(fd):
+                return
+            if is_same_file(fd, self.path):
+                os.remove(self.path)
+        finally:
+            os.close(fd)
+
+    def hand_over(self, pid):
+        """ Hand the lock over to another process.
+
+            :param pid: The process ID of the new holder of the lock.
+            :return: ``None``.
+            :raise lockfile.NotMyLock: If this process does not hold the
+                lock.
+
+            Write `pid` to the PID file. The other process then takes the
+            lock by adopting the file descriptor of the PID file (see
+            `fileno` and `adopt`); the lock is held throughout. This
+            process stops refreshing the lease (if any).
+            """
+        if not self.i_am_locking():
+            raise lockfile.NotMyLock(
+                    "{path} is not locked by this process".format(
+                        path=self.path))
+        self._lease = stop_lease(self._lease)
+        self._write_pid(pid)
+
+    def adopt(self, fd=None):
+        """ Take over the lock, held on a PID file handed over.
+
+            :param fd: The file descriptor of the locked PID file,
+                received from the previous holder (see `hand_over`).
+            :return: ``None``.
+            :raise ValueError: If no file descriptor is handed over.
+            """
+        if fd is None:
+            raise ValueError(
+                    "No open PID file handed over for {path}".format(
+                        path=self.path))
+        if self._fd is not None and self._fd != fd:
+            os.close(self._fd)
+        self._fd = fd
+        self._pid = os.getpid()
+        self._lease = start_lease(self._lease, self._fd, self.lease_interval)
+
+    def _write_pid(self, pid):
+        """ Write `pid` to the open PID file.
+
+            :param pid: The process ID to write.
+            :return: ``None``.
+
+            The content is overwritten, then the file truncated, so a
+            reader never sees an empty PID file.
+            """
+        content = format_pidfile_content(pid).encode('ascii')
+        os.pwrite(self._fd, content, 0)
+        os.ftruncate(self._fd, len(content))
+        self._pid = pid
+
+
+class LeaseHeartbeat:
+    """ Refresher of the lease on a PID file.
+
+        A dedicated thread sets the modification time of the PID file to
+        the current time, every `interval`. A reader then knows from one
+        ‘stat(2)’ of the PID file whether its holder is alive: the lease
+        has expired if it was not refreshed recently (see
+        `get_lease_age`), without signalling the process.
+
+        The refreshes follow a fixed schedule on the monotonic clock, as
+        for `daemon.notify.WatchdogHeartbeat`. Each refresh is one
+        ‘utimensat(2)’ call on a file descriptor or path prepared in
+        advance; nothing is formatted or written, and the main thread
+        never waits for it.
+        """
+
+    thread_name = "daemon-pidfile-lease"
+
+    def __init__(self, target, interval):
+        """ Set up a new instance.
+
+            :param target: The PID file to refresh: an open file
+                descriptor, or a filesystem path.
+            :param interval: The time (seconds) between refreshes.
+            :return: ``None``.
+            """
+        self.target = target
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        """ ``True`` if the lease thread is running. """
+        return (self._thread is not None) and self._thread.is_alive()
+
+    def start(self):
+        """ Start refreshing the lease.
+
+            :return: ``None``.
+
+            The first refresh is immediate. If the lease thread is
+            already running, do nothing.
+            """
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+                target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """ Stop refreshing the lease.
+
+            :param timeout: The time (seconds) to wait for the lease
+                thread to end, or ``None`` to wait indefinitely.
+            :return: ``None``.
+            """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self):
+        """ Refresh the lease once.
+
+            :return: ``True`` if the lease was refreshed; otherwise
+                ``False``.
+
+            An error (for example, if the PID file is being removed) is
+            ignored.
+            """
+        try:
+            os.utime(self.target)
+        except OSError:
+            return False
+        return True
+
+    def _run(self):
+        """ Refresh the lease until stopped. """
+        next_refresh_time = time.monotonic()
+        while True:
+            self.refresh()
+            next_refresh_time += self.interval
+            delay = next_refresh_time - time.monotonic()
+            if delay < 0:
+                # Behind schedule; refresh now, and resume from this time.
+                next_refresh_time -= delay
+                delay = 0
+            if self._stop_event.wait(delay):
+                break
+
+
+def start_lease(lease, target, interval):
+    """ Start refreshing the lease on a PID file, if not already.
+
+        :param lease: The current `LeaseHeartbeat`, or ``None``.
+        :param target: The PID file to refresh (see `LeaseHeartbeat`).
+        :param interval: The time (seconds) between refreshes, or
+            ``None`` to not refresh the lease.
+        :return: The running `LeaseHeartbeat`, or ``None``.
+
+        A lease thread does not survive ‘fork(2)’; in a child process,
+        a new one is started.
+        """
+    if interval is None:
+        return None
+    if lease is None or not lease.is_running or lease.target != target:
+        if lease is not None:
+            lease.stop()
+        lease = LeaseHeartbeat(target, interval)
+        lease.start()
+    return lease
+
+
+def stop_lease(lease):
+    """ Stop refreshing the lease on a PID file, if any.
+
+        :param lease: The current `LeaseHeartbeat`, or ``None``.
+        :return: ``None``.
+        """
+    if lease is not None:
+        lease.stop()
+    return None
+
+
+def get_lease_age(pidfile_path):
+    """ Get the time since the lease on the PID file was refreshed.
+
+        :param pidfile_path: Filesystem path to the PID file.
+        :return: The time (seconds) since the PID file was last modified,
+            or ``None`` if the PID file does not exist.
+
+        The PID file's modification time is compared with the system
+        clock (`time.time`), which sets it.
+        """
+    try:
+        pidfile_stat = os.stat(pidfile_path)
+    except FileNotFoundError:
+        return None
+    return time.time() - pidfile_stat.st_mtime
+
+
+def is_lease_expired(pidfile_path, timeout):
+    """ Determine whether the lease on the PID file has expired.
+
+        :param pidfile_path: Filesystem path to the PID file.
+        :param timeout: The maximum age (seconds) of a current lease;
+            this should allow for several lease intervals, so that a
+            late refresh is not mistaken for a dead holder.
+        :return: ``True`` if there is no PID file, or it was not
+            refreshed within `timeout`; otherwise ``False``.
+        """
+    age = get_lease_age(pidfile_path)
+    return (age is None or age > timeout)
+
+
+class _LockTimeoutAlarm(Exception):
+    """ Exception raised to interrupt a wait for a lock. """
+
+
+def lock_file_descriptor(fd, timeout=None):
+    """ Acquire an exclusive ‘flock(2)’ lock on file descriptor `fd`.
+
+        :param fd: The file descriptor to lock.
+        :param timeout: Maximum time (seconds) to wait for the lock;
+            ``None`` to wait indefinitely, or zero to not wait.
+        :return: ``True`` if the lock is acquired, otherwise ``False``.
+
+        The wait is one blocking ‘flock(2)’ call, which returns as soon as
+        the lock is released. With a timeout, in the main thread, the call
+        is interrupted by ``SIGALRM`` from an interval timer (see
+        ‘setitimer(2)’); the previous handler of ``SIGALRM`` is restored
+        afterward. Where that is not possible (in another thread, or if the
+        interval timer is in use), the lock is instead polled.
+        """
+    if timeout is None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return True
+    if _try_lock_file_descriptor(fd):
+        return True
+    if timeout <= 0:
+        return False
+
+    can_use_alarm = (
+            threading.current_thread() is threading.main_thread()
+            and signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0))
+    if not can_use_alarm:
+        return _poll_lock_file_descriptor(fd, timeout)
+
+    alarm_state = {'armed': True}
+
+    def handle_alarm(signal_number, stack_frame):
+        if alarm_state['armed']:
+            alarm_state['armed'] = False
+            raise _LockTimeoutAlarm()
+
+    previous_handler = signal.signal(signal.SIGALRM, handle_alarm)
+    try:
+        try:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            alarm_state['armed'] = False
+        except _LockTimeoutAlarm:
+            pass
+    finally:
+        alarm_state['armed'] = False
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+    # The alarm may have interrupted the wait just as the lock was
+    # acquired; a lock already held on `fd` is acquired again at once.
+    return _try_lock_file_descriptor(fd)
+
+
+lock_poll_interval = 0.01
+""" Interval (seconds) between attempts when polling a lock. """
+
+
+def _try_lock_file_descriptor(fd):
+    """ Try to lock `fd` without waiting; return ``True`` if locked. """
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _poll_lock_file_descriptor(fd, timeout):
+    """ Poll for the lock on `fd`, until locked or `timeout` expires. """
+    deadline = time.monotonic() + timeout
+    while True:
+        if _try_lock_file_descriptor(fd):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(lock_poll_interval, remaining))
+
+
+inotify_release_events = (
+        0x00000004     # ‘IN_ATTRIB’: includes the file being unlinked.
+        | 0x00000008   # ‘IN_CLOSE_WRITE’
+        | 0x00000400   # ‘IN_DELETE_SELF’
+        | 0x00000800)  # ‘IN_MOVE_SELF’
+""" Events of ‘inotify(7)’ that may release a PID file. """
+
+
+def wait_for_pidfile_release(pidfile_path, timeout=None):
+    """ Wait for the holder of the PID file to release it.
+
+        :param pidfile_path: Filesystem path to the PID file.
+        :param timeout: Maximum time (seconds) to wait, or ``None`` to
+            wait indefinitely.
+        :return: ``True`` if the PID file may have been released;
+            ``False`` if the timeout expired.
+
+        Wait until the PID file is written, removed, or replaced (watched
+        with ‘inotify(7)’), or the process named in the PID file ends
+        (watched with a process file descriptor; see ‘pidfd_open(2)’);
+        whichever is first. This takes no time between the event and
+        the return, and no polling while waiting.
+
+        Where neither is available, wait for `lock_poll_interval`.
+        """
+    fds = []
+    try:
+        try:
+            watch_fd = _open_inotify_watch(
+                    pidfile_path, inotify_release_events)
+        except FileNotFoundError:
+            # The PID file is already removed.
+            return True
+        if watch_fd is not None:
+            fds.append(watch_fd)
+        holder_fd = _open_holder_pidfd(pidfile_path)
+        if holder_fd is not None:
+            fds.append(holder_fd)
+
+        if not fds:
+            delay = lock_poll_interval
+            if timeout is not None:
+                delay = min(delay, timeout)
+            time.sleep(delay)
+            return True
+
+        poller = select.poll()
+        for fd in fds:
+            poller.register(fd, select.POLLIN)
+        poll_timeout = None
+        if timeout is not None:
+            poll_timeout = math.ceil(max(timeout, 0) * 1000)
+        return bool(poller.poll(poll_timeout))
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def _open_holder_pidfd(pidfile_path):
+    """ Open a process file descriptor for the process in the PID file.
+
+        :param pidfile_path: Filesystem path to the PID file.
+        :return: The process file descriptor, or ``None`` if there is no
+            such process, or process file descriptors are not available.
+        """
+    if not hasattr(os, 'pidfd_open'):
+        return None
+    pid = read_pid_from_pidfile(pidfile_path)
+    if pid is None or pid <= 0:
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        # No such process, or no support from the running kernel.
+        return None
+
+
+def _make_inotify_functions():
+    """ Make functions to invoke the ‘inotify(7)’ system calls.
+
+        :return: A tuple (`inotify_init1`, `inotify_add_watch`) of
+            functions that invoke the system calls, or ``None`` if the
+            system calls are not available on this platform.
+
+        Each function raises ``OSError`` if the system call fails.
+        """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+    except (ImportError, OSError):
+        # No foreign function interface to the C library.
+        return None
+    if not all(
+            hasattr(libc, name)
+            for name in ['inotify_init1', 'inotify_add_watch']):
+        return None
+
+    libc_inotify_init1 = libc.inotify_init1
+    libc_inotify_init1.argtypes = [ctypes.c_int]
+    libc_inotify_init1.restype = ctypes.c_int
+    libc_inotify_add_watch = libc.inotify_add_watch
+    libc_inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc_inotify_add_watch.restype = ctypes.c_int
+
+    def check_result(result):
+        if result < 0:
+            exc_errno = ctypes.get_errno()
+            raise OSError(exc_errno, os.strerror(exc_errno))
+        return result
+
+    def inotify_init1(flags):
+        """ Invoke ‘inotify_init1(2)’; return the new file descriptor. """
+        return check_result(libc_inotify_init1(flags))
+
+    def inotify_add_watch(fd, path, mask):
+        """ Invoke ‘inotify_add_watch(2)’; return the watch descriptor. """
+        return check_result(
+                libc_inotify_add_watch(fd, os.fsencode(path), mask))
+
+    return (inotify_init1, inotify_add_watch)
+
+
+_inotify_functions = None
+_inotify_functions_are_known = False
+
+
+def _get_inotify_functions():
+    """ Get the functions to invoke the ‘inotify(7)’ system calls.
+
+        :return: The functions made by `_make_inotify_functions`, or
+            ``None`` if the system calls are not available.
+
+        The functions are made on the first call, and remembered for
+        subsequent calls.
+        """
+    global _inotify_functions, _inotify_functions_are_known
+    if not _inotify_functions_are_known:
+        _inotify_functions = _make_inotify_functions()
+        _inotify_functions_are_known = True
+    return _inotify_functions
+
+
+def _open_inotify_watch(path, mask):
+    """ Open an ‘inotify(7)’ instance, watching `path` for `mask` events.
+
+        :param path: Filesystem path of the file to watch.
+        :param mask: The events to watch for.
+        :return: The file descriptor of the ‘inotify(7)’ instance, or
+            ``None`` if ‘inotify(7)’ is not available.
+        :raise FileNotFoundError: If the file does not exist.
+        """
+    inotify_functions = _get_inotify_functions()
+    if inotify_functions is None:
+        return None
+    (inotify_init1, inotify_add_watch) = inotify_functions
+    try:
+        fd = inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+    except OSError:
+        # Out of ‘inotify(7)’ instances, or not supported by the kernel.
+        return None
+    try:
+        inotify_add_watch(fd, path, mask)
+    except FileNotFoundError:
+        os.close(fd)
+        raise
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def is_same_file(fd, path):
+    """ ``True`` if file descriptor `fd` refers to the file at `path`. """
+    try:
+        path_stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    fd_stat = os.fstat(fd)
+    return (
+            (fd_stat.st_dev, fd_stat.st_ino)
+            == (path_stat.st_dev, path_stat.st_ino))
+
+
+process_stat_path_template = "/proc/{pid}/stat"
+boot_id_path = "/proc/sys/kernel/random/boot_id"
+
+
+def get_process_start_time(pid):
+    """ Get the start time of process `pid`.
+
+        :param pid: The process ID.
+        :return: The time the process started, in clock ticks after the
+            system boot (field 22 of ‘/proc/PID/stat’; see ‘proc(5)’); or
+            ``None`` if there is no such process, or no such field.
+        """
+    path = process_stat_path_template.format(pid=pid)
+    try:
+        with open(path, 'rb') as infile:
+            content = infile.read()
+    except OSError:
+        return None
+    return _parse_process_start_time(content)
+
+
+def _parse_process_start_time(content):
+    """ Parse the start time from the content of ‘/proc/PID/stat’. """
+    # The command name (field 2) is in parentheses, and may contain any
+    # character; the fields after the last ‘)’ start with field 3.
+    fields = content[content.rfind(b")") + 1:].split()
+    try:
+        return int(fields[22 - 3])
+    except (IndexError, ValueError):
+        return None
+
+
+_boot_id = None
+
+
+def get_boot_id():
+    """ Get the identifier of the current boot of the system.
+
+        :return: The boot ID (see ‘random(4)’), or ``None`` if it is not
+            available.
+
+        The boot ID is read once, and remembered for subsequent calls.
+        """
+    global _boot_id
+    if _boot_id is None:
+        try:
+            with open(boot_id_path) as infile:
+                _boot_id = infile.read().strip() or None
+        except OSError:
+            pass
+    return _boot_id
+
+
+def format_pidfile_content(pid):
+    """ Format the content of a PID file for process `pid`.
+
+        :param pid: The process ID.
+        :return: The text of the PID file.
+
+        The first line is the process ID, as written by ‘lockfile’. If
+        available, the second line is the identity of the process: its
+        start time (see `get_process_start_time`) and the boot ID (see
+        `get_boot_id`), separated by a space. Together with the process
+        ID, these identify the process even if its ID is later reused.
+        """
+    content = "{pid}\n".format(pid=pid)
+    start_time = get_process_start_time(pid)
+    boot_id = get_boot_id()
+    if start_time is not None and boot_id is not None:
+        content += "{start_time} {boot_id}\n".format(
+                start_time=start_time, boot_id=boot_id)
+    return content
+
+
+def read_pidfile_record(pidfile_path):
+    """ Read the process ID and identity from the PID file.
+
+        :param pidfile_path: Filesystem path to the PID file.
+        :return: A tuple (`pid`, `start_time`, `boot_id`), with ``None``
+            for `start_time` and `boot_id` if the PID file does not record
+            them (see `format_pidfile_content`); or ``None`` if the PID
+            file does not exist, or does not contain a process ID.
+        """
+    try:
+        with open(pidfile_path, 'rb') as infile:
+            content = infile.read(4096)
+    except OSError:
+        return None
+    return _parse_pidfile_record(content)
+
+
+def _parse_pidfile_record(content):
+    """ Parse the content of a PID file; see `read_pidfile_record`. """
+    lines = content.splitlines()
+    try:
+        pid = int(lines[0])
+    except (IndexError, ValueError):
+        return None
+
+    start_time = boot_id = None
+    words = lines[1].split() if len(lines) > 1 else []
+    if len(words) == 2:
+        try:
+            start_time = int(words[0])
+            boot_id = words[1].decode('ascii')
+        except (ValueError, UnicodeDecodeError):
+            start_time = boot_id = None
+    return (pid, start_time, boot_id)
+
+
+def is_pidfile_stale(pidfile_path):
+    """ Determine whether a PID file is stale.
+
+        :param pidfile_path: Filesystem path to the PID file.
+        :return: ``True`` iff the PID file names a process that is no
+            longer running; otherwise ``False``.
+
+        If the PID file records the identity of the process (see
+        `format_pidfile_content`), the PID file is stale if it was written
+        during a previous boot, or if the process with that ID has a
+        different start time: the ID now belongs to a different process.
+        This takes two small reads, and sends no signal.
+
+        Otherwise, the PID file is stale if no process has that ID.
+
+        A PID file that does not exist, or does not contain a process
+        ID, is not stale.
+        """
+    record = read_pidfile_record(pidfile_path)
+    if record is None:
+        return False
+    (pid, start_time, boot_id) = record
+
+    current_boot_id = get_boot_id()
+    if start_time is not None and current_boot_id is not None:
+        if boot_id != current_boot_id:
+            return True
+        return (get_process_start_time(pid) != start_time)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        # The process exists, but belongs to another user.
+        pass
+    return False
+
+
+def replace_pidfile(pidfile_path, pid):
+    """ Atomically replace the PID file with one containing `pid`.
+
+        :param pidfile_path: Filesystem path to the PID file.
+        :param pid: The process ID to write.
+        :return: ``None``.
+
+        Write the new PID file to a temporary file in the same directory,
+        then rename it over the existing PID file. A reader sees either
+        the old or the new PID file, never a missing or partial one.
+        """
+    (directory, name) = os.path.split(os.path.abspath(pidfile_path))
+    (temp_fd, temp_path) = tempfile.mkstemp(
+            prefix=".{name}.".format(name=name), dir=directory)
+    try:
+        with os.fdopen(temp_fd, 'w') as temp_file:
+            # Use the same format and permissions as ‘lockfile’.
+            os.fchmod(temp_file.fileno(), 0o644)
+            temp_file.write(format_pidfile_content(pid))
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, pidfile_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+proc_locks_path = "/proc/locks"
+scan_pidfile_pattern = "*.pid"
+
+
+def get_file_lock_holders():
+    """ Get the processes holding locks on files, for all files.
+
+        :return: A `dict` mapping each locked file, as a tuple
+            (`st_dev`, `st_ino`), to the ID of the process holding the
+            lock; or ``None`` if the system does not report file locks.
+
+        The locks are read from ‘/proc/locks’ (see ‘proc(5)’), in one
+        read for all files. Requests waiting for a lock are ignored. A
+        lock without a process (an open file description lock) is held
+        by process ``None``.
+        """
+    try:
+        with open(proc_locks_path, 'rb') as infile:
+            content = infile.read()
+    except OSError:
+        return None
+    holders = {}
+    for line in content.splitlines():
+        fields = line.split()
+        if len(fields) < 6 or fields[1] == b"->":
+            continue
+        try:
+            pid = int(fields[4])
+            (major, minor, inode) = fields[5].split(b":")
+            file_key = (os.makedev(int(major, 16), int(minor, 16)), int(inode))
+        except ValueError:
+            continue
+        holders.setdefault(file_key, pid if pid > 0 else None)
+    return holders
+
+
+def _read_small_file(path):
+    """ Read a small file in one call, without a Python file object.
+
+        :param path: Filesystem path to the file.
+        :return: A tuple (`content`, `stat`) of the first 4096 bytes of
+            the file, and its `os.stat_result`.
+        :raise OSError: If the file cannot be read.
+        """
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        return (os.read(fd, 4096), os.fstat(fd))
+    finally:
+        os.close(fd)
+
+
+def _match_pidfile_paths(pattern):
+    """ Get the paths of the PID files to scan; see `scan_pidfiles`. """
+    if os.path.isdir(pattern):
+        try:
+            entries = os.scandir(pattern)
+        except OSError:
+            return []
+        with entries:
+            paths = [
+                    entry.path for entry in entries
+                    if fnmatch.fnmatch(entry.name, scan_pidfile_pattern)]
+    else:
+        paths = glob.glob(pattern)
+    return sorted(paths)
+
+
+def scan_pidfiles(pattern):
+    """ Get the status of many PID files, in one pass.
+
+        :param pattern: A directory, to scan each ‘*.pid’ file in it; or
+            a glob pattern (see `glob.glob`) matching the PID files.
+        :return: A `list` of the status of each PID file, in order of
+            path. Each status is a `dict` with the items:
+
+            * ``path``: the filesystem path to the PID file.
+            * ``pid``: the process ID in the PID file, or ``None`` if the
+              PID file cannot be read or does not contain one.
+            * ``alive``: ``True`` iff that process is running.
+            * ``uptime``: the time (seconds) since that process started,
+              or ``None`` if it is not running.
+            * ``lock_holder``: the ID of the process holding a kernel lock
+              on the PID file (see `FlockPIDLockFile`), or ``None``.
+            * ``lease_age``: the time (seconds) since the PID file was
+              modified (see `get_lease_age`), or ``None``.
+
+        The facts common to all PID files are read once: the file locks
+        (see `get_file_lock_holders`), the boot ID, and the clocks. Then
+        each PID file is read, with its metadata, in one open file; and
+        the process it names is checked with one read of
+        ‘/proc/PID/stat’, as for `is_pidfile_stale`. No process is
+        signalled, and no lock is taken.
+        """
+    paths = _match_pidfile_paths(pattern)
+    lock_holders = get_file_lock_holders() or {}
+    current_boot_id = get_boot_id()
+    clock_ticks_per_second = os.sysconf('SC_CLK_TCK')
+    now = time.time()
+    boot_clock = getattr(time, 'CLOCK_BOOTTIME', None)
+    uptime_now = (
+            None if boot_clock is None else time.clock_gettime(boot_clock))
+    start_times = {}
+
+    statuses = []
+    for path in paths:
+        status = {
+                'path': path, 'pid': None, 'alive': False, 'uptime': None,
+                'lock_holder': None, 'lease_age': None,
+                }
+        statuses.append(status)
+        try:
+            (content, pidfile_stat) = _read_small_file(path)
+        except OSError:
+            continue
+        status['lock_holder'] = lock_holders.get(
+                (pidfile_stat.st_dev, pidfile_stat.st_ino))
+        status['lease_age'] = now - pidfile_stat.st_mtime
+        record = _parse_pidfile_record(content)
+        if record is None:
+            continue
+        (pid, recorded_start_time, recorded_boot_id) = record
+        status['pid'] = pid
+
+        if pid not in start_times:
+            try:
+                (stat_content, __) = _read_small_file(
+                        process_stat_path_template.format(pid=pid))
+                start_times[pid] = _parse_process_start_time(stat_content)
+            except OSError:
+                start_times[pid] = None
+        start_time = start_times[pid]
+        if start_time is None:
+            continue
+        if recorded_start_time is not None and current_boot_id is not None:
+            if (
+                    recorded_boot_id != current_boot_id
+                    or recorded_start_time != start_time):
+                continue
+        status['alive'] = True
+        if uptime_now is not None:
+            status['uptime'] = max(
+                    uptime_now - (start_time / clock_ticks_per_second), 0)
+
+    return statuses
 
 
 # Copyright © 2008–2024 Ben Finney <ben+python@benfinney.id.au>
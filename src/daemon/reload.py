@@ -0,0 +1,118 @@
+# daemon/reload.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" In-place reload of a daemon's configuration.
+
+    Instead of restarting when asked to reload (conventionally, on the
+    ``SIGHUP`` signal), the daemon calls reload callbacks that re-read
+    its configuration, reopen its log files, and so on, keeping the rest
+    of its state.
+    """
+
+import sys
+import time
+import traceback
+
+
+class Reloader:
+    """ State and actions of in-place reloads.
+
+        Each reload calls the reload callbacks in order of registration.
+        A reload requested while another is in progress (for example, by
+        a signal arriving while the callbacks run) is not started at
+        once; instead, one more reload is done when the current one
+        ends. A burst of requests thus causes at most one further reload.
+        """
+
+    def __init__(self, begin=None, end=None):
+        """ Set up a new instance.
+
+            :param begin: A callable, expecting no arguments, to call
+                before each reload; or ``None``.
+            :param end: A callable, expecting the duration of the reload
+                (seconds), to call after each reload; or ``None``.
+            """
+        self.begin = begin
+        self.end = end
+        self.count = 0
+        self.last_duration = None
+
+        self._reload_callbacks = []
+        self._is_reloading = False
+        self._is_pending = False
+
+    @property
+    def is_reloading(self):
+        """ ``True`` iff a reload is in progress. """
+        return self._is_reloading
+
+    def add_reload_callback(self, callback):
+        """ Register `callback` to be called on each reload.
+
+            :param callback: A callable object, expecting no arguments.
+            :return: ``None``.
+            """
+        self._reload_callbacks.append(callback)
+
+    def request(self):
+        """ Request a reload.
+
+            :return: ``True`` if this call did the reload; ``False`` if a
+                reload in progress will be repeated instead.
+
+            If no reload is in progress, reload; then, while another
+            reload was requested meanwhile, reload again.
+            """
+        self._is_pending = True
+        if self._is_reloading:
+            return False
+        self._is_reloading = True
+        try:
+            while self._is_pending:
+                self._is_pending = False
+                self.reload()
+        finally:
+            self._is_reloading = False
+        return True
+
+    def reload(self):
+        """ Call each reload callback, in order of registration.
+
+            :return: ``None``.
+
+            Call the `begin` function before, and the `end` function
+            with the duration after, the reload callbacks. An exception
+            raised by a callback is reported to `sys.stderr`, and the
+            remaining callbacks are called.
+            """
+        if self.begin is not None:
+            self.begin()
+        start = time.monotonic()
+        for callback in list(self._reload_callbacks):
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+        self.last_duration = time.monotonic() - start
+        self.count += 1
+        if self.end is not None:
+            self.end(self.last_duration)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,137 @@
+# daemon/shutdown.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Graceful shutdown of a daemon, with a deadline.
+
+    Instead of ending at once when asked to terminate, the daemon can
+    stop taking new work, finish (“drain”) the work in progress, then
+    end. A deadline bounds the time this takes.
+    """
+
+import sys
+import threading
+import time
+import traceback
+
+
+class GracefulShutdown:
+    """ State and actions of a graceful shutdown.
+
+        The shutdown `event` is set when the shutdown begins. Code doing
+        work checks ``event.is_set()``, which takes no lock, to decide
+        whether to take more work; or waits on the event.
+
+        When the shutdown begins, the drain callbacks are called in
+        order of registration, in a dedicated thread. If the shutdown
+        has a deadline, and the deadline passes before `cancel` is
+        called, the `expire` function is called.
+        """
+
+    thread_name = "daemon-drain"
+
+    def __init__(self):
+        """ Set up a new instance. """
+        self.event = threading.Event()
+        self.deadline = None
+
+        self._drain_callbacks = []
+        self._thread = None
+        self._timer = None
+
+    @property
+    def is_requested(self):
+        """ ``True`` iff the shutdown has begun. """
+        return self.event.is_set()
+
+    def add_drain_callback(self, callback):
+        """ Register `callback` to be called when the shutdown begins.
+
+            :param callback: A callable object, expecting no arguments.
+            :return: ``None``.
+            """
+        self._drain_callbacks.append(callback)
+
+    def begin(self, timeout=None, expire=None):
+        """ Begin the shutdown.
+
+            :param timeout: The time (seconds) allowed for the shutdown,
+                or ``None`` for no deadline.
+            :param expire: The function to call, with no arguments, if
+                the deadline passes; or ``None`` to do nothing.
+            :return: ``True`` if this call began the shutdown; ``False``
+                if the shutdown had already begun.
+
+            Set the shutdown `event`, start the deadline timer, then
+            call the drain callbacks in a dedicated thread.
+            """
+        if self.event.is_set():
+            return False
+        self.event.set()
+
+        if timeout is not None:
+            self.deadline = time.monotonic() + timeout
+            if expire is not None:
+                self._timer = threading.Timer(timeout, expire)
+                self._timer.daemon = True
+                self._timer.start()
+
+        self._thread = threading.Thread(
+                target=self.drain, name=self.thread_name, daemon=True)
+        self._thread.start()
+        return True
+
+    def drain(self):
+        """ Call each drain callback, in order of registration.
+
+            :return: ``None``.
+
+            An exception raised by a callback is reported to `sys.stderr`,
+            and the remaining callbacks are called.
+            """
+        for callback in list(self._drain_callbacks):
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+
+    def wait_drained(self, timeout=None):
+        """ Wait until the drain callbacks have all returned.
+
+            :param timeout: Maximum time (seconds) to wait, or ``None`` to
+                wait indefinitely.
+            :return: ``True`` iff the drain callbacks have all returned.
+            """
+        if self._thread is None:
+            return False
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        """ Cancel the deadline of the shutdown, if any.
+
+            :return: ``None``.
+
+            The shutdown `event` remains set.
+            """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,309 @@
+# daemon/signals.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Dispatch of signals from a dedicated thread.
+
+    Python calls a signal handler only in the main thread, between
+    bytecode instructions. If the main thread is in a long call to
+    compiled code (for example, hashing or compressing a large buffer, or
+    a numerical library operation), the handler is delayed until that call
+    returns.
+
+    A `SignalDispatcher` instead blocks the signals, and waits for them
+    (with ‘sigwaitinfo(2)’) in a dedicated thread, which calls the handler
+    as soon as the signal arrives. The handler still needs the global
+    interpreter lock (GIL), so this helps only while the main thread's
+    call releases that lock. If the main thread holds the GIL in a long
+    computation that checks for signals, the dispatcher thread instead
+    waits longer than the main thread would; measure the program's own
+    workload (see ‘test/benchmark_signal_latency.py’).
+    """
+
+import _thread
+import contextlib
+import os
+import signal
+import sys
+import threading
+
+
+class SignalDispatcher:
+    """ Dispatcher of signals to their handlers from a dedicated thread.
+
+        Each handler is called in the dispatcher thread, with arguments
+        (`signal_number`, ``None``). If the handler raises an exception
+        (for example, `DaemonContext.terminate` raises ``SystemExit``),
+        the exception is raised in the main thread instead, as soon as
+        the main thread next runs Python code.
+
+        A child process inherits the signal mask of the thread that
+        starts it, and would block the dispatched signals with no thread
+        to receive them. So:
+
+        * In a child forked with `os.fork`, the dispatched signals are
+          unblocked again (see `os.register_at_fork`); the signal
+          handlers remain, and are called in the child's main thread.
+
+        * A child started by `subprocess.Popen` does not run those
+          hooks; start it within `signals_unblocked`.
+
+        Before Python 3.10, the main thread can be interrupted only with
+        ``SIGINT`` (see `interrupt_main_thread`); so, while dispatching,
+        the ``SIGINT`` handler raises a pending exception first, and
+        otherwise calls the previous ``SIGINT`` handler.
+        """
+
+    thread_name = "daemon-signal"
+
+    def __init__(self, signal_handler_map):
+        """ Set up a new instance.
+
+            :param signal_handler_map: A mapping from signal number to
+                handler, as for `daemon.daemon.set_signal_handlers`.
+                Signals with a handler of `signal.SIG_IGN` or
+                `signal.SIG_DFL` are not dispatched.
+            """
+        self.signal_handler_map = signal_handler_map
+        self.signal_numbers = frozenset(
+                signal_number
+                for (signal_number, handler) in signal_handler_map.items()
+                if callable(handler))
+
+        self._blocked_signals = frozenset()
+        self._pending_exceptions = {}
+        self._interrupt_handler = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        """ ``True`` iff the dispatcher thread is running. """
+        return (self._thread is not None and self._thread.is_alive())
+
+    def start(self):
+        """ Start dispatching the signals from a dedicated thread.
+
+            :return: ``None``.
+
+            This must be called from the main thread. Set the signal
+            handlers, then block the dispatched signals in the calling
+            thread (and so in every thread it starts after this), then
+            start the dispatcher thread.
+
+            Threads started before this call do not block the signals;
+            a signal delivered to such a thread is handled in the main
+            thread as usual. Signals the calling thread already blocked
+            remain blocked after `stop`.
+            """
+        if self.is_running:
+            return
+        for (signal_number, handler) in self.signal_handler_map.items():
+            if signal_number in self.signal_numbers:
+                handler = self._handle_in_main_thread
+            signal.signal(signal_number, handler)
+        if not self.signal_numbers:
+            return
+        if not interrupt_main_accepts_signal:
+            self._interrupt_handler = signal.getsignal(signal.SIGINT)
+            signal.signal(
+                    signal.SIGINT, self._handle_interrupt_in_main_thread)
+        previous_mask = signal.pthread_sigmask(
+                signal.SIG_BLOCK, self.signal_numbers)
+        self._blocked_signals = self.signal_numbers - set(previous_mask)
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+                target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+        _running_dispatchers.add(self)
+
+    def stop(self, timeout=None):
+        """ Stop dispatching the signals.
+
+            :param timeout: Maximum time (seconds) to wait for the
+                dispatcher thread to end, or ``None`` to wait
+                indefinitely.
+            :return: ``None``.
+
+            Stop the dispatcher thread, then unblock the signals in the
+            calling thread. A signal that arrives later is handled in the
+            main thread as usual. If `start` set the ``SIGINT`` handler,
+            restore the previous one.
+            """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._thread.is_alive():
+            # Wake the thread from its wait with one of its own signals.
+            signal.pthread_kill(
+                    self._thread.ident, min(self.signal_numbers))
+        self._thread.join(timeout)
+        self._thread = None
+        _running_dispatchers.discard(self)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, self._blocked_signals)
+        if (
+                signal.getsignal(signal.SIGINT)
+                == self._handle_interrupt_in_main_thread):
+            # A handler not set from Python cannot be restored.
+            signal.signal(
+                    signal.SIGINT,
+                    signal.SIG_DFL if self._interrupt_handler is None
+                    else self._interrupt_handler)
+
+    @contextlib.contextmanager
+    def signals_unblocked(self):
+        """ Context in which the calling thread does not block the signals.
+
+            :return: A context manager.
+
+            Within the context, the signals blocked by `start` are
+            unblocked in the calling thread, then blocked again on exit.
+            Start a child process (for example, with `subprocess.Popen`)
+            within this context, so that it does not inherit the blocked
+            signals. A signal that arrives meanwhile is handled in the
+            main thread as usual.
+            """
+        if not self._blocked_signals:
+            yield
+            return
+        previous_mask = signal.pthread_sigmask(
+                signal.SIG_UNBLOCK, self._blocked_signals)
+        try:
+            yield
+        finally:
+            signal.pthread_sigmask(signal.SIG_SETMASK, previous_mask)
+
+    def _reset_in_child(self):
+        """ Reset this dispatcher in a child process, after `os.fork`.
+
+            :return: ``None``.
+
+            The dispatcher thread does not exist in the child. Unblock
+            the signals blocked by `start`, so the child's main thread
+            handles them.
+            """
+        self._thread = None
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, self._blocked_signals)
+        self._blocked_signals = frozenset()
+
+    def dispatch(self, signal_number):
+        """ Call the handler for `signal_number`.
+
+            :param signal_number: The OS signal number received.
+            :return: ``None``.
+
+            If the handler raises an exception, raise it in the main
+            thread (see `_handle_in_main_thread`).
+            """
+        handler = self.signal_handler_map[signal_number]
+        try:
+            handler(signal_number, None)
+        except BaseException as exc:
+            self._pending_exceptions[signal_number] = exc
+            interrupt_main_thread(signal_number)
+
+    def _handle_in_main_thread(self, signal_number, stack_frame):
+        """ Handle `signal_number` in the main thread.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+            :raise BaseException: The exception from the handler in the
+                dispatcher thread, if any.
+
+            If the handler raised an exception in the dispatcher thread,
+            raise that exception. Otherwise, the signal was delivered to
+            a thread that does not block it; call the handler.
+            """
+        exception = self._pending_exceptions.pop(signal_number, None)
+        if exception is not None:
+            raise exception
+        handler = self.signal_handler_map[signal_number]
+        handler(signal_number, stack_frame)
+
+    def _handle_interrupt_in_main_thread(self, signal_number, stack_frame):
+        """ Handle ``SIGINT`` in the main thread, before Python 3.10.
+
+            :param signal_number: The OS signal number received.
+            :param stack_frame: The frame object at the point the
+                signal was received.
+            :return: ``None``.
+            :raise BaseException: The exception from a handler in the
+                dispatcher thread, if any.
+
+            If a handler raised an exception in the dispatcher thread
+            (see `interrupt_main_thread`), raise that exception.
+            Otherwise, the ``SIGINT`` is genuine; call the previous
+            handler. A previous handler of `signal.SIG_DFL` is treated as
+            `signal.default_int_handler`.
+            """
+        if self._pending_exceptions:
+            (__, exception) = self._pending_exceptions.popitem()
+            raise exception
+        handler = self._interrupt_handler
+        if handler == signal.SIG_IGN:
+            return
+        if not callable(handler):
+            handler = signal.default_int_handler
+        handler(signal_number, stack_frame)
+
+    def _run(self):
+        """ Wait for the signals and dispatch each one, until stopped. """
+        while True:
+            siginfo = signal.sigwaitinfo(self.signal_numbers)
+            if self._stop_event.is_set():
+                break
+            self.dispatch(siginfo.si_signo)
+
+
+_running_dispatchers = set()
+
+
+def _reset_dispatchers_in_child():
+    """ Reset each running dispatcher in a new child process. """
+    for dispatcher in list(_running_dispatchers):
+        dispatcher._reset_in_child()
+    _running_dispatchers.clear()
+
+
+os.register_at_fork(after_in_child=_reset_dispatchers_in_child)
+
+
+interrupt_main_accepts_signal = (sys.version_info >= (3, 10))
+""" ``True`` if `_thread.interrupt_main` accepts a signal number. """
+
+
+def interrupt_main_thread(signal_number):
+    """ Simulate the arrival of `signal_number` in the main thread.
+
+        :param signal_number: The OS signal number to simulate.
+        :return: ``None``.
+
+        The main thread calls the Python signal handler for
+        `signal_number` as soon as it next runs Python code. Before
+        Python 3.10, only ``SIGINT`` can be simulated (see
+        `interrupt_main_accepts_signal`); its handler is called instead.
+        """
+    if interrupt_main_accepts_signal:
+        _thread.interrupt_main(signal_number)
+    else:
+        _thread.interrupt_main()
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,497 @@
+# daemon/workers.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Pool of worker processes, forked from a daemon.
+
+    A daemon program doing CPU-bound work in Python uses several processes
+    to use several processors. The daemon process (the “master”) opens the
+    daemon context, loads the application, then forks the worker
+    processes; each worker shares the loaded application with the master,
+    without loading it again.
+
+    Simple example of usage::
+
+        import daemon
+        import daemon.workers
+
+        from spam import load_application
+
+        with daemon.DaemonContext() as daemon_context:
+            application = load_application()
+            pool = daemon.workers.WorkerPool(
+                    daemon_context, target=application.serve)
+            pool.run()
+    """
+
+import os
+import select
+import signal
+import sys
+import time
+import traceback
+import types
+
+from .daemon import (
+        DaemonError,
+        set_signal_handlers,
+        )
+from .memory import (
+        freeze_gc_heap,
+        get_memory_usage,
+        )
+
+
+def get_usable_cpu_count():
+    """ Get the number of processors this process can use.
+
+        :return: The number of processors (at least 1).
+
+        This counts the processors in this process's CPU affinity mask
+        (see ‘sched_setaffinity(2)’), where the system supports it;
+        otherwise, all the processors of the system.
+        """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        count = os.cpu_count()
+    return max(count or 1, 1)
+
+
+def describe_exit(result):
+    """ Describe how a child process ended.
+
+        :param result: The `os.waitid_result` for the process, or
+            ``None`` if not known.
+        :return: The description text.
+        """
+    if result is None:
+        description = "ended"
+    elif result.si_code == os.CLD_EXITED:
+        description = "exited with status {status}".format(
+                status=result.si_status)
+    else:
+        try:
+            name = signal.Signals(result.si_status).name
+        except ValueError:
+            name = str(result.si_status)
+        description = "was killed by signal {name}".format(name=name)
+    return description
+
+
+worker_poll_interval = 0.1
+""" Time (seconds) between checks for ended workers, without pidfds. """
+
+
+def _is_pidfd_supported():
+    """ Return ``True`` iff this system supports process file descriptors.
+
+        A process file descriptor (see ‘pidfd_open(2)’) refers to a
+        process, not a process ID; it is not confused by a process ID
+        that is reused after the process ends.
+        """
+    if not all([
+            hasattr(os, 'pidfd_open'), hasattr(os, 'P_PIDFD'),
+            hasattr(signal, 'pidfd_send_signal')]):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        # The kernel does not support the system call.
+        return False
+    return True
+
+
+class WorkerPool:
+    """ Pool of worker processes, forked from the daemon process.
+
+        The `run` method forks the workers, then waits for them. While it
+        runs:
+
+        * A worker that ends is replaced by a new worker, with the same
+          index. A worker that ends sooner than `respawn_delay` seconds
+          after it started is replaced only when that time has passed,
+          so that a worker failing repeatedly does not use all the
+          processor time.
+
+        * On ``SIGHUP``, the daemon reloads (see
+          `daemon.daemon.DaemonContext.reload`), then the signal is sent
+          to each worker.
+
+        * On ``SIGTERM``, the signal is sent to each worker, and no more
+          workers are started; `run` returns when all the workers have
+          ended.
+
+        The master waits for the workers with their process file
+        descriptors (see ‘pidfd_open(2)’) where the system supports them,
+        otherwise with ‘waitid(2)’; it does not wake until a worker ends
+        or a signal arrives.
+
+        If `gc_freeze` is true, the garbage collector's heap is frozen
+        once, before the workers are first started (see
+        `daemon.memory.freeze_gc_heap`), so that the memory of the
+        application loaded by the master stays shared with the workers;
+        see `memory_usage`.
+
+        Each worker handles signals as specified by the daemon context's
+        `signal_map`; so, by default, ``SIGTERM`` ends the worker and
+        ``SIGHUP`` calls the reload callbacks in the worker. The worker
+        does not notify the service manager, and does not release the
+        PID file when it ends.
+        """
+
+    fan_out_signals = (signal.SIGTERM, signal.SIGHUP)
+
+    def __init__(
+            self, daemon_context, target, count=None, respawn_delay=1,
+            gc_freeze=False, gc_freeze_collect=False):
+        """ Set up a new instance.
+
+            :param daemon_context: The `DaemonContext` of the daemon.
+            :param target: The function to run in each worker; it is
+                called with the worker's index (from 0 to `count` - 1)
+                as its only argument. The worker ends when it returns.
+            :param count: The number of workers, or ``None`` for the
+                number of usable processors (see `get_usable_cpu_count`).
+            :param respawn_delay: Minimum time (seconds) between starting
+                a worker and replacing it.
+            :param gc_freeze: If true, freeze the garbage collector's heap
+                before starting the workers.
+            :param gc_freeze_collect: If true, do a full garbage
+                collection before the freeze.
+            """
+        if count is None:
+            count = get_usable_cpu_count()
+        self.daemon_context = daemon_context
+        self.target = target
+        self.count = count
+        self.respawn_delay = respawn_delay
+        self.gc_freeze = gc_freeze
+        self.gc_freeze_collect = gc_freeze_collect
+
+        self._workers = {}
+        self._pidfds = {}
+        self._start_times = {}
+        self._respawn_times = {}
+        self._poll = None
+        self._is_stopping = False
+
+    @property
+    def workers(self):
+        """ Read-only mapping from process ID to index of each worker. """
+        return types.MappingProxyType(self._workers)
+
+    @property
+    def is_stopping(self):
+        """ ``True`` iff the pool is stopping its workers. """
+        return self._is_stopping
+
+    def memory_usage(self):
+        """ Get the memory usage of each worker.
+
+            :return: A `dict` mapping the index of each worker to its
+                memory usage, as from `daemon.memory.get_memory_usage`.
+
+            The ``shared`` size of a worker counts the pages it still
+            shares with the master (or other workers); the ``private``
+            size counts the pages copied for it alone.
+            """
+        return {
+                index: get_memory_usage(pid)
+                for (pid, index) in list(self._workers.items())}
+
+    def run(self):
+        """ Run the pool of workers, until they are stopped.
+
+            :return: ``None``.
+            :raise DaemonError: If the daemon context is not open.
+
+            Set the signal handlers for the master, start the workers,
+            then wait for them and replace each one that ends, until the
+            pool is stopped (see `stop`) and all workers have ended. If
+            an exception ends the wait, send ``SIGTERM`` to the remaining
+            workers before propagating it.
+            """
+        if not self.daemon_context.is_open:
+            raise DaemonError(
+                    "Daemon context must be open before starting workers")
+        if self.daemon_context._signal_dispatcher is not None:
+            # The master only waits, so handles signals without delay.
+            self.daemon_context._signal_dispatcher.stop()
+            self.daemon_context._signal_dispatcher = None
+        previous_handlers = {
+                signal_number: signal.getsignal(signal_number)
+                for signal_number in self.fan_out_signals}
+        set_signal_handlers({
+                signal.SIGTERM: self._handle_stop_signal,
+                signal.SIGHUP: self._handle_reload_signal,
+                })
+
+        if _is_pidfd_supported():
+            self._poll = select.poll()
+        self._is_stopping = False
+        if self.gc_freeze:
+            # A replacement worker is forked from the same master, whose
+            # heap is already frozen; freezing again would only move the
+            # master's newer objects, which the workers do not share.
+            freeze_gc_heap(collect=self.gc_freeze_collect)
+        try:
+            for index in range(self.count):
+                self._start_worker(index)
+            while self._workers or self._respawn_times:
+                self._wait_worker()
+                self._start_due_workers()
+        except BaseException:
+            self.send_signal(signal.SIGTERM)
+            raise
+        finally:
+            for pidfd in self._pidfds.values():
+                os.close(pidfd)
+            self._pidfds.clear()
+            self._workers.clear()
+            self._poll = None
+            set_signal_handlers(previous_handlers)
+
+    def stop(self, signal_number=signal.SIGTERM):
+        """ Stop the workers.
+
+            :param signal_number: The OS signal number to send to each
+                worker.
+            :return: ``None``.
+
+            Send the signal to each worker, and start no more workers.
+            """
+        self._is_stopping = True
+        self._respawn_times.clear()
+        self.send_signal(signal_number)
+
+    def send_signal(self, signal_number):
+        """ Send a signal to each worker.
+
+            :param signal_number: The OS signal number to send.
+            :return: ``None``.
+            """
+        for (pid, index) in list(self._workers.items()):
+            pidfd = self._pidfds.get(pid)
+            try:
+                if pidfd is not None:
+                    signal.pidfd_send_signal(pidfd, signal_number)
+                else:
+                    os.kill(pid, signal_number)
+            except ProcessLookupError:
+                # The worker has ended, and is not yet reaped.
+                pass
+
+    def _handle_stop_signal(self, signal_number, stack_frame):
+        """ Signal handler in the master, to stop the workers. """
+        self.stop(signal_number)
+
+    def _handle_reload_signal(self, signal_number, stack_frame):
+        """ Signal handler in the master, to reload the daemon. """
+        self.daemon_context.reload(signal_number, stack_frame)
+        self.send_signal(signal_number)
+
+    def _start_worker(self, index):
+        """ Fork a worker process.
+
+            :param index: The index of the worker.
+            :return: ``None``.
+
+            In the new process, call the `target` function (see
+            `_run_worker`). In the master, record the worker.
+            """
+        # Avoid writing buffered output from both processes.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(index)
+        self._workers[pid] = index
+        self._start_times[index] = time.monotonic()
+        if self._poll is not None:
+            pidfd = os.pidfd_open(pid)
+            self._pidfds[pid] = pidfd
+            self._poll.register(pidfd, select.POLLIN)
+
+    def _run_worker(self, index):
+        """ Run the `target` function in the worker process, then exit.
+
+            :param index: The index of the worker.
+            :return: Does not return.
+
+            The exit status of the worker is 0 if the `target` function
+            returns, or the status from ``SystemExit``; otherwise the
+            exception is reported to `sys.stderr`, and the status is 1.
+            The process exits with `os._exit`, so it does not call the
+            master's exit handlers (e.g. to release the PID file).
+            """
+        exit_status = 1
+        try:
+            self._prepare_worker()
+            self.target(index)
+            exit_status = 0
+        except SystemExit as exc:
+            if exc.code is None:
+                exit_status = 0
+            elif isinstance(exc.code, int):
+                exit_status = exc.code
+            else:
+                print(exc.code, file=sys.stderr)
+        except BaseException:
+            traceback.print_exc(file=sys.stderr)
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(exit_status)
+
+    def _prepare_worker(self):
+        """ Prepare the state of a new worker process.
+
+            :return: ``None``.
+            """
+        for pidfd in self._pidfds.values():
+            os.close(pidfd)
+        self._pidfds.clear()
+        self._workers.clear()
+        self._poll = None
+
+        daemon_context = self.daemon_context
+        if daemon_context._ready_fd is not None:
+            # The original process waits for the master to report ready;
+            # it sees the end of the pipe only when every copy is closed.
+            os.close(daemon_context._ready_fd)
+            daemon_context._ready_fd = None
+        # Only the master may notify the service manager; the worker
+        # does not have the master's threads.
+        daemon_context._service_notifier = None
+        daemon_context._watchdog_heartbeat = None
+        set_signal_handlers(daemon_context._make_signal_handler_map())
+
+    def _wait_worker(self):
+        """ Wait for a worker to end, then record that.
+
+            :return: ``None``.
+
+            Wait until a worker ends, or until the next worker is due to
+            be started. When a worker ends, unless the pool is stopping,
+            schedule its replacement.
+            """
+        timeout = None
+        if self._respawn_times:
+            timeout = max(
+                    0, min(self._respawn_times.values()) - time.monotonic())
+        if self._poll is not None:
+            if timeout is not None:
+                timeout = int(timeout * 1000) + 1
+            events = self._poll.poll(timeout)
+            ready_pidfds = {pidfd for (pidfd, event) in events}
+            ended = [
+                    (pid, pidfd) for (pid, pidfd) in self._pidfds.items()
+                    if pidfd in ready_pidfds]
+            for (pid, pidfd) in ended:
+                del self._pidfds[pid]
+                self._poll.unregister(pidfd)
+                try:
+                    result = os.waitid(os.P_PIDFD, pidfd, os.WEXITED)
+                finally:
+                    os.close(pidfd)
+                self._end_worker(pid, result)
+        else:
+            self._wait_worker_by_pid(timeout)
+
+    def _wait_worker_by_pid(self, timeout):
+        """ Wait for a worker to end, without process file descriptors.
+
+            :param timeout: The maximum time (seconds) to wait, or
+                ``None`` to wait until a worker ends.
+            :return: ``None``.
+
+            Wait for any child process to end, without reaping it
+            (``WNOWAIT``); then reap only the workers that have ended.
+            Other child processes of the program (for example, from
+            `subprocess`) are left for the program to reap. While such a
+            process has ended but is not yet reaped, or while a worker is
+            due to be started, check every `worker_poll_interval` instead.
+            """
+        if timeout is None:
+            try:
+                result = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT)
+            except ChildProcessError:
+                # Another part of the program reaped the workers.
+                for pid in list(self._workers):
+                    self._end_worker(pid, None)
+                return
+            if result is not None and result.si_pid not in self._workers:
+                # Not a worker; avoid waiting for it again at once.
+                time.sleep(worker_poll_interval)
+        else:
+            time.sleep(min(timeout, worker_poll_interval))
+        self._reap_ended_workers()
+
+    def _reap_ended_workers(self):
+        """ Reap each worker that has ended, then record that.
+
+            :return: ``None``.
+            """
+        for pid in list(self._workers):
+            try:
+                result = os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG)
+            except ChildProcessError:
+                # Another part of the program reaped the worker.
+                self._end_worker(pid, None)
+                continue
+            if result is not None:
+                self._end_worker(pid, result)
+
+    def _end_worker(self, pid, result):
+        """ Record that the worker `pid` has ended.
+
+            :param pid: The process ID of the worker.
+            :param result: The `os.waitid_result` for the worker, or
+                ``None`` if not known.
+            :return: ``None``.
+
+            Unless the pool is stopping, report the end of the worker to
+            `sys.stderr`, and schedule its replacement.
+            """
+        index = self._workers.pop(pid)
+        if self._is_stopping:
+            return
+        print(
+                "Worker {index} (PID {pid}) {status}; replacing it".format(
+                    index=index, pid=pid, status=describe_exit(result)),
+                file=sys.stderr)
+        self._respawn_times[index] = max(
+                time.monotonic(),
+                self._start_times[index] + self.respawn_delay)
+
+    def _start_due_workers(self):
+        """ Start each worker whose replacement is due.
+
+            :return: ``None``.
+            """
+        now = time.monotonic()
+        for (index, respawn_time) in sorted(self._respawn_times.items()):
+            if respawn_time <= now and not self._is_stopping:
+                del self._respawn_times[index]
+                self._start_worker(index)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the Apache License, version 2.0 as published by the
+# Apache Software Foundation.
+# No warranty expressed or implied. See the file ‘LICENSE.ASF-2’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -31,6 +31,10 @@ TEST_PYCODESTYLE_OPTS ?=
 TEST_PYMCCABE_MIN ?= 3
 TEST_PYMCCABE_OPTS ?= --min ${TEST_PYMCCABE_MIN}
 
+TEST_BENCHMARK_OPTS ?= --output ${MODULE_DIR}/benchmark-fd-cleanup.json
+TEST_BENCHMARK_SIGNAL_OPTS ?= \
+	--output ${MODULE_DIR}/benchmark-signal-latency.json
+
 
 .PHONY: test
 test: test-pycodestyle
@@ -91,6 +95,15 @@ test-pycodestyle:
 test-pymccabe:
 	$(PYTHON3) -m mccabe ${TEST_PYMCCABE_OPTS} ${CODE_MODULES}
 
+
+.PHONY: test-benchmark
+test-benchmark: pip-confirm-test-dependencies-installed
+	$(PYTHON) -m test.benchmark_fd_cleanup ${TEST_BENCHMARK_OPTS}
+	$(PYTHON) -m test.benchmark_signal_latency ${TEST_BENCHMARK_SIGNAL_OPTS}
+
+GENERATED_FILES += ${MODULE_DIR}/benchmark-fd-cleanup.json
+GENERATED_FILES += ${MODULE_DIR}/benchmark-signal-latency.json
+
 
 # Copyright © 2006–2024 Ben Finney <ben+python@benfinney.id.au>
 #
@@ -0,0 +1,298 @@
+# test/benchmark_fd_cleanup.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Benchmark suite for closing file descriptors during daemon start.
+
+    Measure the time taken by `daemon.daemon.close_all_open_files` for
+    combinations of:
+
+    * maximum file descriptors (as for ``RLIMIT_NOFILE``);
+    * shape of the set of file descriptors to exclude;
+    * number of file descriptors actually open;
+    * method available to find and close the file descriptors (see
+      `disable_close_range` for a limit on what can be disabled).
+
+    Each measurement is made in a new child process, since closing the
+    open files is destructive. The child reports its timing through
+    anonymous shared memory, which is unaffected by closing files.
+
+    The results are written as JSON, for comparison between releases::
+
+        $ python3 -m test.benchmark_fd_cleanup --output results.json
+    """
+
+import argparse
+import json
+import mmap
+import os
+import platform
+import resource
+import statistics
+import struct
+import sys
+import time
+import traceback
+
+import daemon.daemon
+
+
+maxfd_choices = [1024, 65536, 1048576]
+
+open_fd_count_choices = [3, 100, 1000, 10000]
+
+
+def make_exclude_empty(open_fds):
+    """ Make an empty set of file descriptors to exclude. """
+    return set()
+
+
+def make_exclude_dense(open_fds):
+    """ Make a set to exclude the lower half of open file descriptors. """
+    candidates = sorted(fd for fd in open_fds if fd > 2)
+    return set(candidates[:len(candidates) // 2])
+
+
+def make_exclude_sparse(open_fds):
+    """ Make a set to exclude every second open file descriptor. """
+    candidates = sorted(fd for fd in open_fds if fd > 2)
+    return set(candidates[::2])
+
+
+exclude_shapes = {
+        'empty': make_exclude_empty,
+        'dense': make_exclude_dense,
+        'sparse': make_exclude_sparse,
+        }
+
+
+def disable_close_range():
+    """ Make the `close_range(2)` system call unavailable.
+
+        This only stops `daemon.daemon` from using the system call. From
+        Python 3.10, `os.closerange` may itself make the system call,
+        which cannot be switched off; there, ``no-close-range`` does not
+        measure closing each file descriptor in turn.
+        """
+    daemon.daemon.os_closerange_uses_close_range = False
+    daemon.daemon._get_close_range_function = (lambda: None)
+
+
+def disable_close_range_and_open_file_descriptors():
+    """ Make neither `close_range(2)` nor the open files available. """
+    disable_close_range()
+    daemon.daemon._get_open_file_descriptors = (lambda: None)
+
+
+methods = {
+        'default': (lambda: None),
+        'no-close-range': disable_close_range,
+        'no-close-range-no-proc': (
+            disable_close_range_and_open_file_descriptors),
+        }
+
+
+def open_file_descriptors(count):
+    """ Open file descriptors, so that `count` are open in total.
+
+        :param count: The total number of file descriptors to be open.
+        :return: A `set` of the open file descriptors.
+        """
+    (soft_limit, hard_limit) = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed_limit = count + 16
+    if soft_limit != resource.RLIM_INFINITY and soft_limit < needed_limit:
+        resource.setrlimit(
+                resource.RLIMIT_NOFILE, (needed_limit, hard_limit))
+
+    open_fds = set(daemon.daemon._get_open_file_descriptors() or [0, 1, 2])
+    open_fds = {fd for fd in open_fds if _is_open(fd)}
+    null_fd = os.open(os.devnull, os.O_RDWR)
+    open_fds.add(null_fd)
+    while len(open_fds) < count:
+        open_fds.add(os.dup(null_fd))
+
+    return open_fds
+
+
+def _is_open(fd):
+    """ Return ``True`` iff the file descriptor `fd` is open. """
+    try:
+        os.fstat(fd)
+    except OSError:
+        return False
+    return True
+
+
+def measure_once(maxfd, exclude_shape, open_fd_count, method):
+    """ Measure one close of all open files, in a child process.
+
+        :param maxfd: The maximum number of file descriptors to assume.
+        :param exclude_shape: The name of the shape of exclude set.
+        :param open_fd_count: The number of file descriptors to open.
+        :param method: The name of the method to use.
+        :return: The time (nanoseconds) taken, or ``None`` if the
+            measurement could not be made.
+        """
+    result_size = struct.calcsize('q')
+    shared_result = mmap.mmap(-1, result_size)
+    shared_result[:] = struct.pack('q', -1)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            daemon.daemon._total_file_descriptor_range = range(0, maxfd)
+            open_fds = open_file_descriptors(open_fd_count)
+            exclude = exclude_shapes[exclude_shape](open_fds)
+            methods[method]()
+
+            start_time = time.perf_counter_ns()
+            daemon.daemon.close_all_open_files(exclude=exclude)
+            end_time = time.perf_counter_ns()
+
+            shared_result[:] = struct.pack('q', end_time - start_time)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            os._exit(0)
+
+    os.waitpid(pid, 0)
+    (duration,) = struct.unpack('q', shared_result[:])
+    shared_result.close()
+    if duration < 0:
+        duration = None
+    return duration
+
+
+def run_benchmarks(
+        maxfds=maxfd_choices,
+        shapes=tuple(exclude_shapes),
+        open_fd_counts=open_fd_count_choices,
+        method_names=tuple(methods),
+        repeat=5,
+        ):
+    """ Run the benchmark for each combination of parameters.
+
+        :param maxfds: Collection of maximum file descriptor values.
+        :param shapes: Collection of exclude set shape names.
+        :param open_fd_counts: Collection of open file descriptor counts.
+        :param method_names: Collection of method names.
+        :param repeat: Number of measurements for each combination.
+        :return: A `list` of result mappings, one per combination.
+
+        Combinations with more open file descriptors than the maximum
+        are not possible, and are omitted.
+        """
+    results = []
+    for maxfd in maxfds:
+        for open_fd_count in open_fd_counts:
+            if open_fd_count > maxfd:
+                continue
+            for shape in shapes:
+                for method in method_names:
+                    durations = [
+                            measure_once(maxfd, shape, open_fd_count, method)
+                            for __ in range(repeat)]
+                    durations = [
+                            duration for duration in durations
+                            if duration is not None]
+                    result = {
+                            'maxfd': maxfd,
+                            'open_fds': open_fd_count,
+                            'exclude': shape,
+                            'method': method,
+                            'durations_ns': durations,
+                            'min_ns': min(durations, default=None),
+                            'median_ns': (
+                                statistics.median(durations)
+                                if durations else None),
+                            }
+                    results.append(result)
+
+    return results
+
+
+def describe_environment():
+    """ Describe the environment in which the benchmark runs.
+
+        :return: A mapping of environment properties.
+        """
+    environment = {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'rlimit_nofile': list(resource.getrlimit(resource.RLIMIT_NOFILE)),
+            'close_range': (
+                daemon.daemon._get_close_range_function() is not None),
+            'open_file_descriptors_directory': (
+                daemon.daemon._get_open_file_descriptors() is not None),
+            }
+    return environment
+
+
+def make_argument_parser():
+    """ Make the command-line argument parser for this program. """
+    parser = argparse.ArgumentParser(
+            description="Benchmark closing file descriptors.")
+    parser.add_argument(
+            '--maxfd', dest='maxfds', type=int, action='append',
+            help="Maximum file descriptors; may be repeated.")
+    parser.add_argument(
+            '--open-fds', dest='open_fd_counts', type=int, action='append',
+            help="Count of open file descriptors; may be repeated.")
+    parser.add_argument(
+            '--exclude', dest='shapes', action='append',
+            choices=sorted(exclude_shapes),
+            help="Shape of exclude set; may be repeated.")
+    parser.add_argument(
+            '--method', dest='method_names', action='append',
+            choices=sorted(methods),
+            help="Method of closing files; may be repeated.")
+    parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="Measurements for each combination (default: %(default)s).")
+    parser.add_argument(
+            '--output', type=argparse.FileType('w'), default=sys.stdout,
+            help="File to write JSON results (default: stdout).")
+    return parser
+
+
+def main(argv=None):
+    """ Mainline code for this program. """
+    parser = make_argument_parser()
+    args = parser.parse_args(argv)
+
+    benchmark_kwargs = {
+            name: getattr(args, name)
+            for name in ['maxfds', 'open_fd_counts', 'shapes', 'method_names']
+            if getattr(args, name) is not None}
+    results = run_benchmarks(repeat=args.repeat, **benchmark_kwargs)
+
+    report = {
+            'benchmark': 'fd_cleanup',
+            'environment': describe_environment(),
+            'results': results,
+            }
+    json.dump(report, args.output, indent=4)
+    args.output.write("\n")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,265 @@
+# test/benchmark_signal_latency.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Benchmark suite for latency from signal to signal handler.
+
+    Measure the time from sending a signal to the daemon process, until
+    the signal handler is called, for combinations of:
+
+    * method of dispatching signals: by the Python main thread (as
+      `daemon.daemon.set_signal_handlers`), or from a dedicated thread
+      (as `daemon.signals.SignalDispatcher`);
+    * work the main thread is doing when the signal arrives.
+
+    Each measurement is made in a new child process, which reports the
+    time its handler was called through anonymous shared memory. The
+    times are from the monotonic clock, which is the same for all
+    processes on the system.
+
+    The results are written as JSON, for comparison between releases::
+
+        $ python3 -m test.benchmark_signal_latency --output results.json
+    """
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import platform
+import random
+import signal
+import statistics
+import struct
+import sys
+import time
+import traceback
+
+import daemon.daemon
+import daemon.signals
+
+
+benchmark_signal_number = signal.SIGUSR1
+
+hash_buffer_size = 256 * 1024 * 1024
+
+
+def make_workload_idle():
+    """ Make a workload of Python code that mostly sleeps. """
+    def workload():
+        time.sleep(0.001)
+    return workload
+
+
+def make_workload_hash():
+    """ Make a workload of compiled code that releases the GIL. """
+    buffer = bytes(hash_buffer_size)
+
+    def workload():
+        hashlib.sha256(buffer).digest()
+    return workload
+
+
+def make_workload_bignum():
+    """ Make a workload of compiled code that holds the GIL.
+
+        The computation checks for signals periodically, so the Python
+        main thread calls its handlers promptly; but a dispatcher thread
+        must wait for the GIL.
+        """
+    def workload():
+        pow(3, 3000000)
+    return workload
+
+
+workloads = {
+        'idle': make_workload_idle,
+        'hash': make_workload_hash,
+        'bignum': make_workload_bignum,
+        }
+
+
+def set_handler_main_thread(handler):
+    """ Set `handler` to be called by the Python main thread. """
+    daemon.daemon.set_signal_handlers({benchmark_signal_number: handler})
+
+
+def set_handler_dispatch_thread(handler):
+    """ Set `handler` to be called from a signal dispatcher thread. """
+    dispatcher = daemon.signals.SignalDispatcher(
+            {benchmark_signal_number: handler})
+    dispatcher.start()
+
+
+methods = {
+        'main-thread': set_handler_main_thread,
+        'dispatch-thread': set_handler_dispatch_thread,
+        }
+
+
+def measure_once(workload_name, method, delay):
+    """ Measure the latency of one signal, in a child process.
+
+        :param workload_name: The name of the workload of the main thread.
+        :param method: The name of the method to dispatch the signal.
+        :param delay: The time (seconds) to wait, after the child starts
+            its workload, before sending the signal.
+        :return: The time (nanoseconds) from sending the signal to the
+            call of the handler, or ``None`` if the measurement could not
+            be made.
+        """
+    result_size = struct.calcsize('q')
+    shared_result = mmap.mmap(-1, result_size)
+    shared_result[:] = struct.pack('q', -1)
+    (ready_read_fd, ready_write_fd) = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(ready_read_fd)
+            workload = workloads[workload_name]()
+
+            def handler(signal_number, stack_frame):
+                shared_result[:] = struct.pack('q', time.monotonic_ns())
+
+            methods[method](handler)
+            os.write(ready_write_fd, b"\n")
+            os.close(ready_write_fd)
+            while struct.unpack('q', shared_result[:])[0] < 0:
+                workload()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            os._exit(0)
+
+    os.close(ready_write_fd)
+    os.read(ready_read_fd, 1)
+    os.close(ready_read_fd)
+    time.sleep(delay)
+    send_time = time.monotonic_ns()
+    os.kill(pid, benchmark_signal_number)
+    os.waitpid(pid, 0)
+    (handler_time,) = struct.unpack('q', shared_result[:])
+    shared_result.close()
+    latency = None
+    if handler_time >= 0:
+        latency = handler_time - send_time
+    return latency
+
+
+def run_benchmarks(
+        workload_names=tuple(workloads),
+        method_names=tuple(methods),
+        repeat=10,
+        ):
+    """ Run the benchmark for each combination of parameters.
+
+        :param workload_names: Collection of workload names.
+        :param method_names: Collection of method names.
+        :param repeat: Number of measurements for each combination.
+        :return: A `list` of result mappings, one per combination.
+
+        Each measurement sends the signal after a random delay, so that
+        it arrives at a random point in the workload.
+        """
+    results = []
+    for workload_name in workload_names:
+        for method in method_names:
+            latencies = [
+                    measure_once(
+                        workload_name, method,
+                        delay=random.uniform(0.05, 0.15))
+                    for __ in range(repeat)]
+            latencies = [
+                    latency for latency in latencies
+                    if latency is not None]
+            result = {
+                    'workload': workload_name,
+                    'method': method,
+                    'latencies_ns': latencies,
+                    'median_ns': (
+                        statistics.median(latencies)
+                        if latencies else None),
+                    'max_ns': max(latencies, default=None),
+                    }
+            results.append(result)
+
+    return results
+
+
+def describe_environment():
+    """ Describe the environment in which the benchmark runs.
+
+        :return: A mapping of environment properties.
+        """
+    environment = {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            }
+    return environment
+
+
+def make_argument_parser():
+    """ Make the command-line argument parser for this program. """
+    parser = argparse.ArgumentParser(
+            description="Benchmark latency from signal to signal handler.")
+    parser.add_argument(
+            '--workload', dest='workload_names', action='append',
+            choices=sorted(workloads),
+            help="Workload of the main thread; may be repeated.")
+    parser.add_argument(
+            '--method', dest='method_names', action='append',
+            choices=sorted(methods),
+            help="Method of dispatching signals; may be repeated.")
+    parser.add_argument(
+            '--repeat', type=int, default=10,
+            help="Measurements for each combination (default: %(default)s).")
+    parser.add_argument(
+            '--output', type=argparse.FileType('w'), default=sys.stdout,
+            help="File to write JSON results (default: stdout).")
+    return parser
+
+
+def main(argv=None):
+    """ Mainline code for this program. """
+    parser = make_argument_parser()
+    args = parser.parse_args(argv)
+
+    benchmark_kwargs = {
+            name: getattr(args, name)
+            for name in ['workload_names', 'method_names']
+            if getattr(args, name) is not None}
+    results = run_benchmarks(repeat=args.repeat, **benchmark_kwargs)
+
+    report = {
+            'benchmark': 'signal_latency',
+            'environment': describe_environment(),
+            'results': results,
+            }
+    json.dump(report, args.output, indent=4)
+    args.output.write("\n")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,299 @@
+# test/test_activation.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘activation’ module. """
+
+import errno
+import os
+import socket
+import unittest.mock
+
+import daemon.activation
+
+from . import scaffold
+
+
+class get_listen_file_descriptors_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for function `get_listen_file_descriptors`. """
+
+    test_pid = 2468
+
+    scenarios = [
+            ('not-set', {
+                'environ': {},
+                'expected_result': [],
+                }),
+            ('one', {
+                'environ': {'LISTEN_PID': "2468", 'LISTEN_FDS': "1"},
+                'expected_result': [("unknown", 3)],
+                }),
+            ('several', {
+                'environ': {'LISTEN_PID': "2468", 'LISTEN_FDS': "3"},
+                'expected_result': [
+                    ("unknown", 3), ("unknown", 4), ("unknown", 5)],
+                }),
+            ('named', {
+                'environ': {
+                    'LISTEN_PID': "2468", 'LISTEN_FDS': "3",
+                    'LISTEN_FDNAMES': "lorem:ipsum:lorem"},
+                'expected_result': [
+                    ("lorem", 3), ("ipsum", 4), ("lorem", 5)],
+                }),
+            ('names-mismatch', {
+                'environ': {
+                    'LISTEN_PID': "2468", 'LISTEN_FDS': "3",
+                    'LISTEN_FDNAMES': "lorem:ipsum"},
+                'expected_result': [
+                    ("unknown", 3), ("unknown", 4), ("unknown", 5)],
+                }),
+            ('other-pid', {
+                'environ': {'LISTEN_PID': "1357", 'LISTEN_FDS': "1"},
+                'expected_result': [],
+                }),
+            ('no-pid', {
+                'environ': {'LISTEN_FDS': "1"},
+                'expected_result': [],
+                }),
+            ('zero', {
+                'environ': {'LISTEN_PID': "2468", 'LISTEN_FDS': "0"},
+                'expected_result': [],
+                }),
+            ('negative', {
+                'environ': {'LISTEN_PID': "2468", 'LISTEN_FDS': "-1"},
+                'expected_result': [],
+                }),
+            ('invalid-count', {
+                'environ': {'LISTEN_PID': "2468", 'LISTEN_FDS': "lorem"},
+                'expected_result': [],
+                }),
+            ('invalid-pid', {
+                'environ': {'LISTEN_PID': "ipsum", 'LISTEN_FDS': "1"},
+                'expected_result': [],
+                }),
+            ]
+
+    def test_returns_expected_result(self):
+        """ Should return expected result. """
+        result = daemon.activation.get_listen_file_descriptors(
+                self.environ, pid=self.test_pid)
+        self.assertEqual(self.expected_result, result)
+
+    def test_queries_os_environ_by_default(self):
+        """ Should query `os.environ` if no `environ` specified. """
+        with unittest.mock.patch.dict(
+                os.environ, self.environ, clear=True):
+            result = daemon.activation.get_listen_file_descriptors(
+                    pid=self.test_pid)
+        self.assertEqual(self.expected_result, result)
+
+    def test_matches_current_process_by_default(self):
+        """ Should match the current process if no `pid` specified. """
+        with unittest.mock.patch.object(
+                os, "getpid", return_value=self.test_pid):
+            result = daemon.activation.get_listen_file_descriptors(
+                    self.environ)
+        self.assertEqual(self.expected_result, result)
+
+
+class clear_listen_environment_TestCase(scaffold.TestCase):
+    """ Test cases for function `clear_listen_environment`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_environ = {
+                'LISTEN_PID': "2468",
+                'LISTEN_FDS': "2",
+                'LISTEN_FDNAMES': "lorem:ipsum",
+                'NOTIFY_SOCKET': "/run/systemd/notify",
+                }
+
+    def test_removes_listen_variables(self):
+        """ Should remove the socket activation variables. """
+        environ = self.test_environ
+        daemon.activation.clear_listen_environment(environ)
+        expected_environ = {'NOTIFY_SOCKET': "/run/systemd/notify"}
+        self.assertEqual(expected_environ, environ)
+
+    def test_ignores_absent_variables(self):
+        """ Should not fail if the variables are absent. """
+        environ = {}
+        daemon.activation.clear_listen_environment(environ)
+        self.assertEqual({}, environ)
+
+    def test_modifies_os_environ_by_default(self):
+        """ Should modify `os.environ` if no `environ` specified. """
+        with unittest.mock.patch.dict(
+                os.environ, self.test_environ, clear=True):
+            daemon.activation.clear_listen_environment()
+            self.assertNotIn('LISTEN_FDS', os.environ)
+            self.assertIn('NOTIFY_SOCKET', os.environ)
+
+
+class is_socket_file_descriptor_TestCase(scaffold.TestCase):
+    """ Test cases for function `is_socket_file_descriptor`. """
+
+    def test_true_for_socket(self):
+        """ Should return ``True`` for a socket. """
+        (test_socket, peer_socket) = socket.socketpair()
+        self.addCleanup(test_socket.close)
+        self.addCleanup(peer_socket.close)
+        result = daemon.activation.is_socket_file_descriptor(
+                test_socket.fileno())
+        self.assertTrue(result)
+
+    def test_false_for_pipe(self):
+        """ Should return ``False`` for a pipe. """
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        result = daemon.activation.is_socket_file_descriptor(read_fd)
+        self.assertFalse(result)
+
+    def test_false_for_closed_file_descriptor(self):
+        """ Should return ``False`` for a closed file descriptor. """
+        (read_fd, write_fd) = os.pipe()
+        os.close(read_fd)
+        os.close(write_fd)
+        result = daemon.activation.is_socket_file_descriptor(read_fd)
+        self.assertFalse(result)
+
+
+class make_listen_sockets_TestCase(scaffold.TestCase):
+    """ Test cases for function `make_listen_sockets`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_socket_fds = []
+        for __ in range(3):
+            (test_socket, peer_socket) = socket.socketpair()
+            self.addCleanup(peer_socket.close)
+            self.test_socket_fds.append(test_socket.detach())
+        (self.test_pipe_read_fd, test_pipe_write_fd) = os.pipe()
+        self.addCleanup(os.close, self.test_pipe_read_fd)
+        self.addCleanup(os.close, test_pipe_write_fd)
+
+    def close_result_sockets(self, result):
+        """ Close all the sockets in `result`. """
+        for sockets in result.values():
+            for listen_socket in sockets:
+                listen_socket.close()
+
+    def test_returns_sockets_by_name(self):
+        """ Should return mapping of name to sockets. """
+        named_fds = [
+                ("lorem", self.test_socket_fds[0]),
+                ("ipsum", self.test_socket_fds[1]),
+                ("lorem", self.test_socket_fds[2]),
+                ]
+        result = daemon.activation.make_listen_sockets(named_fds)
+        self.addCleanup(self.close_result_sockets, result)
+        self.assertEqual({"lorem", "ipsum"}, set(result))
+        self.assertEqual(
+                [self.test_socket_fds[0], self.test_socket_fds[2]],
+                [item.fileno() for item in result["lorem"]])
+        self.assertEqual(
+                [self.test_socket_fds[1]],
+                [item.fileno() for item in result["ipsum"]])
+
+    def test_returns_socket_instances(self):
+        """ Should return `socket.socket` instances. """
+        named_fds = [("lorem", self.test_socket_fds[0])]
+        result = daemon.activation.make_listen_sockets(named_fds)
+        self.addCleanup(self.close_result_sockets, result)
+        self.assertIsInstance(result["lorem"][0], socket.socket)
+
+    def test_omits_non_socket_file_descriptors(self):
+        """ Should omit file descriptors that are not sockets. """
+        named_fds = [
+                ("lorem", self.test_socket_fds[0]),
+                ("ipsum", self.test_pipe_read_fd),
+                ]
+        result = daemon.activation.make_listen_sockets(named_fds)
+        self.addCleanup(self.close_result_sockets, result)
+        self.assertEqual({"lorem"}, set(result))
+
+    def test_returns_empty_mapping_if_no_file_descriptors(self):
+        """ Should return empty mapping if no file descriptors. """
+        result = daemon.activation.make_listen_sockets([])
+        self.assertEqual({}, result)
+
+
+class adopt_listen_file_descriptors_TestCase(scaffold.TestCase):
+    """ Test cases for function `adopt_listen_file_descriptors`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_environ = {
+                'LISTEN_PID': str(os.getpid()),
+                'LISTEN_FDS': "2",
+                'LISTEN_FDNAMES': "lorem:ipsum",
+                }
+
+        func_patcher_set_inheritable = unittest.mock.patch.object(
+                os, "set_inheritable")
+        self.mock_func_set_inheritable = func_patcher_set_inheritable.start()
+        self.addCleanup(func_patcher_set_inheritable.stop)
+
+    def test_returns_named_file_descriptors(self):
+        """ Should return the named file descriptors. """
+        result = daemon.activation.adopt_listen_file_descriptors(
+                self.test_environ)
+        self.assertEqual([("lorem", 3), ("ipsum", 4)], result)
+
+    def test_marks_file_descriptors_not_inheritable(self):
+        """ Should mark each file descriptor not inheritable. """
+        daemon.activation.adopt_listen_file_descriptors(self.test_environ)
+        self.mock_func_set_inheritable.assert_has_calls([
+                unittest.mock.call(3, False),
+                unittest.mock.call(4, False),
+                ])
+
+    def test_clears_environment(self):
+        """ Should remove the socket activation variables. """
+        environ = self.test_environ
+        daemon.activation.adopt_listen_file_descriptors(environ)
+        self.assertEqual({}, environ)
+
+    def test_clears_environment_if_not_for_this_process(self):
+        """ Should remove the variables even if for another process. """
+        environ = self.test_environ
+        environ['LISTEN_PID'] = str(os.getpid() + 1)
+        result = daemon.activation.adopt_listen_file_descriptors(environ)
+        self.assertEqual([], result)
+        self.assertFalse(self.mock_func_set_inheritable.called)
+        self.assertEqual({}, environ)
+
+    def test_propagates_error_from_set_inheritable(self):
+        """ Should propagate OSError from marking file descriptor. """
+        test_error = OSError(errno.EBADF, "Bad file descriptor")
+        self.mock_func_set_inheritable.side_effect = test_error
+        exc = self.assertRaises(
+                OSError,
+                daemon.activation.adopt_listen_file_descriptors,
+                self.test_environ)
+        self.assertIs(test_error, exc)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -9,21 +9,31 @@
 
 import collections
 import errno
+import functools
 import importlib
 import io
+import operator
 import os
 import pwd
 import resource
 import signal
 import socket
+import stat
+import subprocess
 import sys
+import sysconfig
 import tempfile
+import threading
+import time
 from types import ModuleType
 import unittest
 import unittest.mock
 import warnings
 
 import daemon
+import daemon.notify
+import daemon.pidfile
+import daemon.signals
 
 from . import scaffold
 from .test_pidfile import (
@@ -319,6 +329,214 @@ class DaemonContext_TestCase(DaemonContext_BaseTestCase):
         instance = daemon.daemon.DaemonContext(**args)
         self.assertEqual(expected_signal_map, instance.signal_map)
 
+    def test_has_specified_files_close_on_exec(self):
+        """ Should have specified `files_close_on_exec` option. """
+        args = dict(
+                files_close_on_exec=object(),
+                )
+        expected_value = args['files_close_on_exec']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.files_close_on_exec)
+
+    def test_has_default_files_close_on_exec(self):
+        """ Should have default `files_close_on_exec` option. """
+        args = dict()
+        expected_value = False
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.files_close_on_exec)
+
+    def test_has_specified_record_open_timings(self):
+        """ Should have specified `record_open_timings` option. """
+        args = dict(
+                record_open_timings=object(),
+                )
+        expected_value = args['record_open_timings']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.record_open_timings)
+
+    def test_has_default_record_open_timings(self):
+        """ Should have default `record_open_timings` option. """
+        args = dict()
+        expected_value = False
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.record_open_timings)
+
+    def test_has_specified_open_timings_hook(self):
+        """ Should have specified `open_timings_hook` option. """
+        args = dict(
+                open_timings_hook=object(),
+                )
+        expected_value = args['open_timings_hook']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.open_timings_hook)
+
+    def test_has_default_open_timings_hook(self):
+        """ Should have default `open_timings_hook` option. """
+        args = dict()
+        expected_value = None
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.open_timings_hook)
+
+    def test_has_specified_wait_for_ready(self):
+        """ Should have specified `wait_for_ready` option. """
+        args = dict(
+                wait_for_ready=object(),
+                )
+        expected_value = args['wait_for_ready']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.wait_for_ready)
+
+    def test_has_default_wait_for_ready(self):
+        """ Should have default `wait_for_ready` option. """
+        args = dict()
+        expected_value = False
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.wait_for_ready)
+
+    def test_has_specified_watchdog_heartbeat(self):
+        """ Should have specified `watchdog_heartbeat` option. """
+        args = dict(
+                watchdog_heartbeat=object(),
+                )
+        expected_value = args['watchdog_heartbeat']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.watchdog_heartbeat)
+
+    def test_has_default_watchdog_heartbeat(self):
+        """ Should have default `watchdog_heartbeat` option. """
+        args = dict()
+        expected_value = False
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.watchdog_heartbeat)
+
+    def test_has_specified_watchdog_liveness_check(self):
+        """ Should have specified `watchdog_liveness_check` option. """
+        args = dict(
+                watchdog_liveness_check=object(),
+                )
+        expected_value = args['watchdog_liveness_check']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.watchdog_liveness_check)
+
+    def test_has_default_watchdog_liveness_check(self):
+        """ Should have default `watchdog_liveness_check` option. """
+        args = dict()
+        expected_value = None
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.watchdog_liveness_check)
+
+    def test_has_specified_socket_activation(self):
+        """ Should have specified `socket_activation` option. """
+        args = dict(
+                socket_activation=object(),
+                )
+        expected_value = args['socket_activation']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.socket_activation)
+
+    def test_has_default_socket_activation(self):
+        """ Should have default `socket_activation` option. """
+        args = dict()
+        expected_value = True
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.socket_activation)
+
+    def test_has_specified_signal_dispatch_thread(self):
+        """ Should have specified `signal_dispatch_thread` option. """
+        args = dict(
+                signal_dispatch_thread=object(),
+                )
+        expected_value = args['signal_dispatch_thread']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.signal_dispatch_thread)
+
+    def test_has_default_signal_dispatch_thread(self):
+        """ Should have default `signal_dispatch_thread` option. """
+        args = dict()
+        expected_value = False
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.signal_dispatch_thread)
+
+    def test_has_specified_graceful_shutdown(self):
+        """ Should have specified `graceful_shutdown` option. """
+        args = dict(
+                graceful_shutdown=object(),
+                )
+        expected_value = args['graceful_shutdown']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.graceful_shutdown)
+
+    def test_has_default_graceful_shutdown(self):
+        """ Should have default `graceful_shutdown` option. """
+        args = dict()
+        expected_value = False
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.graceful_shutdown)
+
+    def test_has_specified_shutdown_timeout(self):
+        """ Should have specified `shutdown_timeout` option. """
+        args = dict(
+                shutdown_timeout=object(),
+                )
+        expected_value = args['shutdown_timeout']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.shutdown_timeout)
+
+    def test_has_default_shutdown_timeout(self):
+        """ Should have default `shutdown_timeout` option. """
+        args = dict()
+        expected_value = 30
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.shutdown_timeout)
+
+    def test_has_specified_reload_hook(self):
+        """ Should have specified `reload_hook` option. """
+        args = dict(
+                reload_hook=object(),
+                )
+        expected_value = args['reload_hook']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.reload_hook)
+
+    def test_has_default_reload_hook(self):
+        """ Should have default `reload_hook` option. """
+        args = dict()
+        expected_value = None
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.reload_hook)
+
+    def test_has_specified_detach_strategy(self):
+        """ Should have specified `detach_strategy` option. """
+        args = dict(
+                detach_strategy=daemon.daemon.detach_strategy_single_fork,
+                )
+        expected_value = args['detach_strategy']
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.detach_strategy)
+
+    def test_has_default_detach_strategy(self):
+        """ Should have default `detach_strategy` option. """
+        args = dict()
+        expected_value = daemon.daemon.detach_strategy_double_fork
+        instance = daemon.daemon.DaemonContext(**args)
+        self.assertEqual(expected_value, instance.detach_strategy)
+
+    def test_has_no_last_reload_duration(self):
+        """ Should have no `last_reload_duration` initially. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertIs(instance.last_reload_duration, None)
+
+    def test_is_not_shutting_down(self):
+        """ Should not be shutting down initially. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertFalse(instance.is_shutting_down)
+        self.assertFalse(instance.shutdown_event.is_set())
+
+    def test_has_no_listen_sockets(self):
+        """ Should have empty `listen_sockets` before opening. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertEqual({}, dict(instance.listen_sockets))
+
 
 class DaemonContext_is_open_TestCase(DaemonContext_BaseTestCase):
     """ Test cases for DaemonContext.is_open property. """
@@ -335,6 +553,22 @@ class DaemonContext_is_open_TestCase(DaemonContext_BaseTestCase):
                 AttributeError,
                 setattr, instance, 'is_open', object())
 
+
+class DaemonContext_open_timings_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.open_timings property. """
+
+    def test_begin_none(self):
+        """ Initial value of `open_timings` should be None. """
+        instance = self.test_instance
+        self.assertIs(instance.open_timings, None)
+
+    def test_write_fails(self):
+        """ Writing to `open_timings` should fail. """
+        instance = self.test_instance
+        self.assertRaises(
+                AttributeError,
+                setattr, instance, 'open_timings', object())
+
 
 def make_fake_streams(testcase):
     """ Make fake system stream files for `testcase`. """
@@ -364,14 +598,18 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
                     "change_process_owner",
                     "prevent_core_dump",
                     "close_all_open_files",
+                    "mark_all_open_files_close_on_exec",
                     "redirect_stream",
                     "set_signal_handlers",
                     "register_atexit_function",
+                    "notify_daemon_ready",
+                    "notify_daemon_exception",
                     ]}
         for (func_name, patcher) in daemon_func_patchers.items():
             mock_func = patcher.start()
             self.addCleanup(patcher.stop)
             self.mock_module_daemon.attach_mock(mock_func, func_name)
+        self.mock_module_daemon.detach_process_context.return_value = None
 
         self.mock_module_daemon.attach_mock(
                 unittest.mock.Mock(), 'DaemonContext')
@@ -381,6 +619,9 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         daemoncontext_method_return_values = {
                 '_get_exclude_file_descriptors': self.test_files_preserve_fds,
                 '_make_signal_handler_map': self.test_signal_handler_map,
+                '_open_service_notifier': None,
+                '_adopt_listen_sockets': None,
+                '_start_signal_dispatcher': None,
                 }
         daemoncontext_func_patchers = {
                 func_name: unittest.mock.patch.object(
@@ -405,6 +646,9 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         self.mock_module_daemon.attach_mock(
                 self.mock_pidlockfile, 'pidlockfile')
         expected_calls = [
+                getattr(
+                    unittest.mock.call.DaemonContext,
+                    '_adopt_listen_sockets')(),
                 unittest.mock.call.change_root_directory(
                     unittest.mock.ANY),
                 unittest.mock.call.prevent_core_dump(),
@@ -416,12 +660,17 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
                     unittest.mock.ANY,
                     unittest.mock.ANY,
                     unittest.mock.ANY),
-                unittest.mock.call.detach_process_context(),
+                unittest.mock.call.detach_process_context(
+                    wait_for_ready=unittest.mock.ANY,
+                    strategy=unittest.mock.ANY),
                 getattr(
                     unittest.mock.call.DaemonContext,
                     '_make_signal_handler_map')(),
                 unittest.mock.call.set_signal_handlers(
                     unittest.mock.ANY),
+                getattr(
+                    unittest.mock.call.DaemonContext,
+                    '_open_service_notifier')(),
                 getattr(
                     unittest.mock.call.DaemonContext,
                     '_get_exclude_file_descriptors')(),
@@ -483,6 +732,19 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         instance.open()
         self.mock_module_daemon.close_all_open_files.assert_called_with(
                 exclude=expected_exclude)
+        self.assertFalse(
+                self.mock_module_daemon
+                .mark_all_open_files_close_on_exec.called)
+
+    def test_marks_open_files_close_on_exec_if_files_close_on_exec(self):
+        """ Should mark open files close-on-exec if `files_close_on_exec`. """
+        instance = self.test_instance
+        instance.files_close_on_exec = True
+        expected_exclude = self.test_files_preserve_fds
+        instance.open()
+        (self.mock_module_daemon.mark_all_open_files_close_on_exec
+            .assert_called_with(exclude=expected_exclude))
+        self.assertFalse(self.mock_module_daemon.close_all_open_files.called)
 
     def test_changes_directory_to_working_directory(self):
         """ Should change current directory to `working_directory` option. """
@@ -493,6 +755,31 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         self.mock_module_daemon.change_working_directory.assert_called_with(
                 working_directory)
 
+    def test_starts_signal_dispatcher_if_signal_dispatch_thread(self):
+        """ Should start a signal dispatcher if `signal_dispatch_thread`. """
+        instance = self.test_instance
+        instance.signal_dispatch_thread = True
+        instance.open()
+        (self.mock_module_daemon.DaemonContext._start_signal_dispatcher
+            .assert_called_once_with(self.test_signal_handler_map))
+        self.assertFalse(self.mock_module_daemon.set_signal_handlers.called)
+
+    def test_adopts_listen_sockets(self):
+        """ Should adopt sockets from the service manager. """
+        instance = self.test_instance
+        instance.open()
+        (self.mock_module_daemon.DaemonContext._adopt_listen_sockets
+            .assert_called_once_with())
+
+    def test_skips_listen_sockets_if_no_socket_activation(self):
+        """ Should not adopt sockets if not `socket_activation`. """
+        instance = self.test_instance
+        instance.socket_activation = False
+        instance.open()
+        self.assertFalse(
+                self.mock_module_daemon.DaemonContext
+                ._adopt_listen_sockets.called)
+
     def test_changes_creation_mask_to_umask(self):
         """ Should change file creation mask to `umask` option. """
         instance = self.test_instance
@@ -520,7 +807,97 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         instance = self.test_instance
         instance.detach_process = True
         instance.open()
-        self.mock_module_daemon.detach_process_context.assert_called_with()
+        self.mock_module_daemon.detach_process_context.assert_called_with(
+                wait_for_ready=True, strategy=instance.detach_strategy)
+
+    def test_detaches_with_specified_strategy(self):
+        """ Should request detach with the specified strategy. """
+        instance = self.test_instance
+        instance.detach_process = True
+        instance.detach_strategy = daemon.daemon.detach_strategy_foreground
+        instance.open()
+        self.mock_module_daemon.detach_process_context.assert_called_with(
+                wait_for_ready=True,
+                strategy=daemon.daemon.detach_strategy_foreground)
+
+    def test_keeps_ready_file_descriptor_from_detach(self):
+        """ Should keep the readiness file descriptor from detach. """
+        instance = self.test_instance
+        instance.detach_process = True
+        instance.wait_for_ready = True
+        test_ready_fd = self.getUniqueInteger()
+        self.mock_module_daemon.detach_process_context.return_value = (
+                test_ready_fd)
+        instance.open()
+        self.assertEqual(test_ready_fd, instance._ready_fd)
+
+    def test_notifies_ready_when_open(self):
+        """ Should report ready when open, if not `wait_for_ready`. """
+        instance = self.test_instance
+        instance.detach_process = True
+        instance.wait_for_ready = False
+        test_ready_fd = self.getUniqueInteger()
+        self.mock_module_daemon.detach_process_context.return_value = (
+                test_ready_fd)
+        instance.pidfile = self.mock_pidlockfile
+        self.mock_module_daemon.attach_mock(
+                self.mock_pidlockfile, 'pidlockfile')
+        expected_calls = [
+                unittest.mock.call.pidlockfile.__enter__(),
+                unittest.mock.call.register_atexit_function(
+                    unittest.mock.ANY),
+                unittest.mock.call.notify_daemon_ready(test_ready_fd),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+        self.assertIs(instance._ready_fd, None)
+
+    def test_starts_watchdog_heartbeat_if_watchdog_heartbeat(self):
+        """ Should start watchdog keep-alive if `watchdog_heartbeat`. """
+        instance = self.test_instance
+        instance.watchdog_heartbeat = True
+        with unittest.mock.patch.object(
+                daemon.daemon.DaemonContext,
+                "_start_watchdog_heartbeat") as mock_func_start:
+            instance.open()
+        mock_func_start.assert_called_once_with()
+
+    def test_omits_watchdog_heartbeat_by_default(self):
+        """ Should not start watchdog keep-alive by default. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(
+                daemon.daemon.DaemonContext,
+                "_start_watchdog_heartbeat") as mock_func_start:
+            instance.open()
+        self.assertFalse(mock_func_start.called)
+
+    def test_omits_notify_ready_if_wait_for_ready(self):
+        """ Should not report ready when open, if `wait_for_ready`. """
+        instance = self.test_instance
+        instance.detach_process = True
+        instance.wait_for_ready = True
+        self.mock_module_daemon.detach_process_context.return_value = (
+                self.getUniqueInteger())
+        instance.open()
+        self.assertFalse(self.mock_module_daemon.notify_daemon_ready.called)
+
+    def test_notifies_exception_after_detach(self):
+        """ Should report an exception raised after detach, then raise. """
+        instance = self.test_instance
+        instance.detach_process = True
+        test_ready_fd = self.getUniqueInteger()
+        self.mock_module_daemon.detach_process_context.return_value = (
+                test_ready_fd)
+        test_error = daemon.daemon.DaemonOSEnvironmentError("Lorem ipsum")
+        self.mock_module_daemon.close_all_open_files.side_effect = test_error
+        exc = self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError,
+                instance.open)
+        self.assertIs(test_error, exc)
+        self.mock_module_daemon.notify_daemon_exception.assert_called_with(
+                test_ready_fd, test_error)
+        self.assertFalse(self.mock_module_daemon.notify_daemon_ready.called)
+        self.assertFalse(instance.is_open)
 
     def test_omits_process_detach_if_not_required(self):
         """ Should omit detach of process context if not required. """
@@ -562,6 +939,17 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         instance.open()
         self.mock_pidlockfile.__enter__.assert_called_with()
 
+    def test_omits_pidfile_context_if_predecessor(self):
+        """ Should not enter the PID file context if from a predecessor. """
+        instance = self.test_instance
+        instance.pidfile = self.mock_pidlockfile
+        instance._handover_socket = unittest.mock.MagicMock(
+                spec=socket.socket)
+        with unittest.mock.patch.object(instance, "_complete_handover"):
+            instance.open()
+        self.assertFalse(self.mock_pidlockfile.__enter__.called)
+        self.assertTrue(instance._pidfile_held_elsewhere)
+
     def test_sets_is_open_true(self):
         """ Should set the `is_open` property to True. """
         instance = self.test_instance
@@ -576,6 +964,79 @@ class DaemonContext_open_TestCase(DaemonContext_BaseTestCase):
         self.mock_module_daemon.register_atexit_function.assert_called_with(
                 close_method)
 
+    def test_omits_open_timings_by_default(self):
+        """ Should not record `open_timings` by default. """
+        instance = self.test_instance
+        instance.open()
+        self.assertIs(instance.open_timings, None)
+
+    def test_omits_monotonic_clock_by_default(self):
+        """ Should not read the monotonic clock by default. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(
+                time, "monotonic_ns") as mock_func_monotonic_ns:
+            instance.open()
+        self.assertFalse(mock_func_monotonic_ns.called)
+
+    def test_records_open_timings_if_record_open_timings(self):
+        """ Should record `open_timings` if `record_open_timings`. """
+        instance = self.test_instance
+        instance.record_open_timings = True
+        fake_clock_values = [(1000 * count) ** 2 for count in range(12)]
+        expected_timings = dict(zip(
+                [
+                    'socket_activation', 'chroot_directory',
+                    'prevent_core', 'umask', 'working_directory',
+                    'process_owner', 'detach_process', 'signal_map',
+                    'close_files', 'redirect_streams', 'pidfile'],
+                [
+                    after - before
+                    for (before, after) in zip(
+                        fake_clock_values[:-1], fake_clock_values[1:])]))
+        with unittest.mock.patch.object(
+                time, "monotonic_ns", side_effect=fake_clock_values):
+            instance.open()
+        self.assertEqual(expected_timings, dict(instance.open_timings))
+        self.assertEqual(
+                list(expected_timings), list(instance.open_timings))
+
+    def test_open_timings_are_read_only(self):
+        """ Should record `open_timings` as a read-only mapping. """
+        instance = self.test_instance
+        instance.record_open_timings = True
+        instance.open()
+        self.assertRaises(
+                TypeError,
+                operator.setitem, instance.open_timings, 'pidfile', 0)
+
+    def test_calls_open_timings_hook_with_timings(self):
+        """ Should call `open_timings_hook` with the `open_timings`. """
+        instance = self.test_instance
+        instance.open_timings_hook = unittest.mock.MagicMock()
+        instance.open()
+        self.assertIsNot(instance.open_timings, None)
+        instance.open_timings_hook.assert_called_once_with(
+                instance.open_timings)
+
+    def test_calls_open_timings_hook_after_open(self):
+        """ Should call `open_timings_hook` after opening the context. """
+        instance = self.test_instance
+        instance.pidfile = self.mock_pidlockfile
+        self.mock_module_daemon.attach_mock(
+                self.mock_pidlockfile, 'pidlockfile')
+        self.mock_module_daemon.attach_mock(
+                unittest.mock.MagicMock(), 'open_timings_hook')
+        instance.open_timings_hook = self.mock_module_daemon.open_timings_hook
+        expected_calls = [
+                unittest.mock.call.pidlockfile.__enter__(),
+                unittest.mock.call.register_atexit_function(
+                    unittest.mock.ANY),
+                unittest.mock.call.open_timings_hook(unittest.mock.ANY),
+                ]
+        instance.open()
+        self.mock_module_daemon.assert_has_calls(expected_calls)
+        self.assertTrue(instance.is_open)
+
 
 class DaemonContext_close_TestCase(DaemonContext_BaseTestCase):
     """ Test cases for DaemonContext.close method. """
@@ -601,6 +1062,14 @@ class DaemonContext_close_TestCase(DaemonContext_BaseTestCase):
         instance.close()
         self.mock_pidlockfile.__exit__.assert_called_with(None, None, None)
 
+    def test_omits_pidfile_exit_if_held_elsewhere(self):
+        """ Should not exit the PID file context if held elsewhere. """
+        instance = self.test_instance
+        instance.pidfile = self.mock_pidlockfile
+        instance._pidfile_held_elsewhere = True
+        instance.close()
+        self.assertFalse(self.mock_pidlockfile.__exit__.called)
+
     def test_returns_none(self):
         """ Should return None. """
         instance = self.test_instance
@@ -614,6 +1083,44 @@ class DaemonContext_close_TestCase(DaemonContext_BaseTestCase):
         instance.close()
         self.assertEqual(False, instance.is_open)
 
+    def test_stops_watchdog_heartbeat(self):
+        """ Should stop the watchdog keep-alive notifications. """
+        instance = self.test_instance
+        mock_heartbeat = unittest.mock.MagicMock(
+                spec=daemon.notify.WatchdogHeartbeat)
+        instance._watchdog_heartbeat = mock_heartbeat
+        instance.close()
+        mock_heartbeat.stop.assert_called_once_with()
+        self.assertIs(instance._watchdog_heartbeat, None)
+
+    def test_closes_service_notifier(self):
+        """ Should close the socket to the service manager. """
+        instance = self.test_instance
+        mock_service_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        instance._service_notifier = mock_service_notifier
+        instance.close()
+        mock_service_notifier.close.assert_called_once_with()
+        self.assertIs(instance._service_notifier, None)
+
+    def test_stops_signal_dispatcher(self):
+        """ Should stop the signal dispatcher thread. """
+        instance = self.test_instance
+        mock_signal_dispatcher = unittest.mock.MagicMock(
+                spec=daemon.signals.SignalDispatcher)
+        instance._signal_dispatcher = mock_signal_dispatcher
+        instance.close()
+        mock_signal_dispatcher.stop.assert_called_once_with()
+        self.assertIs(instance._signal_dispatcher, None)
+
+    def test_cancels_shutdown_deadline(self):
+        """ Should cancel the deadline of the graceful shutdown. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(
+                instance._shutdown, "cancel") as mock_func_cancel:
+            instance.close()
+        mock_func_cancel.assert_called_once_with()
+
 
 @unittest.mock.patch.object(daemon.daemon.DaemonContext, "open")
 class DaemonContext_context_manager_enter_TestCase(DaemonContext_BaseTestCase):
@@ -654,45 +1161,961 @@ class DaemonContext_context_manager_exit_TestCase(DaemonContext_BaseTestCase):
         instance.__exit__(**args)
         mock_func_daemoncontext_close.assert_called_with()
 
+    @unittest.mock.patch.object(
+            daemon.daemon.DaemonContext, "notify_exception")
+    def test_notifies_exception(
+            self, mock_func_notify_exception, mock_func_daemoncontext_close):
+        """ Should report the propagating exception. """
+        instance = self.test_instance
+        args = self.test_args
+        instance.__exit__(**args)
+        mock_func_notify_exception.assert_called_once_with(
+                args['exc_value'])
+
+    @unittest.mock.patch.object(
+            daemon.daemon.DaemonContext, "notify_exception")
+    def test_omits_notify_exception_if_no_exception(
+            self, mock_func_notify_exception, mock_func_daemoncontext_close):
+        """ Should not report an exception if there is none. """
+        instance = self.test_instance
+        instance.__exit__(None, None, None)
+        self.assertFalse(mock_func_notify_exception.called)
+
     def test_returns_none(self, mock_func_daemoncontext_close):
         """ Should return None, indicating exception was not handled. """
         instance = self.test_instance
-        args = self.test_args
-        expected_result = None
-        result = instance.__exit__(**args)
-        self.assertIs(result, expected_result)
+        args = self.test_args
+        expected_result = None
+        result = instance.__exit__(**args)
+        self.assertIs(result, expected_result)
+
+
+class DaemonContext_notify_ready_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.notify_ready method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "notify_daemon_ready")
+        self.mock_func_notify_daemon_ready = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        self.test_ready_fd = self.getUniqueInteger()
+        self.test_instance._ready_fd = self.test_ready_fd
+
+    def test_notifies_daemon_ready(self):
+        """ Should report readiness on the readiness file descriptor. """
+        instance = self.test_instance
+        instance.notify_ready()
+        self.mock_func_notify_daemon_ready.assert_called_once_with(
+                self.test_ready_fd)
+
+    def test_notifies_only_once(self):
+        """ Should report readiness only once. """
+        instance = self.test_instance
+        instance.notify_ready()
+        instance.notify_ready()
+        self.mock_func_notify_daemon_ready.assert_called_once_with(
+                self.test_ready_fd)
+        self.assertIs(instance._ready_fd, None)
+
+    def test_does_nothing_if_no_ready_file_descriptor(self):
+        """ Should do nothing if there is no readiness file descriptor. """
+        instance = self.test_instance
+        instance._ready_fd = None
+        instance.notify_ready()
+        self.assertFalse(self.mock_func_notify_daemon_ready.called)
+
+    def test_notifies_service_manager(self):
+        """ Should notify the service manager, if any. """
+        instance = self.test_instance
+        instance._service_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        instance._ready_fd = None
+        instance.notify_ready()
+        instance._service_notifier.notify_ready.assert_called_once_with()
+
+    def test_completes_handover_before_notifying(self):
+        """ Should complete the handover from a predecessor first. """
+        instance = self.test_instance
+        instance._handover_socket = unittest.mock.MagicMock(
+                spec=socket.socket)
+        with unittest.mock.patch.object(
+                instance, "_complete_handover",
+                side_effect=(
+                    lambda: self.assertFalse(
+                        self.mock_func_notify_daemon_ready.called))
+                ) as mock_func_complete_handover:
+            instance.notify_ready()
+        mock_func_complete_handover.assert_called_once_with()
+        self.mock_func_notify_daemon_ready.assert_called_once_with(
+                self.test_ready_fd)
+
+
+class DaemonContext_notify_service_manager_TestCase(
+        DaemonContext_BaseTestCase, scaffold.TestCaseWithScenarios):
+    """ Test cases for DaemonContext service manager notify methods. """
+
+    scenarios = [
+            ('status', {
+                'method_name': "notify_status",
+                'test_args': ["Lorem ipsum"],
+                }),
+            ('watchdog', {
+                'method_name': "notify_watchdog",
+                'test_args': [],
+                }),
+            ('reloading', {
+                'method_name': "notify_reloading",
+                'test_args': [],
+                }),
+            ('stopping', {
+                'method_name': "notify_stopping",
+                'test_args': [],
+                }),
+            ]
+
+    def test_notifies_service_manager(self):
+        """ Should call the corresponding `ServiceNotifier` method. """
+        instance = self.test_instance
+        instance._service_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        getattr(instance, self.method_name)(*self.test_args)
+        mock_method = getattr(instance._service_notifier, self.method_name)
+        mock_method.assert_called_once_with(*self.test_args)
+
+    def test_does_nothing_if_no_service_manager(self):
+        """ Should do nothing if there is no service manager. """
+        instance = self.test_instance
+        instance._service_notifier = None
+        getattr(instance, self.method_name)(*self.test_args)
+
+
+class DaemonContext_start_watchdog_heartbeat_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._start_watchdog_heartbeat method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_service_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        self.test_instance._service_notifier = self.mock_service_notifier
+        self.test_instance.watchdog_liveness_check = object()
+
+        self.test_interval = 30.0
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "get_watchdog_interval",
+                return_value=self.test_interval)
+        self.mock_func_get_watchdog_interval = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "WatchdogHeartbeat")
+        self.mock_class_heartbeat = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+    def test_starts_heartbeat_at_watchdog_interval(self):
+        """ Should start a heartbeat at the watchdog interval. """
+        instance = self.test_instance
+        instance._start_watchdog_heartbeat()
+        self.mock_class_heartbeat.assert_called_once_with(
+                self.mock_service_notifier, self.test_interval,
+                liveness_check=instance.watchdog_liveness_check)
+        mock_heartbeat = self.mock_class_heartbeat.return_value
+        mock_heartbeat.start.assert_called_once_with()
+        self.assertIs(mock_heartbeat, instance._watchdog_heartbeat)
+
+    def test_does_nothing_if_watchdog_not_enabled(self):
+        """ Should do nothing if the watchdog is not enabled. """
+        instance = self.test_instance
+        self.mock_func_get_watchdog_interval.return_value = None
+        instance._start_watchdog_heartbeat()
+        self.assertFalse(self.mock_class_heartbeat.called)
+        self.assertIs(instance._watchdog_heartbeat, None)
+
+    def test_does_nothing_if_no_service_manager(self):
+        """ Should do nothing if there is no service manager. """
+        instance = self.test_instance
+        instance._service_notifier = None
+        instance._start_watchdog_heartbeat()
+        self.assertFalse(self.mock_class_heartbeat.called)
+
+
+class DaemonContext_adopt_listen_sockets_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._adopt_listen_sockets method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_named_fds = [("lorem", 3), ("ipsum", 4), ("lorem", 5)]
+        self.test_listen_sockets = {
+                "lorem": (object(), object()),
+                "ipsum": (object(),),
+                }
+        func_patcher_adopt = unittest.mock.patch.object(
+                daemon.daemon, "adopt_listen_file_descriptors",
+                return_value=self.test_named_fds)
+        self.mock_func_adopt = func_patcher_adopt.start()
+        self.addCleanup(func_patcher_adopt.stop)
+        func_patcher_make_sockets = unittest.mock.patch.object(
+                daemon.daemon, "make_listen_sockets",
+                return_value=self.test_listen_sockets)
+        self.mock_func_make_sockets = func_patcher_make_sockets.start()
+        self.addCleanup(func_patcher_make_sockets.stop)
+        func_patcher_get_handover_socket = unittest.mock.patch.object(
+                daemon.daemon, "get_handover_socket",
+                return_value=None)
+        self.mock_func_get_handover_socket = (
+                func_patcher_get_handover_socket.start())
+        self.addCleanup(func_patcher_get_handover_socket.stop)
+        func_patcher_receive_fds = unittest.mock.patch.object(
+                daemon.daemon, "receive_file_descriptors",
+                return_value=[("dolor", 6)])
+        self.mock_func_receive_fds = func_patcher_receive_fds.start()
+        self.addCleanup(func_patcher_receive_fds.stop)
+
+    def test_adopts_file_descriptors_from_environment(self):
+        """ Should adopt the file descriptors from the environment. """
+        instance = self.test_instance
+        instance._adopt_listen_sockets()
+        self.mock_func_adopt.assert_called_once_with()
+        self.assertEqual([3, 4, 5], instance._listen_fds)
+
+    def test_makes_listen_sockets(self):
+        """ Should make `listen_sockets` from the file descriptors. """
+        instance = self.test_instance
+        instance._adopt_listen_sockets()
+        self.mock_func_make_sockets.assert_called_once_with(
+                self.test_named_fds)
+        self.assertEqual(
+                self.test_listen_sockets, dict(instance.listen_sockets))
+
+    def test_listen_sockets_are_read_only(self):
+        """ Should have `listen_sockets` as a read-only mapping. """
+        instance = self.test_instance
+        instance._adopt_listen_sockets()
+        self.assertRaises(
+                TypeError,
+                operator.setitem, instance.listen_sockets, "dolor", ())
+
+    def test_raises_error_if_adopt_fails(self):
+        """ Should raise DaemonOSEnvironmentError if adopting fails. """
+        instance = self.test_instance
+        test_error = OSError(errno.EBADF, "Bad file descriptor")
+        self.mock_func_adopt.side_effect = test_error
+        exc = self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError,
+                instance._adopt_listen_sockets)
+        self.assertEqual(test_error, exc.__cause__)
+
+    def test_adopts_file_descriptors_from_predecessor(self):
+        """ Should adopt the file descriptors from a predecessor daemon. """
+        instance = self.test_instance
+        test_handover_socket = unittest.mock.MagicMock(spec=socket.socket)
+        self.mock_func_get_handover_socket.return_value = (
+                test_handover_socket)
+        instance._adopt_listen_sockets()
+        self.mock_func_receive_fds.assert_called_once_with(
+                test_handover_socket)
+        self.assertIs(test_handover_socket, instance._handover_socket)
+        self.assertEqual([3, 4, 5, 6], instance._listen_fds)
+        self.mock_func_make_sockets.assert_called_once_with(
+                [("lorem", 3), ("ipsum", 4), ("lorem", 5), ("dolor", 6)])
+
+    def test_omits_predecessor_if_no_handover_socket(self):
+        """ Should not receive file descriptors if no predecessor. """
+        instance = self.test_instance
+        instance._adopt_listen_sockets()
+        self.assertFalse(self.mock_func_receive_fds.called)
+        self.assertIs(instance._handover_socket, None)
+
+    def test_raises_error_if_handover_fails(self):
+        """ Should raise DaemonOSEnvironmentError if handover fails. """
+        instance = self.test_instance
+        self.mock_func_get_handover_socket.return_value = (
+                unittest.mock.MagicMock(spec=socket.socket))
+        test_error = ValueError("Handover message does not name the files")
+        self.mock_func_receive_fds.side_effect = test_error
+        exc = self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError,
+                instance._adopt_listen_sockets)
+        self.assertEqual(test_error, exc.__cause__)
+
+
+class DaemonContext_start_signal_dispatcher_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._start_signal_dispatcher method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_signal_handler_map = {signal.SIGTERM: object()}
+        class_patcher = unittest.mock.patch.object(
+                daemon.daemon, "SignalDispatcher")
+        self.mock_class_dispatcher = class_patcher.start()
+        self.addCleanup(class_patcher.stop)
+
+    def test_starts_dispatcher_for_signal_handler_map(self):
+        """ Should start a dispatcher for the signal handler map. """
+        instance = self.test_instance
+        instance._start_signal_dispatcher(self.test_signal_handler_map)
+        self.mock_class_dispatcher.assert_called_once_with(
+                self.test_signal_handler_map)
+        mock_dispatcher = self.mock_class_dispatcher.return_value
+        mock_dispatcher.start.assert_called_once_with()
+        self.assertIs(mock_dispatcher, instance._signal_dispatcher)
+
+
+class DaemonContext_open_service_notifier_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._open_service_notifier method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_service_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        self.mock_service_notifier.address = "/run/lorem/notify"
+        func_patcher = unittest.mock.patch.object(
+                daemon.notify.ServiceNotifier, "from_environment",
+                return_value=self.mock_service_notifier)
+        self.mock_func_from_environment = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+    def test_opens_notifier_from_environment(self):
+        """ Should open a service notifier from the environment. """
+        instance = self.test_instance
+        instance._open_service_notifier()
+        self.mock_func_from_environment.assert_called_once_with()
+        self.mock_service_notifier.open.assert_called_once_with()
+        self.assertIs(self.mock_service_notifier, instance._service_notifier)
+
+    def test_does_nothing_if_no_service_manager(self):
+        """ Should have no service notifier if none in environment. """
+        instance = self.test_instance
+        self.mock_func_from_environment.return_value = None
+        instance._open_service_notifier()
+        self.assertIs(instance._service_notifier, None)
+
+    def test_raises_error_if_open_fails(self):
+        """ Should raise DaemonOSEnvironmentError if socket open fails. """
+        instance = self.test_instance
+        test_error = FileNotFoundError(
+                errno.ENOENT, "No such file or directory")
+        self.mock_service_notifier.open.side_effect = test_error
+        exc = self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError,
+                instance._open_service_notifier)
+        self.assertEqual(test_error, exc.__cause__)
+
+
+class DaemonContext_notify_failure_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.notify_failure method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "notify_daemon_failure")
+        self.mock_func_notify_daemon_failure = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        self.test_ready_fd = self.getUniqueInteger()
+        self.test_instance._ready_fd = self.test_ready_fd
+        self.test_message = "Lorem ipsum"
+
+    def test_notifies_daemon_failure(self):
+        """ Should report failure on the readiness file descriptor. """
+        instance = self.test_instance
+        instance.notify_failure(self.test_message)
+        self.mock_func_notify_daemon_failure.assert_called_once_with(
+                self.test_ready_fd, self.test_message)
+        self.assertIs(instance._ready_fd, None)
+
+    def test_does_nothing_if_no_ready_file_descriptor(self):
+        """ Should do nothing if there is no readiness file descriptor. """
+        instance = self.test_instance
+        instance._ready_fd = None
+        instance.notify_failure(self.test_message)
+        self.assertFalse(self.mock_func_notify_daemon_failure.called)
+
+
+class DaemonContext_notify_exception_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.notify_exception method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "notify_daemon_exception")
+        self.mock_func_notify_daemon_exception = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        self.test_ready_fd = self.getUniqueInteger()
+        self.test_instance._ready_fd = self.test_ready_fd
+        self.test_exception = ValueError("Lorem ipsum")
+
+    def test_notifies_daemon_exception(self):
+        """ Should report the exception on the readiness file descriptor. """
+        instance = self.test_instance
+        instance.notify_exception(self.test_exception)
+        self.mock_func_notify_daemon_exception.assert_called_once_with(
+                self.test_ready_fd, self.test_exception)
+        self.assertIs(instance._ready_fd, None)
+
+    def test_does_nothing_if_no_ready_file_descriptor(self):
+        """ Should do nothing if there is no readiness file descriptor. """
+        instance = self.test_instance
+        instance._ready_fd = None
+        instance.notify_exception(self.test_exception)
+        self.assertFalse(self.mock_func_notify_daemon_exception.called)
+
+
+class DaemonContext_terminate_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.terminate method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_signal = signal.SIGTERM
+        self.test_frame = None
+        self.test_args = (self.test_signal, self.test_frame)
+
+    def test_raises_system_exit(self):
+        """ Should raise SystemExit. """
+        instance = self.test_instance
+        args = self.test_args
+        expected_exception = SystemExit
+        self.assertRaises(
+                expected_exception,
+                instance.terminate, *args)
+
+    def test_exception_message_contains_signal_number(self):
+        """ Should raise exception with a message containing signal number. """
+        instance = self.test_instance
+        args = self.test_args
+        signal_number = self.test_signal
+        expected_exception = SystemExit
+        exc = self.assertRaises(
+                expected_exception,
+                instance.terminate, *args)
+        self.assertIn(str(signal_number), str(exc))
+
+    def test_begins_shutdown_if_graceful_shutdown(self):
+        """ Should begin a graceful shutdown if `graceful_shutdown`. """
+        instance = self.test_instance
+        instance.graceful_shutdown = True
+        with unittest.mock.patch.object(
+                instance, "begin_shutdown") as mock_func_begin_shutdown:
+            instance.terminate(*self.test_args)
+        mock_func_begin_shutdown.assert_called_once_with(self.test_signal)
+
+    def test_raises_system_exit_if_already_shutting_down(self):
+        """ Should raise SystemExit if graceful shutdown has begun. """
+        instance = self.test_instance
+        instance.graceful_shutdown = True
+        instance.shutdown_event.set()
+        self.assertRaises(
+                SystemExit,
+                instance.terminate, *self.test_args)
+
+
+class DaemonContext_begin_shutdown_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.begin_shutdown method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_instance.shutdown_timeout = 17
+        self.test_drain_calls = []
+        self.test_instance.add_drain_callback(
+                lambda: self.test_drain_calls.append("lorem"))
+        self.test_instance.add_drain_callback(
+                lambda: self.test_drain_calls.append("ipsum"))
+
+        func_patcher_notify_stopping = unittest.mock.patch.object(
+                self.test_instance, "notify_stopping")
+        self.mock_func_notify_stopping = func_patcher_notify_stopping.start()
+        self.addCleanup(func_patcher_notify_stopping.stop)
+        self.addCleanup(self.test_instance._shutdown.cancel)
+
+    def test_sets_shutdown_event(self):
+        """ Should set the `shutdown_event`. """
+        instance = self.test_instance
+        instance.begin_shutdown()
+        self.assertTrue(instance.shutdown_event.is_set())
+        self.assertTrue(instance.is_shutting_down)
+
+    def test_calls_drain_callbacks_in_order(self):
+        """ Should call the drain callbacks in order of registration. """
+        instance = self.test_instance
+        instance.begin_shutdown()
+        self.assertTrue(instance._shutdown.wait_drained(timeout=5))
+        self.assertEqual(["lorem", "ipsum"], self.test_drain_calls)
+
+    def test_notifies_service_manager_once(self):
+        """ Should notify the service manager, once. """
+        instance = self.test_instance
+        instance.begin_shutdown()
+        instance.begin_shutdown()
+        self.mock_func_notify_stopping.assert_called_once_with()
+
+    def test_sets_deadline_from_shutdown_timeout(self):
+        """ Should set the deadline from `shutdown_timeout`. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(
+                time, "monotonic", return_value=1000.0):
+            instance.begin_shutdown()
+        self.assertEqual(1017.0, instance._shutdown.deadline)
+
+    def test_expires_with_signal_number(self):
+        """ Should expire the shutdown with the specified signal. """
+        instance = self.test_instance
+        instance.shutdown_timeout = 0
+        test_signal_number = signal.SIGINT
+        expired = threading.Event()
+        with unittest.mock.patch.object(
+                instance, "_expire_shutdown",
+                side_effect=(lambda signal_number: expired.set())
+                ) as mock_func_expire_shutdown:
+            instance.begin_shutdown(test_signal_number)
+            self.assertTrue(expired.wait(timeout=5))
+        mock_func_expire_shutdown.assert_called_once_with(
+                test_signal_number)
+
+
+class DaemonContext_reload_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.reload method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_calls = []
+        self.test_instance._service_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        self.mock_service_notifier = self.test_instance._service_notifier
+        self.mock_service_notifier.notify_reloading.side_effect = (
+                lambda: self.test_calls.append("reloading"))
+        self.mock_service_notifier.notify_ready.side_effect = (
+                lambda: self.test_calls.append("ready"))
+        for name in ["lorem", "ipsum"]:
+            self.test_instance.add_reload_callback(
+                    functools.partial(self.test_calls.append, name))
+
+        self.test_signal_number = signal.SIGHUP
+        self.test_stack_frame = object()
+        self.test_args = (self.test_signal_number, self.test_stack_frame)
+
+    def test_calls_reload_callbacks_between_notifications(self):
+        """ Should call reload callbacks between service notifications. """
+        instance = self.test_instance
+        instance.reload(*self.test_args)
+        self.assertEqual(
+                ["reloading", "lorem", "ipsum", "ready"], self.test_calls)
+
+    def test_omits_notifications_if_no_service_manager(self):
+        """ Should reload without a service manager. """
+        instance = self.test_instance
+        instance._service_notifier = None
+        instance.reload(*self.test_args)
+        self.assertEqual(["lorem", "ipsum"], self.test_calls)
+
+    def test_calls_reload_hook_with_duration(self):
+        """ Should call the `reload_hook` with the reload duration. """
+        instance = self.test_instance
+        instance.reload_hook = unittest.mock.MagicMock()
+        with unittest.mock.patch.object(
+                time, "monotonic", side_effect=[1000.0, 1000.25]):
+            instance.reload(*self.test_args)
+        instance.reload_hook.assert_called_once_with(0.25)
+        self.assertEqual(0.25, instance.last_reload_duration)
+
+    def test_coalesces_signals_during_reload(self):
+        """ Should reload once more for a burst of signals meanwhile. """
+        instance = self.test_instance
+
+        def fake_reentrant_callback():
+            if self.test_calls.count("dolor") == 0:
+                for __ in range(3):
+                    instance.reload(*self.test_args)
+            self.test_calls.append("dolor")
+
+        instance.add_reload_callback(fake_reentrant_callback)
+        instance.reload(*self.test_args)
+        self.assertEqual(2, self.test_calls.count("dolor"))
+        self.assertEqual(2, self.test_calls.count("ready"))
+
+    def test_is_default_signal_map_target_for_sighup(self):
+        """ Should be the default signal map target for SIGHUP. """
+        instance = daemon.daemon.DaemonContext()
+        self.assertEqual('reload', instance.signal_map[signal.SIGHUP])
+
+
+class DaemonContext_expire_shutdown_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._expire_shutdown method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_signal_number = signal.SIGTERM
+
+    def test_signals_main_thread(self):
+        """ Should send the signal to the main thread. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(
+                signal, "pthread_kill") as mock_func_pthread_kill:
+            instance._expire_shutdown(self.test_signal_number)
+        mock_func_pthread_kill.assert_called_once_with(
+                threading.main_thread().ident, self.test_signal_number)
+
+    def test_signals_process_if_signal_dispatcher(self):
+        """ Should send the signal to the process, if dispatched. """
+        instance = self.test_instance
+        instance._signal_dispatcher = unittest.mock.MagicMock()
+        with unittest.mock.patch.object(os, "kill") as mock_func_os_kill:
+            instance._expire_shutdown(self.test_signal_number)
+        mock_func_os_kill.assert_called_once_with(
+                os.getpid(), self.test_signal_number)
+
+
+class DaemonContext_restart_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext.restart method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_instance.pidfile = unittest.mock.MagicMock(
+                spec=daemon.pidfile.TimeoutPIDLockFile)
+        self.test_args = ["lorem", "--ipsum"]
+        self.test_successor_pid = 2468
+        self.test_named_fds = [("lorem", 3), ("files_preserve", 7)]
+
+        self.mock_handover_socket = unittest.mock.MagicMock(
+                spec=socket.socket)
+        self.mock_successor_socket = unittest.mock.MagicMock(
+                spec=socket.socket)
+        self.mock_successor_socket.fileno.return_value = 9
+
+        self.mock_module_daemon = unittest.mock.MagicMock()
+        daemon_func_patchers = {
+                func_name: unittest.mock.patch.object(
+                    daemon.daemon, func_name, **kwargs)
+                for (func_name, kwargs) in {
+                    'make_handover_socket_pair': dict(
+                        return_value=(
+                            self.mock_handover_socket,
+                            self.mock_successor_socket)),
+                    'send_file_descriptors': dict(),
+                    'receive_message': dict(
+                        return_value=(
+                            {
+                                'status': "ready",
+                                'pid': self.test_successor_pid},
+                            [])),
+                    'send_message': dict(),
+                    }.items()}
+        for (func_name, patcher) in daemon_func_patchers.items():
+            mock_func = patcher.start()
+            self.addCleanup(patcher.stop)
+            self.mock_module_daemon.attach_mock(mock_func, func_name)
+
+        func_patcher_popen = unittest.mock.patch.object(subprocess, "Popen")
+        self.mock_func_popen = func_patcher_popen.start()
+        self.addCleanup(func_patcher_popen.stop)
+
+        func_patcher_get_handover_fds = unittest.mock.patch.object(
+                self.test_instance, "_get_handover_file_descriptors",
+                return_value=self.test_named_fds)
+        func_patcher_get_handover_fds.start()
+        self.addCleanup(func_patcher_get_handover_fds.stop)
+        func_patcher_begin_shutdown = unittest.mock.patch.object(
+                self.test_instance, "begin_shutdown")
+        self.mock_func_begin_shutdown = func_patcher_begin_shutdown.start()
+        self.addCleanup(func_patcher_begin_shutdown.stop)
+
+    def test_starts_successor_with_signals_unblocked(self):
+        """ Should start the successor with the dispatched signals
+            unblocked. """
+        instance = self.test_instance
+        mock_dispatcher = unittest.mock.MagicMock(
+                spec=daemon.signals.SignalDispatcher)
+        instance._signal_dispatcher = mock_dispatcher
+        mock_dispatcher.attach_mock(self.mock_func_popen, "Popen")
+        instance.restart(self.test_args)
+        self.assertEqual(
+                [
+                    unittest.mock.call.signals_unblocked(),
+                    unittest.mock.call.signals_unblocked().__enter__(),
+                    unittest.mock.call.Popen(
+                        self.test_args, env=unittest.mock.ANY,
+                        pass_fds=unittest.mock.ANY),
+                    unittest.mock.call.signals_unblocked().__exit__(
+                        None, None, None),
+                    ],
+                mock_dispatcher.mock_calls[:4])
+
+    def test_starts_successor_with_handover_socket(self):
+        """ Should start the successor, passing the handover socket. """
+        instance = self.test_instance
+        instance.restart(self.test_args)
+        (args, kwargs) = self.mock_func_popen.call_args
+        self.assertEqual((self.test_args,), args)
+        self.assertEqual([9], kwargs['pass_fds'])
+        self.assertEqual("9", kwargs['env']['DAEMON_HANDOVER_FD'])
+
+    def test_hands_over_in_expected_sequence(self):
+        """ Should hand over files, then PID file, in expected sequence. """
+        instance = self.test_instance
+        self.mock_module_daemon.attach_mock(instance.pidfile, 'pidfile')
+        instance.restart(self.test_args)
+        self.mock_module_daemon.assert_has_calls([
+                unittest.mock.call.send_file_descriptors(
+                    self.mock_handover_socket, self.test_named_fds),
+                unittest.mock.call.receive_message(
+                    self.mock_handover_socket),
+                unittest.mock.call.pidfile.hand_over(
+                    self.test_successor_pid),
+                unittest.mock.call.send_message(
+                    self.mock_handover_socket, fds=[],
+                    status="handed-over"),
+                ])
+        self.assertTrue(instance._pidfile_held_elsewhere)
+
+    def test_sends_open_pidfile_to_successor(self):
+        """ Should send the file descriptor of an open PID file. """
+        instance = self.test_instance
+        instance.pidfile = unittest.mock.MagicMock(
+                spec=daemon.pidfile.FlockPIDLockFile)
+        test_fd = 19
+        instance.pidfile.fileno.return_value = test_fd
+        instance.restart(self.test_args)
+        instance.pidfile.hand_over.assert_called_with(
+                self.test_successor_pid)
+        self.mock_module_daemon.send_message.assert_called_with(
+                self.mock_handover_socket, fds=[test_fd],
+                status="handed-over")
+
+    def test_closes_handover_sockets(self):
+        """ Should close both handover sockets. """
+        instance = self.test_instance
+        instance.restart(self.test_args)
+        self.mock_handover_socket.close.assert_called_with()
+        self.mock_successor_socket.close.assert_called_with()
+
+    def test_waits_for_successor_program(self):
+        """ Should wait for the successor program to detach. """
+        instance = self.test_instance
+        test_timeout = 17
+        instance.restart(self.test_args, timeout=test_timeout)
+        self.mock_func_popen.return_value.wait.assert_called_once_with(
+                test_timeout)
+
+    def test_begins_shutdown(self):
+        """ Should begin a graceful shutdown of this daemon. """
+        instance = self.test_instance
+        instance.restart(self.test_args)
+        self.mock_func_begin_shutdown.assert_called_once_with()
+
+    def test_notifies_service_manager_of_successor(self):
+        """ Should notify the service manager of the successor's PID. """
+        instance = self.test_instance
+        instance._service_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        instance.restart(self.test_args)
+        instance._service_notifier.notify.assert_called_once_with(
+                MAINPID=str(self.test_successor_pid))
+
+    def test_returns_successor_pid(self):
+        """ Should return the process ID of the successor. """
+        instance = self.test_instance
+        result = instance.restart(self.test_args)
+        self.assertEqual(self.test_successor_pid, result)
+
+    def test_raises_error_if_successor_not_ready(self):
+        """ Should raise DaemonError if the successor is not ready. """
+        instance = self.test_instance
+        self.mock_module_daemon.receive_message.return_value = (None, [])
+        self.assertRaises(
+                daemon.daemon.DaemonError,
+                instance.restart, self.test_args)
+        self.assertFalse(instance.pidfile.hand_over.called)
+        self.assertFalse(instance._pidfile_held_elsewhere)
+        self.assertFalse(self.mock_func_begin_shutdown.called)
+
+    def test_raises_error_if_handover_fails(self):
+        """ Should raise DaemonError if the handover fails. """
+        instance = self.test_instance
+        test_error = OSError(errno.ECONNRESET, "Connection reset by peer")
+        self.mock_module_daemon.send_file_descriptors.side_effect = (
+                test_error)
+        exc = self.assertRaises(
+                daemon.daemon.DaemonError,
+                instance.restart, self.test_args)
+        self.assertEqual(test_error, exc.__cause__)
+        self.mock_handover_socket.close.assert_called_with()
+        self.assertFalse(self.mock_func_begin_shutdown.called)
+
+    def test_raises_error_if_pidfile_cannot_be_handed_over(self):
+        """ Should raise DaemonError if the PID file has no `hand_over`. """
+        instance = self.test_instance
+        instance.pidfile = unittest.mock.MagicMock(
+                spec=["__enter__", "__exit__"])
+        self.assertRaises(
+                daemon.daemon.DaemonError,
+                instance.restart, self.test_args)
+        self.assertFalse(self.mock_func_popen.called)
+
+
+class DaemonContext_get_handover_file_descriptors_TestCase(
+        DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._get_handover_file_descriptors. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_sockets = {}
+        for fd in [3, 4, 5]:
+            mock_socket = unittest.mock.MagicMock(spec=socket.socket)
+            mock_socket.fileno.return_value = fd
+            self.test_sockets[fd] = mock_socket
+        self.test_instance._listen_sockets = {
+                "lorem": (self.test_sockets[3], self.test_sockets[5]),
+                "ipsum": (self.test_sockets[4],),
+                }
+        self.test_file = FakeFileDescriptorStringIO()
+        self.test_file._fileno = 11
+
+    def test_returns_listen_sockets_by_name(self):
+        """ Should return the listen sockets, with their names. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        result = instance._get_handover_file_descriptors()
+        self.assertEqual(
+                [("lorem", 3), ("lorem", 5), ("ipsum", 4)], result)
+
+    def test_returns_files_preserve_once(self):
+        """ Should return the files in `files_preserve`, not repeated. """
+        instance = self.test_instance
+        instance.files_preserve = [self.test_file, 17, 4, None, 17]
+        result = instance._get_handover_file_descriptors()
+        self.assertEqual(
+                [
+                    ("lorem", 3), ("lorem", 5), ("ipsum", 4),
+                    ("files_preserve", 11), ("files_preserve", 17)],
+                result)
 
-
-class DaemonContext_terminate_TestCase(DaemonContext_BaseTestCase):
-    """ Test cases for DaemonContext.terminate method. """
+
+class DaemonContext_complete_handover_TestCase(DaemonContext_BaseTestCase):
+    """ Test cases for DaemonContext._complete_handover method. """
 
     def setUp(self):
         """ Set up test fixtures. """
         super().setUp()
 
-        self.test_signal = signal.SIGTERM
-        self.test_frame = None
-        self.test_args = (self.test_signal, self.test_frame)
+        self.mock_handover_socket = unittest.mock.MagicMock(
+                spec=socket.socket)
+        self.test_instance._handover_socket = self.mock_handover_socket
+        self.test_instance._pidfile_held_elsewhere = True
+
+        func_patcher_send_message = unittest.mock.patch.object(
+                daemon.daemon, "send_message")
+        self.mock_func_send_message = func_patcher_send_message.start()
+        self.addCleanup(func_patcher_send_message.stop)
+        func_patcher_receive_message = unittest.mock.patch.object(
+                daemon.daemon, "receive_message",
+                return_value=({'status': "handed-over"}, []))
+        self.mock_func_receive_message = func_patcher_receive_message.start()
+        self.addCleanup(func_patcher_receive_message.stop)
+
+    def test_sends_ready_with_process_id(self):
+        """ Should tell the predecessor this daemon is ready. """
+        instance = self.test_instance
+        instance._complete_handover()
+        self.mock_func_send_message.assert_called_once_with(
+                self.mock_handover_socket,
+                status="ready", pid=os.getpid())
 
-    def test_raises_system_exit(self):
-        """ Should raise SystemExit. """
+    def test_holds_pidfile_when_handed_over(self):
+        """ Should hold the PID file once the predecessor hands over. """
         instance = self.test_instance
-        args = self.test_args
-        expected_exception = SystemExit
+        instance._complete_handover()
+        self.assertFalse(instance._pidfile_held_elsewhere)
+
+    @unittest.mock.patch.object(os, "close")
+    def test_adopts_open_pidfile_when_handed_over(self, mock_func_os_close):
+        """ Should adopt the open PID file sent by the predecessor. """
+        instance = self.test_instance
+        instance.pidfile = unittest.mock.MagicMock(
+                spec=daemon.pidfile.FlockPIDLockFile)
+        self.mock_func_receive_message.return_value = (
+                {'status': "handed-over"}, [19, 23])
+        instance._complete_handover()
+        instance.pidfile.adopt.assert_called_once_with(19)
+        mock_func_os_close.assert_called_once_with(23)
+
+    @unittest.mock.patch.object(os, "close")
+    def test_closes_open_pidfile_if_cannot_adopt(self, mock_func_os_close):
+        """ Should close the open PID file, if the PID file cannot adopt. """
+        instance = self.test_instance
+        instance.pidfile = unittest.mock.MagicMock(
+                spec=daemon.pidfile.PIDLockFile)
+        self.mock_func_receive_message.return_value = (
+                {'status': "handed-over"}, [19])
+        instance._complete_handover()
+        mock_func_os_close.assert_called_once_with(19)
+
+    def test_adopts_pidfile_without_open_file_when_handed_over(self):
+        """ Should adopt the PID file, if the predecessor sent no file. """
+        instance = self.test_instance
+        instance.pidfile = unittest.mock.MagicMock(
+                spec=daemon.pidfile.TimeoutPIDLockFile)
+        self.mock_func_receive_message.return_value = (
+                {'status': "handed-over"}, [])
+        instance._complete_handover()
+        instance.pidfile.adopt.assert_called_once_with(None)
+
+    def test_closes_handover_socket(self):
+        """ Should close the handover socket. """
+        instance = self.test_instance
+        instance._complete_handover()
+        self.mock_handover_socket.close.assert_called_once_with()
+        self.assertIs(instance._handover_socket, None)
+
+    def test_raises_error_if_not_handed_over(self):
+        """ Should raise DaemonError if the predecessor did not hand over. """
+        instance = self.test_instance
+        self.mock_func_receive_message.return_value = (None, [])
         self.assertRaises(
-                expected_exception,
-                instance.terminate, *args)
+                daemon.daemon.DaemonError,
+                instance._complete_handover)
+        self.assertTrue(instance._pidfile_held_elsewhere)
 
-    def test_exception_message_contains_signal_number(self):
-        """ Should raise exception with a message containing signal number. """
+    def test_raises_error_if_socket_fails(self):
+        """ Should raise DaemonError if the handover socket fails. """
         instance = self.test_instance
-        args = self.test_args
-        signal_number = self.test_signal
-        expected_exception = SystemExit
+        test_error = OSError(errno.EPIPE, "Broken pipe")
+        self.mock_func_send_message.side_effect = test_error
         exc = self.assertRaises(
-                expected_exception,
-                instance.terminate, *args)
-        self.assertIn(str(signal_number), str(exc))
+                daemon.daemon.DaemonError,
+                instance._complete_handover)
+        self.assertEqual(test_error, exc.__cause__)
+        self.mock_handover_socket.close.assert_called_once_with()
 
 
 class DaemonContext_get_exclude_file_descriptors_TestCase(
@@ -733,6 +2156,62 @@ class DaemonContext_get_exclude_file_descriptors_TestCase(
         result = instance._get_exclude_file_descriptors()
         self.assertEqual(expected_result, result)
 
+    def test_returns_ready_file_descriptor(self):
+        """ Should include the readiness file descriptor, if any. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        test_ready_fd = 13
+        instance._ready_fd = test_ready_fd
+        result = instance._get_exclude_file_descriptors()
+        self.assertIn(test_ready_fd, result)
+
+    def test_returns_service_notifier_file_descriptor(self):
+        """ Should include the service manager socket, if any. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        instance._service_notifier = FakeFileDescriptorStringIO()
+        test_fd = instance._service_notifier.fileno()
+        result = instance._get_exclude_file_descriptors()
+        self.assertIn(test_fd, result)
+
+    def test_returns_listen_file_descriptors(self):
+        """ Should include the sockets passed by the service manager. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        test_listen_fds = [3, 4, 5]
+        instance._listen_fds = test_listen_fds
+        result = instance._get_exclude_file_descriptors()
+        self.assertTrue(set(test_listen_fds).issubset(result))
+
+    def test_returns_handover_file_descriptor(self):
+        """ Should include the socket to a predecessor daemon, if any. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        instance._handover_socket = FakeFileDescriptorStringIO()
+        test_fd = instance._handover_socket.fileno()
+        result = instance._get_exclude_file_descriptors()
+        self.assertIn(test_fd, result)
+
+    def test_returns_pidfile_file_descriptor(self):
+        """ Should include the open PID file, if any. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        instance.pidfile = unittest.mock.MagicMock(
+                spec=daemon.pidfile.FlockPIDLockFile)
+        test_fd = 19
+        instance.pidfile.fileno.return_value = test_fd
+        result = instance._get_exclude_file_descriptors()
+        self.assertIn(test_fd, result)
+
+    def test_omits_pidfile_without_file_descriptor(self):
+        """ Should omit a PID file that has no file descriptor. """
+        instance = self.test_instance
+        instance.files_preserve = None
+        instance.pidfile = unittest.mock.MagicMock(
+                spec=daemon.pidfile.TimeoutPIDLockFile)
+        result = instance._get_exclude_file_descriptors()
+        self.assertNotIn(instance.pidfile, result)
+
     def test_returns_stream_redirects_if_no_files_preserve(self):
         """ Should return only stream redirects if no files_preserve. """
         instance = self.test_instance
@@ -794,6 +2273,17 @@ class DaemonContext_get_exclude_file_descriptors_TestCase(
         result = instance._get_exclude_file_descriptors()
         self.assertEqual(expected_result, result)
 
+    def test_does_not_modify_files_preserve(self):
+        """ Should not modify the `files_preserve` collection. """
+        instance = self.test_instance
+        test_files_preserve = list(self.test_files.values())
+        instance.files_preserve = test_files_preserve
+        expected_files_preserve = list(test_files_preserve)
+        instance._get_exclude_file_descriptors()
+        instance._get_exclude_file_descriptors()
+        self.assertIs(test_files_preserve, instance.files_preserve)
+        self.assertEqual(expected_files_preserve, instance.files_preserve)
+
 
 class DaemonContext_make_signal_handler_TestCase(DaemonContext_BaseTestCase):
     """ Test cases for DaemonContext._make_signal_handler function. """
@@ -1251,6 +2741,44 @@ class prevent_core_dump_TestCase(scaffold.TestCase):
                 daemon.daemon.prevent_core_dump)
         self.assertEqual(test_error, exc.__cause__)
 
+
+class PhaseTimer_TestCase(scaffold.TestCase):
+    """ Test cases for class `PhaseTimer`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.fake_clock_values = [100, 250, 275, 1275]
+        func_patcher = unittest.mock.patch.object(
+                time, "monotonic_ns", side_effect=self.fake_clock_values)
+        func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        self.test_instance = daemon.daemon.PhaseTimer()
+
+    def test_timings_empty_initially(self):
+        """ Should have no timings initially. """
+        self.assertEqual({}, dict(self.test_instance.timings))
+
+    def test_records_duration_of_each_phase(self):
+        """ Should record the duration of each phase, in order. """
+        instance = self.test_instance
+        for name in ['lorem', 'ipsum', 'dolor']:
+            instance.end_phase(name)
+        expected_timings = {'lorem': 150, 'ipsum': 25, 'dolor': 1000}
+        self.assertEqual(expected_timings, dict(instance.timings))
+        self.assertEqual(
+                ['lorem', 'ipsum', 'dolor'], list(instance.timings))
+
+    def test_timings_are_read_only(self):
+        """ Should provide the timings as a read-only mapping. """
+        instance = self.test_instance
+        instance.end_phase('lorem')
+        self.assertRaises(
+                TypeError,
+                operator.setitem, instance.timings, 'lorem', 0)
+
 
 class get_stream_file_descriptors_TestCase(scaffold.TestCase):
     """ Test cases for function `get_stream_file_descriptors`. """
@@ -1367,6 +2895,43 @@ class close_file_descriptor_if_open_TestCase(scaffold.TestCase):
                 daemon.daemon.close_file_descriptor_if_open, fd)
         self.assertEqual(test_error, exc.__cause__)
 
+
+@unittest.mock.patch.object(os, "set_inheritable")
+class mark_file_descriptor_close_on_exec_if_open_TestCase(scaffold.TestCase):
+    """ Test cases for mark_file_descriptor_close_on_exec_if_open function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.fake_fd = 274
+
+    def test_requests_file_descriptor_not_inheritable(
+            self, mock_func_os_set_inheritable):
+        """ Should request the file descriptor be made not inheritable. """
+        fd = self.fake_fd
+        daemon.daemon.mark_file_descriptor_close_on_exec_if_open(fd)
+        mock_func_os_set_inheritable.assert_called_with(fd, False)
+
+    def test_ignores_badfd_error(self, mock_func_os_set_inheritable):
+        """ Should ignore OSError EBADF when marking. """
+        fd = self.fake_fd
+        test_error = OSError(errno.EBADF, "Bad file descriptor")
+        mock_func_os_set_inheritable.side_effect = test_error
+        daemon.daemon.mark_file_descriptor_close_on_exec_if_open(fd)
+        mock_func_os_set_inheritable.assert_called_with(fd, False)
+
+    def test_raises_error_if_oserror(self, mock_func_os_set_inheritable):
+        """ Should raise DaemonError if an OSError occurs when marking. """
+        fd = self.fake_fd
+        test_error = OSError(object(), "Unexpected error")
+        mock_func_os_set_inheritable.side_effect = test_error
+        expected_error = daemon.daemon.DaemonOSEnvironmentError
+        exc = self.assertRaises(
+                expected_error,
+                daemon.daemon.mark_file_descriptor_close_on_exec_if_open, fd)
+        self.assertEqual(test_error, exc.__cause__)
+
 
 class maxfd_TestCase(scaffold.TestCase):
     """ Test cases for module MAXFD constant. """
@@ -1454,6 +3019,167 @@ class get_maximum_file_descriptors_TestCase(scaffold.TestCase):
         self.assertEqual(expected_result, result)
 
 
+class FileDescriptorIntervalSet_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for class `FileDescriptorIntervalSet`. """
+
+    scenarios = [
+            ('empty', {
+                'test_fds': [],
+                'expected_intervals': [],
+                }),
+            ('one', {
+                'test_fds': [7],
+                'expected_intervals': [(7, 8)],
+                }),
+            ('consecutive', {
+                'test_fds': [5, 3, 4, 6],
+                'expected_intervals': [(3, 7)],
+                }),
+            ('sparse', {
+                'test_fds': [0, 2, 4, 5, 9],
+                'expected_intervals': [(0, 1), (2, 3), (4, 6), (9, 10)],
+                }),
+            ('duplicates', {
+                'test_fds': [2, 2, 3, 3, 8, 8],
+                'expected_intervals': [(2, 4), (8, 9)],
+                }),
+            ('negative', {
+                'test_fds': [-3, -2, 1],
+                'expected_intervals': [(-3, -1), (1, 2)],
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_instance = (
+                daemon.daemon.FileDescriptorIntervalSet.from_file_descriptors(
+                    self.test_fds))
+
+    def test_has_expected_intervals(self):
+        """ Should have the expected intervals. """
+        result = self.test_instance.intervals()
+        self.assertEqual(self.expected_intervals, result)
+
+    def test_equals_instance_from_same_intervals(self):
+        """ Should be equal to an instance made from the same intervals. """
+        other = daemon.daemon.FileDescriptorIntervalSet(
+                self.expected_intervals)
+        self.assertEqual(self.test_instance, other)
+
+    def test_has_expected_length(self):
+        """ Should have length of the number of distinct values. """
+        expected_length = len(set(self.test_fds))
+        self.assertEqual(expected_length, len(self.test_instance))
+
+    def test_iterates_values_in_order(self):
+        """ Should iterate the distinct values in order. """
+        expected_values = sorted(set(self.test_fds))
+        self.assertEqual(expected_values, list(self.test_instance))
+
+    def test_contains_only_specified_values(self):
+        """ Should contain exactly the specified values. """
+        test_values = range(-5, 15)
+        expected_membership = [fd in self.test_fds for fd in test_values]
+        result = [fd in self.test_instance for fd in test_values]
+        self.assertEqual(expected_membership, result)
+
+    def test_complement_ranges_cover_other_values(self):
+        """ Should have complement ranges with exactly the other values. """
+        within = range(0, 12)
+        result = self.test_instance.complement_ranges(within=within)
+        result_values = [
+                fd for (low, high) in result for fd in range(low, high)]
+        expected_values = [fd for fd in within if fd not in self.test_fds]
+        self.assertEqual(expected_values, result_values)
+        for (low, high) in result:
+            self.assertLess(low, high)
+
+
+class FileDescriptorIntervalSet_init_TestCase(scaffold.TestCase):
+    """ Test cases for `FileDescriptorIntervalSet` initialiser. """
+
+    def test_merges_overlapping_and_adjacent_intervals(self):
+        """ Should merge intervals which overlap or adjoin. """
+        instance = daemon.daemon.FileDescriptorIntervalSet(
+                [(10, 20), (0, 5), (5, 8), (15, 25), (30, 30)])
+        expected_intervals = [(0, 8), (10, 25)]
+        self.assertEqual(expected_intervals, instance.intervals())
+
+    def test_empty_by_default(self):
+        """ Should be empty by default. """
+        instance = daemon.daemon.FileDescriptorIntervalSet()
+        self.assertFalse(instance)
+        self.assertEqual([], instance.intervals())
+
+
+class FileDescriptorIntervalSet_union_TestCase(scaffold.TestCase):
+    """ Test cases for `FileDescriptorIntervalSet.union` method. """
+
+    def test_returns_set_with_values_of_both(self):
+        """ Should return a new set with the values of both sets. """
+        first = daemon.daemon.FileDescriptorIntervalSet([(0, 3), (10, 12)])
+        second = daemon.daemon.FileDescriptorIntervalSet([(3, 5), (20, 21)])
+        expected_intervals = [(0, 5), (10, 12), (20, 21)]
+        result = first.union(second)
+        self.assertEqual(expected_intervals, result.intervals())
+        self.assertEqual(result, (first | second))
+
+    def test_does_not_modify_either_set(self):
+        """ Should not modify either of the sets. """
+        first = daemon.daemon.FileDescriptorIntervalSet([(0, 3)])
+        second = daemon.daemon.FileDescriptorIntervalSet([(5, 8)])
+        first.union(second)
+        self.assertEqual([(0, 3)], first.intervals())
+        self.assertEqual([(5, 8)], second.intervals())
+
+
+class FileDescriptorIntervalSet_complement_ranges_TestCase(
+        scaffold.TestCaseWithScenarios):
+    """ Test cases for `FileDescriptorIntervalSet.complement_ranges`. """
+
+    scenarios = [
+            ('empty-set', {
+                'test_intervals': [],
+                'within': range(0, 10),
+                'expected_result': [(0, 10)],
+                }),
+            ('empty-range', {
+                'test_intervals': [(2, 4)],
+                'within': range(5, 5),
+                'expected_result': [],
+                }),
+            ('set-covers-range', {
+                'test_intervals': [(0, 20)],
+                'within': range(5, 10),
+                'expected_result': [],
+                }),
+            ('set-at-both-ends', {
+                'test_intervals': [(0, 2), (5, 6), (8, 10)],
+                'within': range(0, 10),
+                'expected_result': [(2, 5), (6, 8)],
+                }),
+            ('set-beyond-both-ends', {
+                'test_intervals': [(-5, 2), (5, 6), (8, 20)],
+                'within': range(0, 10),
+                'expected_result': [(2, 5), (6, 8)],
+                }),
+            ('set-outside-range', {
+                'test_intervals': [(-5, -1), (20, 30)],
+                'within': range(0, 10),
+                'expected_result': [(0, 10)],
+                }),
+            ]
+
+    def test_returns_expected_ranges(self):
+        """ Should return the expected ranges. """
+        instance = daemon.daemon.FileDescriptorIntervalSet(
+                self.test_intervals)
+        result = instance.complement_ranges(within=self.within)
+        self.assertEqual(self.expected_result, result)
+
+
 def make_total_file_descriptor_range_patch(testcase, fake_maxfd):
     """ Make a `_total_file_descriptor_range` patch for the `testcase`.
 
@@ -1591,6 +3317,30 @@ class _get_candidate_file_descriptor_ranges_TestCase(
         self.assertEqual(result, self.expected_result)
 
 
+class _get_candidate_file_descriptor_ranges_IntervalSetTestCase(
+        scaffold.TestCase):
+    """
+    Test cases for `_get_candidate_file_descriptor_ranges` with interval sets.
+    """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        patch_total_file_descriptor_range(self, fake_maxfd=100)
+
+    def test_returns_ranges_not_in_interval_set(self):
+        """ Should return the ranges not in the `exclude` interval set. """
+        test_kwargs = dict(
+                exclude=daemon.daemon.FileDescriptorIntervalSet(
+                    [(0, 3), (10, 50)]),
+                )
+        expected_result = [(3, 10), (50, 100)]
+        result = daemon.daemon._get_candidate_file_descriptor_ranges(
+                **test_kwargs)
+        self.assertEqual(expected_result, result)
+
+
 class _get_candidate_file_descriptor_ranges_ErrorTestCase(
         scaffold.TestCaseWithScenarios):
     """
@@ -1643,6 +3393,218 @@ class _get_candidate_file_descriptor_ranges_ErrorTestCase(
                 self.expected_error_message_substring, str(exc_cm.exception))
 
 
+def patch_close_range_function(testcase, close_range=None):
+    """ Patch `_get_close_range_function` for the `testcase`.
+
+        :param testcase: The `unittest.TestCase` instance to patch.
+        :param close_range: The fake `close_range` function to return,
+            or ``None`` to fake the system call being unavailable.
+        :return: ``None``.
+
+        Also fake a Python version where `os.closerange` does not use
+        the system call (see `patch_os_closerange_uses_close_range`).
+        """
+    func_patcher = unittest.mock.patch.object(
+            daemon.daemon, "_get_close_range_function",
+            return_value=close_range)
+    func_patcher.start()
+    testcase.addCleanup(func_patcher.stop)
+    patch_os_closerange_uses_close_range(testcase, False)
+
+
+def patch_os_closerange_uses_close_range(testcase, value):
+    """ Patch `os_closerange_uses_close_range` for the `testcase`.
+
+        :param testcase: The `unittest.TestCase` instance to patch.
+        :param value: The fake value.
+        :return: ``None``.
+        """
+    patcher = unittest.mock.patch.object(
+            daemon.daemon, "os_closerange_uses_close_range", new=value)
+    patcher.start()
+    testcase.addCleanup(patcher.stop)
+
+
+class _make_close_range_function_TestCase(scaffold.TestCase):
+    """ Test cases for function `_make_close_range_function`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.fake_libc = unittest.mock.MagicMock(
+                spec=['close_range', 'syscall'])
+        self.fake_libc.close_range.return_value = 0
+
+        func_patcher_ctypes_cdll = unittest.mock.patch(
+                "ctypes.CDLL", return_value=self.fake_libc)
+        self.mock_func_ctypes_cdll = func_patcher_ctypes_cdll.start()
+        self.addCleanup(func_patcher_ctypes_cdll.stop)
+
+    def test_returns_none_if_no_c_library(self):
+        """ Should return ``None`` if the C library cannot be loaded. """
+        self.mock_func_ctypes_cdll.side_effect = OSError("No such library")
+        result = daemon.daemon._make_close_range_function()
+        self.assertIs(result, None)
+
+    def test_returns_none_if_no_system_call_interface(self):
+        """ Should return ``None`` if the C library has no interface. """
+        self.fake_libc.mock_add_spec([])
+        result = daemon.daemon._make_close_range_function()
+        self.assertIs(result, None)
+
+    def test_result_calls_c_library_close_range(self):
+        """ Should return a function calling the C library `close_range`. """
+        close_range = daemon.daemon._make_close_range_function()
+        close_range(3, 99, 0)
+        self.fake_libc.close_range.assert_called_with(3, 99, 0)
+
+    @unittest.mock.patch.object(sys, "platform", new="linux")
+    def test_result_calls_c_library_syscall_if_no_close_range(self):
+        """ Should return a function calling `syscall` as a fallback. """
+        self.fake_libc.mock_add_spec(['syscall'])
+        self.fake_libc.syscall.return_value = 0
+        close_range = daemon.daemon._make_close_range_function()
+        close_range(3, 99, 0)
+        (args, kwargs) = self.fake_libc.syscall.call_args
+        self.assertEqual(
+                [daemon.daemon.SYS_CLOSE_RANGE, 3, 99, 0],
+                [arg.value for arg in args])
+
+    @unittest.mock.patch("ctypes.get_errno", return_value=errno.ENOSYS)
+    def test_result_raises_oserror_on_failure(self, mock_func_get_errno):
+        """ Should return a function raising ``OSError`` on failure. """
+        self.fake_libc.close_range.return_value = -1
+        close_range = daemon.daemon._make_close_range_function()
+        exc = self.assertRaises(OSError, close_range, 3, 99, 0)
+        self.assertEqual(errno.ENOSYS, exc.errno)
+
+
+class _get_close_range_function_TestCase(scaffold.TestCase):
+    """ Test cases for function `_get_close_range_function`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        for (name, value) in [
+                ('_close_range_function', None),
+                ('_close_range_function_is_known', False),
+                ]:
+            attr_patcher = unittest.mock.patch.object(
+                    daemon.daemon, name, new=value)
+            attr_patcher.start()
+            self.addCleanup(attr_patcher.stop)
+
+        self.fake_close_range = object()
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "_make_close_range_function",
+                return_value=self.fake_close_range)
+        self.mock_func_make_close_range_function = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+    def test_returns_made_function(self):
+        """ Should return the function from `_make_close_range_function`. """
+        result = daemon.daemon._get_close_range_function()
+        self.assertIs(result, self.fake_close_range)
+
+    def test_makes_function_only_once(self):
+        """ Should make the function only on the first call. """
+        daemon.daemon._get_close_range_function()
+        daemon.daemon._get_close_range_function()
+        self.mock_func_make_close_range_function.assert_called_once_with()
+
+
+class _check_os_closerange_uses_close_range_TestCase(scaffold.TestCase):
+    """ Test cases for function `_check_os_closerange_uses_close_range`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_close_range = unittest.mock.MagicMock()
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "_get_close_range_function",
+                return_value=self.mock_close_range)
+        self.mock_func_get_close_range_function = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        self.test_config_vars = {'HAVE_CLOSE_RANGE': 1}
+        func_patcher = unittest.mock.patch.object(
+                sysconfig, "get_config_var",
+                side_effect=self.test_config_vars.get)
+        func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        self.test_version_info = (3, 10, 0, 'final', 0)
+        attr_patcher = unittest.mock.patch.object(
+                sys, "version_info", new=self.test_version_info)
+        attr_patcher.start()
+        self.addCleanup(attr_patcher.stop)
+
+    def test_returns_true_if_close_range_works(self):
+        """ Should return ``True`` if the system call works. """
+        result = daemon.daemon._check_os_closerange_uses_close_range()
+        self.assertIs(result, True)
+        probe_fd = daemon.daemon.close_range_probe_file_descriptor
+        self.mock_close_range.assert_called_once_with(probe_fd, probe_fd, 0)
+
+    def test_returns_false_if_python_before_3_10(self):
+        """ Should return ``False`` before Python 3.10. """
+        with unittest.mock.patch.object(
+                sys, "version_info", new=(3, 9, 18, 'final', 0)):
+            result = daemon.daemon._check_os_closerange_uses_close_range()
+        self.assertIs(result, False)
+        self.assertFalse(self.mock_func_get_close_range_function.called)
+
+    def test_returns_false_if_built_without_close_range(self):
+        """ Should return ``False`` if Python was built without it. """
+        self.test_config_vars['HAVE_CLOSE_RANGE'] = 0
+        result = daemon.daemon._check_os_closerange_uses_close_range()
+        self.assertIs(result, False)
+        self.assertFalse(self.mock_func_get_close_range_function.called)
+
+    def test_returns_false_if_close_range_unavailable(self):
+        """ Should return ``False`` if the system call is unavailable. """
+        self.mock_func_get_close_range_function.return_value = None
+        result = daemon.daemon._check_os_closerange_uses_close_range()
+        self.assertIs(result, False)
+
+    def test_returns_false_if_close_range_fails(self):
+        """ Should return ``False`` if the kernel does not support it. """
+        self.mock_close_range.side_effect = OSError(
+                errno.ENOSYS, "Function not implemented")
+        result = daemon.daemon._check_os_closerange_uses_close_range()
+        self.assertIs(result, False)
+
+
+class _get_os_closerange_uses_close_range_TestCase(scaffold.TestCase):
+    """ Test cases for function `_get_os_closerange_uses_close_range`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        patch_os_closerange_uses_close_range(self, None)
+
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "_check_os_closerange_uses_close_range",
+                return_value=True)
+        self.mock_func_check = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+    def test_returns_checked_value(self):
+        """ Should return the value from the check. """
+        result = daemon.daemon._get_os_closerange_uses_close_range()
+        self.assertIs(result, True)
+
+    def test_checks_only_once(self):
+        """ Should check only on the first call. """
+        daemon.daemon._get_os_closerange_uses_close_range()
+        daemon.daemon._get_os_closerange_uses_close_range()
+        self.mock_func_check.assert_called_once_with()
+
+
 @unittest.mock.patch.object(os, "closerange")
 class _close_file_descriptor_ranges_TestCase(scaffold.TestCaseWithScenarios):
     """ Test cases for function `_close_file_descriptor_ranges`. """
@@ -1654,32 +3616,183 @@ class _close_file_descriptor_ranges_TestCase(scaffold.TestCaseWithScenarios):
                         (0, 10),
                         ],
                     },
-                'expected_os_closerange_calls': [
-                    unittest.mock.call(0, 10),
+                'expected_os_closerange_calls': [
+                    unittest.mock.call(0, 10),
+                    ],
+                }),
+            ('ranges-three', {
+                'test_kwargs': {
+                    'ranges': [
+                        (5, 10),
+                        (0, 3),
+                        (15, 20),
+                        ],
+                    },
+                'expected_os_closerange_calls': [
+                    unittest.mock.call(5, 10),
+                    unittest.mock.call(0, 3),
+                    unittest.mock.call(15, 20),
+                    ],
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_close_range = unittest.mock.MagicMock()
+        patch_close_range_function(self, close_range=None)
+
+    def test_calls_os_closerange_with_expected_ranges(
+            self, mock_func_os_closerange):
+        """ Should request close of all file descriptors in range. """
+        daemon.daemon._close_file_descriptor_ranges(**self.test_kwargs)
+        mock_func_os_closerange.assert_has_calls(
+                self.expected_os_closerange_calls)
+
+    def test_calls_close_range_with_expected_ranges(
+            self, mock_func_os_closerange):
+        """ Should call `close_range` for each range, if available. """
+        patch_close_range_function(self, close_range=self.mock_close_range)
+        daemon.daemon._close_file_descriptor_ranges(**self.test_kwargs)
+        expected_calls = [
+                unittest.mock.call(low, high - 1, 0)
+                for (low, high) in self.test_kwargs['ranges']]
+        self.assertEqual(expected_calls, self.mock_close_range.mock_calls)
+        self.assertFalse(mock_func_os_closerange.called)
+
+    def test_calls_os_closerange_if_close_range_fails(
+            self, mock_func_os_closerange):
+        """ Should fall back to `os.closerange` if `close_range` fails. """
+        self.mock_close_range.side_effect = OSError(
+                errno.ENOSYS, "Function not implemented")
+        patch_close_range_function(self, close_range=self.mock_close_range)
+        daemon.daemon._close_file_descriptor_ranges(**self.test_kwargs)
+        self.mock_close_range.assert_called_once_with(
+                unittest.mock.ANY, unittest.mock.ANY, 0)
+        mock_func_os_closerange.assert_has_calls(
+                self.expected_os_closerange_calls)
+
+    def test_calls_only_os_closerange_if_it_uses_close_range(
+            self, mock_func_os_closerange):
+        """ Should not load `close_range`, if `os.closerange` uses it. """
+        patch_close_range_function(self, close_range=self.mock_close_range)
+        patch_os_closerange_uses_close_range(self, True)
+        daemon.daemon._close_file_descriptor_ranges(**self.test_kwargs)
+        self.assertEqual(
+                self.expected_os_closerange_calls,
+                mock_func_os_closerange.mock_calls)
+        self.assertFalse(daemon.daemon._get_close_range_function.called)
+
+
+def patch_open_file_descriptors(testcase, open_fds=None):
+    """ Patch `_get_open_file_descriptors` for the `testcase`.
+
+        :param testcase: The `unittest.TestCase` instance to patch.
+        :param open_fds: The fake collection of open file descriptors to
+            return, or ``None`` to fake them being unavailable.
+        :return: ``None``.
+        """
+    func_patcher = unittest.mock.patch.object(
+            daemon.daemon, "_get_open_file_descriptors",
+            return_value=open_fds)
+    func_patcher.start()
+    testcase.addCleanup(func_patcher.stop)
+
+
+@unittest.mock.patch.object(os, "listdir")
+class _get_open_file_descriptors_TestCase(scaffold.TestCase):
+    """ Test cases for function `_get_open_file_descriptors`. """
+
+    def test_reads_open_file_descriptors_directory(self, mock_func_listdir):
+        """ Should read the directory of open file descriptors. """
+        daemon.daemon._get_open_file_descriptors()
+        mock_func_listdir.assert_called_with(
+                daemon.daemon.open_file_descriptors_directory)
+
+    def test_returns_file_descriptors_from_directory(self, mock_func_listdir):
+        """ Should return the file descriptors named in the directory. """
+        mock_func_listdir.return_value = ["0", "1", "2", "17", "5"]
+        expected_result = [0, 1, 2, 17, 5]
+        result = daemon.daemon._get_open_file_descriptors()
+        self.assertEqual(expected_result, result)
+
+    def test_returns_none_if_directory_not_found(self, mock_func_listdir):
+        """ Should return ``None`` if the directory is not available. """
+        mock_func_listdir.side_effect = FileNotFoundError(
+                errno.ENOENT, "No such file or directory")
+        result = daemon.daemon._get_open_file_descriptors()
+        self.assertIs(result, None)
+
+    def test_returns_none_if_directory_entry_invalid(self, mock_func_listdir):
+        """ Should return ``None`` if the directory has unexpected entries. """
+        mock_func_listdir.return_value = ["0", "1", "b0gUs"]
+        result = daemon.daemon._get_open_file_descriptors()
+        self.assertIs(result, None)
+
+
+class _get_open_file_descriptor_ranges_TestCase(
+        scaffold.TestCaseWithScenarios):
+    """ Test cases for function `_get_open_file_descriptor_ranges`. """
+
+    scenarios = [
+            ('open-fds-unavailable', {
+                'open_fds': None,
+                'test_kwargs': {
+                    'exclude': set(),
+                    },
+                'expected_result': None,
+                }),
+            ('exclude-none', {
+                'open_fds': [2, 0, 1, 3, 17, 4, 23],
+                'test_kwargs': {
+                    'exclude': set(),
+                    },
+                'expected_result': [
+                    (0, 5),
+                    (17, 18),
+                    (23, 24),
                     ],
                 }),
-            ('ranges-three', {
+            ('exclude-some', {
+                'open_fds': [0, 1, 2, 3, 4, 5, 17, 23],
                 'test_kwargs': {
-                    'ranges': [
-                        (5, 10),
-                        (0, 3),
-                        (15, 20),
-                        ],
+                    'exclude': {1, 4, 17, 100},
                     },
-                'expected_os_closerange_calls': [
-                    unittest.mock.call(5, 10),
-                    unittest.mock.call(0, 3),
-                    unittest.mock.call(15, 20),
+                'expected_result': [
+                    (0, 1),
+                    (2, 4),
+                    (5, 6),
+                    (23, 24),
                     ],
                 }),
+            ('exclude-all', {
+                'open_fds': [0, 1, 2],
+                'test_kwargs': {
+                    'exclude': {0, 1, 2},
+                    },
+                'expected_result': [],
+                }),
             ]
 
-    def test_calls_os_closerange_with_expected_ranges(
-            self, mock_func_os_closerange):
-        """ Should request close of all file descriptors in range. """
-        daemon.daemon._close_file_descriptor_ranges(**self.test_kwargs)
-        mock_func_os_closerange.assert_has_calls(
-                self.expected_os_closerange_calls)
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        patch_open_file_descriptors(self, open_fds=self.open_fds)
+
+    def test_returns_expected_file_descriptors(self):
+        """ Should return the expected set of file descriptors. """
+        result = daemon.daemon._get_open_file_descriptor_ranges(
+                **self.test_kwargs)
+        self.assertEqual(result, self.expected_result)
+
+    def test_raises_error_for_invalid_exclude(self):
+        """ Should raise ``TypeError`` for an invalid `exclude` item. """
+        test_kwargs = dict(exclude={4, "b0gUs", 7})
+        self.assertRaises(
+                TypeError,
+                daemon.daemon._get_open_file_descriptor_ranges, **test_kwargs)
 
 
 class close_all_open_files_TestCase(scaffold.TestCase):
@@ -1692,6 +3805,8 @@ class close_all_open_files_TestCase(scaffold.TestCase):
         super().setUp()
 
         patch_total_file_descriptor_range(self, fake_maxfd=self.fake_maxfd)
+        patch_close_range_function(self, close_range=None)
+        patch_open_file_descriptors(self, open_fds=None)
         self.patch_os_closerange()
 
     def patch_os_closerange(self):
@@ -1738,6 +3853,176 @@ class close_all_open_files_TestCase(scaffold.TestCase):
         self.mock_func_os_closerange.assert_has_calls(
                 expected_os_closerange_calls, any_order=True)
 
+    def test_closes_only_open_file_descriptors_when_known(self):
+        """ Should close only the open files, when those are known. """
+        patch_open_file_descriptors(self, open_fds=[0, 1, 2, 3, 5, 6, 8])
+        test_kwargs = dict(
+                exclude={2, 6},
+                )
+        daemon.daemon.close_all_open_files(**test_kwargs)
+        expected_os_closerange_calls = [
+                unittest.mock.call(0, 2),
+                unittest.mock.call(3, 4),
+                unittest.mock.call(5, 6),
+                unittest.mock.call(8, 9),
+                ]
+        self.assertEqual(
+                expected_os_closerange_calls,
+                self.mock_func_os_closerange.mock_calls)
+
+    def test_closes_open_file_descriptors_without_loading_close_range(self):
+        """ Should close only the open files, without `close_range`. """
+        mock_close_range = unittest.mock.MagicMock()
+        patch_close_range_function(self, close_range=mock_close_range)
+        patch_open_file_descriptors(self, open_fds=[0, 1, 2, 3, 5, 6, 8])
+        test_kwargs = dict(
+                exclude={2, 6},
+                )
+        daemon.daemon.close_all_open_files(**test_kwargs)
+        expected_os_closerange_calls = [
+                unittest.mock.call(0, 2),
+                unittest.mock.call(3, 4),
+                unittest.mock.call(5, 6),
+                unittest.mock.call(8, 9),
+                ]
+        self.assertEqual(
+                expected_os_closerange_calls,
+                self.mock_func_os_closerange.mock_calls)
+        self.assertFalse(daemon.daemon._get_close_range_function.called)
+
+    def test_closes_candidate_file_descriptors_when_close_range(self):
+        """ Should close candidate files with `close_range`, when the
+            open files are not known. """
+        mock_close_range = unittest.mock.MagicMock()
+        patch_close_range_function(self, close_range=mock_close_range)
+        test_kwargs = dict(
+                exclude={2, 6},
+                )
+        daemon.daemon.close_all_open_files(**test_kwargs)
+        expected_close_range_calls = [
+                unittest.mock.call(0, 1, 0),
+                unittest.mock.call(3, 5, 0),
+                unittest.mock.call(7, self.fake_maxfd - 1, 0),
+                ]
+        self.assertEqual(
+                expected_close_range_calls, mock_close_range.mock_calls)
+        self.assertFalse(self.mock_func_os_closerange.called)
+
+    def test_closes_candidate_file_descriptors_when_os_closerange_uses(self):
+        """ Should close candidate files, when `os.closerange` uses
+            `close_range`. """
+        patch_os_closerange_uses_close_range(self, True)
+        patch_open_file_descriptors(self, open_fds=[0, 1, 2, 3, 5, 6, 8])
+        test_kwargs = dict(
+                exclude={2, 6},
+                )
+        daemon.daemon.close_all_open_files(**test_kwargs)
+        expected_os_closerange_calls = [
+                unittest.mock.call(0, 2),
+                unittest.mock.call(3, 6),
+                unittest.mock.call(7, self.fake_maxfd),
+                ]
+        self.assertEqual(
+                expected_os_closerange_calls,
+                self.mock_func_os_closerange.mock_calls)
+        self.assertFalse(daemon.daemon._get_close_range_function.called)
+        self.assertFalse(daemon.daemon._get_open_file_descriptors.called)
+
+
+@unittest.mock.patch.object(
+        daemon.daemon, "mark_file_descriptor_close_on_exec_if_open")
+class _mark_file_descriptor_ranges_close_on_exec_TestCase(scaffold.TestCase):
+    """ Test cases for function `_mark_file_descriptor_ranges_close_on_exec`.
+        """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_kwargs = dict(
+                ranges=[(0, 3), (7, 9)],
+                )
+        self.mock_close_range = unittest.mock.MagicMock()
+        patch_close_range_function(self, close_range=None)
+
+    def test_marks_each_file_descriptor_in_ranges(self, mock_func_mark):
+        """ Should mark each file descriptor in the ranges. """
+        daemon.daemon._mark_file_descriptor_ranges_close_on_exec(
+                **self.test_kwargs)
+        expected_calls = [
+                unittest.mock.call(fd) for fd in [0, 1, 2, 7, 8]]
+        self.assertEqual(expected_calls, mock_func_mark.mock_calls)
+
+    def test_calls_close_range_with_cloexec_flag(self, mock_func_mark):
+        """ Should call `close_range` with flag to mark close-on-exec. """
+        patch_close_range_function(self, close_range=self.mock_close_range)
+        daemon.daemon._mark_file_descriptor_ranges_close_on_exec(
+                **self.test_kwargs)
+        expected_flags = daemon.daemon.CLOSE_RANGE_CLOEXEC
+        expected_calls = [
+                unittest.mock.call(0, 2, expected_flags),
+                unittest.mock.call(7, 8, expected_flags),
+                ]
+        self.assertEqual(expected_calls, self.mock_close_range.mock_calls)
+        self.assertFalse(mock_func_mark.called)
+
+    def test_marks_each_file_descriptor_if_close_range_fails(
+            self, mock_func_mark):
+        """ Should fall back to marking each file if `close_range` fails. """
+        self.mock_close_range.side_effect = OSError(
+                errno.EINVAL, "Invalid argument")
+        patch_close_range_function(self, close_range=self.mock_close_range)
+        daemon.daemon._mark_file_descriptor_ranges_close_on_exec(
+                **self.test_kwargs)
+        self.mock_close_range.assert_called_once_with(
+                0, 2, daemon.daemon.CLOSE_RANGE_CLOEXEC)
+        expected_calls = [
+                unittest.mock.call(fd) for fd in [0, 1, 2, 7, 8]]
+        self.assertEqual(expected_calls, mock_func_mark.mock_calls)
+
+
+@unittest.mock.patch.object(
+        daemon.daemon, "_mark_file_descriptor_ranges_close_on_exec")
+class mark_all_open_files_close_on_exec_TestCase(scaffold.TestCase):
+    """ Test cases for function `mark_all_open_files_close_on_exec`. """
+
+    fake_maxfd = 10
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        patch_total_file_descriptor_range(self, fake_maxfd=self.fake_maxfd)
+        patch_open_file_descriptors(self, open_fds=None)
+
+    def test_marks_each_candidate_file_descriptor_when_exclude(
+            self, mock_func_mark_ranges):
+        """ Should mark each candidate file, when `exclude` specified. """
+        test_kwargs = dict(
+                exclude={3, 7},
+                )
+        daemon.daemon.mark_all_open_files_close_on_exec(**test_kwargs)
+        mock_func_mark_ranges.assert_called_with(
+                ranges=[(0, 3), (4, 7), (8, self.fake_maxfd)])
+
+    def test_marks_all_file_descriptors_when_no_exclude(
+            self, mock_func_mark_ranges):
+        """ Should mark all files, when no `exclude`. """
+        daemon.daemon.mark_all_open_files_close_on_exec()
+        mock_func_mark_ranges.assert_called_with(
+                ranges=[(0, self.fake_maxfd)])
+
+    def test_marks_only_open_file_descriptors_when_known(
+            self, mock_func_mark_ranges):
+        """ Should mark only the open files, when those are known. """
+        patch_open_file_descriptors(self, open_fds=[0, 1, 2, 5])
+        test_kwargs = dict(
+                exclude={1},
+                )
+        daemon.daemon.mark_all_open_files_close_on_exec(**test_kwargs)
+        mock_func_mark_ranges.assert_called_with(
+                ranges=[(0, 1), (2, 3), (5, 6)])
+
 
 class detach_process_context_TestCase(scaffold.TestCase):
     """ Test cases for detach_process_context function. """
@@ -1865,6 +4150,389 @@ class detach_process_context_TestCase(scaffold.TestCase):
                 unittest.mock.call.fork(),
                 ])
 
+    def test_returns_none_by_default(self):
+        """ Should return None if not waiting for ready. """
+        result = daemon.daemon.detach_process_context()
+        self.assertIs(result, None)
+
+    def test_raises_error_for_unknown_strategy(self):
+        """ Should raise ValueError for an unknown detach strategy. """
+        self.assertRaises(
+                ValueError,
+                daemon.daemon.detach_process_context,
+                strategy="triple-fork")
+        self.assertFalse(self.mock_func_os_fork.called)
+
+    def test_single_fork_child_does_not_fork_again(self):
+        """ With single-fork strategy, child should not fork again. """
+        daemon.daemon.detach_process_context(
+                strategy=daemon.daemon.detach_strategy_single_fork)
+        self.assertEqual(
+                [
+                    unittest.mock.call.fork(),
+                    unittest.mock.call.setsid()],
+                self.mock_module_os.mock_calls)
+
+
+class detach_process_context_wait_for_ready_TestCase(
+        detach_process_context_TestCase):
+    """ Test cases for detach_process_context, waiting for ready. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_pipe = (13, 17)
+        for (name, kwargs) in [
+                ("pipe", {'return_value': self.test_pipe}),
+                ("close", {}),
+                ]:
+            func_patcher = unittest.mock.patch.object(os, name, **kwargs)
+            mock_func = func_patcher.start()
+            self.addCleanup(func_patcher.stop)
+            self.mock_module_os.attach_mock(mock_func, name)
+
+        self.test_exit_status = 1
+        self.test_message = "Lorem ipsum"
+        func_patcher = unittest.mock.patch.object(
+                daemon.daemon, "wait_for_daemon_ready",
+                return_value=(self.test_exit_status, self.test_message))
+        self.mock_func_wait_for_daemon_ready = func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+        self.mock_module_os.attach_mock(
+                self.mock_func_wait_for_daemon_ready, "wait_for_daemon_ready")
+
+        self.fake_stderr = FakeFileDescriptorStringIO()
+        func_patcher = unittest.mock.patch.object(
+                sys, "stderr", new=self.fake_stderr)
+        func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+        self.test_kwargs = dict(wait_for_ready=True)
+
+    def test_parent_waits_for_ready_then_exits(self):
+        """ Original parent should wait for ready, then exit. """
+        parent_pid = 23
+        self.mock_func_os_fork.side_effect = iter([parent_pid])
+        self.assertRaises(
+                self.FakeOSExit,
+                daemon.daemon.detach_process_context, **self.test_kwargs)
+        self.mock_module_os.assert_has_calls([
+                unittest.mock.call.pipe(),
+                unittest.mock.call.fork(),
+                unittest.mock.call.close(self.test_pipe[1]),
+                unittest.mock.call.wait_for_daemon_ready(self.test_pipe[0]),
+                unittest.mock.call._exit(self.test_exit_status),
+                ])
+
+    def test_parent_writes_message_to_stderr(self):
+        """ Original parent should write the daemon's message to stderr. """
+        parent_pid = 23
+        self.mock_func_os_fork.side_effect = iter([parent_pid])
+        self.assertRaises(
+                self.FakeOSExit,
+                daemon.daemon.detach_process_context, **self.test_kwargs)
+        self.assertIn(self.test_message, self.fake_stderr.getvalue())
+
+    def test_parent_writes_nothing_if_no_message(self):
+        """ Original parent should write nothing to stderr if no message. """
+        parent_pid = 23
+        self.mock_func_os_fork.side_effect = iter([parent_pid])
+        self.mock_func_wait_for_daemon_ready.return_value = (0, None)
+        self.assertRaises(
+                self.FakeOSExit,
+                daemon.daemon.detach_process_context, **self.test_kwargs)
+        self.assertEqual("", self.fake_stderr.getvalue())
+        self.mock_func_os_force_exit.assert_called_with(0)
+
+    def test_parent_exits_if_wait_interrupted(self):
+        """ Original parent should exit, even if the wait is interrupted. """
+        parent_pid = 23
+        self.mock_func_os_fork.side_effect = iter([parent_pid])
+        self.mock_func_wait_for_daemon_ready.side_effect = KeyboardInterrupt
+        self.assertRaises(
+                self.FakeOSExit,
+                daemon.daemon.detach_process_context, **self.test_kwargs)
+        self.mock_func_os_force_exit.assert_called_once_with(
+                daemon.daemon.ready_exit_status_failed)
+
+    def test_child_closes_read_end(self):
+        """ Child should close the read end of the readiness pipe. """
+        daemon.daemon.detach_process_context(**self.test_kwargs)
+        self.mock_module_os.assert_has_calls([
+                unittest.mock.call.pipe(),
+                unittest.mock.call.fork(),
+                unittest.mock.call.close(self.test_pipe[0]),
+                unittest.mock.call.setsid(),
+                unittest.mock.call.fork(),
+                ])
+
+    def test_intermediate_parent_exits_without_waiting(self):
+        """ Intermediate parent should exit without waiting for ready. """
+        fake_pids = [0, 42]
+        self.mock_func_os_fork.side_effect = iter(fake_pids)
+        self.assertRaises(
+                self.FakeOSExit,
+                daemon.daemon.detach_process_context, **self.test_kwargs)
+        self.mock_func_os_force_exit.assert_called_once_with(0)
+        self.assertFalse(self.mock_func_wait_for_daemon_ready.called)
+
+    def test_returns_ready_file_descriptor(self):
+        """ Should return the write end of the readiness pipe. """
+        result = daemon.daemon.detach_process_context(**self.test_kwargs)
+        self.assertEqual(self.test_pipe[1], result)
+
+
+class detach_process_context_foreground_TestCase(scaffold.TestCase):
+    """ Test cases for detach_process_context, without forking. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_module_os = unittest.mock.MagicMock()
+        self.test_pid = self.getUniqueInteger()
+        for (name, kwargs) in [
+                ("fork", {}),
+                ("pipe", {}),
+                ("setsid", {}),
+                ("getpid", {'return_value': self.test_pid}),
+                ("getpgrp", {'return_value': self.getUniqueInteger()}),
+                ]:
+            func_patcher = unittest.mock.patch.object(os, name, **kwargs)
+            mock_func = func_patcher.start()
+            self.addCleanup(func_patcher.stop)
+            self.mock_module_os.attach_mock(mock_func, name)
+
+        self.test_kwargs = dict(
+                wait_for_ready=True,
+                strategy=daemon.daemon.detach_strategy_foreground)
+
+    def test_does_not_fork(self):
+        """ Should not fork, nor make a readiness pipe. """
+        daemon.daemon.detach_process_context(**self.test_kwargs)
+        self.assertFalse(self.mock_module_os.fork.called)
+        self.assertFalse(self.mock_module_os.pipe.called)
+
+    def test_starts_new_session(self):
+        """ Should start a new session, if not a process group leader. """
+        daemon.daemon.detach_process_context(**self.test_kwargs)
+        self.mock_module_os.setsid.assert_called_with()
+
+    def test_omits_new_session_if_process_group_leader(self):
+        """ Should not start a session if already a process group leader. """
+        self.mock_module_os.getpgrp.return_value = self.test_pid
+        daemon.daemon.detach_process_context(**self.test_kwargs)
+        self.assertFalse(self.mock_module_os.setsid.called)
+
+    def test_returns_none(self):
+        """ Should return None, since no original process is waiting. """
+        result = daemon.daemon.detach_process_context(**self.test_kwargs)
+        self.assertIs(result, None)
+
+
+@unittest.mock.patch.object(os, "close")
+@unittest.mock.patch.object(os, "write")
+class _write_readiness_message_TestCase(scaffold.TestCase):
+    """ Test cases for function `_write_readiness_message`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_fd = self.getUniqueInteger()
+        self.test_message = {'status': "lorem", 'message': "Ipsum\ndolor"}
+        self.expected_data = (
+                b'{"status": "lorem", "message": "Ipsum\\ndolor"}\n')
+
+    @staticmethod
+    def fake_os_write(fd, data):
+        """ Fake `os.write`, writing all of `data`. """
+        return len(data)
+
+    def test_writes_message_as_line_of_json(
+            self, mock_func_os_write, mock_func_os_close):
+        """ Should write the message as a single line of JSON. """
+        mock_func_os_write.side_effect = self.fake_os_write
+        daemon.daemon._write_readiness_message(self.test_fd, self.test_message)
+        self.assertEqual(
+                [unittest.mock.call(self.test_fd, self.expected_data)],
+                mock_func_os_write.mock_calls)
+
+    def test_writes_remainder_after_partial_write(
+            self, mock_func_os_write, mock_func_os_close):
+        """ Should write the remaining data after a partial write. """
+        mock_func_os_write.side_effect = [10, len(self.expected_data) - 10]
+        daemon.daemon._write_readiness_message(self.test_fd, self.test_message)
+        self.assertEqual(
+                [
+                    unittest.mock.call(self.test_fd, self.expected_data),
+                    unittest.mock.call(self.test_fd, self.expected_data[10:]),
+                    ],
+                mock_func_os_write.mock_calls)
+
+    def test_closes_file_descriptor(
+            self, mock_func_os_write, mock_func_os_close):
+        """ Should close the file descriptor after writing. """
+        mock_func_os_write.side_effect = self.fake_os_write
+        daemon.daemon._write_readiness_message(self.test_fd, self.test_message)
+        mock_func_os_close.assert_called_once_with(self.test_fd)
+
+    def test_ignores_broken_pipe(
+            self, mock_func_os_write, mock_func_os_close):
+        """ Should ignore a broken pipe, and close the file descriptor. """
+        mock_func_os_write.side_effect = BrokenPipeError(
+                errno.EPIPE, "Broken pipe")
+        daemon.daemon._write_readiness_message(self.test_fd, self.test_message)
+        mock_func_os_close.assert_called_once_with(self.test_fd)
+
+    def test_raises_error_if_write_fails(
+            self, mock_func_os_write, mock_func_os_close):
+        """ Should raise DaemonOSEnvironmentError if the write fails. """
+        test_error = OSError(errno.EIO, "Input/output error")
+        mock_func_os_write.side_effect = test_error
+        exc = self.assertRaises(
+                daemon.daemon.DaemonOSEnvironmentError,
+                daemon.daemon._write_readiness_message,
+                self.test_fd, self.test_message)
+        self.assertEqual(test_error, exc.__cause__)
+        mock_func_os_close.assert_called_once_with(self.test_fd)
+
+
+@unittest.mock.patch.object(daemon.daemon, "_write_readiness_message")
+class notify_daemon_ready_TestCase(scaffold.TestCase):
+    """ Test cases for function `notify_daemon_ready`. """
+
+    def test_writes_ready_message(self, mock_func_write_readiness_message):
+        """ Should write a readiness message with status ‘ready’. """
+        test_fd = self.getUniqueInteger()
+        daemon.daemon.notify_daemon_ready(test_fd)
+        mock_func_write_readiness_message.assert_called_once_with(
+                test_fd, {'status': "ready"})
+
+
+@unittest.mock.patch.object(daemon.daemon, "_write_readiness_message")
+class notify_daemon_failure_TestCase(scaffold.TestCase):
+    """ Test cases for function `notify_daemon_failure`. """
+
+    def test_writes_failed_message(self, mock_func_write_readiness_message):
+        """ Should write a readiness message with status ‘failed’. """
+        test_fd = self.getUniqueInteger()
+        test_message = "Lorem ipsum"
+        daemon.daemon.notify_daemon_failure(test_fd, test_message)
+        mock_func_write_readiness_message.assert_called_once_with(
+                test_fd, {'status': "failed", 'message': test_message})
+
+
+@unittest.mock.patch.object(daemon.daemon, "_write_readiness_message")
+class notify_daemon_exception_TestCase(scaffold.TestCase):
+    """ Test cases for function `notify_daemon_exception`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        try:
+            raise daemon.daemon.DaemonOSEnvironmentError("Lorem ipsum")
+        except daemon.daemon.DaemonOSEnvironmentError as exc:
+            self.test_exception = exc
+        self.test_fd = self.getUniqueInteger()
+
+    def test_writes_exception_message(
+            self, mock_func_write_readiness_message):
+        """ Should write a readiness message describing the exception. """
+        daemon.daemon.notify_daemon_exception(
+                self.test_fd, self.test_exception)
+        (fd, message) = mock_func_write_readiness_message.call_args.args
+        self.assertEqual(self.test_fd, fd)
+        self.assertEqual("exception", message['status'])
+        self.assertEqual(
+                "daemon.daemon.DaemonOSEnvironmentError", message['type'])
+        self.assertEqual("Lorem ipsum", message['message'])
+
+    def test_writes_exception_traceback(
+            self, mock_func_write_readiness_message):
+        """ Should write the formatted traceback of the exception. """
+        daemon.daemon.notify_daemon_exception(
+                self.test_fd, self.test_exception)
+        (fd, message) = mock_func_write_readiness_message.call_args.args
+        self.assertIn(
+                "Traceback (most recent call last)", message['traceback'])
+        self.assertIn("test_daemon.py", message['traceback'])
+        self.assertTrue(message['traceback'].endswith(
+                "DaemonOSEnvironmentError: Lorem ipsum\n"))
+
+
+@unittest.mock.patch.object(os, "close")
+@unittest.mock.patch.object(os, "read")
+class wait_for_daemon_ready_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for function `wait_for_daemon_ready`. """
+
+    scenarios = [
+            ('ready', {
+                'read_chunks': [b'{"status": "ready"}\n'],
+                'expected_result': (0, None),
+                }),
+            ('ready-in-pieces', {
+                'read_chunks': [b'{"status": ', b'"ready"}', b'\n'],
+                'expected_result': (0, None),
+                }),
+            ('failed', {
+                'read_chunks': [
+                    b'{"status": "failed", "message": "Lorem ipsum"}\n'],
+                'expected_result': (1, "Lorem ipsum"),
+                }),
+            ('exception', {
+                'read_chunks': [
+                    b'{"status": "exception", "type": "lorem.Ipsum",'
+                    b' "message": "Dolor", "traceback": "Traceback\\n'
+                    b'lorem.Ipsum: Dolor\\n"}\n'],
+                'expected_result': (
+                    os.EX_SOFTWARE, "Traceback\nlorem.Ipsum: Dolor"),
+                }),
+            ('exception-without-traceback', {
+                'read_chunks': [
+                    b'{"status": "exception", "type": "lorem.Ipsum",'
+                    b' "message": "Dolor"}\n'],
+                'expected_result': (os.EX_SOFTWARE, "lorem.Ipsum: Dolor"),
+                }),
+            ('ended-without-report', {
+                'read_chunks': [b""],
+                'expected_result': (
+                    1, "Daemon process ended before it was ready"),
+                }),
+            ('ended-during-report', {
+                'read_chunks': [b'{"status": "rea', b""],
+                'expected_result': (
+                    1, "Daemon process ended before it was ready"),
+                }),
+            ('unknown-report', {
+                'read_chunks': [b'{"lorem": "ipsum"}\n'],
+                'expected_result': (
+                    1, "Daemon process ended before it was ready"),
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_fd = self.getUniqueInteger()
+
+    def test_returns_expected_result(
+            self, mock_func_os_read, mock_func_os_close):
+        """ Should return expected result. """
+        mock_func_os_read.side_effect = self.read_chunks
+        result = daemon.daemon.wait_for_daemon_ready(self.test_fd)
+        self.assertEqual(self.expected_result, result)
+
+    def test_closes_file_descriptor(
+            self, mock_func_os_read, mock_func_os_close):
+        """ Should close the file descriptor. """
+        mock_func_os_read.side_effect = self.read_chunks
+        daemon.daemon.wait_for_daemon_ready(self.test_fd)
+        mock_func_os_close.assert_called_once_with(self.test_fd)
+
 
 @unittest.mock.patch("os.getppid", return_value=765)
 class is_process_started_by_init_TestCase(scaffold.TestCase):
@@ -1886,6 +4554,23 @@ class is_process_started_by_init_TestCase(scaffold.TestCase):
         self.assertIs(result, expected_result)
 
 
+def setup_fstat_fixtures(testcase):
+    """ Set up common test fixtures for querying the file type. """
+    testcase.fake_file_mode = stat.S_IFREG
+
+    def fake_os_fstat(fd):
+        if isinstance(testcase.fake_file_mode, Exception):
+            raise testcase.fake_file_mode
+        result = os.stat_result(
+                (testcase.fake_file_mode,) + (0,) * 9)
+        return result
+
+    func_patcher_os_fstat = unittest.mock.patch.object(
+            os, "fstat", side_effect=fake_os_fstat)
+    testcase.mock_func_os_fstat = func_patcher_os_fstat.start()
+    testcase.addCleanup(func_patcher_os_fstat.stop)
+
+
 class is_socket_TestCase(scaffold.TestCase):
     """ Test cases for `is_socket` function. """
 
@@ -1893,29 +4578,7 @@ class is_socket_TestCase(scaffold.TestCase):
         """ Set up test fixtures. """
         super().setUp()
 
-        def fake_getsockopt(level, optname, buflen=None):
-            result = object()
-            if optname is socket.SO_TYPE:
-                result = socket.SOCK_RAW
-            return result
-
-        self.fake_socket_getsockopt_func = fake_getsockopt
-
-        self.fake_socket_error = socket.error(
-                errno.ENOTSOCK,
-                "Socket operation on non-socket")
-
-        self.mock_socket = unittest.mock.MagicMock(spec=socket.socket)
-        self.mock_socket.getsockopt.side_effect = self.fake_socket_error
-
-        def fake_socket_fromfd(fd, family, type, proto=None):
-            return self.mock_socket
-
-        func_patcher_socket_fromfd = unittest.mock.patch.object(
-                socket, "fromfd",
-                side_effect=fake_socket_fromfd)
-        func_patcher_socket_fromfd.start()
-        self.addCleanup(func_patcher_socket_fromfd.stop)
+        setup_fstat_fixtures(self)
 
         warnings_catcher = warnings.catch_warnings(record=True)
         self.caught_warnings = warnings_catcher.__enter__()
@@ -1938,22 +4601,25 @@ class is_socket_TestCase(scaffold.TestCase):
     def test_returns_true_if_stdin_is_socket(self):
         """ Should return True if `stdin` is a socket. """
         test_fd = 23
-        getsockopt = self.mock_socket.getsockopt
-        getsockopt.side_effect = self.fake_socket_getsockopt_func
+        self.fake_file_mode = stat.S_IFSOCK
         expected_result = True
         result = daemon.daemon.is_socket(test_fd)
         self.assertIs(result, expected_result)
 
-    def test_returns_false_if_stdin_socket_raises_error(self):
-        """ Should return True if `stdin` is a socket and raises error. """
+    def test_returns_false_if_file_descriptor_not_open(self):
+        """ Should return False if the file descriptor is not open. """
         test_fd = 23
-        getsockopt = self.mock_socket.getsockopt
-        getsockopt.side_effect = socket.error(
-                object(), "Weird socket stuff")
-        expected_result = True
+        self.fake_file_mode = OSError(errno.EBADF, "Bad file descriptor")
+        expected_result = False
         result = daemon.daemon.is_socket(test_fd)
         self.assertIs(result, expected_result)
 
+    def test_queries_file_type_of_file_descriptor(self):
+        """ Should query the file type of the file descriptor. """
+        test_fd = 23
+        daemon.daemon.is_socket(test_fd)
+        self.mock_func_os_fstat.assert_called_once_with(test_fd)
+
 
 class is_socket_file_TestCase(scaffold.TestCase):
     """ Test cases for is_socket_file function. """
@@ -1962,29 +4628,7 @@ class is_socket_file_TestCase(scaffold.TestCase):
         """ Set up test fixtures. """
         super().setUp()
 
-        def fake_getsockopt(level, optname, buflen=None):
-            result = object()
-            if optname is socket.SO_TYPE:
-                result = socket.SOCK_RAW
-            return result
-
-        self.fake_socket_getsockopt_func = fake_getsockopt
-
-        self.fake_socket_error = socket.error(
-                errno.ENOTSOCK,
-                "Socket operation on non-socket")
-
-        self.mock_socket = unittest.mock.MagicMock(spec=socket.socket)
-        self.mock_socket.getsockopt.side_effect = self.fake_socket_error
-
-        def fake_socket_fromfd(fd, family, type, proto=None):
-            return self.mock_socket
-
-        func_patcher_socket_fromfd = unittest.mock.patch.object(
-                socket, "fromfd",
-                side_effect=fake_socket_fromfd)
-        func_patcher_socket_fromfd.start()
-        self.addCleanup(func_patcher_socket_fromfd.stop)
+        setup_fstat_fixtures(self)
 
         def fake_fileno_func():
             return self.fake_fileno
@@ -2009,24 +4653,62 @@ class is_socket_file_TestCase(scaffold.TestCase):
         expected_result = False
         result = daemon.daemon.is_socket_file(self.mock_file)
         self.assertIs(result, expected_result)
+        self.assertFalse(self.mock_func_os_fstat.called)
 
     def test_returns_true_if_stdin_is_socket(self):
         """ Should return True if `stdin` is a socket. """
-        getsockopt = self.mock_socket.getsockopt
-        getsockopt.side_effect = self.fake_socket_getsockopt_func
+        self.fake_file_mode = stat.S_IFSOCK
         expected_result = True
         result = daemon.daemon.is_socket_file(self.mock_file)
         self.assertIs(result, expected_result)
 
-    def test_returns_false_if_stdin_socket_raises_error(self):
-        """ Should return True if `stdin` is a socket and raises error. """
-        getsockopt = self.mock_socket.getsockopt
-        getsockopt.side_effect = socket.error(
-                object(), "Weird socket stuff")
-        expected_result = True
+    def test_returns_false_if_file_descriptor_not_open(self):
+        """ Should return False if the file descriptor is not open. """
+        self.fake_file_mode = OSError(errno.EBADF, "Bad file descriptor")
+        expected_result = False
         result = daemon.daemon.is_socket_file(self.mock_file)
         self.assertIs(result, expected_result)
 
+    def test_queries_file_type_of_file_descriptor(self):
+        """ Should query the file type of the file's descriptor. """
+        daemon.daemon.is_socket_file(self.mock_file)
+        self.mock_func_os_fstat.assert_called_once_with(self.fake_fileno)
+
+
+class is_socket_file_real_file_TestCase(scaffold.TestCase):
+    """ Test cases for is_socket_file function, with real files. """
+
+    def test_returns_true_for_socket(self):
+        """ Should return True for a socket file. """
+        (test_socket, peer_socket) = socket.socketpair()
+        self.addCleanup(test_socket.close)
+        self.addCleanup(peer_socket.close)
+        test_file = test_socket.makefile('rb')
+        self.addCleanup(test_file.close)
+        result = daemon.daemon.is_socket_file(test_file)
+        self.assertIs(result, True)
+
+    def test_returns_false_for_pipe(self):
+        """ Should return False for a pipe file. """
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, write_fd)
+        test_file = open(read_fd, 'rb')
+        self.addCleanup(test_file.close)
+        result = daemon.daemon.is_socket_file(test_file)
+        self.assertIs(result, False)
+
+    def test_does_not_open_file_descriptor(self):
+        """ Should not open any file descriptor. """
+        (test_socket, peer_socket) = socket.socketpair()
+        self.addCleanup(test_socket.close)
+        self.addCleanup(peer_socket.close)
+        test_file = test_socket.makefile('rb')
+        self.addCleanup(test_file.close)
+        with unittest.mock.patch.object(
+                os, "dup", wraps=os.dup) as mock_func_os_dup:
+            daemon.daemon.is_socket_file(test_file)
+        self.assertFalse(mock_func_os_dup.called)
+
 
 class is_process_started_by_superserver_TestCase(scaffold.TestCase):
     """ Test cases for is_process_started_by_superserver function. """
@@ -2074,6 +4756,18 @@ class is_process_started_by_superserver_TestCase(scaffold.TestCase):
 class is_detach_process_context_required_TestCase(scaffold.TestCase):
     """ Test cases for is_detach_process_context_required function. """
 
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        for name in [
+                '_detach_process_context_required',
+                '_detach_process_context_required_key',
+                ]:
+            patcher = unittest.mock.patch.object(daemon.daemon, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
     def test_returns_true_by_default(
             self,
             mock_func_is_process_started_by_init,
@@ -2103,6 +4797,46 @@ class is_detach_process_context_required_TestCase(scaffold.TestCase):
         result = daemon.daemon.is_detach_process_context_required()
         self.assertIs(result, expected_result)
 
+    def test_interrogates_environment_once_per_process(
+            self,
+            mock_func_is_process_started_by_init,
+            mock_func_is_process_started_by_superserver):
+        """ Should interrogate the environment once in each process. """
+        daemon.daemon.is_detach_process_context_required()
+        mock_func_is_process_started_by_init.return_value = True
+        expected_result = True
+        result = daemon.daemon.is_detach_process_context_required()
+        self.assertIs(result, expected_result)
+        self.assertEqual(1, mock_func_is_process_started_by_init.call_count)
+
+    def test_interrogates_environment_again_in_new_process(
+            self,
+            mock_func_is_process_started_by_init,
+            mock_func_is_process_started_by_superserver):
+        """ Should interrogate the environment again in a new process. """
+        daemon.daemon.is_detach_process_context_required()
+        mock_func_is_process_started_by_init.return_value = True
+        expected_result = False
+        with unittest.mock.patch.object(
+                os, "getpid", return_value=os.getpid() + 1):
+            result = daemon.daemon.is_detach_process_context_required()
+        self.assertIs(result, expected_result)
+        self.assertEqual(2, mock_func_is_process_started_by_init.call_count)
+
+    def test_interrogates_environment_again_if_reparented(
+            self,
+            mock_func_is_process_started_by_init,
+            mock_func_is_process_started_by_superserver):
+        """ Should interrogate the environment again if reparented. """
+        with unittest.mock.patch.object(os, "getppid", return_value=1357):
+            daemon.daemon.is_detach_process_context_required()
+        mock_func_is_process_started_by_init.return_value = True
+        expected_result = False
+        with unittest.mock.patch.object(os, "getppid", return_value=1):
+            result = daemon.daemon.is_detach_process_context_required()
+        self.assertIs(result, expected_result)
+        self.assertEqual(2, mock_func_is_process_started_by_init.call_count)
+
 
 def setup_streams_fixtures(testcase):
     """ Set up common test fixtures for standard streams. """
@@ -2149,6 +4883,12 @@ class redirect_stream_TestCase(scaffold.TestCase):
         self.mock_func_os_open = func_patcher_os_open.start()
         self.addCleanup(func_patcher_os_open.stop)
 
+        func_patcher_os_set_inheritable = unittest.mock.patch.object(
+                os, "set_inheritable")
+        self.mock_func_os_set_inheritable = (
+                func_patcher_os_set_inheritable.start())
+        self.addCleanup(func_patcher_os_set_inheritable.stop)
+
     def test_duplicates_target_file_descriptor(
             self, mock_func_os_dup2):
         """ Should duplicate file descriptor from target to system stream. """
@@ -2173,6 +4913,16 @@ class redirect_stream_TestCase(scaffold.TestCase):
         self.mock_func_os_open.assert_called_with(null_path, null_flag)
         mock_func_os_dup2.assert_called_with(null_fileno, system_fileno)
 
+    def test_sets_system_file_descriptor_inheritable(
+            self, mock_func_os_dup2):
+        """ Should set the system stream file descriptor inheritable. """
+        system_stream = self.test_system_stream
+        system_fileno = system_stream.fileno()
+        target_stream = None
+        daemon.daemon.redirect_stream(system_stream, target_stream)
+        self.mock_func_os_set_inheritable.assert_called_with(
+                system_fileno, True)
+
 
 class make_default_signal_map_TestCase(scaffold.TestCase):
     """ Test cases for make_default_signal_map function. """
@@ -2207,6 +4957,7 @@ class make_default_signal_map_TestCase(scaffold.TestCase):
                 'SIGTTIN': None,
                 'SIGTTOU': None,
                 'SIGTERM': 'terminate',
+                'SIGHUP': 'reload',
                 }
         self.default_signal_map = {
                 getattr(self.fake_signal_module, name): target
@@ -0,0 +1,299 @@
+# test/test_eventloop.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘eventloop’ module. """
+
+import asyncio
+import os
+import signal
+import unittest.mock
+
+import daemon.daemon
+import daemon.eventloop
+
+from . import scaffold
+
+
+class AsyncDaemonContext_BaseTestCase(scaffold.TestCase):
+    """ Base class for AsyncDaemonContext test case classes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_signal_number = signal.SIGUSR1
+        self.addCleanup(
+                signal.signal, self.test_signal_number,
+                signal.getsignal(self.test_signal_number))
+        self.test_signal_calls = []
+
+        def fake_signal_handler(signal_number, stack_frame):
+            self.test_signal_calls.append((signal_number, stack_frame))
+
+        self.fake_signal_handler = fake_signal_handler
+
+        self.test_instance = daemon.eventloop.AsyncDaemonContext(
+                detach_process=False,
+                signal_map={
+                    signal.SIGTSTP: None,
+                    self.test_signal_number: self.fake_signal_handler,
+                    })
+
+        def fake_open():
+            self.test_instance._is_open = True
+
+        def fake_close():
+            self.test_instance._is_open = False
+
+        func_patcher_open = unittest.mock.patch.object(
+                self.test_instance, "open", side_effect=fake_open)
+        self.mock_func_open = func_patcher_open.start()
+        self.addCleanup(func_patcher_open.stop)
+        func_patcher_close = unittest.mock.patch.object(
+                self.test_instance, "close", side_effect=fake_close)
+        self.mock_func_close = func_patcher_close.start()
+        self.addCleanup(func_patcher_close.stop)
+
+
+class AsyncDaemonContext_TestCase(AsyncDaemonContext_BaseTestCase):
+    """ Test cases for AsyncDaemonContext class. """
+
+    def test_instantiate(self):
+        """ New instance of AsyncDaemonContext should be created. """
+        self.assertIsInstance(
+                self.test_instance, daemon.daemon.DaemonContext)
+
+    def test_aenter_raises_error_if_not_open(self):
+        """ Should raise DaemonError if the context is not open. """
+        instance = self.test_instance
+
+        async def main():
+            async with instance:
+                pass
+
+        self.assertRaises(daemon.daemon.DaemonError, asyncio.run, main())
+
+    def test_aenter_returns_instance(self):
+        """ Should return the instance from the asynchronous context. """
+        instance = self.test_instance
+        instance.open()
+
+        async def main():
+            async with instance as context:
+                return context
+
+        result = asyncio.run(main())
+        self.assertIs(instance, result)
+
+    def test_aenter_stops_signal_dispatcher(self):
+        """ Should stop the signal dispatcher thread, if any. """
+        instance = self.test_instance
+        instance.open()
+        mock_signal_dispatcher = unittest.mock.MagicMock()
+        instance._signal_dispatcher = mock_signal_dispatcher
+
+        async def main():
+            async with instance:
+                pass
+
+        asyncio.run(main())
+        mock_signal_dispatcher.stop.assert_called_once_with()
+        self.assertIs(instance._signal_dispatcher, None)
+
+    def test_aexit_closes_context(self):
+        """ Should close the context on exit of asynchronous context. """
+        instance = self.test_instance
+        instance.open()
+
+        async def main():
+            async with instance:
+                pass
+
+        asyncio.run(main())
+        self.mock_func_close.assert_called_once_with()
+
+    def test_aexit_notifies_exception(self):
+        """ Should report a propagating exception (see `__exit__`). """
+        instance = self.test_instance
+        instance.open()
+        test_error = ValueError("Lorem ipsum")
+
+        async def main():
+            async with instance:
+                raise test_error
+
+        with unittest.mock.patch.object(
+                instance, "notify_exception") as mock_func_notify_exception:
+            self.assertRaises(ValueError, asyncio.run, main())
+        mock_func_notify_exception.assert_called_once_with(test_error)
+
+
+class AsyncDaemonContext_run_TestCase(AsyncDaemonContext_BaseTestCase):
+    """ Test cases for AsyncDaemonContext.run method. """
+
+    def test_opens_context_before_running_loop(self):
+        """ Should open the context before the event loop runs. """
+        instance = self.test_instance
+
+        async def main():
+            return asyncio.get_running_loop()
+
+        def fake_open():
+            self.assertFalse(mock_func_asyncio_run.called)
+            instance._is_open = True
+
+        self.mock_func_open.side_effect = fake_open
+        with unittest.mock.patch.object(
+                asyncio, "run", wraps=asyncio.run) as mock_func_asyncio_run:
+            instance.run(main())
+        self.mock_func_open.assert_called_once_with()
+
+    def test_returns_result_of_main(self):
+        """ Should return the result of `main`. """
+        instance = self.test_instance
+        test_result = object()
+
+        async def main():
+            return test_result
+
+        result = instance.run(main())
+        self.assertIs(test_result, result)
+
+    def test_runs_main_in_asynchronous_context(self):
+        """ Should run `main` with the asynchronous context entered. """
+        instance = self.test_instance
+
+        async def main():
+            return instance._main_task
+
+        result = instance.run(main())
+        self.assertIsInstance(result, asyncio.Task)
+        self.mock_func_close.assert_called_once_with()
+
+
+class AsyncDaemonContext_signal_TestCase(AsyncDaemonContext_BaseTestCase):
+    """ Test cases for AsyncDaemonContext signal handling. """
+
+    def test_calls_handler_in_event_loop(self):
+        """ Should call the signal handler as an event loop callback. """
+        instance = self.test_instance
+        instance.open()
+
+        async def main():
+            async with instance:
+                os.kill(os.getpid(), self.test_signal_number)
+                for __ in range(100):
+                    if self.test_signal_calls:
+                        break
+                    await asyncio.sleep(0.01)
+
+        asyncio.run(main())
+        self.assertEqual(
+                [(self.test_signal_number, None)], self.test_signal_calls)
+
+    def test_schedules_coroutine_handler_as_task(self):
+        """ Should schedule a coroutine signal handler as a task. """
+        instance = self.test_instance
+        instance.open()
+        handler_tasks = []
+
+        async def fake_coroutine_handler(signal_number, stack_frame):
+            handler_tasks.append(asyncio.current_task())
+
+        async def main():
+            async with instance:
+                instance._dispatch_signal(
+                        fake_coroutine_handler, self.test_signal_number)
+                await asyncio.sleep(0)
+                return asyncio.current_task()
+
+        main_task = asyncio.run(main())
+        self.assertEqual(1, len(handler_tasks))
+        self.assertIsNot(main_task, handler_tasks[0])
+
+    def test_leaves_ignored_signals_to_open(self):
+        """ Should not handle in the event loop signals to ignore. """
+        instance = self.test_instance
+        instance.open()
+        instance._loop = unittest.mock.MagicMock()
+        instance._add_loop_signal_handlers()
+        instance._loop.add_signal_handler.assert_called_once_with(
+                self.test_signal_number, instance._dispatch_signal,
+                self.fake_signal_handler, self.test_signal_number)
+
+    def test_restores_signal_handlers_on_exit(self):
+        """ Should restore the signal handlers from `signal_map`. """
+        instance = self.test_instance
+        instance.open()
+
+        async def main():
+            async with instance:
+                pass
+
+        asyncio.run(main())
+        self.assertEqual(
+                self.fake_signal_handler,
+                signal.getsignal(self.test_signal_number))
+
+
+class AsyncDaemonContext_terminate_TestCase(AsyncDaemonContext_BaseTestCase):
+    """ Test cases for AsyncDaemonContext.terminate method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_instance.signal_map[self.test_signal_number] = 'terminate'
+
+    def test_raises_system_exit_if_no_event_loop(self):
+        """ Should raise SystemExit if not in the event loop. """
+        instance = self.test_instance
+        self.assertRaises(
+                SystemExit,
+                instance.terminate, self.test_signal_number, None)
+
+    def test_cancels_main_task_once(self):
+        """ Should cancel the task in the asynchronous context, once. """
+        instance = self.test_instance
+        instance._main_task = unittest.mock.MagicMock()
+        instance.terminate(self.test_signal_number, None)
+        instance.terminate(self.test_signal_number, None)
+        instance._main_task.cancel.assert_called_once_with()
+
+    def test_raises_system_exit_after_cleanup(self):
+        """ Should let the task clean up, then raise SystemExit. """
+        instance = self.test_instance
+        instance.open()
+        cleanup_calls = []
+
+        async def main():
+            async with instance:
+                try:
+                    os.kill(os.getpid(), self.test_signal_number)
+                    await asyncio.sleep(10)
+                finally:
+                    cleanup_calls.append(True)
+
+        exc = self.assertRaises(SystemExit, asyncio.run, main())
+        self.assertIn(str(int(self.test_signal_number)), str(exc))
+        self.assertEqual([True], cleanup_calls)
+        self.mock_func_close.assert_called_once_with()
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,300 @@
+# test/test_handover.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘handover’ module. """
+
+import os
+import socket
+
+import daemon.handover
+
+from . import scaffold
+
+
+def setup_handover_socket_fixtures(testcase):
+    """ Set up a connected pair of handover sockets for test cases. """
+    (testcase.test_predecessor_socket, testcase.test_successor_socket) = (
+            daemon.handover.make_handover_socket_pair())
+    testcase.addCleanup(testcase.test_predecessor_socket.close)
+    testcase.addCleanup(testcase.test_successor_socket.close)
+
+
+def close_file_descriptors(fds):
+    """ Close each file descriptor in `fds`. """
+    for fd in fds:
+        os.close(fd)
+
+
+class make_handover_socket_pair_TestCase(scaffold.TestCase):
+    """ Test cases for function `make_handover_socket_pair`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_handover_socket_fixtures(self)
+
+    def test_returns_sequential_packet_sockets(self):
+        """ Should return a pair of ``SOCK_SEQPACKET`` Unix sockets. """
+        for test_socket in [
+                self.test_predecessor_socket, self.test_successor_socket]:
+            self.assertEqual(socket.AF_UNIX, test_socket.family)
+            self.assertEqual(socket.SOCK_SEQPACKET, test_socket.type)
+
+    def test_predecessor_socket_is_not_inheritable(self):
+        """ Should return the predecessor socket not inheritable. """
+        self.assertFalse(self.test_predecessor_socket.get_inheritable())
+
+    def test_successor_socket_is_inheritable(self):
+        """ Should return the successor socket inheritable. """
+        self.assertTrue(self.test_successor_socket.get_inheritable())
+
+
+class get_handover_socket_TestCase(scaffold.TestCase):
+    """ Test cases for function `get_handover_socket`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_handover_socket_fixtures(self)
+
+        self.test_fd = self.test_successor_socket.detach()
+        self.test_environ = {
+                'DAEMON_HANDOVER_FD': str(self.test_fd),
+                'LOREM': "ipsum",
+                }
+
+    def test_returns_socket_for_named_file_descriptor(self):
+        """ Should return a socket for the named file descriptor. """
+        result = daemon.handover.get_handover_socket(self.test_environ)
+        self.addCleanup(result.close)
+        self.assertIsInstance(result, socket.socket)
+        self.assertEqual(self.test_fd, result.fileno())
+
+    def test_returns_socket_not_inheritable(self):
+        """ Should return the socket not inheritable. """
+        result = daemon.handover.get_handover_socket(self.test_environ)
+        self.addCleanup(result.close)
+        self.assertFalse(result.get_inheritable())
+
+    def test_removes_environment_variable(self):
+        """ Should remove the variable from the environment. """
+        result = daemon.handover.get_handover_socket(self.test_environ)
+        self.addCleanup(result.close)
+        self.assertEqual({'LOREM': "ipsum"}, self.test_environ)
+
+    def test_returns_none_if_not_set(self):
+        """ Should return ``None`` if the variable is not set. """
+        self.addCleanup(os.close, self.test_fd)
+        result = daemon.handover.get_handover_socket({})
+        self.assertIs(result, None)
+
+    def test_returns_none_if_not_valid(self):
+        """ Should return ``None`` if the variable is not valid. """
+        self.addCleanup(os.close, self.test_fd)
+        for value in ["", "lorem", "-1"]:
+            with self.subTest(value=value):
+                test_environ = {'DAEMON_HANDOVER_FD': value}
+                result = daemon.handover.get_handover_socket(test_environ)
+                self.assertIs(result, None)
+                self.assertEqual({}, test_environ)
+
+
+class send_receive_message_TestCase(scaffold.TestCase):
+    """ Test cases for functions `send_message` and `receive_message`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_handover_socket_fixtures(self)
+
+        (self.test_pipe_read_fd, self.test_pipe_write_fd) = os.pipe()
+        self.addCleanup(os.close, self.test_pipe_read_fd)
+        self.addCleanup(os.close, self.test_pipe_write_fd)
+
+    def test_receives_fields_sent(self):
+        """ Should receive the fields of the message sent. """
+        daemon.handover.send_message(
+                self.test_predecessor_socket, status="ready", pid=2468)
+        (fields, fds) = daemon.handover.receive_message(
+                self.test_successor_socket)
+        self.assertEqual({'status': "ready", 'pid': 2468}, fields)
+        self.assertEqual([], fds)
+
+    def test_receives_file_descriptors_sent(self):
+        """ Should receive duplicates of the file descriptors sent. """
+        daemon.handover.send_message(
+                self.test_predecessor_socket,
+                fds=[self.test_pipe_write_fd])
+        (fields, fds) = daemon.handover.receive_message(
+                self.test_successor_socket)
+        self.addCleanup(close_file_descriptors, fds)
+        self.assertEqual(1, len(fds))
+        self.assertNotEqual(self.test_pipe_write_fd, fds[0])
+        os.write(fds[0], b"lorem")
+        self.assertEqual(b"lorem", os.read(self.test_pipe_read_fd, 5))
+
+    def test_received_file_descriptors_are_not_inheritable(self):
+        """ Should receive file descriptors not inheritable. """
+        os.set_inheritable(self.test_pipe_write_fd, True)
+        daemon.handover.send_message(
+                self.test_predecessor_socket,
+                fds=[self.test_pipe_write_fd])
+        (fields, fds) = daemon.handover.receive_message(
+                self.test_successor_socket)
+        self.addCleanup(close_file_descriptors, fds)
+        self.assertFalse(os.get_inheritable(fds[0]))
+
+    def test_returns_none_if_peer_closed(self):
+        """ Should return ``None`` fields if the peer closed the socket. """
+        self.test_predecessor_socket.close()
+        (fields, fds) = daemon.handover.receive_message(
+                self.test_successor_socket)
+        self.assertIs(fields, None)
+        self.assertEqual([], fds)
+
+    def test_raises_value_error_if_message_not_valid(self):
+        """ Should raise ValueError if the message is not valid JSON. """
+        self.test_predecessor_socket.send(b"lorem ipsum")
+        self.assertRaises(
+                ValueError,
+                daemon.handover.receive_message,
+                self.test_successor_socket)
+
+    def test_raises_value_error_if_message_not_object(self):
+        """ Should raise ValueError if the message is not an object. """
+        self.test_predecessor_socket.send(b"[1, 2, 3]")
+        self.assertRaises(
+                ValueError,
+                daemon.handover.receive_message,
+                self.test_successor_socket)
+
+    def test_raises_value_error_if_too_many_file_descriptors(self):
+        """ Should raise ValueError if too many file descriptors. """
+        test_fds = [self.test_pipe_write_fd] * (
+                daemon.handover.max_file_descriptors + 1)
+        self.assertRaises(
+                ValueError,
+                daemon.handover.send_message,
+                self.test_predecessor_socket, fds=test_fds)
+
+
+class send_receive_file_descriptors_TestCase(scaffold.TestCase):
+    """ Test cases for sending and receiving named file descriptors. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_handover_socket_fixtures(self)
+
+        self.test_named_fds = []
+        for name in ["lorem", "ipsum", "lorem"]:
+            (test_socket, peer_socket) = socket.socketpair()
+            self.addCleanup(test_socket.close)
+            self.addCleanup(peer_socket.close)
+            self.test_named_fds.append((name, test_socket.fileno()))
+
+    def test_receives_names_in_order(self):
+        """ Should receive the names of the file descriptors in order. """
+        daemon.handover.send_file_descriptors(
+                self.test_predecessor_socket, self.test_named_fds)
+        result = daemon.handover.receive_file_descriptors(
+                self.test_successor_socket)
+        self.addCleanup(
+                close_file_descriptors, [fd for (name, fd) in result])
+        self.assertEqual(
+                ["lorem", "ipsum", "lorem"],
+                [name for (name, fd) in result])
+
+    def test_receives_sockets(self):
+        """ Should receive each file descriptor as a socket. """
+        daemon.handover.send_file_descriptors(
+                self.test_predecessor_socket, self.test_named_fds)
+        result = daemon.handover.receive_file_descriptors(
+                self.test_successor_socket)
+        self.addCleanup(
+                close_file_descriptors, [fd for (name, fd) in result])
+        for (name, fd) in result:
+            with socket.socket(fileno=os.dup(fd)) as test_socket:
+                self.assertEqual(socket.AF_UNIX, test_socket.family)
+
+    def test_raises_value_error_if_names_do_not_match(self):
+        """ Should raise ValueError if the names do not match the files. """
+        daemon.handover.send_message(
+                self.test_predecessor_socket,
+                fds=[fd for (name, fd) in self.test_named_fds],
+                names=["lorem"])
+        self.assertRaises(
+                ValueError,
+                daemon.handover.receive_file_descriptors,
+                self.test_successor_socket)
+
+    def test_raises_value_error_if_peer_closed(self):
+        """ Should raise ValueError if the peer closed the socket. """
+        self.test_predecessor_socket.close()
+        self.assertRaises(
+                ValueError,
+                daemon.handover.receive_file_descriptors,
+                self.test_successor_socket)
+
+    def test_receives_no_file_descriptors(self):
+        """ Should receive an empty list if there are no files. """
+        daemon.handover.send_file_descriptors(
+                self.test_predecessor_socket, [])
+        result = daemon.handover.receive_file_descriptors(
+                self.test_successor_socket)
+        self.assertEqual([], result)
+
+    def test_receives_more_than_one_message_of_file_descriptors(self):
+        """ Should receive more files than fit in one message. """
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        test_count = (daemon.handover.max_file_descriptors * 2) + 5
+        test_named_fds = [
+                ("lorem-{index:d}".format(index=index), write_fd)
+                for index in range(test_count)]
+        daemon.handover.send_file_descriptors(
+                self.test_predecessor_socket, test_named_fds)
+        result = daemon.handover.receive_file_descriptors(
+                self.test_successor_socket)
+        self.addCleanup(
+                close_file_descriptors, [fd for (name, fd) in result])
+        self.assertEqual(
+                [name for (name, fd) in test_named_fds],
+                [name for (name, fd) in result])
+        for (name, fd) in result:
+            self.assertTrue(os.path.sameopenfile(fd, write_fd))
+
+    def test_closes_received_file_descriptors_if_later_message_fails(self):
+        """ Should close the files received, if a later message fails. """
+        daemon.handover.send_message(
+                self.test_predecessor_socket,
+                fds=[fd for (name, fd) in self.test_named_fds],
+                names=[name for (name, fd) in self.test_named_fds],
+                done=False)
+        self.test_predecessor_socket.close()
+        open_fds_before = set(os.listdir("/proc/self/fd"))
+        self.assertRaises(
+                ValueError,
+                daemon.handover.receive_file_descriptors,
+                self.test_successor_socket)
+        self.assertEqual(open_fds_before, set(os.listdir("/proc/self/fd")))
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
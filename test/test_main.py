@@ -0,0 +1,152 @@
+# test/test_main.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘__main__’ module. """
+
+import io
+import json
+import unittest.mock
+
+import daemon.__main__
+import daemon.pidfile
+
+from . import scaffold
+
+
+def make_status(**kwargs):
+    """ Make a PID file status, as from `scan_pidfiles`. """
+    status = {
+            'path': "/run/lorem.pid", 'pid': 1357, 'alive': True,
+            'uptime': 12.34, 'lock_holder': 1357, 'lease_age': None,
+            }
+    status.update(kwargs)
+    return status
+
+
+class format_status_value_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for ‘format_status_value’ function. """
+
+    scenarios = [
+            ('none', {'value': None, 'expected_result': "-"}),
+            ('true', {'value': True, 'expected_result': "yes"}),
+            ('false', {'value': False, 'expected_result': "no"}),
+            ('float', {'value': 12.34, 'expected_result': "12.3"}),
+            ('int', {'value': 1357, 'expected_result': "1357"}),
+            ('str', {'value': "lorem", 'expected_result': "lorem"}),
+            ]
+
+    def test_returns_expected_result(self):
+        """ Should return expected result for the scenario. """
+        result = daemon.__main__.format_status_value(self.value)
+        self.assertEqual(self.expected_result, result)
+
+
+class format_status_table_TestCase(scaffold.TestCase):
+    """ Test cases for ‘format_status_table’ function. """
+
+    def test_returns_aligned_table(self):
+        """ Should return a heading, and one aligned line per PID file. """
+        statuses = [
+                make_status(),
+                make_status(
+                    path="/run/ipsum.pid", pid=24680, alive=False,
+                    uptime=None, lock_holder=None, lease_age=5.0),
+                ]
+        result = daemon.__main__.format_status_table(statuses)
+        expected_result = (
+                "PID    ALIVE  UPTIME  LOCK  LEASE  PATH\n"
+                "1357   yes    12.3    1357  -      /run/lorem.pid\n"
+                "24680  no     -       -     5.0    /run/ipsum.pid\n")
+        self.assertEqual(expected_result, result)
+
+
+class get_exit_status_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for ‘get_exit_status’ function. """
+
+    scenarios = [
+            ('all-running', {
+                'statuses': [make_status(), make_status()],
+                'expected_result': 0,
+                }),
+            ('one-not-running', {
+                'statuses': [make_status(), make_status(alive=False)],
+                'expected_result': 3,
+                }),
+            ('no-pidfiles', {
+                'statuses': [],
+                'expected_result': 4,
+                }),
+            ]
+
+    def test_returns_expected_result(self):
+        """ Should return expected result for the scenario. """
+        result = daemon.__main__.get_exit_status(self.statuses)
+        self.assertEqual(self.expected_result, result)
+
+
+class main_TestCase(scaffold.TestCase):
+    """ Test cases for ‘main’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_statuses = [make_status(), make_status(alive=False)]
+        func_patcher_scan_pidfiles = unittest.mock.patch.object(
+                daemon.pidfile, "scan_pidfiles",
+                return_value=self.test_statuses)
+        self.mock_func_scan_pidfiles = func_patcher_scan_pidfiles.start()
+        self.addCleanup(func_patcher_scan_pidfiles.stop)
+
+        self.test_output = io.StringIO()
+
+    def test_status_scans_pattern(self):
+        """ Should scan the PID files matching the pattern. """
+        daemon.__main__.main(["status", "/run/"], output=self.test_output)
+        self.mock_func_scan_pidfiles.assert_called_once_with("/run/")
+
+    def test_status_writes_table(self):
+        """ Should write the status as a table. """
+        daemon.__main__.main(["status", "/run/"], output=self.test_output)
+        self.assertEqual(
+                daemon.__main__.format_status_table(self.test_statuses),
+                self.test_output.getvalue())
+
+    def test_status_writes_json(self):
+        """ Should write the status as JSON, if requested. """
+        daemon.__main__.main(
+                ["status", "--json", "/run/"], output=self.test_output)
+        self.assertEqual(
+                self.test_statuses,
+                json.loads(self.test_output.getvalue()))
+
+    def test_status_returns_exit_status(self):
+        """ Should return the exit status for the status. """
+        result = daemon.__main__.main(
+                ["status", "/run/"], output=self.test_output)
+        self.assertEqual(3, result)
+
+    def test_requires_command(self):
+        """ Should exit with an error, if no command is specified. """
+        with unittest.mock.patch("sys.stderr", new=io.StringIO()):
+            exc = self.assertRaises(SystemExit, daemon.__main__.main, [])
+        self.assertEqual(2, exc.code)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,131 @@
+# test/test_memory.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘memory’ module. """
+
+import builtins
+import gc
+import os
+import textwrap
+import unittest.mock
+
+import daemon.memory
+
+from . import scaffold
+
+
+class freeze_gc_heap_TestCase(scaffold.TestCase):
+    """ Test cases for function `freeze_gc_heap`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_module_gc = unittest.mock.MagicMock()
+        for func_name in ["collect", "freeze"]:
+            func_patcher = unittest.mock.patch.object(gc, func_name)
+            self.mock_module_gc.attach_mock(func_patcher.start(), func_name)
+            self.addCleanup(func_patcher.stop)
+
+    def test_freezes_heap(self):
+        """ Should freeze the garbage collector's heap. """
+        daemon.memory.freeze_gc_heap()
+        self.mock_module_gc.freeze.assert_called_once_with()
+        self.assertFalse(self.mock_module_gc.collect.called)
+
+    def test_collects_before_freezing_if_specified(self):
+        """ Should do a full collection before freezing, if specified. """
+        daemon.memory.freeze_gc_heap(collect=True)
+        self.assertEqual(
+                [unittest.mock.call.collect(), unittest.mock.call.freeze()],
+                self.mock_module_gc.mock_calls)
+
+
+class get_memory_usage_TestCase(scaffold.TestCase):
+    """ Test cases for function `get_memory_usage`. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_content = textwrap.dedent("""\
+                55ace89dc000-7fff9d380000 ---p 00000000 00:00 0    [rollup]
+                Rss:                1252 kB
+                Pss:                 377 kB
+                Pss_Anon:            116 kB
+                Shared_Clean:        936 kB
+                Shared_Dirty:          8 kB
+                Private_Clean:       192 kB
+                Private_Dirty:       116 kB
+                Referenced:         1252 kB
+                Swap:                 12 kB
+                SwapPss:              12 kB
+                """).encode('ascii')
+        self.expected_usage = {
+                'rss': 1252 * 1024,
+                'pss': 377 * 1024,
+                'shared': (936 + 8) * 1024,
+                'private': (192 + 116) * 1024,
+                'swap': 12 * 1024,
+                }
+
+        self.mock_func_open = unittest.mock.mock_open(
+                read_data=self.test_content)
+        func_patcher_open = unittest.mock.patch.object(
+                builtins, "open", new=self.mock_func_open)
+        func_patcher_open.start()
+        self.addCleanup(func_patcher_open.stop)
+
+    def test_returns_usage_from_smaps_rollup(self):
+        """ Should return the memory usage from ‘smaps_rollup’. """
+        result = daemon.memory.get_memory_usage(2468)
+        self.mock_func_open.assert_called_once_with(
+                "/proc/2468/smaps_rollup", 'rb')
+        self.assertEqual(self.expected_usage, result)
+
+    def test_reads_current_process_by_default(self):
+        """ Should read the current process by default. """
+        daemon.memory.get_memory_usage()
+        self.mock_func_open.assert_called_once_with(
+                "/proc/self/smaps_rollup", 'rb')
+
+    def test_returns_none_if_not_reported(self):
+        """ Should return ``None`` if the system does not report usage. """
+        for error_class in [FileNotFoundError, PermissionError]:
+            with self.subTest(error_class=error_class):
+                self.mock_func_open.side_effect = error_class()
+                result = daemon.memory.get_memory_usage(2468)
+                self.assertIs(result, None)
+
+
+@unittest.skipUnless(
+        os.path.exists("/proc/self/smaps_rollup"),
+        "system does not report ‘smaps_rollup’")
+class get_memory_usage_real_process_TestCase(scaffold.TestCase):
+    """ Test cases for function `get_memory_usage` on this process. """
+
+    def test_returns_usage_of_current_process(self):
+        """ Should return the memory usage of the current process. """
+        result = daemon.memory.get_memory_usage()
+        self.assertEqual(
+                {'rss', 'pss', 'shared', 'private', 'swap'}, set(result))
+        self.assertEqual(result['rss'], result['shared'] + result['private'])
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
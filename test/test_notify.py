@@ -0,0 +1,460 @@
+# test/test_notify.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘notify’ module. """
+
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest.mock
+
+import daemon.notify
+
+from . import scaffold
+
+
+class get_notify_socket_address_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for function `get_notify_socket_address`. """
+
+    scenarios = [
+            ('not-set', {
+                'environ': {},
+                'expected_result': None,
+                }),
+            ('empty', {
+                'environ': {'NOTIFY_SOCKET': ""},
+                'expected_result': None,
+                }),
+            ('path', {
+                'environ': {'NOTIFY_SOCKET': "/run/systemd/notify"},
+                'expected_result': "/run/systemd/notify",
+                }),
+            ('abstract', {
+                'environ': {'NOTIFY_SOCKET': "@lorem/ipsum"},
+                'expected_result': b"\0lorem/ipsum",
+                }),
+            ('relative-path', {
+                'environ': {'NOTIFY_SOCKET': "lorem/ipsum"},
+                'expected_result': None,
+                }),
+            ('vsock', {
+                'environ': {'NOTIFY_SOCKET': "vsock:2:1234"},
+                'expected_result': None,
+                }),
+            ]
+
+    def test_returns_expected_result(self):
+        """ Should return expected result. """
+        result = daemon.notify.get_notify_socket_address(self.environ)
+        self.assertEqual(self.expected_result, result)
+
+    def test_queries_os_environ_by_default(self):
+        """ Should query `os.environ` if no `environ` specified. """
+        with unittest.mock.patch.dict(
+                os.environ, self.environ, clear=True):
+            result = daemon.notify.get_notify_socket_address()
+        self.assertEqual(self.expected_result, result)
+
+
+class get_watchdog_interval_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for function `get_watchdog_interval`. """
+
+    fake_pid = 1357
+
+    scenarios = [
+            ('not-set', {
+                'environ': {},
+                'expected_result': None,
+                }),
+            ('usec', {
+                'environ': {'WATCHDOG_USEC': "30000000"},
+                'expected_result': 30.0,
+                }),
+            ('usec-zero', {
+                'environ': {'WATCHDOG_USEC': "0"},
+                'expected_result': None,
+                }),
+            ('usec-not-integer', {
+                'environ': {'WATCHDOG_USEC': "lorem"},
+                'expected_result': None,
+                }),
+            ('pid-match', {
+                'environ': {
+                    'WATCHDOG_USEC': "500000",
+                    'WATCHDOG_PID': str(fake_pid),
+                    },
+                'expected_result': 0.5,
+                }),
+            ('pid-mismatch', {
+                'environ': {
+                    'WATCHDOG_USEC': "500000",
+                    'WATCHDOG_PID': str(fake_pid + 1),
+                    },
+                'expected_result': None,
+                }),
+            ('pid-not-integer', {
+                'environ': {
+                    'WATCHDOG_USEC': "500000",
+                    'WATCHDOG_PID': "lorem",
+                    },
+                'expected_result': None,
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        func_patcher = unittest.mock.patch.object(
+                os, "getpid", return_value=self.fake_pid)
+        func_patcher.start()
+        self.addCleanup(func_patcher.stop)
+
+    def test_returns_expected_result(self):
+        """ Should return expected result. """
+        result = daemon.notify.get_watchdog_interval(self.environ)
+        self.assertEqual(self.expected_result, result)
+
+    def test_queries_os_environ_by_default(self):
+        """ Should query `os.environ` if no `environ` specified. """
+        with unittest.mock.patch.dict(
+                os.environ, self.environ, clear=True):
+            result = daemon.notify.get_watchdog_interval()
+        self.assertEqual(self.expected_result, result)
+
+
+def setup_service_manager_socket(testcase):
+    """ Set up a stand-in for the service manager's socket for `testcase`.
+
+        :param testcase: The `TestCase` instance to modify.
+        :return: ``None``.
+
+        Bind a Unix datagram socket `testcase.service_manager_socket` in
+        a new temporary directory, at `testcase.service_manager_address`.
+        """
+    temp_dir = tempfile.TemporaryDirectory()
+    testcase.addCleanup(temp_dir.cleanup)
+    testcase.service_manager_address = os.path.join(temp_dir.name, "notify")
+    testcase.service_manager_socket = socket.socket(
+            socket.AF_UNIX, socket.SOCK_DGRAM)
+    testcase.addCleanup(testcase.service_manager_socket.close)
+    testcase.service_manager_socket.bind(testcase.service_manager_address)
+    testcase.service_manager_socket.settimeout(5)
+
+
+class ServiceNotifier_BaseTestCase(scaffold.TestCase):
+    """ Base class for `ServiceNotifier` test case classes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        setup_service_manager_socket(self)
+        self.test_instance = daemon.notify.ServiceNotifier(
+                self.service_manager_address)
+        self.addCleanup(self.test_instance.close)
+
+    def receive_notification(self):
+        """ Receive one notification datagram, as text. """
+        data = self.service_manager_socket.recv(4096)
+        return data.decode('utf-8')
+
+
+class ServiceNotifier_TestCase(ServiceNotifier_BaseTestCase):
+    """ Test cases for `ServiceNotifier` class. """
+
+    def test_has_specified_address(self):
+        """ Should have specified `address`. """
+        self.assertEqual(
+                self.service_manager_address, self.test_instance.address)
+
+    def test_socket_initially_closed(self):
+        """ Should have no socket initially. """
+        self.assertIs(self.test_instance.socket, None)
+        self.assertIs(self.test_instance.fileno(), None)
+
+    def test_open_connects_socket(self):
+        """ Should connect a socket to the address on `open`. """
+        instance = self.test_instance
+        instance.open()
+        self.assertEqual(
+                self.service_manager_address,
+                instance.socket.getpeername())
+        self.assertEqual(instance.socket.fileno(), instance.fileno())
+
+    def test_open_makes_socket_not_inheritable(self):
+        """ Should make a socket that is not inherited by child programs. """
+        instance = self.test_instance
+        instance.open()
+        self.assertFalse(instance.socket.get_inheritable())
+
+    def test_open_twice_keeps_socket(self):
+        """ Should keep the same socket if `open` called again. """
+        instance = self.test_instance
+        instance.open()
+        first_socket = instance.socket
+        instance.open()
+        self.assertIs(first_socket, instance.socket)
+
+    def test_open_raises_error_if_no_such_socket(self):
+        """ Should raise OSError, and have no socket, if connect fails. """
+        instance = daemon.notify.ServiceNotifier(
+                self.service_manager_address + "-bogus")
+        self.assertRaises(OSError, instance.open)
+        self.assertIs(instance.socket, None)
+
+    def test_close_closes_socket(self):
+        """ Should close the socket on `close`. """
+        instance = self.test_instance
+        instance.open()
+        test_socket = instance.socket
+        instance.close()
+        self.assertIs(instance.socket, None)
+        self.assertEqual(-1, test_socket.fileno())
+
+    def test_close_if_not_open_does_nothing(self):
+        """ Should do nothing on `close` if not open. """
+        instance = self.test_instance
+        instance.close()
+        self.assertIs(instance.socket, None)
+
+
+class ServiceNotifier_from_environment_TestCase(scaffold.TestCase):
+    """ Test cases for `ServiceNotifier.from_environment` method. """
+
+    def test_returns_notifier_for_socket_address(self):
+        """ Should return a notifier for the socket in the environment. """
+        environ = {'NOTIFY_SOCKET': "/run/lorem/notify"}
+        result = daemon.notify.ServiceNotifier.from_environment(environ)
+        self.assertIsInstance(result, daemon.notify.ServiceNotifier)
+        self.assertEqual("/run/lorem/notify", result.address)
+
+    def test_returns_none_if_no_socket_address(self):
+        """ Should return None if no socket in the environment. """
+        result = daemon.notify.ServiceNotifier.from_environment({})
+        self.assertIs(result, None)
+
+
+class ServiceNotifier_notify_TestCase(ServiceNotifier_BaseTestCase):
+    """ Test cases for `ServiceNotifier` notification methods. """
+
+    def test_notify_sends_assignments(self):
+        """ Should send each assignment on its own line. """
+        self.test_instance.notify(READY=1, STATUS="Lorem ipsum")
+        self.assertEqual(
+                "READY=1\nSTATUS=Lorem ipsum\n",
+                self.receive_notification())
+
+    def test_notify_opens_socket_if_needed(self):
+        """ Should open the socket if not already open. """
+        self.test_instance.notify(STATUS="Lorem")
+        self.assertIsNot(self.test_instance.socket, None)
+
+    def test_notify_sends_each_on_the_same_socket(self):
+        """ Should send each notification on the same socket. """
+        instance = self.test_instance
+        instance.notify(STATUS="Lorem")
+        first_socket = instance.socket
+        instance.notify(STATUS="Ipsum")
+        self.assertIs(first_socket, instance.socket)
+        self.assertEqual("STATUS=Lorem\n", self.receive_notification())
+        self.assertEqual("STATUS=Ipsum\n", self.receive_notification())
+
+    def test_notify_raises_error_if_newline_in_value(self):
+        """ Should raise ValueError if a value contains a newline. """
+        self.assertRaises(
+                ValueError,
+                self.test_instance.notify, STATUS="Lorem\nREADY=1")
+
+    def test_notify_ready_sends_ready(self):
+        """ Should send ‘READY=1’. """
+        self.test_instance.notify_ready()
+        self.assertEqual("READY=1\n", self.receive_notification())
+
+    def test_notify_ready_sends_status(self):
+        """ Should send ‘READY=1’ with status, if specified. """
+        self.test_instance.notify_ready(status="Lorem ipsum")
+        self.assertEqual(
+                "READY=1\nSTATUS=Lorem ipsum\n",
+                self.receive_notification())
+
+    def test_notify_status_sends_status(self):
+        """ Should send ‘STATUS=…’. """
+        self.test_instance.notify_status("Dolor sit amet")
+        self.assertEqual(
+                "STATUS=Dolor sit amet\n", self.receive_notification())
+
+    def test_notify_watchdog_sends_watchdog(self):
+        """ Should send ‘WATCHDOG=1’. """
+        self.test_instance.notify_watchdog()
+        self.assertEqual("WATCHDOG=1\n", self.receive_notification())
+
+    def test_notify_reloading_sends_reloading_with_monotonic_time(self):
+        """ Should send ‘RELOADING=1’ with the monotonic clock time. """
+        fake_clock_ns = 1234567891011
+        with unittest.mock.patch.object(
+                time, "clock_gettime_ns", return_value=fake_clock_ns):
+            self.test_instance.notify_reloading()
+        self.assertEqual(
+                "RELOADING=1\nMONOTONIC_USEC=1234567891\n",
+                self.receive_notification())
+
+    def test_notify_stopping_sends_stopping(self):
+        """ Should send ‘STOPPING=1’. """
+        self.test_instance.notify_stopping()
+        self.assertEqual("STOPPING=1\n", self.receive_notification())
+
+
+class WatchdogHeartbeat_BaseTestCase(scaffold.TestCase):
+    """ Base class for `WatchdogHeartbeat` test case classes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_notifier = unittest.mock.MagicMock(
+                spec=daemon.notify.ServiceNotifier)
+        self.test_interval = 10.0
+        self.mock_liveness_check = unittest.mock.MagicMock(
+                return_value=True)
+        self.test_instance = daemon.notify.WatchdogHeartbeat(
+                self.mock_notifier, self.test_interval,
+                liveness_check=self.mock_liveness_check)
+        self.addCleanup(self.test_instance.stop)
+
+
+class WatchdogHeartbeat_TestCase(WatchdogHeartbeat_BaseTestCase):
+    """ Test cases for `WatchdogHeartbeat` class. """
+
+    def test_period_is_half_interval(self):
+        """ Should have a period of half the watchdog interval. """
+        self.assertEqual(5.0, self.test_instance.period)
+
+    def test_not_running_initially(self):
+        """ Should not be running initially. """
+        self.assertFalse(self.test_instance.is_running)
+
+
+class WatchdogHeartbeat_beat_TestCase(WatchdogHeartbeat_BaseTestCase):
+    """ Test cases for `WatchdogHeartbeat.beat` method. """
+
+    def test_sends_keep_alive(self):
+        """ Should send a keep-alive if the liveness check passes. """
+        result = self.test_instance.beat()
+        self.assertIs(result, True)
+        self.mock_liveness_check.assert_called_once_with()
+        self.mock_notifier.notify_watchdog.assert_called_once_with()
+
+    def test_sends_keep_alive_if_no_liveness_check(self):
+        """ Should send a keep-alive if there is no liveness check. """
+        self.test_instance.liveness_check = None
+        result = self.test_instance.beat()
+        self.assertIs(result, True)
+        self.mock_notifier.notify_watchdog.assert_called_once_with()
+
+    def test_skips_keep_alive_if_liveness_check_fails(self):
+        """ Should skip the keep-alive if the liveness check fails. """
+        self.mock_liveness_check.return_value = False
+        result = self.test_instance.beat()
+        self.assertIs(result, False)
+        self.assertFalse(self.mock_notifier.notify_watchdog.called)
+
+    def test_skips_keep_alive_if_liveness_check_raises(self):
+        """ Should skip the keep-alive if the liveness check raises. """
+        self.mock_liveness_check.side_effect = RuntimeError("Lorem")
+        result = self.test_instance.beat()
+        self.assertIs(result, False)
+        self.assertFalse(self.mock_notifier.notify_watchdog.called)
+
+    def test_ignores_error_sending_keep_alive(self):
+        """ Should ignore an error sending the keep-alive. """
+        self.mock_notifier.notify_watchdog.side_effect = ConnectionRefusedError
+        result = self.test_instance.beat()
+        self.assertIs(result, False)
+
+
+class WatchdogHeartbeat_run_TestCase(WatchdogHeartbeat_BaseTestCase):
+    """ Test cases for `WatchdogHeartbeat._run` method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_stop_event = unittest.mock.MagicMock(
+                spec=threading.Event)
+        self.test_instance._stop_event = self.mock_stop_event
+
+    def run_with_clock(self, clock_values, wait_results):
+        """ Run the heartbeat with fake clock values and wait results. """
+        self.mock_stop_event.wait.side_effect = wait_results
+        with unittest.mock.patch.object(
+                time, "monotonic", side_effect=clock_values):
+            self.test_instance._run()
+
+    def test_beats_until_stopped(self):
+        """ Should beat, then wait, until the stop event is set. """
+        self.run_with_clock(
+                clock_values=[100.0, 100.0, 105.0, 110.0],
+                wait_results=[False, False, True])
+        self.assertEqual(3, self.mock_notifier.notify_watchdog.call_count)
+
+    def test_keeps_schedule_if_beat_late(self):
+        """ Should wait only until the next scheduled beat time. """
+        self.run_with_clock(
+                clock_values=[100.0, 101.5, 105.25],
+                wait_results=[False, True])
+        self.assertEqual(
+                [unittest.mock.call(3.5), unittest.mock.call(4.75)],
+                self.mock_stop_event.wait.mock_calls)
+
+    def test_beats_immediately_if_behind_schedule(self):
+        """ Should beat without waiting if behind schedule. """
+        self.run_with_clock(
+                clock_values=[100.0, 112.0, 113.0],
+                wait_results=[False, True])
+        self.assertEqual(
+                [unittest.mock.call(0), unittest.mock.call(4.0)],
+                self.mock_stop_event.wait.mock_calls)
+
+
+class WatchdogHeartbeat_thread_TestCase(ServiceNotifier_BaseTestCase):
+    """ Test cases for `WatchdogHeartbeat` thread, with a socket. """
+
+    def test_sends_keep_alive_notifications(self):
+        """ Should send keep-alive notifications to the service manager. """
+        heartbeat = daemon.notify.WatchdogHeartbeat(
+                self.test_instance, interval=0.02)
+        heartbeat.start()
+        self.addCleanup(heartbeat.stop)
+        self.assertTrue(heartbeat.is_running)
+        for __ in range(3):
+            self.assertEqual("WATCHDOG=1\n", self.receive_notification())
+
+    def test_stop_ends_thread(self):
+        """ Should end the thread on `stop`. """
+        heartbeat = daemon.notify.WatchdogHeartbeat(
+                self.test_instance, interval=60)
+        heartbeat.start()
+        heartbeat.stop(timeout=5)
+        self.assertFalse(heartbeat.is_running)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -10,10 +10,14 @@
 import builtins
 import contextlib
 import errno
+import fcntl
 import io
 import itertools
 import os
+import signal
 import tempfile
+import threading
+import time
 import unittest.mock
 
 import lockfile
@@ -384,7 +388,9 @@ class TimeoutPIDLockFile_TestCase(scaffold.TestCase):
 
     def test_init_has_expected_signature(self):
         """ Should have expected signature for ‘__init__’. """
-        def test_func(self, path, acquire_timeout=None, *args, **kwargs): pass
+        def test_func(
+                self, path, acquire_timeout=None, *args,
+                wait_for_release=False, lease_interval=None, **kwargs): pass
         test_func.__name__ = '__init__'
         self.assertFunctionSignatureMatch(
                 test_func,
@@ -396,6 +402,22 @@ class TimeoutPIDLockFile_TestCase(scaffold.TestCase):
         expected_timeout = self.test_kwargs['acquire_timeout']
         self.assertEqual(expected_timeout, instance.acquire_timeout)
 
+    def test_has_default_wait_for_release(self):
+        """ Should not wait for release events by default. """
+        instance = self.test_instance
+        self.assertFalse(instance.wait_for_release)
+
+    def test_has_specified_wait_for_release(self):
+        """ Should have specified ‘wait_for_release’ value. """
+        instance = daemon.pidfile.TimeoutPIDLockFile(
+                wait_for_release=True, **self.test_kwargs)
+        self.assertTrue(instance.wait_for_release)
+
+    def test_has_default_lease_interval(self):
+        """ Should not refresh a lease by default. """
+        instance = self.test_instance
+        self.assertIs(instance.lease_interval, None)
+
     @unittest.mock.patch.object(
             lockfile.pidlockfile.PIDLockFile, "__init__",
             autospec=True)
@@ -429,6 +451,1288 @@ class TimeoutPIDLockFile_TestCase(scaffold.TestCase):
         instance.acquire()
         mock_func_acquire.assert_called_with(instance, expected_timeout)
 
+    @unittest.mock.patch.object(daemon.pidfile, "wait_for_pidfile_release")
+    @unittest.mock.patch.object(
+            lockfile.pidlockfile.PIDLockFile, "acquire",
+            autospec=True)
+    def test_acquire_waits_for_release_then_tries_again(
+            self, mock_func_acquire, mock_func_wait_for_pidfile_release):
+        """ Should wait for the PID file's release between attempts. """
+        instance = self.test_instance
+        instance.wait_for_release = True
+        mock_func_acquire.side_effect = [lockfile.AlreadyLocked(), None]
+        mock_calls = unittest.mock.MagicMock()
+        mock_calls.attach_mock(mock_func_acquire, "acquire")
+        mock_calls.attach_mock(
+                mock_func_wait_for_pidfile_release, "wait_for_pidfile_release")
+        instance.acquire(10)
+        self.assertEqual(
+                [
+                    unittest.mock.call.acquire(instance, 0),
+                    unittest.mock.call.wait_for_pidfile_release(
+                        self.scenario['pidfile_path'], unittest.mock.ANY),
+                    unittest.mock.call.acquire(instance, 0)],
+                mock_calls.mock_calls)
+
+    @unittest.mock.patch.object(time, "monotonic", side_effect=[0, 11])
+    @unittest.mock.patch.object(daemon.pidfile, "wait_for_pidfile_release")
+    @unittest.mock.patch.object(
+            lockfile.pidlockfile.PIDLockFile, "acquire",
+            autospec=True, side_effect=lockfile.AlreadyLocked())
+    def test_acquire_raises_lock_timeout_if_not_released(
+            self, mock_func_acquire, mock_func_wait_for_pidfile_release,
+            mock_func_monotonic):
+        """ Should raise LockTimeout if not released before the timeout. """
+        instance = self.test_instance
+        instance.wait_for_release = True
+        self.assertRaises(lockfile.LockTimeout, instance.acquire, 10)
+        mock_func_wait_for_pidfile_release.assert_not_called()
+
+    @unittest.mock.patch.object(daemon.pidfile, "wait_for_pidfile_release")
+    @unittest.mock.patch.object(
+            lockfile.pidlockfile.PIDLockFile, "acquire",
+            autospec=True)
+    def test_acquire_without_timeout_does_not_wait(
+            self, mock_func_acquire, mock_func_wait_for_pidfile_release):
+        """ Should not wait for release if the timeout is not positive. """
+        instance = self.test_instance
+        instance.wait_for_release = True
+        instance.acquire(0)
+        mock_func_acquire.assert_called_once_with(instance, 0)
+        mock_func_wait_for_pidfile_release.assert_not_called()
+
+    def test_acquire_writes_process_identity(self):
+        """ Should write the identity of this process to the PID file. """
+        temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_directory.cleanup)
+        test_path = os.path.join(temp_directory.name, "lorem.pid")
+        instance = daemon.pidfile.TimeoutPIDLockFile(test_path)
+        instance.acquire()
+        self.addCleanup(instance.release)
+        with open(test_path) as test_pidfile:
+            self.assertEqual(
+                    daemon.pidfile.format_pidfile_content(os.getpid()),
+                    test_pidfile.read())
+        self.assertEqual(os.getpid(), instance.read_pid())
+
+    def make_leased_instance(self):
+        """ Make an instance with a lease, on a PID file in a temporary
+            directory. """
+        temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_directory.cleanup)
+        test_path = os.path.join(temp_directory.name, "lorem.pid")
+        instance = daemon.pidfile.TimeoutPIDLockFile(
+                test_path, lease_interval=60)
+        return instance
+
+    def test_acquire_starts_lease(self):
+        """ Should start refreshing the lease on the PID file. """
+        instance = self.make_leased_instance()
+        instance.acquire()
+        self.addCleanup(instance.release)
+        self.assertTrue(instance._lease.is_running)
+        self.assertEqual(instance.path, instance._lease.target)
+        self.assertEqual(60, instance._lease.interval)
+
+    def test_acquire_without_lease_interval_starts_no_lease(self):
+        """ Should not refresh a lease if there is no lease interval. """
+        temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_directory.cleanup)
+        test_path = os.path.join(temp_directory.name, "lorem.pid")
+        instance = daemon.pidfile.TimeoutPIDLockFile(test_path)
+        instance.acquire()
+        self.addCleanup(instance.release)
+        self.assertIs(instance._lease, None)
+
+    def test_release_stops_lease(self):
+        """ Should stop refreshing the lease, then remove the PID file. """
+        instance = self.make_leased_instance()
+        instance.acquire()
+        test_lease = instance._lease
+        instance.release()
+        self.assertFalse(test_lease.is_running)
+        self.assertIs(instance._lease, None)
+        self.assertFalse(os.path.exists(instance.path))
+
+    @unittest.mock.patch.object(daemon.pidfile, "replace_pidfile")
+    def test_hand_over_stops_lease(self, mock_func_replace_pidfile):
+        """ Should stop refreshing the lease when handing over. """
+        instance = self.make_leased_instance()
+        instance.acquire()
+        self.addCleanup(os.remove, instance.path)
+        test_lease = instance._lease
+        instance.hand_over(self.getUniqueInteger())
+        self.assertFalse(test_lease.is_running)
+        self.assertIs(instance._lease, None)
+
+    def test_adopt_starts_lease(self):
+        """ Should start refreshing the lease when adopting the lock. """
+        instance = self.make_leased_instance()
+        instance.adopt()
+        self.addCleanup(instance._lease.stop)
+        self.assertTrue(instance._lease.is_running)
+
+    @unittest.mock.patch.object(os, "close")
+    def test_adopt_closes_file_descriptor(self, mock_func_os_close):
+        """ Should close a file descriptor handed over, not needed. """
+        instance = self.test_instance
+        instance.adopt(19)
+        mock_func_os_close.assert_called_once_with(19)
+        self.assertIs(instance._lease, None)
+
+    @unittest.mock.patch.object(daemon.pidfile, "is_pidfile_stale")
+    def test_is_stale_checks_pidfile(self, mock_func_is_pidfile_stale):
+        """ Should check whether the PID file is stale. """
+        instance = self.test_instance
+        result = instance.is_stale()
+        mock_func_is_pidfile_stale.assert_called_with(
+                self.scenario['pidfile_path'])
+        self.assertIs(mock_func_is_pidfile_stale.return_value, result)
+
+    @unittest.mock.patch.object(daemon.pidfile, "replace_pidfile")
+    @unittest.mock.patch.object(
+            lockfile.pidlockfile.PIDLockFile, "i_am_locking",
+            return_value=True)
+    def test_hand_over_replaces_pidfile(
+            self, mock_func_i_am_locking, mock_func_replace_pidfile):
+        """ Should replace the PID file with one for the new holder. """
+        instance = self.test_instance
+        test_pid = self.getUniqueInteger()
+        instance.hand_over(test_pid)
+        mock_func_replace_pidfile.assert_called_with(
+                self.scenario['pidfile_path'], test_pid)
+
+    @unittest.mock.patch.object(daemon.pidfile, "replace_pidfile")
+    @unittest.mock.patch.object(
+            lockfile.pidlockfile.PIDLockFile, "i_am_locking",
+            return_value=False)
+    def test_hand_over_raises_not_my_lock_if_not_locking(
+            self, mock_func_i_am_locking, mock_func_replace_pidfile):
+        """ Should raise NotMyLock if this process does not hold the lock. """
+        instance = self.test_instance
+        test_pid = self.getUniqueInteger()
+        self.assertRaises(
+                lockfile.NotMyLock,
+                instance.hand_over, test_pid)
+        mock_func_replace_pidfile.assert_not_called()
+
+
+def setup_flock_pidfile_fixtures(testcase):
+    """ Set up fixtures for test cases of kernel-locked PID files.
+
+        :param testcase: A `TestCase` instance to decorate.
+
+        Decorate the `testcase` with a temporary directory, a PID file path
+        in it, and a method `hold_lock` to lock the PID file from another
+        open file.
+        """
+    temp_directory = tempfile.TemporaryDirectory()
+    testcase.addCleanup(temp_directory.cleanup)
+    testcase.test_directory = temp_directory.name
+    testcase.test_pidfile_path = os.path.join(
+            testcase.test_directory, "lorem.pid")
+
+    def hold_lock():
+        fd = os.open(testcase.test_pidfile_path, os.O_RDWR | os.O_CREAT)
+        testcase.addCleanup(os.close, fd)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    testcase.hold_lock = hold_lock
+
+
+class FlockPIDLockFile_TestCase(scaffold.TestCase):
+    """ Test cases for ‘FlockPIDLockFile’ class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_flock_pidfile_fixtures(self)
+
+        self.test_kwargs = dict(
+                path=self.test_pidfile_path,
+                acquire_timeout=self.getUniqueInteger(),
+                )
+        self.test_instance = daemon.pidfile.FlockPIDLockFile(
+                **self.test_kwargs)
+        self.addCleanup(self.release_if_locked)
+
+    def release_if_locked(self):
+        """ Release the test instance's lock, if held. """
+        daemon.pidfile.stop_lease(self.test_instance._lease)
+        if self.test_instance._fd is not None:
+            os.close(self.test_instance._fd)
+
+    def read_pidfile(self):
+        """ Read the content of the PID file. """
+        with open(self.test_pidfile_path) as test_pidfile:
+            return test_pidfile.read()
+
+    def test_has_specified_acquire_timeout(self):
+        """ Should have specified ‘acquire_timeout’ value. """
+        instance = self.test_instance
+        expected_timeout = self.test_kwargs['acquire_timeout']
+        self.assertEqual(expected_timeout, instance.acquire_timeout)
+
+    def test_acquire_writes_current_pid(self):
+        """ Should write the current process ID to the PID file. """
+        instance = self.test_instance
+        instance.acquire()
+        self.assertEqual(
+                daemon.pidfile.format_pidfile_content(os.getpid()),
+                self.read_pidfile())
+        self.assertEqual(os.getpid(), instance.read_pid())
+
+    def test_acquire_holds_kernel_lock(self):
+        """ Should hold a lock that excludes other open files. """
+        instance = self.test_instance
+        instance.acquire()
+        fd = os.open(self.test_pidfile_path, os.O_RDONLY)
+        self.addCleanup(os.close, fd)
+        self.assertRaises(
+                BlockingIOError,
+                fcntl.flock, fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self.assertTrue(instance.i_am_locking())
+        self.assertTrue(instance.is_locked())
+
+    def test_acquire_ignores_stale_pidfile(self):
+        """ Should acquire the lock despite a PID file left behind. """
+        instance = self.test_instance
+        with open(self.test_pidfile_path, 'w') as test_pidfile:
+            test_pidfile.write("1357924680\n")
+        instance.acquire(timeout=0)
+        self.assertEqual(
+                daemon.pidfile.format_pidfile_content(os.getpid()),
+                self.read_pidfile())
+
+    def test_acquire_sets_pidfile_permissions(self):
+        """ Should create the PID file with the expected permissions. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(os, "umask", return_value=0):
+            instance.acquire()
+        self.assertEqual(
+                0o644, os.stat(self.test_pidfile_path).st_mode & 0o777)
+
+    def test_acquire_raises_already_locked_if_no_wait(self):
+        """ Should raise AlreadyLocked if locked and timeout is zero. """
+        instance = self.test_instance
+        self.hold_lock()
+        self.assertRaises(
+                lockfile.AlreadyLocked,
+                instance.acquire, timeout=0)
+        self.assertFalse(instance.i_am_locking())
+
+    def test_acquire_raises_lock_timeout_if_timeout_expires(self):
+        """ Should raise LockTimeout if locked until the timeout. """
+        instance = self.test_instance
+        self.hold_lock()
+        self.assertRaises(
+                lockfile.LockTimeout,
+                instance.acquire, timeout=0.05)
+        self.assertFalse(instance.i_am_locking())
+
+    def test_acquire_raises_lock_failed_if_cannot_open(self):
+        """ Should raise LockFailed if the PID file cannot be opened. """
+        instance = daemon.pidfile.FlockPIDLockFile(
+                os.path.join(self.test_directory, "bogus", "lorem.pid"))
+        exc = self.assertRaises(lockfile.LockFailed, instance.acquire)
+        self.assertIsInstance(exc.__cause__, FileNotFoundError)
+
+    def test_acquire_waits_for_release(self):
+        """ Should acquire the lock when the holder releases it. """
+        instance = self.test_instance
+        holder_fd = self.hold_lock()
+        timer = threading.Timer(
+                0.05, fcntl.flock, [holder_fd, fcntl.LOCK_UN])
+        timer.start()
+        self.addCleanup(timer.join)
+        instance.acquire(timeout=10)
+        self.assertTrue(instance.i_am_locking())
+
+    def test_acquire_locks_replacement_pidfile(self):
+        """ Should lock the new PID file, if the holder removes it. """
+        instance = self.test_instance
+        holder_fd = self.hold_lock()
+
+        def release_holder():
+            os.remove(self.test_pidfile_path)
+            fcntl.flock(holder_fd, fcntl.LOCK_UN)
+
+        timer = threading.Timer(0.05, release_holder)
+        timer.start()
+        self.addCleanup(timer.join)
+        instance.acquire(timeout=10)
+        self.assertTrue(daemon.pidfile.is_same_file(
+                instance.fileno(), self.test_pidfile_path))
+
+    def test_acquire_again_in_child_writes_child_pid(self):
+        """ Should keep the lock, writing the PID, in a forked child. """
+        instance = self.test_instance
+        instance.acquire()
+        test_fd = instance.fileno()
+        test_pid = self.getUniqueInteger()
+        with unittest.mock.patch.object(
+                os, "getpid", return_value=test_pid):
+            self.assertFalse(instance.i_am_locking())
+            instance.acquire()
+            self.assertTrue(instance.i_am_locking())
+        self.assertEqual(test_fd, instance.fileno())
+        self.assertEqual(
+                daemon.pidfile.format_pidfile_content(test_pid),
+                self.read_pidfile())
+
+    def test_fileno_raises_value_error_if_not_locked(self):
+        """ Should raise ValueError from `fileno` if not locked. """
+        instance = self.test_instance
+        self.assertRaises(ValueError, instance.fileno)
+
+    def test_release_removes_pidfile_and_releases_lock(self):
+        """ Should remove the PID file, and release the lock. """
+        instance = self.test_instance
+        instance.acquire()
+        test_fd = instance.fileno()
+        instance.release()
+        self.assertFalse(os.path.exists(self.test_pidfile_path))
+        self.assertRaises(OSError, os.fstat, test_fd)
+        self.assertFalse(instance.i_am_locking())
+        self.assertFalse(instance.is_locked())
+
+    def test_release_raises_not_locked_if_not_locked(self):
+        """ Should raise NotLocked if no process holds the lock. """
+        instance = self.test_instance
+        self.assertRaises(lockfile.NotLocked, instance.release)
+
+    def test_release_raises_not_my_lock_if_locked_elsewhere(self):
+        """ Should raise NotMyLock if another holder has the lock. """
+        instance = self.test_instance
+        self.hold_lock()
+        self.assertRaises(lockfile.NotMyLock, instance.release)
+        self.assertTrue(os.path.exists(self.test_pidfile_path))
+
+    def test_context_manager_acquires_and_releases(self):
+        """ Should acquire on entering the context, release on exit. """
+        instance = self.test_instance
+        with instance as context:
+            self.assertIs(instance, context)
+            self.assertTrue(instance.i_am_locking())
+        self.assertFalse(instance.i_am_locking())
+        self.assertFalse(os.path.exists(self.test_pidfile_path))
+
+    def test_is_locked_false_if_no_pidfile(self):
+        """ Should not be locked if the PID file does not exist. """
+        instance = self.test_instance
+        self.assertFalse(instance.is_locked())
+
+    def test_is_stale_if_pidfile_not_locked(self):
+        """ Should be stale if the PID file exists, but is not locked. """
+        instance = self.test_instance
+        with open(self.test_pidfile_path, 'w') as test_pidfile:
+            test_pidfile.write("{pid}\n".format(pid=os.getpid()))
+        self.assertTrue(instance.is_stale())
+
+    def test_is_not_stale_if_pidfile_locked(self):
+        """ Should not be stale if the PID file is locked. """
+        instance = self.test_instance
+        self.hold_lock()
+        self.assertFalse(instance.is_stale())
+
+    def test_is_not_stale_if_no_pidfile(self):
+        """ Should not be stale if there is no PID file. """
+        instance = self.test_instance
+        self.assertFalse(instance.is_stale())
+
+    def test_break_lock_removes_stale_pidfile(self):
+        """ Should remove a PID file that no process holds. """
+        instance = self.test_instance
+        with open(self.test_pidfile_path, 'w') as test_pidfile:
+            test_pidfile.write("1357\n")
+        instance.break_lock()
+        self.assertFalse(os.path.exists(self.test_pidfile_path))
+
+    def test_break_lock_leaves_held_pidfile(self):
+        """ Should leave a PID file that another process holds. """
+        instance = self.test_instance
+        self.hold_lock()
+        instance.break_lock()
+        self.assertTrue(os.path.exists(self.test_pidfile_path))
+
+    def test_break_lock_holds_lock_while_removing(self):
+        """ Should hold the lock while removing the PID file. """
+        instance = self.test_instance
+        with open(self.test_pidfile_path, 'w') as test_pidfile:
+            test_pidfile.write("1357\n")
+        locked_during_remove = []
+        real_remove = os.remove
+
+        def fake_remove(path):
+            locked_during_remove.append(instance.is_locked())
+            real_remove(path)
+
+        with unittest.mock.patch.object(os, "remove", new=fake_remove):
+            instance.break_lock()
+        self.assertEqual([True], locked_during_remove)
+        self.assertFalse(os.path.exists(self.test_pidfile_path))
+
+    def test_break_lock_ignores_missing_pidfile(self):
+        """ Should do nothing if the PID file does not exist. """
+        instance = self.test_instance
+        instance.break_lock()
+        self.assertFalse(os.path.exists(self.test_pidfile_path))
+
+    def test_hand_over_writes_new_pid(self):
+        """ Should write the PID of the new holder, keeping the lock. """
+        instance = self.test_instance
+        instance.acquire()
+        test_fd = instance.fileno()
+        instance.hand_over(2468)
+        self.assertEqual(
+                daemon.pidfile.format_pidfile_content(2468),
+                self.read_pidfile())
+        self.assertFalse(instance.i_am_locking())
+        self.assertEqual(test_fd, instance.fileno())
+
+    def test_hand_over_raises_not_my_lock_if_not_locking(self):
+        """ Should raise NotMyLock if this process does not hold the lock. """
+        instance = self.test_instance
+        self.assertRaises(
+                lockfile.NotMyLock,
+                instance.hand_over, 2468)
+
+    def test_adopt_holds_lock_on_file_descriptor(self):
+        """ Should hold the lock on the file descriptor handed over. """
+        instance = self.test_instance
+        test_fd = os.open(self.test_pidfile_path, os.O_RDWR | os.O_CREAT)
+        fcntl.flock(test_fd, fcntl.LOCK_EX)
+        instance.adopt(test_fd)
+        self.assertTrue(instance.i_am_locking())
+        self.assertEqual(test_fd, instance.fileno())
+
+    def test_adopt_raises_value_error_if_no_file_descriptor(self):
+        """ Should raise ValueError if no file descriptor is handed over. """
+        instance = self.test_instance
+        self.assertRaises(ValueError, instance.adopt, None)
+        self.assertFalse(instance.i_am_locking())
+
+    def test_has_default_lease_interval(self):
+        """ Should not refresh a lease by default. """
+        instance = self.test_instance
+        self.assertIs(instance.lease_interval, None)
+
+    def test_acquire_starts_lease_on_file_descriptor(self):
+        """ Should refresh the lease through the open PID file. """
+        instance = self.test_instance
+        instance.lease_interval = 60
+        instance.acquire()
+        self.assertTrue(instance._lease.is_running)
+        self.assertEqual(instance.fileno(), instance._lease.target)
+
+    def test_acquire_again_restarts_lease_if_not_running(self):
+        """ Should restart the lease, as in a child after ‘fork(2)’. """
+        instance = self.test_instance
+        instance.lease_interval = 60
+        instance.acquire()
+        instance._lease.stop()
+        instance.acquire()
+        self.assertTrue(instance._lease.is_running)
+
+    def test_release_stops_lease(self):
+        """ Should stop refreshing the lease on release. """
+        instance = self.test_instance
+        instance.lease_interval = 60
+        instance.acquire()
+        test_lease = instance._lease
+        instance.release()
+        self.assertFalse(test_lease.is_running)
+        self.assertIs(instance._lease, None)
+
+    def test_hand_over_stops_lease(self):
+        """ Should stop refreshing the lease when handing over. """
+        instance = self.test_instance
+        instance.lease_interval = 60
+        instance.acquire()
+        test_lease = instance._lease
+        instance.hand_over(2468)
+        self.assertFalse(test_lease.is_running)
+        self.assertIs(instance._lease, None)
+
+    def test_adopt_starts_lease(self):
+        """ Should start refreshing the lease when adopting the lock. """
+        instance = self.test_instance
+        instance.lease_interval = 60
+        test_fd = os.open(self.test_pidfile_path, os.O_RDWR | os.O_CREAT)
+        fcntl.flock(test_fd, fcntl.LOCK_EX)
+        instance.adopt(test_fd)
+        self.assertTrue(instance._lease.is_running)
+        self.assertEqual(test_fd, instance._lease.target)
+
+
+def setup_lease_fixtures(testcase):
+    """ Set up a PID file, with an old modification time, for lease tests.
+
+        :param testcase: A `TestCase` instance to decorate.
+        :return: ``None``.
+        """
+    temp_directory = tempfile.TemporaryDirectory()
+    testcase.addCleanup(temp_directory.cleanup)
+    testcase.test_pidfile_path = os.path.join(
+            temp_directory.name, "lorem.pid")
+    with open(testcase.test_pidfile_path, 'w') as test_pidfile:
+        test_pidfile.write("1357\n")
+    testcase.test_old_time = time.time() - 1000
+    os.utime(
+            testcase.test_pidfile_path,
+            (testcase.test_old_time, testcase.test_old_time))
+
+
+class LeaseHeartbeat_BaseTestCase(scaffold.TestCase):
+    """ Base class for `LeaseHeartbeat` test case classes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_lease_fixtures(self)
+
+        self.test_interval = 10.0
+        self.test_instance = daemon.pidfile.LeaseHeartbeat(
+                self.test_pidfile_path, self.test_interval)
+        self.addCleanup(self.test_instance.stop)
+
+
+class LeaseHeartbeat_TestCase(LeaseHeartbeat_BaseTestCase):
+    """ Test cases for `LeaseHeartbeat` class. """
+
+    def test_has_specified_target(self):
+        """ Should have specified `target` value. """
+        self.assertEqual(self.test_pidfile_path, self.test_instance.target)
+
+    def test_has_specified_interval(self):
+        """ Should have specified `interval` value. """
+        self.assertEqual(self.test_interval, self.test_instance.interval)
+
+    def test_not_running_initially(self):
+        """ Should not be running initially. """
+        self.assertFalse(self.test_instance.is_running)
+
+
+class LeaseHeartbeat_refresh_TestCase(LeaseHeartbeat_BaseTestCase):
+    """ Test cases for `LeaseHeartbeat.refresh` method. """
+
+    def test_sets_modification_time_of_path(self):
+        """ Should set the modification time of the PID file to now. """
+        result = self.test_instance.refresh()
+        self.assertIs(result, True)
+        self.assertLess(
+                daemon.pidfile.get_lease_age(self.test_pidfile_path), 10)
+
+    def test_sets_modification_time_of_file_descriptor(self):
+        """ Should set the modification time through a file descriptor. """
+        test_fd = os.open(self.test_pidfile_path, os.O_RDONLY)
+        self.addCleanup(os.close, test_fd)
+        self.test_instance.target = test_fd
+        result = self.test_instance.refresh()
+        self.assertIs(result, True)
+        self.assertLess(
+                daemon.pidfile.get_lease_age(self.test_pidfile_path), 10)
+
+    def test_ignores_error_if_no_pidfile(self):
+        """ Should ignore an error, if the PID file does not exist. """
+        os.remove(self.test_pidfile_path)
+        result = self.test_instance.refresh()
+        self.assertIs(result, False)
+
+
+class LeaseHeartbeat_run_TestCase(LeaseHeartbeat_BaseTestCase):
+    """ Test cases for `LeaseHeartbeat._run` method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.mock_stop_event = unittest.mock.MagicMock(
+                spec=threading.Event)
+        self.test_instance._stop_event = self.mock_stop_event
+
+        func_patcher_refresh = unittest.mock.patch.object(
+                self.test_instance, "refresh")
+        self.mock_func_refresh = func_patcher_refresh.start()
+        self.addCleanup(func_patcher_refresh.stop)
+
+    def run_with_clock(self, clock_values, wait_results):
+        """ Run the lease with fake clock values and wait results. """
+        self.mock_stop_event.wait.side_effect = wait_results
+        with unittest.mock.patch.object(
+                time, "monotonic", side_effect=clock_values):
+            self.test_instance._run()
+
+    def test_refreshes_until_stopped(self):
+        """ Should refresh, then wait, until the stop event is set. """
+        self.run_with_clock(
+                clock_values=[100.0, 100.0, 110.0, 120.0],
+                wait_results=[False, False, True])
+        self.assertEqual(3, self.mock_func_refresh.call_count)
+
+    def test_keeps_schedule_if_refresh_late(self):
+        """ Should wait only until the next scheduled refresh time. """
+        self.run_with_clock(
+                clock_values=[100.0, 101.5, 110.25],
+                wait_results=[False, True])
+        self.assertEqual(
+                [unittest.mock.call(8.5), unittest.mock.call(9.75)],
+                self.mock_stop_event.wait.mock_calls)
+
+    def test_refreshes_immediately_if_behind_schedule(self):
+        """ Should refresh without waiting if behind schedule. """
+        self.run_with_clock(
+                clock_values=[100.0, 122.0, 123.0],
+                wait_results=[False, True])
+        self.assertEqual(
+                [unittest.mock.call(0), unittest.mock.call(9.0)],
+                self.mock_stop_event.wait.mock_calls)
+
+
+class LeaseHeartbeat_thread_TestCase(LeaseHeartbeat_BaseTestCase):
+    """ Test cases for `LeaseHeartbeat` thread. """
+
+    def test_refreshes_lease_when_started(self):
+        """ Should refresh the lease from the thread, once started. """
+        self.test_instance.start()
+        self.assertTrue(self.test_instance.is_running)
+        deadline = time.monotonic() + 5
+        while daemon.pidfile.is_lease_expired(self.test_pidfile_path, 10):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+
+    def test_stop_ends_thread(self):
+        """ Should end the thread on `stop`. """
+        self.test_instance.start()
+        self.test_instance.stop(timeout=5)
+        self.assertFalse(self.test_instance.is_running)
+
+
+class start_lease_TestCase(LeaseHeartbeat_BaseTestCase):
+    """ Test cases for `start_lease` function. """
+
+    def test_returns_none_if_no_interval(self):
+        """ Should return ``None`` if there is no lease interval. """
+        result = daemon.pidfile.start_lease(
+                None, self.test_pidfile_path, None)
+        self.assertIs(result, None)
+
+    def test_starts_new_lease(self):
+        """ Should start a new lease, if there is none. """
+        result = daemon.pidfile.start_lease(
+                None, self.test_pidfile_path, 60)
+        self.addCleanup(result.stop)
+        self.assertTrue(result.is_running)
+        self.assertEqual(60, result.interval)
+
+    def test_keeps_running_lease(self):
+        """ Should keep a lease already running on the same target. """
+        self.test_instance.start()
+        result = daemon.pidfile.start_lease(
+                self.test_instance, self.test_pidfile_path,
+                self.test_interval)
+        self.assertIs(self.test_instance, result)
+
+    def test_replaces_lease_not_running(self):
+        """ Should replace a lease that is not running. """
+        result = daemon.pidfile.start_lease(
+                self.test_instance, self.test_pidfile_path,
+                self.test_interval)
+        self.addCleanup(result.stop)
+        self.assertIsNot(self.test_instance, result)
+        self.assertTrue(result.is_running)
+
+
+class get_lease_age_TestCase(scaffold.TestCase):
+    """ Test cases for `get_lease_age` function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_lease_fixtures(self)
+
+    def test_returns_time_since_modified(self):
+        """ Should return the time since the PID file was modified. """
+        result = daemon.pidfile.get_lease_age(self.test_pidfile_path)
+        self.assertGreaterEqual(result, 1000)
+        self.assertLess(result, 1010)
+
+    def test_returns_none_if_no_pidfile(self):
+        """ Should return ``None`` if the PID file does not exist. """
+        os.remove(self.test_pidfile_path)
+        result = daemon.pidfile.get_lease_age(self.test_pidfile_path)
+        self.assertIs(result, None)
+
+
+class is_lease_expired_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for `is_lease_expired` function. """
+
+    scenarios = [
+            ('refreshed', {
+                'refresh': True,
+                'remove': False,
+                'expected_result': False,
+                }),
+            ('not-refreshed', {
+                'refresh': False,
+                'remove': False,
+                'expected_result': True,
+                }),
+            ('no-pidfile', {
+                'refresh': False,
+                'remove': True,
+                'expected_result': True,
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_lease_fixtures(self)
+        if self.refresh:
+            os.utime(self.test_pidfile_path)
+        if self.remove:
+            os.remove(self.test_pidfile_path)
+
+    def test_returns_expected_result(self):
+        """ Should return expected result for the scenario. """
+        result = daemon.pidfile.is_lease_expired(self.test_pidfile_path, 60)
+        self.assertIs(self.expected_result, result)
+
+
+class lock_file_descriptor_TestCase(scaffold.TestCase):
+    """ Test cases for ‘lock_file_descriptor’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_flock_pidfile_fixtures(self)
+
+        self.test_fd = os.open(
+                self.test_pidfile_path, os.O_RDWR | os.O_CREAT)
+        self.addCleanup(os.close, self.test_fd)
+
+    def test_returns_true_if_unlocked(self):
+        """ Should lock, and return True, if no other holder. """
+        for timeout in [None, 0, 1]:
+            result = daemon.pidfile.lock_file_descriptor(
+                    self.test_fd, timeout)
+            self.assertTrue(result)
+
+    def test_returns_false_if_locked_and_no_wait(self):
+        """ Should return False if locked, with timeout zero. """
+        self.hold_lock()
+        result = daemon.pidfile.lock_file_descriptor(self.test_fd, 0)
+        self.assertFalse(result)
+
+    def test_returns_false_if_timeout_expires(self):
+        """ Should return False if locked until the timeout expires. """
+        self.hold_lock()
+        result = daemon.pidfile.lock_file_descriptor(self.test_fd, 0.05)
+        self.assertFalse(result)
+
+    def test_restores_alarm_signal_handler(self):
+        """ Should restore the previous ‘SIGALRM’ handler and timer. """
+        handled_signals = []
+
+        def test_handler(signal_number, stack_frame):
+            handled_signals.append(signal_number)
+
+        previous_handler = signal.signal(signal.SIGALRM, test_handler)
+        self.addCleanup(signal.signal, signal.SIGALRM, previous_handler)
+        self.hold_lock()
+        daemon.pidfile.lock_file_descriptor(self.test_fd, 0.05)
+        self.assertIs(test_handler, signal.getsignal(signal.SIGALRM))
+        self.assertEqual(
+                (0.0, 0.0), signal.getitimer(signal.ITIMER_REAL))
+        self.assertEqual([], handled_signals)
+
+    def test_waits_in_other_thread(self):
+        """ Should wait for the lock, and time out, in another thread. """
+        self.hold_lock()
+        results = []
+        thread = threading.Thread(
+                target=lambda: results.append(
+                    daemon.pidfile.lock_file_descriptor(self.test_fd, 0.05)))
+        thread.start()
+        thread.join()
+        self.assertEqual([False], results)
+
+
+class wait_for_pidfile_release_TestCase(scaffold.TestCase):
+    """ Test cases for ‘wait_for_pidfile_release’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_flock_pidfile_fixtures(self)
+
+    def write_pidfile(self, pid):
+        """ Write `pid` to the test PID file. """
+        with open(self.test_pidfile_path, 'w') as test_pidfile:
+            test_pidfile.write("{pid}\n".format(pid=pid))
+
+    def test_returns_true_if_no_pidfile(self):
+        """ Should return True at once, if there is no PID file. """
+        result = daemon.pidfile.wait_for_pidfile_release(
+                self.test_pidfile_path, 10)
+        self.assertTrue(result)
+
+    def test_returns_false_if_timeout_expires(self):
+        """ Should return False if the PID file is held until timeout. """
+        self.write_pidfile(os.getpid())
+        result = daemon.pidfile.wait_for_pidfile_release(
+                self.test_pidfile_path, 0.05)
+        self.assertFalse(result)
+
+    def test_returns_true_when_pidfile_removed(self):
+        """ Should return True when the PID file is removed. """
+        self.write_pidfile(os.getpid())
+        timer = threading.Timer(0.05, os.remove, [self.test_pidfile_path])
+        timer.start()
+        self.addCleanup(timer.join)
+        result = daemon.pidfile.wait_for_pidfile_release(
+                self.test_pidfile_path, 10)
+        self.assertTrue(result)
+
+    def test_returns_true_when_pidfile_replaced(self):
+        """ Should return True when the PID file is replaced. """
+        self.write_pidfile(os.getpid())
+        timer = threading.Timer(
+                0.05, daemon.pidfile.replace_pidfile,
+                [self.test_pidfile_path, 1])
+        timer.start()
+        self.addCleanup(timer.join)
+        result = daemon.pidfile.wait_for_pidfile_release(
+                self.test_pidfile_path, 10)
+        self.assertTrue(result)
+
+    @unittest.skipUnless(
+            hasattr(os, 'pidfd_open'), "process file descriptors required")
+    @unittest.mock.patch.object(
+            daemon.pidfile, "_get_inotify_functions", return_value=None)
+    def test_returns_true_when_holder_ends(
+            self, mock_func_get_inotify_functions):
+        """ Should return True when the process in the PID file ends. """
+        holder_pid = os.fork()
+        if holder_pid == 0:
+            time.sleep(0.05)
+            os._exit(0)
+        self.addCleanup(os.waitpid, holder_pid, 0)
+        self.write_pidfile(holder_pid)
+        result = daemon.pidfile.wait_for_pidfile_release(
+                self.test_pidfile_path, 10)
+        self.assertTrue(result)
+
+    @unittest.mock.patch.object(time, "sleep")
+    @unittest.mock.patch.object(
+            daemon.pidfile, "_open_holder_pidfd", return_value=None)
+    @unittest.mock.patch.object(
+            daemon.pidfile, "_get_inotify_functions", return_value=None)
+    def test_sleeps_if_no_events_available(
+            self, mock_func_get_inotify_functions,
+            mock_func_open_holder_pidfd, mock_func_sleep):
+        """ Should sleep for the poll interval, if events not available. """
+        self.write_pidfile(os.getpid())
+        result = daemon.pidfile.wait_for_pidfile_release(
+                self.test_pidfile_path, 10)
+        self.assertTrue(result)
+        mock_func_sleep.assert_called_once_with(
+                daemon.pidfile.lock_poll_interval)
+
+
+class get_process_start_time_TestCase(scaffold.TestCase):
+    """ Test cases for ‘get_process_start_time’ function. """
+
+    def test_returns_start_time_of_current_process(self):
+        """ Should return the start time of the current process. """
+        if not os.path.exists("/proc/self/stat"):
+            self.skipTest("‘/proc/PID/stat’ not available")
+        result = daemon.pidfile.get_process_start_time(os.getpid())
+        self.assertIsInstance(result, int)
+        self.assertEqual(
+                result, daemon.pidfile.get_process_start_time(os.getpid()))
+
+    def test_returns_field_22_after_command_name(self):
+        """ Should return field 22, despite ‘)’ in the command name. """
+        fields_after_name = " ".join(str(n) for n in range(3, 30))
+        test_content = "123 (lorem) (ipsum) {fields}\n".format(
+                fields=fields_after_name).encode('ascii')
+        with unittest.mock.patch.object(
+                builtins, "open",
+                new=unittest.mock.mock_open(read_data=test_content)):
+            result = daemon.pidfile.get_process_start_time(123)
+        self.assertEqual(22, result)
+
+    def test_returns_none_if_no_such_process(self):
+        """ Should return None if there is no such process. """
+        with unittest.mock.patch.object(
+                builtins, "open", side_effect=FileNotFoundError):
+            result = daemon.pidfile.get_process_start_time(123)
+        self.assertIs(result, None)
+
+
+class format_pidfile_content_TestCase(scaffold.TestCase):
+    """ Test cases for ‘format_pidfile_content’ function. """
+
+    @unittest.mock.patch.object(
+            daemon.pidfile, "get_boot_id", return_value="lorem-ipsum")
+    @unittest.mock.patch.object(
+            daemon.pidfile, "get_process_start_time", return_value=4567)
+    def test_includes_process_identity(
+            self, mock_func_get_process_start_time, mock_func_get_boot_id):
+        """ Should include the start time and boot ID of the process. """
+        result = daemon.pidfile.format_pidfile_content(123)
+        self.assertEqual("123\n4567 lorem-ipsum\n", result)
+        mock_func_get_process_start_time.assert_called_with(123)
+
+    @unittest.mock.patch.object(
+            daemon.pidfile, "get_boot_id", return_value="lorem-ipsum")
+    @unittest.mock.patch.object(
+            daemon.pidfile, "get_process_start_time", return_value=None)
+    def test_omits_unavailable_identity(
+            self, mock_func_get_process_start_time, mock_func_get_boot_id):
+        """ Should contain only the process ID, if no identity. """
+        result = daemon.pidfile.format_pidfile_content(123)
+        self.assertEqual("123\n", result)
+
+
+class read_pidfile_record_TestCase(
+        scaffold.TestCaseWithScenarios):
+    """ Test cases for ‘read_pidfile_record’ function. """
+
+    scenarios = [
+            ('not-exist', {
+                'content': None,
+                'expected_result': None,
+                }),
+            ('pid-only', {
+                'content': b"123\n",
+                'expected_result': (123, None, None),
+                }),
+            ('pid-and-identity', {
+                'content': b"123\n4567 lorem-ipsum\n",
+                'expected_result': (123, 4567, "lorem-ipsum"),
+                }),
+            ('invalid-pid', {
+                'content': b"b0gUs\n4567 lorem-ipsum\n",
+                'expected_result': None,
+                }),
+            ('invalid-identity', {
+                'content': b"123\nb0gUs\n",
+                'expected_result': (123, None, None),
+                }),
+            ('invalid-start-time', {
+                'content': b"123\nb0gUs lorem-ipsum\n",
+                'expected_result': (123, None, None),
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_flock_pidfile_fixtures(self)
+        if self.content is not None:
+            with open(self.test_pidfile_path, 'wb') as test_pidfile:
+                test_pidfile.write(self.content)
+
+    def test_returns_expected_result(self):
+        """ Should return the expected result. """
+        result = daemon.pidfile.read_pidfile_record(self.test_pidfile_path)
+        self.assertEqual(self.expected_result, result)
+
+
+class is_pidfile_stale_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for ‘is_pidfile_stale’ function. """
+
+    scenarios = [
+            ('no-record', {
+                'record': None,
+                'expected_result': False,
+                }),
+            ('same-process', {
+                'record': (123, 4567, "lorem"),
+                'start_time': 4567,
+                'expected_result': False,
+                }),
+            ('reused-pid', {
+                'record': (123, 4567, "lorem"),
+                'start_time': 8910,
+                'expected_result': True,
+                }),
+            ('no-process', {
+                'record': (123, 4567, "lorem"),
+                'start_time': None,
+                'expected_result': True,
+                }),
+            ('previous-boot', {
+                'record': (123, 4567, "ipsum"),
+                'start_time': 4567,
+                'expected_result': True,
+                }),
+            ('no-identity-process-exists', {
+                'record': (123, None, None),
+                'expected_result': False,
+                }),
+            ('no-identity-no-process', {
+                'record': (123, None, None),
+                'kill_error': ProcessLookupError(),
+                'expected_result': True,
+                }),
+            ('no-identity-other-user-process', {
+                'record': (123, None, None),
+                'kill_error': PermissionError(),
+                'expected_result': False,
+                }),
+            ('no-boot-id', {
+                'record': (123, 4567, "lorem"),
+                'boot_id': None,
+                'kill_error': ProcessLookupError(),
+                'expected_result': True,
+                }),
+            ]
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_pidfile_path = tempfile.mktemp()
+        self.mock_module_os = unittest.mock.MagicMock()
+        for (target, name, kwargs) in [
+                (daemon.pidfile, "read_pidfile_record", {
+                    'return_value': self.record}),
+                (daemon.pidfile, "get_boot_id", {
+                    'return_value': getattr(self, 'boot_id', "lorem")}),
+                (daemon.pidfile, "get_process_start_time", {
+                    'return_value': getattr(self, 'start_time', None)}),
+                (os, "kill", {
+                    'side_effect': getattr(self, 'kill_error', None)}),
+                ]:
+            func_patcher = unittest.mock.patch.object(target, name, **kwargs)
+            mock_func = func_patcher.start()
+            self.addCleanup(func_patcher.stop)
+            self.mock_module_os.attach_mock(mock_func, name)
+
+    def test_returns_expected_result(self):
+        """ Should return the expected result. """
+        result = daemon.pidfile.is_pidfile_stale(self.test_pidfile_path)
+        self.assertEqual(self.expected_result, result)
+
+    def test_sends_no_signal_if_identity_recorded(self):
+        """ Should not signal the process, if its identity is recorded. """
+        daemon.pidfile.is_pidfile_stale(self.test_pidfile_path)
+        if (
+                self.record is not None and self.record[1] is not None
+                and getattr(self, 'boot_id', "lorem") is not None):
+            self.assertFalse(self.mock_module_os.kill.called)
+
+
+class replace_pidfile_TestCase(scaffold.TestCase):
+    """ Test cases for ‘replace_pidfile’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_directory.cleanup)
+        self.test_directory = temp_directory.name
+        self.test_pidfile_path = os.path.join(
+                self.test_directory, "lorem.pid")
+        with open(self.test_pidfile_path, 'w') as test_pidfile:
+            test_pidfile.write("1357\n")
+        self.test_pid = 2468
+
+    def test_writes_new_pid(self):
+        """ Should write the new PID to the PID file. """
+        daemon.pidfile.replace_pidfile(self.test_pidfile_path, self.test_pid)
+        with open(self.test_pidfile_path) as test_pidfile:
+            self.assertEqual(
+                    daemon.pidfile.format_pidfile_content(self.test_pid),
+                    test_pidfile.read())
+
+    def test_sets_pidfile_permissions(self):
+        """ Should set the permissions of the PID file. """
+        daemon.pidfile.replace_pidfile(self.test_pidfile_path, self.test_pid)
+        self.assertEqual(
+                0o644, os.stat(self.test_pidfile_path).st_mode & 0o777)
+
+    def test_leaves_no_temporary_file(self):
+        """ Should leave no temporary file in the directory. """
+        daemon.pidfile.replace_pidfile(self.test_pidfile_path, self.test_pid)
+        self.assertEqual(["lorem.pid"], os.listdir(self.test_directory))
+
+    @unittest.mock.patch.object(os, "replace")
+    def test_removes_temporary_file_on_error(self, mock_func_os_replace):
+        """ Should remove the temporary file if replacing fails. """
+        test_error = OSError(errno.EACCES, "Permission denied")
+        mock_func_os_replace.side_effect = test_error
+        exc = self.assertRaises(
+                OSError,
+                daemon.pidfile.replace_pidfile,
+                self.test_pidfile_path, self.test_pid)
+        self.assertIs(test_error, exc)
+        self.assertEqual(["lorem.pid"], os.listdir(self.test_directory))
+        with open(self.test_pidfile_path) as test_pidfile:
+            self.assertEqual("1357\n", test_pidfile.read())
+
+
+class get_file_lock_holders_TestCase(scaffold.TestCase):
+    """ Test cases for ‘get_file_lock_holders’ function. """
+
+    def test_returns_holders_by_file(self):
+        """ Should return the holder of each lock, by device and inode. """
+        test_content = (
+                b"1: FLOCK  ADVISORY  WRITE 1357 08:01:2468 0 EOF\n"
+                b"1: -> FLOCK  ADVISORY  WRITE 9753 08:01:2468 0 EOF\n"
+                b"2: POSIX  ADVISORY  WRITE 8642 00:2f:13579 0 EOF\n"
+                b"3: OFDLCK ADVISORY  READ  -1 fd:02:1122 0 EOF\n"
+                b"4: lorem ipsum\n")
+        with unittest.mock.patch.object(
+                builtins, "open",
+                new=unittest.mock.mock_open(read_data=test_content)):
+            result = daemon.pidfile.get_file_lock_holders()
+        expected_result = {
+                (os.makedev(0x08, 0x01), 2468): 1357,
+                (os.makedev(0x00, 0x2f), 13579): 8642,
+                (os.makedev(0xfd, 0x02), 1122): None,
+                }
+        self.assertEqual(expected_result, result)
+
+    def test_returns_none_if_not_reported(self):
+        """ Should return ``None`` if the system does not report locks. """
+        with unittest.mock.patch.object(
+                builtins, "open", side_effect=FileNotFoundError):
+            result = daemon.pidfile.get_file_lock_holders()
+        self.assertIs(result, None)
+
+    def test_reports_lock_held_by_this_process(self):
+        """ Should report a lock held by this process. """
+        if not os.path.exists(daemon.pidfile.proc_locks_path):
+            self.skipTest("‘/proc/locks’ not available")
+        temp_file = tempfile.TemporaryFile()
+        self.addCleanup(temp_file.close)
+        fcntl.flock(temp_file.fileno(), fcntl.LOCK_EX)
+        temp_file_stat = os.fstat(temp_file.fileno())
+        result = daemon.pidfile.get_file_lock_holders()
+        self.assertEqual(
+                os.getpid(),
+                result[(temp_file_stat.st_dev, temp_file_stat.st_ino)])
+
+
+class scan_pidfiles_TestCase(scaffold.TestCase):
+    """ Test cases for ‘scan_pidfiles’ function. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        if not os.path.exists("/proc/self/stat"):
+            self.skipTest("‘/proc/PID/stat’ not available")
+
+        temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_directory.cleanup)
+        self.test_directory = temp_directory.name
+
+    def make_pidfile(self, name, content):
+        """ Make a PID file in the test directory. """
+        path = os.path.join(self.test_directory, name)
+        with open(path, 'w') as test_pidfile:
+            test_pidfile.write(content)
+        return path
+
+    def scan_one(self, content):
+        """ Scan one PID file with `content`, and get its status. """
+        path = self.make_pidfile("lorem.pid", content)
+        (result,) = daemon.pidfile.scan_pidfiles(self.test_directory)
+        self.assertEqual(path, result['path'])
+        return result
+
+    def test_reports_running_process(self):
+        """ Should report the process named in the PID file as running. """
+        result = self.scan_one(
+                daemon.pidfile.format_pidfile_content(os.getpid()))
+        self.assertEqual(os.getpid(), result['pid'])
+        self.assertIs(result['alive'], True)
+        self.assertGreaterEqual(result['uptime'], 0)
+        self.assertLess(result['lease_age'], 60)
+
+    def test_reports_running_process_without_identity(self):
+        """ Should report as running a process, by ID only. """
+        result = self.scan_one("{pid}\n".format(pid=os.getpid()))
+        self.assertIs(result['alive'], True)
+
+    def test_reports_no_such_process(self):
+        """ Should report a process that does not exist as not running. """
+        result = self.scan_one("99999999\n")
+        self.assertEqual(99999999, result['pid'])
+        self.assertIs(result['alive'], False)
+        self.assertIs(result['uptime'], None)
+
+    def test_reports_reused_process_id(self):
+        """ Should report as not running, if the process ID is reused. """
+        start_time = daemon.pidfile.get_process_start_time(os.getpid())
+        result = self.scan_one("{pid}\n{start_time} {boot_id}\n".format(
+                pid=os.getpid(), start_time=(start_time - 1),
+                boot_id=daemon.pidfile.get_boot_id()))
+        self.assertIs(result['alive'], False)
+
+    def test_reports_previous_boot(self):
+        """ Should report as not running, if written in a previous boot. """
+        start_time = daemon.pidfile.get_process_start_time(os.getpid())
+        result = self.scan_one("{pid}\n{start_time} {boot_id}\n".format(
+                pid=os.getpid(), start_time=start_time, boot_id="lorem"))
+        self.assertIs(result['alive'], False)
+
+    def test_reports_no_pid_if_not_valid(self):
+        """ Should report no process ID, if the PID file is not valid. """
+        result = self.scan_one("lorem\n")
+        self.assertIs(result['pid'], None)
+        self.assertIs(result['alive'], False)
+
+    def test_reports_lock_holder(self):
+        """ Should report the process holding a lock on the PID file. """
+        if not os.path.exists(daemon.pidfile.proc_locks_path):
+            self.skipTest("‘/proc/locks’ not available")
+        path = self.make_pidfile("lorem.pid", "1357\n")
+        test_fd = os.open(path, os.O_RDONLY)
+        self.addCleanup(os.close, test_fd)
+        fcntl.flock(test_fd, fcntl.LOCK_EX)
+        (result,) = daemon.pidfile.scan_pidfiles(self.test_directory)
+        self.assertEqual(os.getpid(), result['lock_holder'])
+
+    def test_reports_no_lock_holder_if_not_locked(self):
+        """ Should report no lock holder, if the PID file is not locked. """
+        result = self.scan_one("1357\n")
+        self.assertIs(result['lock_holder'], None)
+
+    def test_scans_only_pidfiles_in_directory(self):
+        """ Should scan only the ‘*.pid’ files, in order of path. """
+        for name in ["ipsum.pid", "lorem.pid", "dolor.txt"]:
+            self.make_pidfile(name, "1357\n")
+        result = daemon.pidfile.scan_pidfiles(self.test_directory)
+        self.assertEqual(
+                [
+                    os.path.join(self.test_directory, name)
+                    for name in ["ipsum.pid", "lorem.pid"]],
+                [status['path'] for status in result])
+
+    def test_scans_files_matching_glob_pattern(self):
+        """ Should scan the files matching a glob pattern. """
+        for name in ["ipsum.pid", "lorem.pid", "dolor.lock"]:
+            self.make_pidfile(name, "1357\n")
+        result = daemon.pidfile.scan_pidfiles(
+                os.path.join(self.test_directory, "*.lock"))
+        self.assertEqual(
+                [os.path.join(self.test_directory, "dolor.lock")],
+                [status['path'] for status in result])
+
+    def test_returns_empty_list_if_no_pidfiles(self):
+        """ Should return an empty list, if no PID file matches. """
+        result = daemon.pidfile.scan_pidfiles(
+                os.path.join(self.test_directory, "nonexistent"))
+        self.assertEqual([], result)
+
 
 # Copyright © 2008–2024 Ben Finney <ben+python@benfinney.id.au>
 #
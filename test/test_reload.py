@@ -0,0 +1,174 @@
+# test/test_reload.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘reload’ module. """
+
+import io
+import sys
+import time
+import unittest.mock
+
+import daemon.reload
+
+from . import scaffold
+
+
+class Reloader_BaseTestCase(scaffold.TestCase):
+    """ Base class for Reloader test case classes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_calls = []
+        self.test_instance = daemon.reload.Reloader(
+                begin=(lambda: self.test_calls.append("begin")),
+                end=(lambda duration: self.test_calls.append("end")))
+
+        def make_fake_callback(name):
+            def fake_callback():
+                self.test_calls.append(name)
+            return fake_callback
+
+        self.make_fake_callback = make_fake_callback
+
+
+class Reloader_TestCase(Reloader_BaseTestCase):
+    """ Test cases for Reloader class. """
+
+    def test_is_not_reloading_initially(self):
+        """ Should not be reloading initially. """
+        instance = self.test_instance
+        self.assertFalse(instance.is_reloading)
+
+    def test_has_no_reloads_initially(self):
+        """ Should have no reloads initially. """
+        instance = self.test_instance
+        self.assertEqual(0, instance.count)
+        self.assertIs(instance.last_duration, None)
+
+
+class Reloader_request_TestCase(Reloader_BaseTestCase):
+    """ Test cases for Reloader.request method. """
+
+    def test_calls_reload_callbacks_in_order(self):
+        """ Should call the reload callbacks in order of registration. """
+        instance = self.test_instance
+        for name in ["lorem", "ipsum", "dolor"]:
+            instance.add_reload_callback(self.make_fake_callback(name))
+        result = instance.request()
+        self.assertTrue(result)
+        self.assertEqual(
+                ["begin", "lorem", "ipsum", "dolor", "end"], self.test_calls)
+        self.assertFalse(instance.is_reloading)
+
+    def test_reloads_on_each_separate_request(self):
+        """ Should reload once for each request made between reloads. """
+        instance = self.test_instance
+        instance.add_reload_callback(self.make_fake_callback("lorem"))
+        instance.request()
+        instance.request()
+        self.assertEqual(2, self.test_calls.count("lorem"))
+        self.assertEqual(2, instance.count)
+
+    def test_coalesces_requests_during_reload(self):
+        """ Should reload once more for a burst of requests meanwhile. """
+        instance = self.test_instance
+        nested_results = []
+
+        def fake_reentrant_callback():
+            self.test_calls.append("lorem")
+            if instance.count == 0:
+                for __ in range(5):
+                    nested_results.append(instance.request())
+
+        instance.add_reload_callback(fake_reentrant_callback)
+        instance.request()
+        self.assertEqual([False] * 5, nested_results)
+        self.assertEqual(
+                ["begin", "lorem", "end", "begin", "lorem", "end"],
+                self.test_calls)
+        self.assertEqual(2, instance.count)
+
+    def test_records_duration(self):
+        """ Should record the duration of the reload. """
+        instance = self.test_instance
+        test_durations = []
+        instance.end = test_durations.append
+        with unittest.mock.patch.object(
+                time, "monotonic", side_effect=[1000.0, 1002.5]):
+            instance.request()
+        self.assertEqual(2.5, instance.last_duration)
+        self.assertEqual([2.5], test_durations)
+
+    def test_is_not_reloading_after_callback_error(self):
+        """ Should not be reloading after an error escapes a reload. """
+        instance = self.test_instance
+        test_error = KeyboardInterrupt()
+        instance.begin = unittest.mock.MagicMock(side_effect=test_error)
+        self.assertRaises(KeyboardInterrupt, instance.request)
+        self.assertFalse(instance.is_reloading)
+
+
+class Reloader_reload_TestCase(Reloader_BaseTestCase):
+    """ Test cases for Reloader.reload method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.fake_stderr = io.StringIO()
+        func_patcher_stderr = unittest.mock.patch.object(
+                sys, "stderr", new=self.fake_stderr)
+        func_patcher_stderr.start()
+        self.addCleanup(func_patcher_stderr.stop)
+
+    def test_continues_after_callback_error(self):
+        """ Should call remaining callbacks after a callback error. """
+        instance = self.test_instance
+
+        def fake_failing_callback():
+            raise ValueError("Lorem ipsum")
+
+        instance.add_reload_callback(fake_failing_callback)
+        instance.add_reload_callback(self.make_fake_callback("dolor"))
+        instance.reload()
+        self.assertEqual(["begin", "dolor", "end"], self.test_calls)
+
+    def test_reports_callback_error(self):
+        """ Should report a callback error to `sys.stderr`. """
+        instance = self.test_instance
+
+        def fake_failing_callback():
+            raise ValueError("Lorem ipsum")
+
+        instance.add_reload_callback(fake_failing_callback)
+        instance.reload()
+        self.assertIn("ValueError: Lorem ipsum", self.fake_stderr.getvalue())
+
+    def test_omits_begin_and_end_if_none(self):
+        """ Should reload without `begin` and `end` functions. """
+        instance = daemon.reload.Reloader()
+        instance.add_reload_callback(self.make_fake_callback("lorem"))
+        instance.reload()
+        self.assertEqual(["lorem"], self.test_calls)
+        self.assertEqual(1, instance.count)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,203 @@
+# test/test_shutdown.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘shutdown’ module. """
+
+import io
+import sys
+import threading
+import time
+import unittest.mock
+
+import daemon.shutdown
+
+from . import scaffold
+
+
+class GracefulShutdown_BaseTestCase(scaffold.TestCase):
+    """ Base class for GracefulShutdown test case classes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_instance = daemon.shutdown.GracefulShutdown()
+        self.addCleanup(self.test_instance.cancel)
+
+        self.test_drain_calls = []
+
+        def make_fake_callback(name):
+            def fake_callback():
+                self.test_drain_calls.append(
+                        (name, threading.current_thread().name))
+            return fake_callback
+
+        self.make_fake_callback = make_fake_callback
+
+
+class GracefulShutdown_TestCase(GracefulShutdown_BaseTestCase):
+    """ Test cases for GracefulShutdown class. """
+
+    def test_is_not_requested_initially(self):
+        """ Should not be requested initially. """
+        instance = self.test_instance
+        self.assertFalse(instance.is_requested)
+        self.assertFalse(instance.event.is_set())
+
+    def test_has_no_deadline_initially(self):
+        """ Should have no deadline initially. """
+        instance = self.test_instance
+        self.assertIs(instance.deadline, None)
+
+    def test_wait_drained_false_if_not_begun(self):
+        """ Should report not drained if the shutdown has not begun. """
+        instance = self.test_instance
+        self.assertFalse(instance.wait_drained(timeout=0))
+
+
+class GracefulShutdown_begin_TestCase(GracefulShutdown_BaseTestCase):
+    """ Test cases for GracefulShutdown.begin method. """
+
+    def test_sets_event(self):
+        """ Should set the shutdown event. """
+        instance = self.test_instance
+        instance.begin()
+        self.assertTrue(instance.is_requested)
+        self.assertTrue(instance.event.is_set())
+
+    def test_returns_whether_begun(self):
+        """ Should return ``True`` only for the call that begins. """
+        instance = self.test_instance
+        self.assertTrue(instance.begin())
+        self.assertFalse(instance.begin())
+
+    def test_calls_drain_callbacks_in_order_in_thread(self):
+        """ Should call the drain callbacks in order, in a thread. """
+        instance = self.test_instance
+        for name in ["lorem", "ipsum", "dolor"]:
+            instance.add_drain_callback(self.make_fake_callback(name))
+        instance.begin()
+        self.assertTrue(instance.wait_drained(timeout=5))
+        thread_name = daemon.shutdown.GracefulShutdown.thread_name
+        expected_calls = [
+                ("lorem", thread_name),
+                ("ipsum", thread_name),
+                ("dolor", thread_name),
+                ]
+        self.assertEqual(expected_calls, self.test_drain_calls)
+
+    def test_calls_drain_callbacks_once(self):
+        """ Should call the drain callbacks only once. """
+        instance = self.test_instance
+        instance.add_drain_callback(self.make_fake_callback("lorem"))
+        instance.begin()
+        instance.begin()
+        self.assertTrue(instance.wait_drained(timeout=5))
+        self.assertEqual(1, len(self.test_drain_calls))
+
+    def test_sets_deadline_from_timeout(self):
+        """ Should set the deadline from the `timeout`. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(
+                time, "monotonic", return_value=1000.0):
+            instance.begin(timeout=17)
+        self.assertEqual(1017.0, instance.deadline)
+
+    def test_has_no_deadline_if_no_timeout(self):
+        """ Should have no deadline if no `timeout`. """
+        instance = self.test_instance
+        instance.begin(timeout=None, expire=unittest.mock.MagicMock())
+        self.assertIs(instance.deadline, None)
+        self.assertIs(instance._timer, None)
+
+    def test_calls_expire_after_timeout(self):
+        """ Should call `expire` when the deadline passes. """
+        instance = self.test_instance
+        expired = threading.Event()
+        instance.begin(timeout=0.01, expire=expired.set)
+        self.assertTrue(expired.wait(timeout=5))
+
+
+class GracefulShutdown_drain_TestCase(GracefulShutdown_BaseTestCase):
+    """ Test cases for GracefulShutdown.drain method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.fake_stderr = io.StringIO()
+        func_patcher_stderr = unittest.mock.patch.object(
+                sys, "stderr", new=self.fake_stderr)
+        func_patcher_stderr.start()
+        self.addCleanup(func_patcher_stderr.stop)
+
+    def test_continues_after_callback_error(self):
+        """ Should call remaining callbacks after a callback error. """
+        instance = self.test_instance
+
+        def fake_failing_callback():
+            raise ValueError("Lorem ipsum")
+
+        instance.add_drain_callback(fake_failing_callback)
+        instance.add_drain_callback(self.make_fake_callback("dolor"))
+        instance.drain()
+        self.assertEqual(
+                ["dolor"], [name for (name, __) in self.test_drain_calls])
+
+    def test_reports_callback_error(self):
+        """ Should report a callback error to `sys.stderr`. """
+        instance = self.test_instance
+
+        def fake_failing_callback():
+            raise ValueError("Lorem ipsum")
+
+        instance.add_drain_callback(fake_failing_callback)
+        instance.drain()
+        self.assertIn("ValueError: Lorem ipsum", self.fake_stderr.getvalue())
+
+
+class GracefulShutdown_cancel_TestCase(GracefulShutdown_BaseTestCase):
+    """ Test cases for GracefulShutdown.cancel method. """
+
+    def test_cancels_deadline_timer(self):
+        """ Should cancel the deadline timer. """
+        instance = self.test_instance
+        with unittest.mock.patch.object(
+                threading, "Timer") as mock_class_timer:
+            instance.begin(timeout=17, expire=unittest.mock.MagicMock())
+        mock_timer = mock_class_timer.return_value
+        mock_timer.start.assert_called_once_with()
+        instance.cancel()
+        mock_timer.cancel.assert_called_once_with()
+
+    def test_keeps_event_set(self):
+        """ Should keep the shutdown event set. """
+        instance = self.test_instance
+        instance.begin()
+        instance.cancel()
+        self.assertTrue(instance.event.is_set())
+
+    def test_does_nothing_if_no_deadline(self):
+        """ Should do nothing if there is no deadline. """
+        instance = self.test_instance
+        instance.cancel()
+        self.assertFalse(instance.is_requested)
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
@@ -0,0 +1,429 @@
+# test/test_signals.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘signals’ module. """
+
+import _thread
+import os
+import signal
+import subprocess
+import threading
+import time
+import unittest.mock
+
+import daemon.signals
+
+from . import scaffold
+
+
+def setup_signal_fixtures(testcase):
+    """ Set up common test fixtures for signal handling. """
+    testcase.test_signal_number = signal.SIGUSR1
+    testcase.test_ignored_signal_number = signal.SIGUSR2
+    for signal_number in [
+            testcase.test_signal_number,
+            testcase.test_ignored_signal_number]:
+        testcase.addCleanup(
+                signal.signal, signal_number, signal.getsignal(signal_number))
+    testcase.addCleanup(
+            signal.pthread_sigmask, signal.SIG_SETMASK,
+            signal.pthread_sigmask(signal.SIG_BLOCK, []))
+
+    testcase.test_handler_calls = []
+    testcase.test_handler_called = threading.Event()
+
+    def fake_handler(signal_number, stack_frame):
+        testcase.test_handler_calls.append(
+                (signal_number, stack_frame, threading.current_thread().name))
+        testcase.test_handler_called.set()
+
+    testcase.fake_handler = fake_handler
+    testcase.test_signal_handler_map = {
+            testcase.test_signal_number: testcase.fake_handler,
+            testcase.test_ignored_signal_number: signal.SIG_IGN,
+            }
+
+
+def get_blocked_signals(pid):
+    """ Get the signals blocked in process `pid`.
+
+        :param pid: The process ID.
+        :return: A `set` of the signal numbers blocked in the main thread
+            of the process, read from ‘/proc/PID/status’.
+        """
+    path = "/proc/{pid}/status".format(pid=pid)
+    with open(path) as infile:
+        for line in infile:
+            (name, __, value) = line.partition(":")
+            if name == "SigBlk":
+                mask = int(value, 16)
+                break
+    return {
+            signal_number for signal_number in range(1, 65)
+            if mask & (1 << (signal_number - 1))}
+
+
+def patch_interrupt_main_accepts_signal(testcase, value):
+    """ Patch `interrupt_main_accepts_signal` for the `testcase`.
+
+        :param testcase: The `unittest.TestCase` instance to patch.
+        :param value: The fake value.
+        :return: ``None``.
+
+        Also restore the ``SIGINT`` handler after the test.
+        """
+    testcase.addCleanup(
+            signal.signal, signal.SIGINT, signal.getsignal(signal.SIGINT))
+    patcher = unittest.mock.patch.object(
+            daemon.signals, "interrupt_main_accepts_signal", new=value)
+    patcher.start()
+    testcase.addCleanup(patcher.stop)
+
+
+class SignalDispatcher_BaseTestCase(scaffold.TestCase):
+    """ Base class for SignalDispatcher test case classes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        setup_signal_fixtures(self)
+        self.test_instance = daemon.signals.SignalDispatcher(
+                self.test_signal_handler_map)
+        self.addCleanup(self.test_instance.stop, timeout=5)
+
+
+class SignalDispatcher_TestCase(SignalDispatcher_BaseTestCase):
+    """ Test cases for SignalDispatcher class. """
+
+    def test_has_dispatched_signal_numbers(self):
+        """ Should dispatch only the signals with callable handlers. """
+        instance = self.test_instance
+        expected_signal_numbers = {self.test_signal_number}
+        self.assertEqual(expected_signal_numbers, instance.signal_numbers)
+
+    def test_is_not_running_initially(self):
+        """ Should not be running before `start`. """
+        instance = self.test_instance
+        self.assertFalse(instance.is_running)
+
+    def test_stop_does_nothing_if_not_started(self):
+        """ Should do nothing on `stop` if not started. """
+        instance = self.test_instance
+        instance.stop()
+        self.assertFalse(instance.is_running)
+
+
+class SignalDispatcher_start_TestCase(SignalDispatcher_BaseTestCase):
+    """ Test cases for SignalDispatcher.start method. """
+
+    def test_sets_signal_handlers(self):
+        """ Should set the handler for each signal. """
+        instance = self.test_instance
+        instance.start()
+        self.assertEqual(
+                instance._handle_in_main_thread,
+                signal.getsignal(self.test_signal_number))
+        self.assertEqual(
+                signal.SIG_IGN,
+                signal.getsignal(self.test_ignored_signal_number))
+
+    def test_blocks_dispatched_signals(self):
+        """ Should block the dispatched signals in the calling thread. """
+        instance = self.test_instance
+        instance.start()
+        blocked_signals = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+        self.assertIn(self.test_signal_number, blocked_signals)
+        self.assertNotIn(self.test_ignored_signal_number, blocked_signals)
+
+    def test_starts_dispatcher_thread(self):
+        """ Should start the dispatcher thread. """
+        instance = self.test_instance
+        instance.start()
+        self.assertTrue(instance.is_running)
+        self.assertEqual(
+                daemon.signals.SignalDispatcher.thread_name,
+                instance._thread.name)
+
+    def test_starts_no_thread_if_no_dispatched_signals(self):
+        """ Should start no thread if no signals have a handler. """
+        instance = daemon.signals.SignalDispatcher({
+                self.test_ignored_signal_number: signal.SIG_IGN})
+        instance.start()
+        self.assertFalse(instance.is_running)
+        blocked_signals = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+        self.assertNotIn(self.test_ignored_signal_number, blocked_signals)
+
+
+class SignalDispatcher_stop_TestCase(SignalDispatcher_BaseTestCase):
+    """ Test cases for SignalDispatcher.stop method. """
+
+    def test_stops_dispatcher_thread(self):
+        """ Should stop the dispatcher thread. """
+        instance = self.test_instance
+        instance.start()
+        instance.stop(timeout=5)
+        self.assertFalse(instance.is_running)
+
+    def test_unblocks_dispatched_signals(self):
+        """ Should unblock the dispatched signals in the calling thread. """
+        instance = self.test_instance
+        instance.start()
+        instance.stop(timeout=5)
+        blocked_signals = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+        self.assertNotIn(self.test_signal_number, blocked_signals)
+
+    def test_does_not_dispatch_wake_signal(self):
+        """ Should not call the handler for the signal waking the thread. """
+        instance = self.test_instance
+        instance.start()
+        instance.stop(timeout=5)
+        self.assertEqual([], self.test_handler_calls)
+
+    def test_leaves_signals_blocked_before_start(self):
+        """ Should leave blocked the signals blocked before `start`. """
+        instance = self.test_instance
+        signal.pthread_sigmask(signal.SIG_BLOCK, [self.test_signal_number])
+        instance.start()
+        instance.stop(timeout=5)
+        blocked_signals = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+        self.assertIn(self.test_signal_number, blocked_signals)
+
+
+class SignalDispatcher_child_TestCase(SignalDispatcher_BaseTestCase):
+    """ Test cases for SignalDispatcher signal mask in child processes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        if not os.path.exists("/proc/self/status"):
+            self.skipTest("‘/proc/PID/status’ not available")
+
+    def test_signals_unblocked_unblocks_in_context(self):
+        """ Should unblock the signals only within the context. """
+        instance = self.test_instance
+        instance.start()
+        with instance.signals_unblocked():
+            blocked_signals = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+            self.assertNotIn(self.test_signal_number, blocked_signals)
+        blocked_signals = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+        self.assertIn(self.test_signal_number, blocked_signals)
+
+    def test_subprocess_started_unblocked_does_not_block(self):
+        """ Should start a subprocess that does not block the signals. """
+        instance = self.test_instance
+        instance.start()
+        with instance.signals_unblocked():
+            child = subprocess.Popen(["sleep", "60"])
+        self.addCleanup(child.wait)
+        self.addCleanup(child.kill)
+        self.assertNotIn(
+                self.test_signal_number, get_blocked_signals(child.pid))
+
+    def test_forked_child_does_not_block(self):
+        """ Should unblock the signals in a child forked with `os.fork`. """
+        instance = self.test_instance
+        instance.start()
+        (read_fd, write_fd) = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                blocked_signals = get_blocked_signals(os.getpid())
+                os.write(write_fd, str(
+                        self.test_signal_number in blocked_signals
+                        ).encode('ascii'))
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as infile:
+            result = infile.read()
+        os.waitpid(pid, 0)
+        self.assertEqual(b"False", result)
+        self.assertIn(
+                self.test_signal_number, get_blocked_signals(os.getpid()))
+
+
+class SignalDispatcher_dispatch_TestCase(SignalDispatcher_BaseTestCase):
+    """ Test cases for SignalDispatcher signal dispatch. """
+
+    def test_calls_handler_in_dispatcher_thread(self):
+        """ Should call the handler in the dispatcher thread. """
+        instance = self.test_instance
+        instance.start()
+        os.kill(os.getpid(), self.test_signal_number)
+        self.assertTrue(self.test_handler_called.wait(timeout=5))
+        expected_calls = [(
+                self.test_signal_number, None,
+                daemon.signals.SignalDispatcher.thread_name)]
+        self.assertEqual(expected_calls, self.test_handler_calls)
+
+    def test_calls_handler_while_main_thread_blocked(self):
+        """ Should call the handler while the main thread is blocked. """
+        instance = self.test_instance
+        instance.start()
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+
+        def write_when_handled():
+            self.test_handler_called.wait(timeout=5)
+            os.write(write_fd, b"x")
+
+        writer_thread = threading.Thread(target=write_when_handled)
+        writer_thread.start()
+        os.kill(os.getpid(), self.test_signal_number)
+        os.read(read_fd, 1)
+        writer_thread.join()
+        self.assertTrue(self.test_handler_called.is_set())
+
+    def test_raises_handler_exception_in_main_thread(self):
+        """ Should raise the handler's exception in the main thread. """
+        test_exception = SystemExit("Lorem ipsum")
+
+        def fake_raising_handler(signal_number, stack_frame):
+            raise test_exception
+
+        instance = daemon.signals.SignalDispatcher({
+                self.test_signal_number: fake_raising_handler})
+        self.addCleanup(instance.stop, timeout=5)
+        instance.start()
+
+        def wait_for_exception():
+            os.kill(os.getpid(), self.test_signal_number)
+            for __ in range(500):
+                time.sleep(0.01)
+
+        exc = self.assertRaises(SystemExit, wait_for_exception)
+        self.assertIs(test_exception, exc)
+
+
+class SignalDispatcher_interrupt_TestCase(SignalDispatcher_BaseTestCase):
+    """ Test cases for SignalDispatcher before Python 3.10. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+
+        self.test_interrupt_calls = []
+
+        def fake_interrupt_handler(signal_number, stack_frame):
+            self.test_interrupt_calls.append(signal_number)
+
+        self.fake_interrupt_handler = fake_interrupt_handler
+        patch_interrupt_main_accepts_signal(self, False)
+        signal.signal(signal.SIGINT, self.fake_interrupt_handler)
+
+    def test_sets_interrupt_handler(self):
+        """ Should set the ``SIGINT`` handler while dispatching. """
+        instance = self.test_instance
+        instance.start()
+        self.assertEqual(
+                instance._handle_interrupt_in_main_thread,
+                signal.getsignal(signal.SIGINT))
+
+    def test_restores_interrupt_handler_on_stop(self):
+        """ Should restore the previous ``SIGINT`` handler on `stop`. """
+        instance = self.test_instance
+        instance.start()
+        instance.stop(timeout=5)
+        self.assertEqual(
+                self.fake_interrupt_handler,
+                signal.getsignal(signal.SIGINT))
+
+    def test_calls_previous_handler_if_no_pending_exception(self):
+        """ Should call the previous ``SIGINT`` handler, if no exception
+            is pending. """
+        instance = self.test_instance
+        instance.start()
+        instance._handle_interrupt_in_main_thread(signal.SIGINT, None)
+        self.assertEqual([signal.SIGINT], self.test_interrupt_calls)
+
+    def test_raises_handler_exception_in_main_thread(self):
+        """ Should raise the handler's exception in the main thread. """
+        test_exception = SystemExit("Lorem ipsum")
+
+        def fake_raising_handler(signal_number, stack_frame):
+            raise test_exception
+
+        instance = daemon.signals.SignalDispatcher({
+                self.test_signal_number: fake_raising_handler})
+        self.addCleanup(instance.stop, timeout=5)
+        instance.start()
+
+        def wait_for_exception():
+            os.kill(os.getpid(), self.test_signal_number)
+            for __ in range(500):
+                time.sleep(0.01)
+
+        exc = self.assertRaises(SystemExit, wait_for_exception)
+        self.assertIs(test_exception, exc)
+        self.assertEqual([], self.test_interrupt_calls)
+        self.assertEqual({}, instance._pending_exceptions)
+
+
+class SignalDispatcher_handle_in_main_thread_TestCase(
+        SignalDispatcher_BaseTestCase):
+    """ Test cases for SignalDispatcher._handle_in_main_thread method. """
+
+    def test_calls_handler_if_no_pending_exception(self):
+        """ Should call the handler if no exception is pending. """
+        instance = self.test_instance
+        test_stack_frame = object()
+        instance._handle_in_main_thread(
+                self.test_signal_number, test_stack_frame)
+        self.assertEqual(
+                [(self.test_signal_number, test_stack_frame, "MainThread")],
+                self.test_handler_calls)
+
+    def test_raises_pending_exception(self):
+        """ Should raise the pending exception, once. """
+        instance = self.test_instance
+        test_exception = ValueError("Lorem ipsum")
+        instance._pending_exceptions[self.test_signal_number] = (
+                test_exception)
+        exc = self.assertRaises(
+                ValueError,
+                instance._handle_in_main_thread,
+                self.test_signal_number, None)
+        self.assertIs(test_exception, exc)
+        self.assertEqual([], self.test_handler_calls)
+        self.assertEqual({}, instance._pending_exceptions)
+
+
+@unittest.mock.patch.object(_thread, "interrupt_main")
+class interrupt_main_thread_TestCase(scaffold.TestCase):
+    """ Test cases for function `interrupt_main_thread`. """
+
+    def test_interrupts_main_thread_with_signal(
+            self, mock_func_interrupt_main):
+        """ Should simulate the signal in the main thread. """
+        test_signal_number = signal.SIGTERM
+        daemon.signals.interrupt_main_thread(test_signal_number)
+        mock_func_interrupt_main.assert_called_once_with(test_signal_number)
+
+    def test_interrupts_main_thread_without_signal_before_3_10(
+            self, mock_func_interrupt_main):
+        """ Should simulate ``SIGINT`` if a signal cannot be specified. """
+        patch_interrupt_main_accepts_signal(self, False)
+        test_signal_number = signal.SIGTERM
+        daemon.signals.interrupt_main_thread(test_signal_number)
+        mock_func_interrupt_main.assert_called_once_with()
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
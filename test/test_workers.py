@@ -0,0 +1,426 @@
+# test/test_workers.py
+# Part of ‘python-daemon’, an implementation of PEP 3143.
+#
+# This is free software, and you are welcome to redistribute it under
+# certain conditions; see the end of this file for copyright
+# information, grant of license, and disclaimer of warranty.
+
+""" Unit test for ‘workers’ module. """
+
+import io
+import os
+import signal
+import subprocess
+import sys
+import threading
+import unittest.mock
+
+import daemon.daemon
+import daemon.workers
+
+from . import scaffold
+
+
+class get_usable_cpu_count_TestCase(scaffold.TestCase):
+    """ Test cases for function `get_usable_cpu_count`. """
+
+    def test_returns_count_of_affinity_mask(self):
+        """ Should return the count of processors in the affinity mask. """
+        with unittest.mock.patch.object(
+                os, "sched_getaffinity", create=True,
+                return_value={0, 2, 5}):
+            result = daemon.workers.get_usable_cpu_count()
+        self.assertEqual(3, result)
+
+    def test_returns_cpu_count_if_no_affinity(self):
+        """ Should return the system processor count without affinity. """
+        with unittest.mock.patch.object(
+                os, "sched_getaffinity", create=True,
+                side_effect=AttributeError):
+            with unittest.mock.patch.object(
+                    os, "cpu_count", return_value=6):
+                result = daemon.workers.get_usable_cpu_count()
+        self.assertEqual(6, result)
+
+    def test_returns_one_if_count_unknown(self):
+        """ Should return 1 if the processor count is unknown. """
+        with unittest.mock.patch.object(
+                os, "sched_getaffinity", create=True,
+                side_effect=AttributeError):
+            with unittest.mock.patch.object(
+                    os, "cpu_count", return_value=None):
+                result = daemon.workers.get_usable_cpu_count()
+        self.assertEqual(1, result)
+
+
+class describe_exit_TestCase(scaffold.TestCaseWithScenarios):
+    """ Test cases for function `describe_exit`. """
+
+    scenarios = [
+            ('unknown', {
+                'result': None,
+                'expected_description': "ended",
+                }),
+            ('exited', {
+                'result': unittest.mock.Mock(
+                    si_code=os.CLD_EXITED, si_status=3),
+                'expected_description': "exited with status 3",
+                }),
+            ('killed', {
+                'result': unittest.mock.Mock(
+                    si_code=os.CLD_KILLED, si_status=signal.SIGKILL),
+                'expected_description': "was killed by signal SIGKILL",
+                }),
+            ('killed-unknown-signal', {
+                'result': unittest.mock.Mock(
+                    si_code=os.CLD_KILLED, si_status=1000),
+                'expected_description': "was killed by signal 1000",
+                }),
+            ]
+
+    def test_returns_expected_description(self):
+        """ Should return the expected description. """
+        result = daemon.workers.describe_exit(self.result)
+        self.assertEqual(self.expected_description, result)
+
+
+def setup_worker_pool_fixtures(testcase):
+    """ Set up common fixtures for `WorkerPool` test cases. """
+    testcase.mock_daemon_context = unittest.mock.MagicMock(
+            spec=daemon.daemon.DaemonContext)
+    testcase.mock_daemon_context.is_open = True
+    testcase.mock_daemon_context._signal_dispatcher = None
+    testcase.mock_daemon_context._ready_fd = None
+    testcase.mock_daemon_context._make_signal_handler_map.return_value = {
+            signal.SIGTERM: signal.SIG_DFL,
+            signal.SIGHUP: signal.SIG_DFL,
+            }
+    testcase.mock_target = unittest.mock.MagicMock()
+    testcase.test_instance = daemon.workers.WorkerPool(
+            testcase.mock_daemon_context, testcase.mock_target, count=2)
+
+
+class WorkerPool_TestCase(scaffold.TestCase):
+    """ Test cases for WorkerPool class. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_worker_pool_fixtures(self)
+
+    def test_has_specified_count(self):
+        """ Should have specified `count`. """
+        instance = self.test_instance
+        self.assertEqual(2, instance.count)
+
+    @unittest.mock.patch.object(
+            daemon.workers, "get_usable_cpu_count", return_value=7)
+    def test_has_usable_cpu_count_by_default(
+            self, mock_func_get_usable_cpu_count):
+        """ Should have the usable processor count by default. """
+        instance = daemon.workers.WorkerPool(
+                self.mock_daemon_context, self.mock_target)
+        self.assertEqual(7, instance.count)
+
+    def test_has_gc_freeze_disabled_by_default(self):
+        """ Should not freeze the garbage collector's heap by default. """
+        instance = self.test_instance
+        self.assertFalse(instance.gc_freeze)
+        self.assertFalse(instance.gc_freeze_collect)
+
+    def test_has_no_workers_initially(self):
+        """ Should have no workers initially. """
+        instance = self.test_instance
+        self.assertEqual({}, dict(instance.workers))
+        self.assertFalse(instance.is_stopping)
+
+    def test_run_raises_error_if_not_open(self):
+        """ Should raise DaemonError if the daemon context is not open. """
+        instance = self.test_instance
+        self.mock_daemon_context.is_open = False
+        self.assertRaises(daemon.daemon.DaemonError, instance.run)
+
+    @unittest.mock.patch.object(daemon.workers, "get_memory_usage")
+    def test_memory_usage_returns_usage_by_index(
+            self, mock_func_get_memory_usage):
+        """ Should return the memory usage of each worker, by index. """
+        instance = self.test_instance
+        instance._workers = {2468: 0, 1357: 1}
+        mock_func_get_memory_usage.side_effect = (
+                lambda pid: {'pss': pid})
+        result = instance.memory_usage()
+        self.assertEqual({0: {'pss': 2468}, 1: {'pss': 1357}}, result)
+
+
+class WorkerPool_start_worker_TestCase(scaffold.TestCase):
+    """ Test cases for WorkerPool._start_worker method, in the master. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_worker_pool_fixtures(self)
+
+        self.test_pid = 2468
+        self.mock_module_os = unittest.mock.MagicMock()
+        func_patcher_fork = unittest.mock.patch.object(
+                os, "fork", return_value=self.test_pid)
+        self.mock_module_os.attach_mock(func_patcher_fork.start(), "fork")
+        self.addCleanup(func_patcher_fork.stop)
+        func_patcher_freeze = unittest.mock.patch.object(
+                daemon.workers, "freeze_gc_heap")
+        self.mock_module_os.attach_mock(
+                func_patcher_freeze.start(), "freeze_gc_heap")
+        self.addCleanup(func_patcher_freeze.stop)
+
+    def test_records_worker(self):
+        """ Should record the new worker by process ID. """
+        instance = self.test_instance
+        instance._start_worker(1)
+        self.assertEqual({self.test_pid: 1}, dict(instance.workers))
+
+    def test_does_not_freeze_gc_heap(self):
+        """ Should not freeze the garbage collector's heap again. """
+        instance = self.test_instance
+        instance.gc_freeze = True
+        instance._start_worker(1)
+        self.assertEqual(
+                [unittest.mock.call.fork()],
+                self.mock_module_os.mock_calls)
+
+
+class WorkerPool_prepare_worker_TestCase(scaffold.TestCase):
+    """ Test cases for WorkerPool._prepare_worker method, in the worker. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_worker_pool_fixtures(self)
+
+        func_patcher_set_signal_handlers = unittest.mock.patch.object(
+                daemon.workers, "set_signal_handlers")
+        func_patcher_set_signal_handlers.start()
+        self.addCleanup(func_patcher_set_signal_handlers.stop)
+
+    def test_closes_ready_pipe(self):
+        """ Should close the pipe to the original process, if any. """
+        instance = self.test_instance
+        (read_fd, write_fd) = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.mock_daemon_context._ready_fd = write_fd
+        instance._prepare_worker()
+        self.assertIs(self.mock_daemon_context._ready_fd, None)
+        self.assertEqual(b"", os.read(read_fd, 1))
+
+    def test_discards_service_notifier(self):
+        """ Should not notify the service manager from the worker. """
+        instance = self.test_instance
+        instance._prepare_worker()
+        self.assertIs(self.mock_daemon_context._service_notifier, None)
+        self.assertIs(self.mock_daemon_context._watchdog_heartbeat, None)
+
+
+class WorkerPool_send_signal_TestCase(scaffold.TestCase):
+    """ Test cases for WorkerPool.send_signal method. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_worker_pool_fixtures(self)
+
+        self.test_instance._workers = {2468: 0, 1357: 1}
+        self.test_signal_number = signal.SIGHUP
+
+        func_patcher_os_kill = unittest.mock.patch.object(os, "kill")
+        self.mock_func_os_kill = func_patcher_os_kill.start()
+        self.addCleanup(func_patcher_os_kill.stop)
+        func_patcher_pidfd_send_signal = unittest.mock.patch.object(
+                signal, "pidfd_send_signal", create=True)
+        self.mock_func_pidfd_send_signal = (
+                func_patcher_pidfd_send_signal.start())
+        self.addCleanup(func_patcher_pidfd_send_signal.stop)
+
+    def test_sends_signal_to_each_worker_by_pid(self):
+        """ Should send the signal to each worker, by process ID. """
+        instance = self.test_instance
+        instance.send_signal(self.test_signal_number)
+        self.mock_func_os_kill.assert_has_calls([
+                unittest.mock.call(2468, self.test_signal_number),
+                unittest.mock.call(1357, self.test_signal_number),
+                ], any_order=True)
+
+    def test_sends_signal_to_each_worker_by_pidfd(self):
+        """ Should send the signal by process file descriptor, if any. """
+        instance = self.test_instance
+        instance._pidfds = {2468: 13, 1357: 17}
+        instance.send_signal(self.test_signal_number)
+        self.mock_func_pidfd_send_signal.assert_has_calls([
+                unittest.mock.call(13, self.test_signal_number),
+                unittest.mock.call(17, self.test_signal_number),
+                ], any_order=True)
+        self.assertFalse(self.mock_func_os_kill.called)
+
+    def test_ignores_ended_worker(self):
+        """ Should ignore a worker that has already ended. """
+        instance = self.test_instance
+        self.mock_func_os_kill.side_effect = [ProcessLookupError(), None]
+        instance.send_signal(self.test_signal_number)
+        self.assertEqual(2, self.mock_func_os_kill.call_count)
+
+    def test_stop_sends_signal_and_stops_respawning(self):
+        """ Should send the signal, and start no more workers, on stop. """
+        instance = self.test_instance
+        instance._respawn_times = {0: 1000.0}
+        instance.stop(signal.SIGINT)
+        self.assertTrue(instance.is_stopping)
+        self.assertEqual({}, instance._respawn_times)
+        self.mock_func_os_kill.assert_any_call(2468, signal.SIGINT)
+
+    def test_reload_signal_reloads_then_sends_signal(self):
+        """ Should reload the daemon, then send the reload signal. """
+        instance = self.test_instance
+        self.mock_daemon_context.reload.side_effect = (
+                lambda *args: self.assertFalse(self.mock_func_os_kill.called))
+        instance._handle_reload_signal(self.test_signal_number, None)
+        self.mock_daemon_context.reload.assert_called_once_with(
+                self.test_signal_number, None)
+        self.mock_func_os_kill.assert_any_call(2468, self.test_signal_number)
+
+
+class WorkerPool_run_TestCase(scaffold.TestCase):
+    """ Test cases for WorkerPool.run method, with real processes. """
+
+    def setUp(self):
+        """ Set up test fixtures. """
+        super().setUp()
+        setup_worker_pool_fixtures(self)
+
+        (self.test_read_fd, self.test_write_fd) = os.pipe()
+        self.addCleanup(os.close, self.test_read_fd)
+        self.addCleanup(os.close, self.test_write_fd)
+
+        self.fake_stderr = io.StringIO()
+        func_patcher_stderr = unittest.mock.patch.object(
+                sys, "stderr", new=self.fake_stderr)
+        func_patcher_stderr.start()
+        self.addCleanup(func_patcher_stderr.stop)
+
+        self.test_previous_handler = signal.getsignal(signal.SIGTERM)
+
+    def make_fake_target(self, then_wait):
+        """ Make a target that reports its index, then waits or returns. """
+        def fake_target(index):
+            os.write(self.test_write_fd, bytes([index]))
+            if then_wait:
+                signal.pause()
+        return fake_target
+
+    def run_until_started(self, instance, count):
+        """ Run `instance` until `count` workers have started.
+
+            :return: The `list` of indexes of the started workers.
+            """
+        started = []
+
+        def stop_when_started():
+            while len(started) < count:
+                started.extend(os.read(self.test_read_fd, count))
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        thread = threading.Thread(target=stop_when_started, daemon=True)
+        thread.start()
+        instance.run()
+        thread.join(timeout=5)
+        return started
+
+    def test_starts_count_workers_until_stopped(self):
+        """ Should start `count` workers, then end when stopped. """
+        instance = self.test_instance
+        instance.target = self.make_fake_target(then_wait=True)
+        started = self.run_until_started(instance, count=2)
+        self.assertEqual([0, 1], sorted(started))
+        self.assertEqual({}, dict(instance.workers))
+        self.assertTrue(instance.is_stopping)
+        self.assertEqual(
+                self.test_previous_handler, signal.getsignal(signal.SIGTERM))
+
+    def test_replaces_ended_worker(self):
+        """ Should replace a worker that ends. """
+        instance = self.test_instance
+        instance.count = 1
+        instance.respawn_delay = 0
+        instance.target = self.make_fake_target(then_wait=False)
+        started = self.run_until_started(instance, count=3)
+        self.assertEqual([0, 0, 0], started[:3])
+        self.assertIn(
+                "Worker 0 (PID", self.fake_stderr.getvalue())
+        self.assertIn(
+                "exited with status 0; replacing it",
+                self.fake_stderr.getvalue())
+
+    @unittest.mock.patch.object(daemon.workers, "freeze_gc_heap")
+    def test_omits_gc_freeze_by_default(self, mock_func_freeze_gc_heap):
+        """ Should not freeze the garbage collector's heap by default. """
+        instance = self.test_instance
+        instance.target = self.make_fake_target(then_wait=True)
+        self.run_until_started(instance, count=2)
+        self.assertFalse(mock_func_freeze_gc_heap.called)
+
+    @unittest.mock.patch.object(daemon.workers, "freeze_gc_heap")
+    def test_freezes_gc_heap_once(self, mock_func_freeze_gc_heap):
+        """ Should freeze the garbage collector's heap once, not on respawn.
+            """
+        instance = self.test_instance
+        instance.count = 1
+        instance.respawn_delay = 0
+        instance.gc_freeze = True
+        test_collect = object()
+        instance.gc_freeze_collect = test_collect
+        instance.target = self.make_fake_target(then_wait=False)
+        started = self.run_until_started(instance, count=3)
+        self.assertEqual([0, 0, 0], started[:3])
+        mock_func_freeze_gc_heap.assert_called_once_with(
+                collect=test_collect)
+
+    @unittest.mock.patch.object(
+            daemon.workers, "_is_pidfd_supported", return_value=False)
+    def test_replaces_ended_worker_without_pidfd(
+            self, mock_func_is_pidfd_supported):
+        """ Should replace a worker that ends, without pidfd support. """
+        instance = self.test_instance
+        instance.count = 1
+        instance.respawn_delay = 0
+        instance.target = self.make_fake_target(then_wait=False)
+        started = self.run_until_started(instance, count=3)
+        self.assertEqual([0, 0, 0], started[:3])
+        self.assertIn(
+                "exited with status 0; replacing it",
+                self.fake_stderr.getvalue())
+
+    @unittest.mock.patch.object(
+            daemon.workers, "_is_pidfd_supported", return_value=False)
+    def test_does_not_reap_other_child_without_pidfd(
+            self, mock_func_is_pidfd_supported):
+        """ Should leave other child processes for the program to reap. """
+        instance = self.test_instance
+        instance.target = self.make_fake_target(then_wait=True)
+        other_child = subprocess.Popen(["sh", "-c", "exit 7"])
+        self.addCleanup(other_child.wait)
+        # Wait until the other child has ended, without reaping it.
+        os.waitid(os.P_PID, other_child.pid, os.WEXITED | os.WNOWAIT)
+        self.run_until_started(instance, count=2)
+        self.assertEqual(7, other_child.wait(timeout=5))
+
+
+# Copyright © 2026 Ben Finney <ben+python@benfinney.id.au>
+#
+# This is free software: you may copy, modify, and/or distribute this work
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of that license or any later version.
+# No warranty expressed or implied. See the file ‘LICENSE.GPL-3’ for details.
+
+
+# Local variables:
+# coding: utf-8
+# mode: python
+# End:
+# vim: fileencoding=utf-8 filetype=python :
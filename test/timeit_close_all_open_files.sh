@@ -0,0 +1,38 @@
+#! /bin/sh
+# Compare timings for ‘daemon.daemon.close_all_open_files’ with and without
+# the ‘close_range(2)’ system call, at a high file descriptor limit.
+#
+# Both runs are told that ‘os.closerange’ does not use ‘close_range(2)’, so
+# that the first calls the system call through the C library. The second
+# falls back to ‘os.closerange’, which attempts ‘close’ on each file
+# descriptor in turn unless the Python build itself uses ‘close_range(2)’;
+# from Python 3.10 it may, and that cannot be switched off, so there the
+# two timings can be the same.
+
+fake_maxfd=1048576
+# fake_maxfd=2048
+
+for close_range in "daemon.daemon._get_close_range_function()" "None" ; do
+printf "Timings for ‘close_all_open_files’ (maxfd %d) with ‘%s’:\n" \
+    "${fake_maxfd}" "${close_range}"
+python3 -m timeit --setup "
+import daemon.daemon
+import unittest.mock
+unittest.mock.patch(
+    'daemon.daemon._total_file_descriptor_range',
+    new=range(0, ${fake_maxfd}),
+).start()
+unittest.mock.patch(
+    'daemon.daemon._get_close_range_function', return_value=${close_range},
+).start()
+unittest.mock.patch(
+    'daemon.daemon.os_closerange_uses_close_range', new=False,
+).start()
+unittest.mock.patch(
+    'daemon.daemon._get_open_file_descriptors', return_value=None,
+).start()
+exclude_fds = {0, 1, 2}
+" "
+daemon.daemon.close_all_open_files(exclude_fds)
+"
+done